@@ -0,0 +1,139 @@
+# File: benchmarks/gutter_bench.py
+"""
+Line-number gutter cost while scrolling a large NovaLang document
+
+Loads a generated program into the editor and scrolls it a few lines per
+frame, timing a full repaint of the gutter and whole scroll frames (gutter
+and text), with the GutterRenderer against the previous
+paint that measured the font and laid out every number on each paint
+(reproduced below as legacy_paint). The frame budget is 16.7 ms (60 Hz).
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/gutter_bench.py
+        [--lines 1000000] [--frames 200]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ide'))
+
+from PyQt6.QtCore import Qt  # noqa: E402
+from PyQt6.QtGui import QColor, QPainter  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from editor import CodeEditorWithLineNumbers as CodeEditor  # noqa: E402
+from program_gen import generate_program  # noqa: E402
+
+FRAME_BUDGET_MS = 1000 / 60
+
+
+def legacy_paint(editor, event):
+    """The gutter paint this benchmark measures against"""
+    painter = QPainter(editor.line_number_area)
+    painter.fillRect(event.rect(), editor.line_number_bg_color)
+
+    block = editor.firstVisibleBlock()
+    block_number = block.blockNumber()
+    top = editor.blockBoundingGeometry(block).translated(
+        editor.contentOffset()
+    ).top()
+    bottom = top + editor.blockBoundingRect(block).height()
+
+    while block.isValid() and top <= event.rect().bottom():
+        if block.isVisible() and bottom >= event.rect().top():
+            number = str(block_number + 1)
+            if block_number + 1 in editor.error_lines:
+                painter.fillRect(0, int(top), editor.line_number_area.width(),
+                                 editor.fontMetrics().height(),
+                                 QColor(220, 50, 47))
+                painter.setPen(QColor(255, 255, 255))
+                number = f"✗ {number}"
+            else:
+                painter.setPen(editor.line_number_fg_color)
+            painter.drawText(0, int(top), editor.line_number_area.width() - 8,
+                             editor.fontMetrics().height(),
+                             Qt.AlignmentFlag.AlignRight, number)
+        block = block.next()
+        top = bottom
+        bottom = top + editor.blockBoundingRect(block).height()
+        block_number += 1
+
+
+def legacy_width(editor):
+    digits = len(str(max(1, editor.blockCount())))
+    return 15 + editor.fontMetrics().horizontalAdvance('9') * digits
+
+
+def repaint_times(editor, count=200):
+    times = []
+    for _ in range(count):
+        t = time.perf_counter()
+        editor.line_number_area.repaint()
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times)
+
+
+def scroll_frames(app, editor, frames, step):
+    bar = editor.verticalScrollBar()
+    bar.setValue(bar.maximum() // 2)
+    app.processEvents()
+    times = []
+    for _ in range(frames):
+        t = time.perf_counter()
+        bar.setValue(bar.value() + step)
+        app.processEvents()
+        times.append((time.perf_counter() - t) * 1000)
+    times.sort()
+    return statistics.median(times), times[int(len(times) * 0.95)]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--lines", type=int, default=1_000_000)
+    ap.add_argument("--frames", type=int, default=200)
+    ap.add_argument("--step", type=int, default=3,
+                    help="lines scrolled per frame")
+    args = ap.parse_args()
+
+    app = QApplication(sys.argv)
+    editor = CodeEditor()
+    editor.resize(1200, 900)
+    editor.show()
+    # Loaded the way the IDE opens a large file: viewport highlighting only
+    editor.begin_chunked_load()
+    editor.append_chunk(generate_program(args.lines))
+    editor.end_chunked_load()
+    # Error markers around where the frames scroll, as after a failed compile
+    middle = editor.blockCount() // 2
+    editor.highlight_error_lines(range(middle, middle + 2000, 7), scroll=False)
+    app.processEvents()
+    print(f"{editor.blockCount()} lines")
+
+    t = time.perf_counter()
+    for _ in range(1000):
+        legacy_width(editor)
+    legacy_ms = (time.perf_counter() - t)
+    t = time.perf_counter()
+    for _ in range(1000):
+        editor.line_number_area_width()
+    print(f"width: legacy {legacy_ms * 1000:.2f} us, "
+          f"cached {(time.perf_counter() - t) * 1000:.2f} us")
+
+    new_paint = CodeEditor.line_number_area_paint_event
+    for name, paint in (("legacy", legacy_paint), ("renderer", new_paint)):
+        CodeEditor.line_number_area_paint_event = paint
+        repaint = repaint_times(editor)
+        p50, p95 = scroll_frames(app, editor, args.frames, args.step)
+        flag = "" if p95 <= FRAME_BUDGET_MS else "  over budget"
+        print(f"{name:>8}: gutter repaint {repaint:5.2f} ms, scroll frame "
+              f"p50 {p50:5.2f} ms, p95 {p95:5.2f} ms{flag}")
+    CodeEditor.line_number_area_paint_event = new_paint
+    editor.stop_live_analysis()
+
+
+if __name__ == "__main__":
+    main()
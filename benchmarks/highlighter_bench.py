@@ -0,0 +1,178 @@
+# File: benchmarks/highlighter_bench.py
+"""
+Per-keystroke and theme-switch highlighting cost on a large NovaLang document
+
+Compares the single-pass NovaLangHighlighter with the previous rule-list
+highlighter (one QRegularExpression per keyword/operator, reproduced
+below as LegacyHighlighter).
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/highlighter_bench.py [lines]
+"""
+
+import gc
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ide'))
+
+from PyQt6.QtCore import QRegularExpression
+from PyQt6.QtGui import (
+    QBrush, QColor, QFont, QSyntaxHighlighter,
+    QTextCharFormat, QTextCursor, QTextDocument
+)
+from PyQt6.QtWidgets import QApplication, QPlainTextDocumentLayout
+
+from syntax_highlighter import NovaLangHighlighter
+from themes import get_theme
+
+
+class LegacyHighlighter(QSyntaxHighlighter):
+    """The rule-list highlighter this benchmark measures against"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.set_theme_colors(get_theme("dark")['tokens'])
+
+    def set_theme_colors(self, theme_colors):
+        colors = {k: QColor(v) for k, v in theme_colors.items()}
+        self.highlighting_rules = []
+
+        keyword_format = QTextCharFormat()
+        keyword_format.setForeground(QBrush(colors["keyword"]))
+        keyword_format.setFontWeight(QFont.Weight.Bold)
+        for keyword in ['start', 'end', 'show', 'take', 'when', 'elsewhen',
+                        'else', 'loop', 'break', 'func', 'back', 'num',
+                        'text', 'flag', 'true', 'false', 'to']:
+            self.highlighting_rules.append(
+                (QRegularExpression(r"\b" + keyword + r"\b"), keyword_format)
+            )
+
+        for pattern, key in ((r"\b[0-9]+\b", "number"), (r'"[^"]*"', "string"),
+                             (r'#.*', "comment")):
+            fmt = QTextCharFormat()
+            fmt.setForeground(QBrush(colors[key]))
+            self.highlighting_rules.append((QRegularExpression(pattern), fmt))
+
+        operator_format = QTextCharFormat()
+        operator_format.setForeground(QBrush(colors["operator"]))
+        for op in [r'\+', r'-', r'\*', r'/', r'=', r'==',
+                   r'!=', r'>', r'<', r'>=', r'<=']:
+            self.highlighting_rules.append((QRegularExpression(op), operator_format))
+
+        function_format = QTextCharFormat()
+        function_format.setForeground(QBrush(colors["function"]))
+        self.highlighting_rules.append(
+            (QRegularExpression(r'\b[A-Za-z_][A-Za-z0-9_]*\s*(?=\()'), function_format)
+        )
+
+    def highlightBlock(self, text):
+        for pattern, fmt in self.highlighting_rules:
+            match_iterator = pattern.globalMatch(text)
+            while match_iterator.hasNext():
+                match = match_iterator.next()
+                self.setFormat(match.capturedStart(), match.capturedLength(), fmt)
+
+
+def generate_program(lines):
+    """Build a NovaLang program of roughly the requested number of lines"""
+    body = [
+        'num count{i} = {i} * 2 + 7',
+        'text label{i} = "item # {i} when loop"',
+        'when count{i} > 5 {{',
+        '    show label{i} + " done"  # trailing comment',
+        '}} elsewhen count{i} == 5 {{',
+        '    show multiply(count{i}, 3)',
+        '}}',
+        'loop k{i} = 1 to 10 {{ show k{i} }}',
+    ]
+    out = ['start', 'func multiply(x, y) {', '    back x * y', '}']
+    i = 0
+    while len(out) < lines - 1:
+        out.extend(line.format(i=i) for line in body)
+        i += 1
+    out.append('end')
+    return "\n".join(out[:lines - 1] + ['end'])
+
+
+def timed(highlighter_cls):
+    """Subclass that accumulates the time spent inside highlightBlock"""
+    class Timed(highlighter_cls):
+        spent = 0.0
+
+        def highlightBlock(self, text):
+            t0 = time.perf_counter()
+            super().highlightBlock(text)
+            Timed.spent += time.perf_counter() - t0
+    return Timed
+
+
+def measure(highlighter_cls, source, keystrokes):
+    gc.collect()
+    highlighter_cls = timed(highlighter_cls)
+    doc = QTextDocument()
+    # Same layout as QPlainTextEdit; without one Qt emits no contentsChange
+    doc.setDocumentLayout(QPlainTextDocumentLayout(doc))
+    doc.setPlainText(source)
+
+    t0 = time.perf_counter()
+    highlighter = highlighter_cls(doc)
+    highlighter.rehighlight()
+    full = time.perf_counter() - t0
+
+    # QSyntaxHighlighter reacts to contentsChange synchronously, so the
+    # time spent in the edit call includes the highlighting it triggers.
+    # Alternate typing and backspacing so the line keeps a normal length.
+    block = doc.findBlockByNumber(doc.blockCount() // 2)
+    cursor = QTextCursor(block)
+    cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+    samples = []
+    highlighter_cls.spent = 0.0
+    for n in range(keystrokes):
+        t0 = time.perf_counter()
+        if n % 2 == 0:
+            cursor.insertText("x")
+        else:
+            cursor.deletePreviousChar()
+        samples.append(time.perf_counter() - t0)
+    samples.sort()
+    highlight_per_key = highlighter_cls.spent / keystrokes
+
+    t0 = time.perf_counter()
+    highlighter.set_theme_colors(get_theme("light")['tokens'])
+    highlighter.rehighlight()
+    theme = time.perf_counter() - t0
+
+    result = {
+        'full_ms': full * 1000.0,
+        'theme_ms': theme * 1000.0,
+        'keystroke_median_us': statistics.median(samples) * 1e6,
+        'keystroke_p95_us': samples[int(len(samples) * 0.95) - 1] * 1e6,
+        'highlight_per_key_us': highlight_per_key * 1e6,
+    }
+    del highlighter, cursor, block, doc
+    return result
+
+
+def main():
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    keystrokes = 500
+    app = QApplication(sys.argv)  # noqa: F841 - required for text layout
+    source = generate_program(lines)
+
+    print(f"document: {lines} lines, {len(source)} chars, {keystrokes} keystrokes")
+    print("key = whole edit call incl. Qt layout; hl = time inside highlightBlock")
+    print(f"{'highlighter':<20}{'full (ms)':>11}{'key p50 (us)':>14}"
+          f"{'key p95 (us)':>14}{'hl/key (us)':>13}{'theme (ms)':>12}")
+    for name, cls in (("legacy rule list", LegacyHighlighter),
+                      ("single pass", NovaLangHighlighter)):
+        r = measure(cls, source, keystrokes)
+        print(f"{name:<20}{r['full_ms']:>11.1f}{r['keystroke_median_us']:>14.1f}"
+              f"{r['keystroke_p95_us']:>14.1f}{r['highlight_per_key_us']:>13.1f}"
+              f"{r['theme_ms']:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# File: benchmarks/incremental_bench.py
+"""
+Whole-program vs incremental analysis after a one-line edit
+
+Usage:
+    python benchmarks/incremental_bench.py [statements]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from nova_lang import analyze
+from nova_lang.incremental import IncrementalAnalyzer
+
+
+def generate_program(statements, funcs=500):
+    lines = ["start"]
+    for f in range(funcs):
+        lines += [f"func f{f}(a, b) {{", "    num t = a * b + 1", "    back t", "}"]
+    for i in range(statements):
+        if i % 3:
+            lines.append(f"num v{i} = f{i % funcs}({i}, 2) + 3")
+        else:
+            lines.append(f'show "line {i}"')
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - t) * 1000
+
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    source = generate_program(statements)
+    middle = statements // 6 * 3 + 1
+    edits = [
+        ("rename a variable", source.replace(f"num v{middle} =", f"num w{middle} =")),
+        ("edit a function body", source.replace("func f7(a, b) {\n    num t = a * b + 1",
+                                                "func f7(a, b) {\n    num t = a * b + 2")),
+        ("change a signature", source.replace("func f7(a, b)", "func f7(a, b, c)")),
+    ]
+
+    print(f"{source.count(chr(10))} lines")
+    _, full_ms = timed(analyze, source)
+    print(f"{'whole program':<24}{full_ms:>10.1f} ms")
+
+    inc = IncrementalAnalyzer()
+    _, cold_ms = timed(inc.analyze, source)
+    print(f"{'incremental, cold':<24}{cold_ms:>10.1f} ms  units={inc.stats['units']}")
+    for label, edited in edits:
+        _, ms = timed(inc.analyze, edited)
+        print(f"{label:<24}{ms:>10.1f} ms  parsed={inc.stats['parsed']} "
+              f"checked={inc.stats['checked']}")
+        inc.analyze(source)
+
+
+if __name__ == "__main__":
+    main()
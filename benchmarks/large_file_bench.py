@@ -0,0 +1,90 @@
+# File: benchmarks/large_file_bench.py
+"""
+Open and scroll times of large NovaLang files in the IDE
+
+Generates a program (see program_gen.py), then measures how the IDE
+opens it through load_file(): read-only through the memory-mapped view at
+or above MAPPED_FILE_BYTES, in chunks below that, or as a plain
+setPlainText with full highlighting for comparison (--plain, slow on big
+files). Open time runs until the first paint; for a chunked load, until
+the last chunk is in. Scroll frames page through the file a few lines at
+a time, until the repaint is done.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/large_file_bench.py
+        [--lines 8000000] [--plain]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'ide'))
+
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from program_gen import generate_program  # noqa: E402
+
+
+def scroll_frames(bar, frames=100, step=3):
+    times = []
+    for _ in range(frames):
+        t = time.perf_counter()
+        bar.setValue(bar.value() + step)
+        QApplication.processEvents()
+        times.append((time.perf_counter() - t) * 1000)
+    return statistics.median(times), max(times)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--lines", type=int, default=8_000_000)
+    ap.add_argument("--plain", action="store_true",
+                    help="also time setPlainText with full highlighting")
+    args = ap.parse_args()
+
+    app = QApplication(sys.argv)
+    import novalang_ide
+
+    ide = novalang_ide.NovaLangIDE()
+    ide.resize(1400, 800)
+    ide.show()
+    app.processEvents()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "large.nova")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(generate_program(args.lines))
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        print(f"{args.lines} lines, {size_mb:.1f} MB")
+
+        t = time.perf_counter()
+        ide.load_file(path)
+        while ide.loader is not None:
+            app.processEvents()
+        view = ide.active_view()
+        view.viewport().repaint()
+        mode = "mapped" if ide.is_mapped() else "chunked"
+        print(f"{mode:>8} open: {(time.perf_counter() - t) * 1000:8.1f} ms")
+        p50, worst = scroll_frames(view.verticalScrollBar())
+        print(f"{mode:>8} scroll frame: p50 {p50:.2f} ms, max {worst:.2f} ms")
+
+        if args.plain:
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            ide.new_file()
+            t = time.perf_counter()
+            ide.editor.set_text(text)
+            ide.editor.viewport().repaint()
+            print(f"   plain open: {(time.perf_counter() - t) * 1000:8.1f} ms")
+
+        # Closes the mapped file before its folder goes
+        ide.close()
+
+
+if __name__ == "__main__":
+    main()
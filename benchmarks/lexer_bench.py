@@ -0,0 +1,56 @@
+# File: benchmarks/lexer_bench.py
+"""
+Classic vs compact lexer in the C++ backend
+
+Lexes the same generated programs with --lexer=classic and
+--lexer=compact (--stop-after=lex) and compares lex time, the memory held
+by the tokens and the peak RSS of the process.
+
+Usage:
+    python benchmarks/lexer_bench.py [--sizes 100000,1000000] [--backend PATH]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from pipeline_bench import find_backend, generate, measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="100000,1000000",
+                        help="comma separated line counts")
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--repeat", type=int, default=3)
+    opt = parser.parse_args()
+
+    backend = opt.backend or find_backend()
+    if backend is None:
+        sys.exit("No backend found; build it or pass --backend")
+
+    print(f"{'lines':>9}{'lexer':>9}{'lex_ms':>10}{'token MiB':>11}"
+          f"{'bytes/token':>13}{'peak RSS':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in (int(s) for s in opt.sizes.split(",")):
+            path = os.path.join(tmp, f"gen_{lines}.nova")
+            generate(lines, path)
+            results = {}
+            for lexer in ("classic", "compact"):
+                command = [backend, f"--lexer={lexer}", "--stop-after=lex",
+                           "--time", path]
+                r = measure(lexer, command, lines, opt.repeat)
+                results[lexer] = r
+                rss = r["peak_rss_kb"] / 1024 if r["peak_rss_kb"] else 0
+                print(f"{lines:>9}{lexer:>9}{r['lex_ms']:>10.1f}"
+                      f"{r['token_bytes'] / 2**20:>11.1f}"
+                      f"{r['token_bytes'] / r['tokens']:>13.1f}"
+                      f"{rss:>8.1f} MiB")
+            old, new = results["classic"], results["compact"]
+            print(f"{'':>9}{'ratio':>9}{old['lex_ms'] / new['lex_ms']:>9.1f}x"
+                  f"{old['token_bytes'] / new['token_bytes']:>10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+# File: benchmarks/native_bench.py
+"""
+Native builds compared with the other execution modes
+
+Runs the vm_bench.py kernels three ways: on the backend VM (--run --time,
+at -O0 and -O2), as native executables built by python -m nova_lang.native,
+and optionally on the Python VM (--python, slow; use a small --scale).
+For the native mode the report splits a cold build (check, C generation
+and the C compiler, with an empty cache) from a warm start, where the
+cached executable is found and run without any compilation. Native run_ms
+is the wall time of the executable process, so it includes process start;
+the VM's run_ms covers execution only.
+
+Results are written as JSON so two commits can be diffed.
+
+Usage:
+    python benchmarks/native_bench.py [--scale 1.0] [--backend PATH]
+        [--python] [--repeat 3] [--out FILE]
+"""
+
+import argparse
+import json
+import os
+import platform
+import sys
+import tempfile
+
+from pipeline_bench import HERE, ROOT, find_backend, git_commit, run_once
+from vm_bench import KERNELS, build, run_python
+
+
+def native_command(path, cache_dir, opt_level):
+    return [sys.executable, "-m", "nova_lang.native", "--time",
+            "--cache-dir", cache_dir, "-O", str(opt_level), path]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--python", action="store_true")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=os.path.join(
+                    HERE, "results", "native_bench.json"),
+                    help="JSON report (default: "
+                         "benchmarks/results/native_bench.json)")
+    args = ap.parse_args()
+
+    sys.path.insert(0, ROOT)
+    from nova_lang.native import find_c_compiler
+
+    if find_c_compiler() is None:
+        sys.exit("No C compiler found; install one or set CC")
+    backend = args.backend or find_backend()
+
+    report = {
+        "commit": git_commit(),
+        "machine": platform.machine(),
+        "scale": args.scale,
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in KERNELS:
+            n, source = build(name, args.scale)
+            path = os.path.join(tmp, name + ".nova")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+            entry = {"iterations": n}
+
+            if backend is not None:
+                for level in (0, 2):
+                    command = [backend, f"-O{level}", "--run", "--time", path]
+                    best = min((run_once(command)[0]
+                                for _ in range(args.repeat)),
+                               key=lambda t: t["run_ms"])
+                    entry[f"backend_O{level}"] = {
+                        "run_ms": round(best["run_ms"], 3)
+                    }
+            if args.python:
+                best = min((run_python(path) for _ in range(args.repeat)),
+                           key=lambda t: t["run_ms"])
+                entry["python"] = {"run_ms": round(best["run_ms"], 3)}
+
+            # Every cold build gets an empty cache; the warm starts reuse
+            # the last one
+            colds = []
+            for i in range(args.repeat):
+                cache_dir = os.path.join(tmp, f"cache-{name}-{i}")
+                colds.append(run_once(native_command(path, cache_dir, 2))[0])
+            cold = min(colds, key=lambda t: t["total_ms"])
+            warm = min((run_once(native_command(path, cache_dir, 2))[0]
+                        for _ in range(args.repeat)),
+                       key=lambda t: t["total_ms"])
+            if not warm["cached"]:
+                raise RuntimeError(f"{name}: warm start was not cached")
+            entry["native"] = {
+                "build_ms": round(cold["check_ms"] + cold["codegen_ms"]
+                                  + cold["cc_ms"], 3),
+                "cc_ms": round(cold["cc_ms"], 3),
+                "run_ms": round(warm["run_ms"], 3),
+                "warm_total_ms": round(warm["total_ms"], 3),
+            }
+            report["results"][name] = entry
+            print(f"{name:>8} n={n:<10} " + "  ".join(
+                f"{label}: {entry[label]['run_ms']:.1f} ms"
+                for label in entry if label != "iterations"
+            ) + f"  (native build {entry['native']['build_ms']:.0f} ms)")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
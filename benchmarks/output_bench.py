@@ -0,0 +1,108 @@
+# File: benchmarks/output_bench.py
+"""
+Output panel cost of a program that prints a lot
+
+Feeds generated program output to the IDE's output panel in pipe-sized
+chunks, the way CompileRunner passes it on, and reports the total time,
+the longest stall of the event loop and the panel's line count. The
+OutputConsole (batched, bounded to its last lines) is compared with the
+previous panel, a QTextEdit that took every chunk as it came and was then
+rebuilt with setHtml from one <pre> of the whole output (reproduced as
+legacy_panel below; --legacy, minutes from 100k lines up).
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/output_bench.py
+        [--lines 1000000] [--legacy]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'ide'))
+
+from PyQt6.QtGui import QTextCursor  # noqa: E402
+from PyQt6.QtWidgets import QApplication, QTextEdit  # noqa: E402
+
+from output_console import OutputConsole  # noqa: E402
+
+CHUNK = 4096
+
+
+def program_output(lines):
+    return "".join(f"<item> {n} & more\n" for n in range(lines))
+
+
+def feed(app, chunks, write, finish):
+    """Time write() per chunk plus finish(), with the events in between"""
+    worst = 0.0
+    start = time.perf_counter()
+    for chunk in chunks:
+        t = time.perf_counter()
+        write(chunk)
+        app.processEvents()
+        worst = max(worst, time.perf_counter() - t)
+    t = time.perf_counter()
+    finish()
+    app.processEvents()
+    worst = max(worst, time.perf_counter() - t)
+    return (time.perf_counter() - start) * 1000, worst * 1000
+
+
+def legacy_panel(app, chunks):
+    panel = QTextEdit()
+    panel.setReadOnly(True)
+    panel.show()
+
+    def write(text):
+        cursor = panel.textCursor()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text)
+        panel.setTextCursor(cursor)
+        panel.ensureCursorVisible()
+
+    def finish():
+        panel.setHtml(f'<p><b>✓ Program Finished</b></p><pre>{"".join(chunks)}</pre>')
+
+    total, worst = feed(app, chunks, write, finish)
+    return total, worst, panel.document().blockCount()
+
+
+def console_panel(app, chunks):
+    console = OutputConsole()
+    console.show()
+    console.begin()
+
+    def finish():
+        console.write_message("✓ Program Finished", "#4ec9b0")
+        console.end()
+
+    total, worst = feed(app, chunks, console.write, finish)
+    return total, worst, console.blockCount()
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--lines", type=int, default=1_000_000)
+    ap.add_argument("--legacy", action="store_true",
+                    help="also time the previous QTextEdit panel")
+    args = ap.parse_args()
+
+    app = QApplication(sys.argv)
+    output = program_output(args.lines)
+    chunks = [output[i:i + CHUNK] for i in range(0, len(output), CHUNK)]
+    print(f"{args.lines} lines, {len(output) / (1024 * 1024):.1f} MB "
+          f"in {len(chunks)} chunks")
+
+    panels = [("console", console_panel)]
+    if args.legacy:
+        panels.append(("legacy", legacy_panel))
+    for name, panel in panels:
+        total, worst, lines = panel(app, chunks)
+        print(f"{name:>8}: {total:9.1f} ms, longest stall {worst:7.1f} ms, "
+              f"{lines} lines kept")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# File: benchmarks/parser_bench.py
+"""
+Parser cost on expression-heavy programs
+
+Parses generated programs whose declarations carry very long expressions
+(--stop-after=parse) and reports parse time and peak RSS. Pass an older
+build as --baseline to compare parsers across commits.
+
+Usage:
+    python benchmarks/parser_bench.py [--lines 100000] [--expr-terms 48,400]
+        [--backend PATH] [--baseline PATH]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+
+from pipeline_bench import find_backend, generate, measure
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--lines", type=int, default=100000)
+    parser.add_argument("--expr-terms", default="48,400",
+                        help="comma separated operands per expression")
+    parser.add_argument("--backend", default=None)
+    parser.add_argument("--baseline", default=None,
+                        help="older backend build to compare against")
+    parser.add_argument("--repeat", type=int, default=3)
+    opt = parser.parse_args()
+
+    backend = opt.backend or find_backend()
+    if backend is None:
+        sys.exit("No backend found; build it or pass --backend")
+    builds = [("current", backend)]
+    if opt.baseline:
+        builds.insert(0, ("baseline", opt.baseline))
+
+    print(f"{'terms':>7}{'build':>10}{'tokens':>10}{'parse_ms':>10}"
+          f"{'ns/token':>10}{'peak RSS':>12}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for terms in (int(s) for s in opt.expr_terms.split(",")):
+            path = os.path.join(tmp, f"expr_{terms}.nova")
+            # Mostly declarations: no when chains or loops to speak of
+            generate(opt.lines, path, f"--expr-terms={terms}",
+                     "--when-depth=1", "--loop-depth=1")
+            results = {}
+            for name, exe in builds:
+                command = [exe, "--stop-after=parse", "--time", path]
+                r = measure(name, command, opt.lines, opt.repeat)
+                results[name] = r
+                rss = r["peak_rss_kb"] / 1024 if r["peak_rss_kb"] else 0
+                print(f"{terms:>7}{name:>10}{r['tokens']:>10}"
+                      f"{r['parse_ms']:>10.1f}"
+                      f"{r['parse_ms'] * 1e6 / r['tokens']:>10.1f}"
+                      f"{rss:>8.1f} MiB")
+            if len(results) == 2:
+                speedup = results["baseline"]["parse_ms"] / results["current"]["parse_ms"]
+                print(f"{'':>7}{'speedup':>10}{'':>10}{speedup:>9.2f}x")
+
+
+if __name__ == "__main__":
+    main()
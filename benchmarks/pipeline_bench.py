@@ -0,0 +1,228 @@
+# File: benchmarks/pipeline_bench.py
+"""
+Scaling benchmark for the compiler pipeline over generated programs
+
+Generates programs from 1k to 1M lines (see program_gen.py), runs the
+backend on each with --time, and records lex, parse and semantic time
+per stage plus the peak RSS of the process (rss_floor_kb in the report
+is what the same measurement gives for /bin/true). The in-process Python front
+end can be measured the same way with --python.
+
+Results are written as JSON so two commits can be diffed. For every pair
+of consecutive sizes the growth exponent of each stage is reported
+(1.0 is linear); exponents above --superlinear are flagged.
+
+Usage:
+    python benchmarks/pipeline_bench.py [--sizes 1000,10000,100000,1000000]
+        [--backend PATH] [--python] [--repeat 3] [--out FILE]
+"""
+
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+
+STAGES = ("lex_ms", "parse_ms", "semantic_ms", "total_ms")
+
+
+def find_backend():
+    candidates = [os.environ.get("NOVA_BACKEND")]
+    for folder in ("ide", "nova_lang"):
+        for name in ("Project2.exe", "Project2"):
+            candidates.append(os.path.join(ROOT, folder, name))
+    for path in candidates:
+        if path and os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def generate(lines, path, *options):
+    # In a child process: on Linux a child's peak RSS starts at its
+    # parent's, so the benchmark itself must stay small
+    subprocess.run(
+        [sys.executable, os.path.join(HERE, "program_gen.py"), str(lines), path]
+        + list(options),
+        check=True
+    )
+
+
+def rss_floor():
+    """Peak RSS reported for a process that does nothing, in KiB"""
+    if not hasattr(os, "wait4") or not os.path.exists("/bin/true"):
+        return None
+    proc = subprocess.Popen(["/bin/true"])
+    usage = os.wait4(proc.pid, 0)[2]
+    proc.returncode = 0
+    return usage.ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+
+
+def run_once(command):
+    """
+    Run one timed front end process
+
+    Returns:
+        (timing dict, peak RSS in KiB or None)
+    """
+    proc = subprocess.Popen(
+        command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, cwd=ROOT
+    )
+    peak_kb = None
+    if hasattr(os, "wait4"):
+        # Read the pipes first so a chatty child cannot block on them
+        stdout = proc.stdout.read()
+        stderr = proc.stderr.read()
+        _, status, usage = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        peak_kb = usage.ru_maxrss // (1024 if sys.platform == "darwin" else 1)
+    else:
+        stdout, stderr = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError(
+            f"{' '.join(command)} failed: {stderr.decode(errors='replace')}"
+        )
+    for line in stdout.decode().splitlines():
+        if line.startswith('{"timing"'):
+            return json.loads(line)["timing"], peak_kb
+    raise RuntimeError(f"{' '.join(command)} printed no timing")
+
+
+def measure(frontend, command, lines, repeat):
+    """Best time per stage over repeat runs, and the largest peak RSS"""
+    best = None
+    peak = None
+    for _ in range(repeat):
+        timing, peak_kb = run_once(command)
+        if best is None:
+            best = dict(timing)
+        else:
+            for stage in STAGES:
+                best[stage] = min(best[stage], timing[stage])
+        if peak_kb is not None:
+            peak = max(peak or 0, peak_kb)
+    result = {"frontend": frontend, "lines": lines}
+    result.update(best)
+    result["peak_rss_kb"] = peak
+    return result
+
+
+def scaling(runs, threshold):
+    """Growth exponent of each stage between consecutive sizes"""
+    rows = []
+    for a, b in zip(runs, runs[1:]):
+        if a["frontend"] != b["frontend"]:
+            continue
+        row = {"frontend": a["frontend"], "from_lines": a["lines"],
+               "to_lines": b["lines"], "superlinear": []}
+        size_ratio = math.log(b["lines"] / a["lines"])
+        for stage in STAGES:
+            if a[stage] <= 0 or b[stage] <= 0:
+                continue
+            exponent = math.log(b[stage] / a[stage]) / size_ratio
+            row[stage.replace("_ms", "")] = round(exponent, 3)
+            # Sub-millisecond timings are too noisy to flag
+            if exponent > threshold and b[stage] >= 1.0:
+                row["superlinear"].append(stage.replace("_ms", ""))
+        rows.append(row)
+    return rows
+
+
+def print_table(runs, rows):
+    header = f"{'frontend':<9}{'lines':>9}{'tokens':>10}"
+    header += "".join(f"{s:>13}" for s in STAGES) + f"{'peak RSS':>12}"
+    print(header)
+    for r in runs:
+        line = f"{r['frontend']:<9}{r['lines']:>9}{r['tokens']:>10}"
+        line += "".join(f"{r[s]:>13.2f}" for s in STAGES)
+        rss = f"{r['peak_rss_kb'] / 1024:.1f} MiB" if r["peak_rss_kb"] else "n/a"
+        print(line + f"{rss:>12}")
+    print()
+    for row in rows:
+        exps = "  ".join(
+            f"{s.replace('_ms', '')}={row[s.replace('_ms', '')]}"
+            for s in STAGES if s.replace('_ms', '') in row
+        )
+        flag = f"  SUPERLINEAR: {', '.join(row['superlinear'])}" if row["superlinear"] else ""
+        print(f"{row['frontend']:<9}{row['from_lines']:>9} -> {row['to_lines']:<9}{exps}{flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000",
+                        help="comma separated line counts")
+    parser.add_argument("--backend", default=None,
+                        help="backend executable (default: ide/ or nova_lang/)")
+    parser.add_argument("--python", action="store_true",
+                        help="also measure the in-process Python front end")
+    parser.add_argument("--python-max-lines", type=int, default=100000,
+                        help="largest size run through the Python front end")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--superlinear", type=float, default=1.2,
+                        help="exponent above which a stage is flagged")
+    parser.add_argument("--out", default=os.path.join(
+                            HERE, "results", "pipeline_bench.json"),
+                        help="JSON report (default: "
+                             "benchmarks/results/pipeline_bench.json)")
+    opt = parser.parse_args()
+
+    sizes = [int(s) for s in opt.sizes.split(",")]
+    backend = opt.backend or find_backend()
+    if backend is None and not opt.python:
+        sys.exit("No backend found; build it, pass --backend, or use --python")
+
+    runs = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for lines in sizes:
+            path = os.path.join(tmp, f"gen_{lines}.nova")
+            generate(lines, path)
+            if backend:
+                runs.append(measure(
+                    "cpp", [backend, "--time", path], lines, opt.repeat
+                ))
+            if opt.python and lines <= opt.python_max_lines:
+                runs.append(measure(
+                    "python",
+                    [sys.executable, "-m", "nova_lang.main", "--time", path],
+                    lines, opt.repeat
+                ))
+
+    runs.sort(key=lambda r: (r["frontend"], r["lines"]))
+    rows = scaling(runs, opt.superlinear)
+    print_table(runs, rows)
+
+    report = {
+        "commit": git_commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "platform": platform.platform(),
+        "backend": backend,
+        "repeat": opt.repeat,
+        "rss_floor_kb": rss_floor(),
+        "runs": runs,
+        "scaling": rows,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(opt.out)), exist_ok=True)
+    with open(opt.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {opt.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# File: benchmarks/program_gen.py
+"""
+Synthetic NovaLang programs for the pipeline benchmarks
+
+generate_program(lines) cycles through the shapes that stress the front
+end: many small 'func' definitions, declarations with long expressions,
+deep 'when'/'elsewhen' chains and nested 'loop's. Every program is valid,
+so each stage runs to completion.
+
+Usage: python benchmarks/program_gen.py LINES OUTPUT [--expr-terms N] ...
+"""
+
+import argparse
+import random
+
+
+def _expression(rnd, names, terms):
+    parts = [str(rnd.randint(1, 99))]
+    for _ in range(terms - 1):
+        op = rnd.choice(('+', '-', '*', '+'))
+        kind = rnd.randrange(4)
+        if kind == 0 or not names['vars']:
+            operand = str(rnd.randint(1, 99))
+        elif kind == 1 and names['funcs']:
+            operand = f"{rnd.choice(names['funcs'])}({rnd.randint(1, 9)}, 2)"
+        elif kind == 2:
+            operand = f"({rnd.choice(names['vars'])} - {rnd.randint(1, 9)})"
+        else:
+            operand = rnd.choice(names['vars'])
+        parts.append(f"{op} {operand}")
+    return " ".join(parts)
+
+
+def _func(rnd, names, out):
+    k = len(names['funcs'])
+    out.append(f"func f{k}(a, b) {{")
+    out.append(f"    num t{k} = a * b + {rnd.randint(1, 9)}")
+    out.append(f"    back t{k} - a")
+    out.append("}")
+    names['funcs'].append(f"f{k}")
+
+
+def _declaration(rnd, names, out, terms):
+    k = len(names['vars'])
+    out.append(f"num v{k} = {_expression(rnd, names, terms)}")
+    names['vars'].append(f"v{k}")
+
+
+def _when_chain(rnd, names, out, depth):
+    var = rnd.choice(names['vars'])
+    out.append(f"when {var} > 0 {{")
+    for i in range(1, depth):
+        out.append(f"    show {var} + {i}")
+        out.append(f"}} elsewhen {var} == {i} {{")
+    out.append('    show "last"')
+    out.append("} else {")
+    out.append(f"    show {var}")
+    out.append("}")
+
+
+def _nested_loops(rnd, names, out, depth):
+    for d in range(depth):
+        pad = "    " * d
+        out.append(f"{pad}loop i{d} = 1 to {rnd.randint(2, 9)} {{")
+    pad = "    " * depth
+    out.append(f"{pad}show i{depth - 1} * {rnd.choice(names['vars'])}")
+    out.append(f"{pad}when i{depth - 1} == 2 {{")
+    out.append(f"{pad}    break")
+    out.append(f"{pad}}}")
+    for d in reversed(range(depth)):
+        out.append("    " * d + "}")
+
+
+def generate_program(lines, seed=0, expr_terms=48, when_depth=24, loop_depth=4):
+    """
+    Build a valid program of roughly the requested number of lines
+
+    Args:
+        lines: Target line count (the result may overshoot by one block)
+        seed: Random seed, so every run benchmarks the same text
+        expr_terms: Operands per long expression
+        when_depth: Cases per when/elsewhen chain
+        loop_depth: Nesting of each loop block
+
+    Returns:
+        Program source
+    """
+    rnd = random.Random(seed)
+    names = {'vars': [], 'funcs': []}
+    out = ["start"]
+    _func(rnd, names, out)
+    _declaration(rnd, names, out, 4)
+    step = 0
+    while len(out) < lines - 1:
+        shape = step % 6
+        if shape in (0, 3):
+            _func(rnd, names, out)
+        elif shape in (1, 4):
+            _declaration(rnd, names, out, expr_terms)
+        elif shape == 2:
+            _when_chain(rnd, names, out, when_depth)
+        else:
+            _nested_loops(rnd, names, out, loop_depth)
+        step += 1
+    out.append("end")
+    return "\n".join(out) + "\n"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a generated program")
+    parser.add_argument("lines", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--expr-terms", type=int, default=48)
+    parser.add_argument("--when-depth", type=int, default=24)
+    parser.add_argument("--loop-depth", type=int, default=4)
+    opt = parser.parse_args()
+    with open(opt.output, "w") as f:
+        f.write(generate_program(
+            opt.lines, opt.seed, opt.expr_terms, opt.when_depth, opt.loop_depth
+        ))
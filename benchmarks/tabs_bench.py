@@ -0,0 +1,109 @@
+# File: benchmarks/tabs_bench.py
+"""
+Opening many NovaLang files as IDE tabs: time and memory
+
+Generates --files programs (see program_gen.py) and opens them all the
+way File > Open does with a multiple selection: each in a tab, only the
+last one shown. Then every tab is shown once. Reported after each step:
+the time, how many tabs hold a QTextDocument (the rest are plain text)
+and the resident memory of the process (Linux; the C allocator keeps
+some of what released documents freed, so it falls less than it could).
+--keep-all lets every tab keep its document, as if there were no
+LIVE_DOCUMENTS or LIVE_DOCUMENT_CHARS limit.
+
+Usage:
+    QT_QPA_PLATFORM=offscreen python benchmarks/tabs_bench.py
+        [--files 50] [--lines 2000] [--keep-all]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'ide'))
+
+from PyQt6.QtCore import QEvent  # noqa: E402
+from PyQt6.QtWidgets import QApplication  # noqa: E402
+
+from program_gen import generate_program  # noqa: E402
+
+
+def rss_mb():
+    """Resident memory now, in MB (None where /proc is not available)"""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def report(step, ide, elapsed):
+    # Released documents are deleted once control is back in the event
+    # loop, which a script driving processEvents() never returns to
+    QApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+    tabs = ide.tabs()
+    live = sum(tab.document is not None for tab in tabs)
+    text = sum(tab.text_bytes() for tab in tabs if tab.document is None)
+    rss = rss_mb()
+    rss = f"{rss:7.1f} MB" if rss is not None else "      n/a"
+    print(f"{step:>10}: {elapsed * 1000:8.1f} ms, {live:3d} documents, "
+          f"{len(tabs) - live:3d} as text ({text / (1024 * 1024):4.1f} MB), "
+          f"RSS {rss}")
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--files", type=int, default=50)
+    ap.add_argument("--lines", type=int, default=2000)
+    ap.add_argument("--keep-all", action="store_true",
+                    help="never turn background tabs back into text")
+    args = ap.parse_args()
+
+    app = QApplication(sys.argv)
+    import novalang_ide
+
+    if args.keep_all:
+        novalang_ide.NovaLangIDE.LIVE_DOCUMENTS = args.files + 1
+        novalang_ide.NovaLangIDE.LIVE_DOCUMENT_CHARS = float("inf")
+    ide = novalang_ide.NovaLangIDE()
+    ide.editor.set_live_diagnostics(False)
+    ide.show()
+    app.processEvents()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        program = generate_program(args.lines)
+        for n in range(args.files):
+            path = os.path.join(tmp, f"unit{n}.nova")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(program)
+            paths.append(path)
+        print(f"{args.files} files of {args.lines} lines")
+        report("start", ide, 0.0)
+
+        t = time.perf_counter()
+        for n, path in enumerate(paths):
+            ide.load_file(path, show=n == len(paths) - 1)
+        app.processEvents()
+        report("open", ide, time.perf_counter() - t)
+
+        t = time.perf_counter()
+        for index in range(ide.tab_bar.count()):
+            ide.tab_bar.setCurrentIndex(index)
+            app.processEvents()
+        report("show each", ide, time.perf_counter() - t)
+
+        t = time.perf_counter()
+        for index in range(ide.tab_bar.count() - 1, -1, -1):
+            ide.tab_bar.setCurrentIndex(index)
+            app.processEvents()
+        report("again", ide, time.perf_counter() - t)
+        ide.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# File: benchmarks/vm_bench.py
+"""
+Execution benchmark for the bytecode VM
+
+Runs small kernels that stress the VM: a counting loop, nested loops,
+calls in a loop, recursion and text building. The backend runs each one
+with --run --time, and the report gives run_ms and the time per loop
+iteration (or call). The Python mirror can be timed the same way with
+--python; it is far slower, so use small --scale values with it.
+
+Results are written as JSON so two commits can be diffed.
+
+Usage:
+    python benchmarks/vm_bench.py [--scale 1.0] [--backend PATH]
+        [--python] [--repeat 3] [--out FILE]
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+
+from pipeline_bench import HERE, ROOT, find_backend, git_commit, run_once
+
+# name -> (iterations at scale 1, program); {n} is the iteration count
+KERNELS = {
+    "count": (10_000_000, """start
+num total = 0
+loop i = 1 to {n} {{
+    total = total + i * 2 - 1
+}}
+show total
+end
+"""),
+    "nested": (10_000_000, """start
+num hits = 0
+loop i = 1 to {n} / 1000 {{
+    loop j = 1 to 1000 {{
+        when j == i {{
+            hits = hits + 1
+        }}
+    }}
+}}
+show hits
+end
+"""),
+    "calls": (2_000_000, """start
+func step(a, b) {{
+    num t = a * b + 1
+    back t - a
+}}
+num acc = 0
+loop i = 1 to {n} {{
+    acc = step(i, 2) - acc
+}}
+show acc
+end
+"""),
+    "fib": (2_692_537, """start
+func fib(n) {{
+    num r = n
+    when n > 1 {{
+        r = fib(n - 1) + fib(n - 2)
+    }}
+    back r
+}}
+show fib({depth})
+end
+"""),
+    "text": (1_000_000, """start
+text s = ""
+num same = 0
+loop i = 1 to {n} {{
+    s = "ab" + "c"
+    when s == "abc" {{
+        same = same + 1
+    }}
+}}
+show same
+end
+"""),
+}
+
+
+def fib_depth(calls):
+    """Largest n whose naive fib(n) makes at most `calls` calls, and its calls"""
+    made = [1, 1]
+    while made[-1] + made[-2] + 1 <= calls:
+        made.append(made[-1] + made[-2] + 1)
+    return len(made) - 1, made[-1]
+
+
+def build(name, scale):
+    base, template = KERNELS[name]
+    n = max(1000, int(base * scale))
+    if name == "fib":
+        depth, n = fib_depth(n)
+        return n, template.format(depth=depth)
+    return n, template.format(n=n)
+
+
+def run_python(path):
+    sys.path.insert(0, ROOT)
+    from nova_lang.main import Options, run
+
+    with open(path, encoding="utf-8") as f:
+        source = f.read()
+    opt = Options()
+    opt.run = True
+    timing = {}
+    t = time.perf_counter()
+    diagnostics = run(opt, source, out=io.StringIO(), timing=timing)
+    if diagnostics:
+        raise RuntimeError(diagnostics[0].message)
+    timing["total_ms"] = (time.perf_counter() - t) * 1000
+    return timing
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--scale", type=float, default=1.0)
+    ap.add_argument("--backend", default=None)
+    ap.add_argument("--python", action="store_true")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--out", default=os.path.join(
+                    HERE, "results", "vm_bench.json"),
+                    help="JSON report (default: "
+                         "benchmarks/results/vm_bench.json)")
+    args = ap.parse_args()
+
+    backend = args.backend or find_backend()
+    if backend is None and not args.python:
+        sys.exit("No backend found; build it or pass --backend")
+
+    report = {
+        "commit": git_commit(),
+        "machine": platform.machine(),
+        "scale": args.scale,
+        "results": {},
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in KERNELS:
+            n, source = build(name, args.scale)
+            path = os.path.join(tmp, name + ".nova")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(source)
+            entry = {"iterations": n}
+            runners = []
+            if backend is not None:
+                command = [backend, "--run", "--time", path]
+                runners.append(("backend", lambda: run_once(command)[0]))
+            if args.python:
+                runners.append(("python", lambda: run_python(path)))
+            for label, runner in runners:
+                best = min(
+                    (runner() for _ in range(args.repeat)),
+                    key=lambda t: t["run_ms"]
+                )
+                entry[label] = {
+                    "run_ms": round(best["run_ms"], 3),
+                    "ns_per_iteration": round(best["run_ms"] * 1e6 / n, 2),
+                }
+            report["results"][name] = entry
+            print(f"{name:>8} n={n:<10} " + "  ".join(
+                f"{label}: {entry[label]['run_ms']:.1f} ms "
+                f"({entry[label]['ns_per_iteration']} ns/it)"
+                for label, _ in runners
+            ))
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# File: benchmarks/workspace_bench.py
+"""
+Workspace symbol index: build, reload and query times
+
+Writes --files generated programs (see program_gen.py) into a temporary
+folder and indexes them with WorkspaceIndex: a cold build that parses
+every file, a save, a warm start that loads the saved index and only
+checks the files' size and mtime, and a refresh after one file changed.
+Then go-to-definition and find-references run at --queries positions
+taken from the index, and a workspace-wide search for one name is timed
+against what it took without an index (lexing every file for that
+name, reproduced as scan_without_index below).
+
+Usage:
+    python benchmarks/workspace_bench.py [--files 2000] [--lines 300]
+        [--queries 1000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(HERE, '..', 'ide'))
+sys.path.insert(0, os.path.join(HERE, '..'))
+
+from nova_lang.lexer import Lexer  # noqa: E402
+from nova_lang.token import TokenType  # noqa: E402
+from program_gen import generate_program  # noqa: E402
+from workspace_index import WorkspaceIndex  # noqa: E402
+
+
+def scan_without_index(root, name):
+    """Uses of name found by reading and lexing every file"""
+    found = []
+    for folder, _, files in os.walk(root):
+        for file in files:
+            if not file.endswith('.nova'):
+                continue
+            path = os.path.join(folder, file)
+            with open(path, encoding='utf-8') as f:
+                tokens = Lexer(f.read()).tokenize()
+            found += [(path, t.line, t.col) for t in tokens
+                      if t.type is TokenType.IDENT and t.value == name]
+    return found
+
+
+def timed(fn, *args):
+    t = time.perf_counter()
+    result = fn(*args)
+    return result, (time.perf_counter() - t) * 1000
+
+
+def query_times(fn, positions):
+    times = []
+    for path, line, col in positions:
+        t = time.perf_counter()
+        fn(path, line, col)
+        times.append((time.perf_counter() - t) * 1000)
+    times.sort()
+    return times[len(times) // 2], times[-1]
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    ap.add_argument("--files", type=int, default=2000)
+    ap.add_argument("--lines", type=int, default=300)
+    ap.add_argument("--queries", type=int, default=1000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = os.path.join(tmp, "workspace")
+        for n in range(args.files):
+            folder = os.path.join(root, f"pkg{n // 100}")
+            os.makedirs(folder, exist_ok=True)
+            with open(os.path.join(folder, f"unit{n}.nova"), "w",
+                      encoding="utf-8") as f:
+                f.write(generate_program(args.lines, seed=n))
+        cache = os.path.join(tmp, "index.jsonl")
+        print(f"{args.files} files of {args.lines} lines")
+
+        index = WorkspaceIndex(root, cache)
+        parsed, ms = timed(index.scan)
+        print(f"{'cold build':>16}: {ms:9.1f} ms, {parsed} files parsed")
+        _, ms = timed(index.save)
+        print(f"{'save':>16}: {ms:9.1f} ms, "
+              f"{os.path.getsize(cache) / (1024 * 1024):.1f} MB")
+
+        warm = WorkspaceIndex(root, cache)
+        _, load_ms = timed(warm.load)
+        parsed, scan_ms = timed(warm.scan)
+        print(f"{'warm start':>16}: {load_ms + scan_ms:9.1f} ms "
+              f"(load {load_ms:.1f}, check {scan_ms:.1f}), {parsed} files parsed")
+
+        changed = warm.paths()[len(warm) // 2]
+        with open(changed, "a", encoding="utf-8") as f:
+            f.write("# edited\n")
+        parsed, ms = timed(warm.scan)
+        print(f"{'one file edited':>16}: {ms:9.1f} ms, {parsed} files parsed")
+
+        rnd = random.Random(0)
+        paths = warm.paths()
+        positions = []
+        for _ in range(args.queries):
+            path = rnd.choice(paths)
+            refs = warm._files[path].symbols.refs
+            _, line, col, _ = rnd.choice(refs[rnd.choice(sorted(refs))])
+            positions.append((path, line, col))
+        median, worst = query_times(warm.definition_at, positions)
+        print(f"{'go to definition':>16}: median {median:.3f} ms, "
+              f"worst {worst:.3f} ms")
+        median, worst = query_times(warm.references_at, positions)
+        print(f"{'find references':>16}: median {median:.3f} ms, "
+              f"worst {worst:.3f} ms")
+
+        uses, ms = timed(warm.references, "f3")
+        print(f"{'workspace search':>16}: {ms:9.1f} ms, {len(uses)} uses of f3")
+        legacy, ms = timed(scan_without_index, root, "f3")
+        print(f"{'without index':>16}: {ms:9.1f} ms, {len(legacy)} tokens f3")
+
+
+if __name__ == "__main__":
+    main()
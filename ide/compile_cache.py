@@ -0,0 +1,168 @@
+# File: ide/compile_cache.py
+"""
+Content-addressed on-disk cache of backend compile results
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+
+
+class CompileResult:
+    """What one backend run produced"""
+
+    __slots__ = ('returncode', 'stdout', 'stderr')
+
+    def __init__(self, returncode, stdout, stderr):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+
+
+class CompileCache:
+    """
+    Size-bounded LRU of compile results, one JSON file per entry.
+
+    Entries are keyed by the source bytes, the identity of the backend
+    binary (path, size, mtime), the flags and the program input, so
+    rebuilding the backend or changing a flag never returns a stale
+    result. Reading an entry bumps its mtime; past max_bytes the entries
+    with the oldest mtime are removed.
+    """
+
+    def __init__(self, directory, max_bytes=32 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._sizes = None
+
+    @staticmethod
+    def make_key(source, backend, flags, stdin=b""):
+        """
+        Build the cache key for a run
+
+        Args:
+            source: Program source as bytes
+            backend: Path to the backend executable
+            flags: Backend flags, without the input file
+            stdin: Bytes the run reads from standard input
+
+        Returns:
+            Hex digest, or None when the backend cannot be examined
+        """
+        try:
+            st = os.stat(backend)
+        except OSError:
+            return None
+        h = hashlib.sha256()
+        h.update(source)
+        identity = [os.path.abspath(backend), st.st_size, st.st_mtime_ns]
+        h.update(json.dumps([identity, list(flags)]).encode('utf-8'))
+        if stdin:
+            h.update(hashlib.sha256(stdin).digest())
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def _load_sizes(self):
+        if self._sizes is None:
+            self._sizes = {}
+            try:
+                names = os.listdir(self.directory)
+            except OSError:
+                names = []
+            for name in names:
+                if name.endswith('.json'):
+                    try:
+                        self._sizes[name[:-5]] = os.path.getsize(
+                            os.path.join(self.directory, name)
+                        )
+                    except OSError:
+                        pass
+        return self._sizes
+
+    def get(self, key):
+        """
+        Look up a result and mark it as recently used
+
+        Returns:
+            CompileResult, or None on a miss
+        """
+        if key is None:
+            self.misses += 1
+            return None
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                record = json.load(f)
+            result = CompileResult(
+                record['returncode'], record['stdout'], record['stderr']
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            self.misses += 1
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        self.hits += 1
+        return result
+
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entries"""
+        if key is None:
+            return
+        data = json.dumps({
+            'returncode': result.returncode,
+            'stdout': result.stdout,
+            'stderr': result.stderr,
+        }).encode('utf-8')
+        if len(data) > self.max_bytes:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp, self._path(key))
+            except OSError:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            return
+        self._load_sizes()[key] = len(data)
+        self._evict()
+
+    def _evict(self):
+        sizes = self._load_sizes()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+        by_age = []
+        for key in sizes:
+            try:
+                by_age.append((os.path.getmtime(self._path(key)), key))
+            except OSError:
+                by_age.append((0, key))
+        by_age.sort()
+        for _, key in by_age:
+            if total <= self.max_bytes:
+                break
+            total -= sizes.pop(key)
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove every entry"""
+        for key in list(self._load_sizes()):
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+        self._sizes = {}
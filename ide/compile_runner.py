@@ -0,0 +1,179 @@
+# File: ide/compile_runner.py
+"""
+Asynchronous backend runner for NovaLang IDE
+"""
+
+import codecs
+
+from PyQt6.QtCore import QObject, QProcess, QTimer, pyqtSignal
+
+
+class CompileRunner(QObject):
+    """
+    Runs the backend compiler in a QProcess so the GUI thread never blocks.
+
+    Every call to start() begins a new run with its own id. Starting a new
+    run kills the one in flight, and any signal that arrives for an older
+    run id is dropped, so late results can never overwrite newer ones.
+    Standard output is also passed on as it arrives, so the output of a
+    running program can be shown before it ends. Only the first
+    max_output bytes of it are kept for finished(), so a program that
+    prints without end does not grow the IDE's memory.
+    """
+
+    # run_id
+    started = pyqtSignal(int)
+    # run_id, text: standard output received since the last output signal
+    output = pyqtSignal(int, str)
+    # run_id, exit_code, stdout, stderr; stdout is empty when it went past
+    # max_output (output_complete is then False)
+    finished = pyqtSignal(int, int, str, str)
+    # run_id, message
+    failed = pyqtSignal(int, str)
+    # run_id
+    cancelled = pyqtSignal(int)
+    # run_id
+    timed_out = pyqtSignal(int)
+
+    def __init__(self, timeout_ms=30000, max_output=1 << 20, parent=None):
+        super().__init__(parent)
+        self.timeout_ms = timeout_ms
+        self.max_output = max_output
+        self.run_id = 0
+        self.process = None
+        # Standard output of the current run while it fits in max_output;
+        # the decoder carries a UTF-8 sequence split between reads
+        self.stdout = bytearray()
+        self.output_complete = True
+        self.decoder = None
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.timeout.connect(self._on_timeout)
+
+    def is_running(self):
+        """Return True while a run is in flight"""
+        return self.process is not None
+
+    def start(self, program, arguments, stdin=b""):
+        """
+        Start a new run, killing any run that is still in flight
+
+        Args:
+            program: Path to the backend executable
+            arguments: List of command line arguments
+            stdin: Bytes written to the process's standard input, which
+                is then closed
+
+        Returns:
+            The id of the new run
+        """
+        self._discard_process()
+        self.run_id += 1
+        run_id = self.run_id
+
+        process = QProcess(self)
+        process.setProgram(program)
+        process.setArguments(list(arguments))
+        process.finished.connect(
+            lambda code, status, p=process, rid=run_id:
+                self._on_finished(p, rid, code, status)
+        )
+        process.errorOccurred.connect(
+            lambda error, p=process, rid=run_id:
+                self._on_error(p, rid, error)
+        )
+        process.readyReadStandardOutput.connect(
+            lambda p=process, rid=run_id: self._on_output(p, rid)
+        )
+        self.process = process
+        self.stdout = bytearray()
+        self.output_complete = True
+        self.decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+
+        process.start()
+        if stdin:
+            process.write(stdin)
+        process.closeWriteChannel()
+        self.timer.start(self.timeout_ms)
+        self.started.emit(run_id)
+        return run_id
+
+    def cancel(self):
+        """Kill the run in flight, if any"""
+        if self.process is None:
+            return
+        run_id = self.run_id
+        self._discard_process()
+        self.cancelled.emit(run_id)
+
+    def _discard_process(self):
+        """Kill the current process and detach it so its results are dropped"""
+        self.timer.stop()
+        process = self.process
+        self.process = None
+        if process is None:
+            return
+        process.finished.disconnect()
+        process.errorOccurred.disconnect()
+        process.readyReadStandardOutput.disconnect()
+        if process.state() == QProcess.ProcessState.NotRunning:
+            process.deleteLater()
+            return
+        # Freed once it has exited, rather than waiting for that here
+        process.finished.connect(process.deleteLater)
+        process.kill()
+
+    def _is_current(self, process, run_id):
+        return process is self.process and run_id == self.run_id
+
+    def _on_output(self, process, run_id):
+        if not self._is_current(process, run_id):
+            return
+        self._read_output(process, run_id)
+
+    def _read_output(self, process, run_id, final=False):
+        data = bytes(process.readAllStandardOutput())
+        if self.output_complete:
+            if len(self.stdout) + len(data) <= self.max_output:
+                self.stdout += data
+            else:
+                self.stdout = bytearray()
+                self.output_complete = False
+        text = self.decoder.decode(data, final)
+        if text:
+            self.output.emit(run_id, text)
+
+    def _on_finished(self, process, run_id, exit_code, exit_status):
+        if not self._is_current(process, run_id):
+            return
+        self.timer.stop()
+        self._read_output(process, run_id, final=True)
+        stdout = bytes(self.stdout).decode('utf-8', errors='replace')
+        self.stdout = bytearray()
+        stderr = bytes(process.readAllStandardError()).decode(
+            'utf-8', errors='replace'
+        )
+        self.process = None
+        process.deleteLater()
+        if exit_status == QProcess.ExitStatus.CrashExit:
+            self.failed.emit(run_id, "Backend compiler crashed")
+            return
+        self.finished.emit(run_id, exit_code, stdout, stderr)
+
+    def _on_error(self, process, run_id, error):
+        # Crashes are reported through finished(); only start failures
+        # never produce a finished signal
+        if error != QProcess.ProcessError.FailedToStart:
+            return
+        if not self._is_current(process, run_id):
+            return
+        message = process.errorString()
+        self._discard_process()
+        self.failed.emit(run_id, message)
+
+    def _on_timeout(self):
+        if self.process is None:
+            return
+        run_id = self.run_id
+        self._discard_process()
+        self.timed_out.emit(run_id)
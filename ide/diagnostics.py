@@ -0,0 +1,44 @@
+# File: ide/diagnostics.py
+"""
+Structured diagnostics reported by the NovaLang backend
+"""
+
+import json
+import os
+import sys
+
+# The in-process front end lives in the nova_lang package at the repo root
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from nova_lang.diagnostics import Diagnostic  # noqa: E402
+
+
+def parse_diagnostics(stream_text):
+    """
+    Split backend stderr into diagnostics and any other text
+
+    Each diagnostic is one JSON object per line; anything else (e.g. a
+    crash message from the runtime) is passed through untouched.
+
+    Args:
+        stream_text: Text the backend wrote to stderr
+
+    Returns:
+        (list of Diagnostic, list of other lines)
+    """
+    diagnostics = []
+    other = []
+    for line in stream_text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith('{'):
+            try:
+                record = json.loads(stripped)
+            except ValueError:
+                other.append(line)
+                continue
+            diagnostics.append(Diagnostic.from_record(record))
+        elif stripped:
+            other.append(line)
+    return diagnostics, other
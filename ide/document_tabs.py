@@ -0,0 +1,87 @@
+# File: ide/document_tabs.py
+"""
+Open documents behind the IDE's tabs
+"""
+
+import os
+
+from PyQt6.QtGui import QTextDocument
+from PyQt6.QtWidgets import QPlainTextDocumentLayout
+
+
+class DocumentTab:
+    """
+    One open file, kept as cheaply as its state allows.
+
+    A tab holds a plain text snapshot until it is first shown; only then
+    is a QTextDocument built (and highlighted, by the editor). A tab that
+    has not been shown for a while and has no unsaved changes can go
+    back to a snapshot with release(), which frees the document, its
+    layout and highlighting; the undo history goes with it. Files too
+    large to edit are kept as their MappedDocument instead.
+    """
+
+    def __init__(self, path=None, text="", mapped=None):
+        self.path = path
+        # Text while there is no document
+        self.text = text
+        self.document = None
+        self.mapped = mapped
+        # Unsaved changes, while there is no document
+        self.modified = False
+        # Shown with viewport-only highlighting (a large file)
+        self.large = False
+        # Where the view was when the tab was last hidden
+        self.cursor_position = 0
+        self.scroll = 0
+        # Order in which tabs were last shown
+        self.last_shown = 0
+
+    def title(self):
+        name = os.path.basename(self.path) if self.path else "Untitled"
+        return name + " ●" if self.is_modified() else name
+
+    def is_modified(self):
+        if self.document is not None:
+            return self.document.isModified()
+        return self.modified
+
+    def get_text(self):
+        if self.document is not None:
+            return self.document.toPlainText()
+        return self.text
+
+    def text_bytes(self):
+        """Characters the tab holds, for the budget of live documents"""
+        if self.document is not None:
+            return self.document.characterCount()
+        return len(self.text)
+
+    def materialize(self):
+        """The tab's document, built from the snapshot the first time"""
+        if self.document is None:
+            document = QTextDocument()
+            document.setDocumentLayout(QPlainTextDocumentLayout(document))
+            document.setPlainText(self.text)
+            document.setModified(self.modified)
+            self.document = document
+            self.text = None
+        return self.document
+
+    def release(self):
+        """Go back to a text snapshot, dropping the document"""
+        if self.document is None:
+            return
+        self.text = self.document.toPlainText()
+        self.modified = self.document.isModified()
+        self.document.deleteLater()
+        self.document = None
+
+    def close(self):
+        """Release everything the tab holds open"""
+        if self.mapped is not None:
+            self.mapped.close()
+            self.mapped = None
+        if self.document is not None:
+            self.document.deleteLater()
+            self.document = None
@@ -4,10 +4,14 @@ Code editor widget with line numbers for NovaLang IDE
 """
 
 from PyQt6.QtWidgets import QPlainTextEdit, QWidget, QTextEdit
-from PyQt6.QtCore import Qt, QSize
+from PyQt6.QtCore import Qt, QSize, QTimer, QEvent, pyqtSignal
 from PyQt6.QtGui import QPainter, QTextFormat, QColor, QFont, QTextCursor
 
-from syntax_highlighter import NovaLangHighlighter
+from gutter import GutterRenderer
+from syntax_highlighter import (
+    NovaLangHighlighter, ViewportHighlighter, make_formats
+)
+from live_analysis import LiveAnalyzer
 from themes import get_theme
 
 
@@ -31,8 +35,12 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
     and error line highlighting
     """
     
+    # list of nova_lang.Diagnostic for the current text
+    live_diagnostics_changed = pyqtSignal(list)
+    
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.gutter = None
         
         # Set up editor properties
         self.setFont(QFont(
@@ -45,16 +53,42 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         self.line_number_bg_color = QColor(37, 37, 38)
         self.line_number_fg_color = QColor(133, 133, 133)
         
-        # Error tracking
+        # Error tracking: error_line is the first (scrolled to) error,
+        # error_lines every line with an error
         self.error_line = -1
+        self.error_lines = set()
+        
+        # Live diagnostics: edits are debounced, then a snapshot of the
+        # text is analyzed on a worker thread
+        self.live_enabled = False
+        self.restyling = False
+        self.live_revision = 0
+        self.live_diagnostics = []
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(400)
+        self.live_timer.timeout.connect(self.start_live_analysis)
+        self.live_analyzer = LiveAnalyzer(self)
+        self.live_analyzer.finished.connect(self.on_live_analysis_finished)
         
-        # Create line number area
+        # Large-document mode: only the viewport is highlighted and there
+        # is no live analysis; loading is set while a ChunkedLoader fills
+        # the document
+        self.large_document = False
+        self.loading = False
+        self.load_cursor = None
+        self.theme_name = "dark"
+        
+        # Create line number area; gutter_width is the margin last set
+        self.gutter = GutterRenderer(self.font())
+        self.gutter_width = 0
         self.line_number_area = LineNumberArea(self)
         
         # Connect signals
         self.blockCountChanged.connect(self.update_line_number_area_width)
         self.updateRequest.connect(self.update_line_number_area)
         self.cursorPositionChanged.connect(self.highlight_current_line)
+        self.document().contentsChanged.connect(self.schedule_live_analysis)
         
         # Initialize
         self.update_line_number_area_width(0)
@@ -64,12 +98,18 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
 
     def line_number_area_width(self):
         """Calculate width needed for line numbers"""
-        digits = len(str(max(1, self.blockCount())))
-        return 15 + self.fontMetrics().horizontalAdvance('9') * digits
+        return self.gutter.width(self.blockCount())
 
     def update_line_number_area_width(self, _):
         """Update the editor margins to accommodate line numbers"""
-        self.setViewportMargins(self.line_number_area_width(), 0, 0, 0)
+        if self.loading:
+            # Once at the end of the load, not once per chunk
+            return
+        width = self.line_number_area_width()
+        if width != self.gutter_width:
+            # Only when the digit count changes, not on every new block
+            self.gutter_width = width
+            self.setViewportMargins(width, 0, 0, 0)
 
     def update_line_number_area(self, rect, dy):
         """Update the line number area when scrolling or content changes"""
@@ -88,33 +128,44 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         cr = self.contentsRect()
         self.line_number_area.setGeometry(
             cr.left(), cr.top(), 
-            self.line_number_area_width(), 
+            self.gutter_width, 
             cr.height()
         )
 
+    def changeEvent(self, event):
+        """Re-measure the gutter when the font changes"""
+        super().changeEvent(event)
+        if event.type() == QEvent.Type.FontChange and self.gutter is not None:
+            self.gutter.set_font(self.font())
+            self.gutter_width = 0
+            self.update_line_number_area_width(0)
+            self.line_number_area.update()
+
     def highlight_current_line(self):
         """Highlight the current line and any error lines"""
         extra_selections = []
         
-        # Error line gets priority and should be more visible
-        if self.error_line != -1:
+        # Error lines get priority and should be more visible; the first
+        # error is brighter than the rest
+        for line in sorted(self.error_lines):
+            block = self.document().findBlockByNumber(line - 1)
+            if not block.isValid():
+                continue
             error_selection = QTextEdit.ExtraSelection()
-            # Bright red background for error line
-            error_selection.format.setBackground(QColor(220, 50, 47, 180))
+            alpha = 180 if line == self.error_line else 90
+            error_selection.format.setBackground(QColor(220, 50, 47, alpha))
             error_selection.format.setProperty(
                 QTextFormat.Property.FullWidthSelection, True
             )
-            block = self.document().findBlockByNumber(self.error_line - 1)
-            if block.isValid():
-                cursor = QTextCursor(block)
-                cursor.clearSelection()
-                error_selection.cursor = cursor
-                extra_selections.append(error_selection)
-        
-        # Current line highlight (only if it's not the error line)
+            cursor = QTextCursor(block)
+            cursor.clearSelection()
+            error_selection.cursor = cursor
+            extra_selections.append(error_selection)
+        
+        # Current line highlight (only if it's not an error line)
         if not self.isReadOnly():
             current_line = self.textCursor().blockNumber()
-            if current_line != self.error_line - 1:
+            if current_line + 1 not in self.error_lines:
                 selection = QTextEdit.ExtraSelection()
                 selection.format.setBackground(QColor(40, 40, 50))
                 selection.format.setProperty(
@@ -126,19 +177,35 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         
         self.setExtraSelections(extra_selections)
 
-    def highlight_error_line(self, line_num):
+    def highlight_error_line(self, line_num, scroll=True):
         """
         Highlight a specific line as an error
         
         Args:
             line_num: Line number to highlight (1-indexed)
+            scroll: Move the cursor to the error line
         """
+        self.highlight_error_lines([line_num], scroll)
+
+    def highlight_error_lines(self, line_nums, scroll=True):
+        """
+        Highlight every line with an error
+        
+        Args:
+            line_nums: Line numbers (1-indexed), first error first
+            scroll: Move the cursor to the first error line
+        """
+        if not line_nums:
+            self.clear_error_highlighting()
+            return
+        line_num = line_nums[0]
         self.error_line = line_num
+        self.error_lines = set(line_nums)
         self.highlight_current_line()
         
         # Scroll to error line
         block = self.document().findBlockByNumber(line_num - 1)
-        if block.isValid():
+        if scroll and block.isValid():
             cursor = QTextCursor(block)
             self.setTextCursor(cursor)
             self.ensureCursorVisible()
@@ -149,59 +216,103 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
     def clear_error_highlighting(self):
         """Clear any error line highlighting"""
         self.error_line = -1
+        self.error_lines = set()
         self.highlight_current_line()
         self.line_number_area.update()
 
+    def set_live_diagnostics(self, enabled):
+        """
+        Turn as-you-type diagnostics on or off
+        
+        Args:
+            enabled: Analyze the text in the background after each edit
+        """
+        self.live_enabled = enabled
+        if enabled and not self.large_document:
+            self.schedule_live_analysis()
+        else:
+            self.live_timer.stop()
+            self.live_analyzer.cancel()
+
+    def set_max_errors(self, max_errors):
+        """
+        Limit the live diagnostics
+        
+        Args:
+            max_errors: Most errors reported per analysis (0: no limit)
+        """
+        self.live_analyzer.set_max_errors(max_errors)
+        if self.live_enabled:
+            self.live_revision += 1
+            self.live_analyzer.cancel()
+            self.live_timer.start()
+
+    def schedule_live_analysis(self):
+        """Restart the debounce timer after an edit"""
+        if self.restyling:
+            # Rehighlighting reports a contents change but the text is the same
+            return
+        if self.large_document:
+            # A snapshot of the whole document per edit is too costly
+            return
+        self.live_revision += 1
+        if self.live_enabled:
+            self.live_analyzer.cancel()
+            self.live_timer.start()
+
+    def start_live_analysis(self):
+        """Hand a snapshot of the current text to the worker thread"""
+        self.live_analyzer.submit(self.live_revision, self.toPlainText())
+
+    def on_live_analysis_finished(self, revision, diagnostics):
+        """Show the result of a background run unless the text moved on"""
+        if not self.live_enabled or revision != self.live_revision:
+            return
+        self.live_diagnostics = diagnostics
+        lines = [d.line for d in diagnostics if d.is_error() and d.line > 0]
+        if lines:
+            if lines[0] != self.error_line or set(lines) != self.error_lines:
+                self.highlight_error_lines(lines, scroll=False)
+        elif self.error_line != -1:
+            self.clear_error_highlighting()
+        self.live_diagnostics_changed.emit(diagnostics)
+
+    def stop_live_analysis(self):
+        """Stop the worker thread; call before the editor goes away"""
+        self.live_timer.stop()
+        self.live_analyzer.stop()
+
     def line_number_area_paint_event(self, event):
-        """Paint line numbers in the line number area"""
+        """Paint the line numbers of the blocks in the exposed rect"""
         painter = QPainter(self.line_number_area)
-        painter.fillRect(event.rect(), self.line_number_bg_color)
+        rect = event.rect()
+        painter.fillRect(rect, self.line_number_bg_color)
+        painter.setFont(self.gutter.font)
+        paint_line = self.gutter.paint_line
+        width = self.line_number_area.width()
+        foreground = self.line_number_fg_color
+        error_lines = self.error_lines
+        exposed_top = rect.top()
+        exposed_bottom = rect.bottom()
         
         block = self.firstVisibleBlock()
-        block_number = block.blockNumber()
+        number = block.blockNumber() + 1
         top = self.blockBoundingGeometry(block).translated(
             self.contentOffset()
         ).top()
-        bottom = top + self.blockBoundingRect(block).height()
-        
-        while block.isValid() and top <= event.rect().bottom():
-            if block.isVisible() and bottom >= event.rect().top():
-                number = str(block_number + 1)
-                
-                # Highlight error line number in red
-                if block_number + 1 == self.error_line:
-                    # Draw red background for error line number
-                    painter.fillRect(
-                        0, int(top), 
-                        self.line_number_area.width(), 
-                        self.fontMetrics().height(), 
-                        QColor(220, 50, 47)
-                    )
-                    painter.setPen(QColor(255, 255, 255))  # White text
-                    painter.drawText(
-                        0, int(top), 
-                        self.line_number_area.width() - 8,
-                        self.fontMetrics().height(),
-                        Qt.AlignmentFlag.AlignRight, 
-                        f"✗ {number}"
-                    )
-                else:
-                    painter.setPen(self.line_number_fg_color)
-                    painter.drawText(
-                        0, int(top), 
-                        self.line_number_area.width() - 8,
-                        self.fontMetrics().height(),
-                        Qt.AlignmentFlag.AlignRight, 
-                        number
-                    )
-            
+        
+        while block.isValid() and top <= exposed_bottom:
+            bottom = top + self.blockBoundingRect(block).height()
+            if block.isVisible() and bottom >= exposed_top:
+                paint_line(painter, width, top, number, foreground,
+                           number in error_lines)
             block = block.next()
             top = bottom
-            bottom = top + self.blockBoundingRect(block).height()
-            block_number += 1
+            number += 1
 
     def apply_dark_theme(self):
         """Apply dark theme to the editor"""
+        self.theme_name = "dark"
         theme = get_theme("dark")
         
         self.setStyleSheet(f"""
@@ -217,11 +328,14 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         self.line_number_fg_color = QColor(theme['line_numbers']['foreground'])
         
         self.highlighter.set_theme_colors(theme['tokens'])
+        self.restyling = True
         self.highlighter.rehighlight()
+        self.restyling = False
         self.line_number_area.update()
 
     def apply_light_theme(self):
         """Apply light theme to the editor"""
+        self.theme_name = "light"
         theme = get_theme("light")
         
         self.setStyleSheet(f"""
@@ -237,7 +351,9 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         self.line_number_fg_color = QColor(theme['line_numbers']['foreground'])
         
         self.highlighter.set_theme_colors(theme['tokens'])
+        self.restyling = True
         self.highlighter.rehighlight()
+        self.restyling = False
         self.line_number_area.update()
 
     def get_text(self):
@@ -251,5 +367,109 @@ class CodeEditorWithLineNumbers(QPlainTextEdit):
         Args:
             text: The text to set
         """
+        if self.large_document:
+            # Empty the document first, so the full highlighter does not
+            # start on the large text
+            self.setPlainText("")
+            self.set_large_document(False)
         self.setPlainText(text)
-        self.document().setModified(False)
\ No newline at end of file
+        self.document().setModified(False)
+
+    def show_document(self, document, large=False):
+        """
+        Show another document, as when switching tabs
+        
+        A document keeps its undo history and, with full highlighting,
+        its highlighter (a child of the document), so showing it again
+        does not highlight it again unless the theme changed meanwhile.
+        
+        Args:
+            document: A QTextDocument with a QPlainTextDocumentLayout;
+                the editor does not take ownership of it
+            large: Highlight only what is on screen (see set_large_document)
+        """
+        if document is self.document():
+            return
+        self.live_timer.stop()
+        self.live_analyzer.cancel()
+        self.live_revision += 1
+        self.document().contentsChanged.disconnect(self.schedule_live_analysis)
+        if self.large_document:
+            self.highlighter.detach()
+        self.error_line = -1
+        self.error_lines = set()
+        # Font and tab stops are document settings
+        document.setDefaultFont(self.font())
+        self.setDocument(document)
+        self.setTabStopDistance(4 * self.fontMetrics().horizontalAdvance(' '))
+        document.contentsChanged.connect(self.schedule_live_analysis)
+        
+        self.large_document = large
+        tokens = get_theme(self.theme_name)['tokens']
+        highlighter = document.findChild(NovaLangHighlighter)
+        if large:
+            self.highlighter = ViewportHighlighter(self)
+            self.highlighter.set_theme_colors(tokens)
+        elif highlighter is None:
+            # Its first pass is queued, so it runs with these colors
+            self.highlighter = NovaLangHighlighter(document)
+            self.highlighter.set_theme_colors(tokens)
+        else:
+            self.highlighter = highlighter
+            if highlighter.formats is not make_formats(tokens):
+                highlighter.set_theme_colors(tokens)
+                self.restyling = True
+                highlighter.rehighlight()
+                self.restyling = False
+        
+        self.gutter_width = 0
+        self.update_line_number_area_width(0)
+        self.highlight_current_line()
+        self.schedule_live_analysis()
+
+    def set_large_document(self, enabled):
+        """
+        Switch between full and viewport-only highlighting
+        
+        Args:
+            enabled: Highlight only what is on screen and skip live
+                analysis, for documents of several MB
+        """
+        if enabled == self.large_document:
+            return
+        self.large_document = enabled
+        if enabled:
+            self.live_timer.stop()
+            self.live_analyzer.cancel()
+            self.highlighter.setDocument(None)
+            self.highlighter.setParent(None)
+            self.highlighter = ViewportHighlighter(self)
+        else:
+            self.highlighter.detach()
+            self.highlighter = NovaLangHighlighter(self.document())
+        self.highlighter.set_theme_colors(get_theme(self.theme_name)['tokens'])
+
+    def begin_chunked_load(self):
+        """Empty the editor and enter large-document mode for a load"""
+        self.clear_error_highlighting()
+        self.setPlainText("")
+        self.set_large_document(True)
+        self.loading = True
+        self.setReadOnly(True)
+        self.document().setUndoRedoEnabled(False)
+        self.load_cursor = QTextCursor(self.document())
+
+    def append_chunk(self, text):
+        """Append the next piece of a chunked load"""
+        self.load_cursor.movePosition(QTextCursor.MoveOperation.End)
+        self.load_cursor.insertText(text)
+
+    def end_chunked_load(self):
+        """Finish a chunked load; the document counts as unmodified"""
+        self.load_cursor = None
+        self.loading = False
+        self.document().setUndoRedoEnabled(True)
+        self.document().setModified(False)
+        self.setReadOnly(False)
+        self.update_line_number_area_width(0)
+        self.highlight_current_line()
\ No newline at end of file
@@ -0,0 +1,143 @@
+# File: ide/file_saver.py
+"""
+Background file saving for NovaLang IDE
+"""
+
+import os
+import shutil
+import tempfile
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# Mode a newly created file gets, read once: os.umask() can only be read
+# by setting it, which is not safe once worker threads are running
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+_NEW_FILE_MODE = 0o666 & ~_UMASK
+
+
+def write_atomic(path, text):
+    """
+    Replace path with text in one step
+
+    The text goes to a temporary file in the same folder, which is then
+    renamed over path, so a crash mid-write never leaves a truncated file.
+    A symlink is written through, so the link survives. An existing file
+    keeps its permission bits; a new one gets the usual umask-based mode
+    rather than the temporary file's 0600.
+    """
+    path = os.path.realpath(path)
+    folder = os.path.dirname(path)
+    fd, tmp = tempfile.mkstemp(
+        dir=folder, prefix='.' + os.path.basename(path) + '.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            shutil.copymode(path, tmp)
+        else:
+            os.chmod(tmp, _NEW_FILE_MODE)
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+
+
+class FileSaver(QObject):
+    """
+    Writes documents on a single worker thread, in the order they are saved.
+
+    save() hands over a snapshot of the text and returns at once. A newer
+    save of the same path replaces one that has not started yet, so a
+    burst of saves writes the file once. wait() blocks until everything
+    queued is on disk, for callers that must not go on before that
+    (closing the window, replacing the document).
+    """
+
+    # path
+    saved = pyqtSignal(str)
+    # path, message
+    failed = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        # path -> text, in the order the paths were first queued
+        self._pending = {}
+        self._busy = False
+        self._errors = 0
+        self._stopped = False
+        self._thread = None
+
+    def save(self, path, text):
+        """Queue text to be written to path"""
+        with self._cond:
+            if self._stopped:
+                return
+            self._pending.pop(path, None)
+            self._pending[path] = text
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="nova-file-saver", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def wait(self, timeout=None):
+        """
+        Block until every queued save has finished
+
+        Returns:
+            True when all of them were written and none failed since the
+            previous wait()
+        """
+        with self._cond:
+            done = self._cond.wait_for(
+                lambda: not self._pending and not self._busy, timeout
+            )
+            ok = done and self._errors == 0
+            self._errors = 0
+            return ok
+
+    def stop(self):
+        """Finish the queued saves, then shut the worker thread down"""
+        self.wait()
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                text = self._pending.pop(path)
+                self._busy = True
+            try:
+                write_atomic(path, text)
+                error = None
+            except (OSError, ValueError) as e:
+                # ValueError: text that cannot be encoded
+                error = str(e)
+            with self._cond:
+                self._busy = False
+                if error is not None:
+                    self._errors += 1
+                self._cond.notify_all()
+            if error is None:
+                self.saved.emit(path)
+            else:
+                self.failed.emit(path, error)
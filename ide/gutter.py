@@ -0,0 +1,89 @@
+# File: ide/gutter.py
+"""
+Line-number gutter rendering for NovaLang IDE
+"""
+
+from collections import OrderedDict
+
+from PyQt6.QtCore import QPointF, Qt
+from PyQt6.QtGui import QColor, QFontMetrics, QStaticText
+
+ERROR_BACKGROUND = QColor(220, 50, 47)
+ERROR_FOREGROUND = QColor(255, 255, 255)
+
+
+class GutterRenderer:
+    """
+    Paints line numbers with everything per-font measured once.
+
+    Font metrics and the gutter width for each digit count are cached
+    until the font changes. Each number is laid out once as a QStaticText
+    (the last CACHED_GLYPHS of them are kept), so a paint only positions
+    and draws prepared glyphs; the pen color is applied at draw time, so
+    a theme change keeps the cache.
+    """
+
+    CACHED_GLYPHS = 4096
+    PADDING = 15
+    RIGHT_MARGIN = 8
+
+    def __init__(self, font):
+        self.set_font(font)
+
+    def set_font(self, font):
+        """Measure font; drops every cached width and glyph"""
+        self.font = font
+        metrics = QFontMetrics(font)
+        self.line_height = metrics.height()
+        self.digit_width = max(metrics.horizontalAdvance(d) for d in "0123456789")
+        self._widths = {}
+        self._glyphs = OrderedDict()
+
+    def width(self, line_count):
+        """Gutter width for a document of line_count lines"""
+        digits = 1
+        limit = 10
+        while line_count >= limit:
+            digits += 1
+            limit *= 10
+        width = self._widths.get(digits)
+        if width is None:
+            width = self.PADDING + self.digit_width * digits
+            self._widths[digits] = width
+        return width
+
+    def glyph(self, number, error=False):
+        """The prepared label of a line, and its width"""
+        key = -number if error else number
+        entry = self._glyphs.get(key)
+        if entry is not None:
+            self._glyphs.move_to_end(key)
+            return entry
+        static = QStaticText(f"✗ {number}" if error else str(number))
+        static.setTextFormat(Qt.TextFormat.PlainText)
+        static.prepare(font=self.font)
+        entry = (static, static.size().width())
+        self._glyphs[key] = entry
+        if len(self._glyphs) > self.CACHED_GLYPHS:
+            self._glyphs.popitem(last=False)
+        return entry
+
+    def paint_line(self, painter, width, top, number, foreground, error=False):
+        """
+        Draw one line number right-aligned in a gutter of the given width;
+        the painter's font must be self.font
+
+        Args:
+            top: Top of the line in gutter coordinates
+            error: Draw it as an error marker (red background, ✗)
+        """
+        if error:
+            painter.fillRect(0, int(top), width, self.line_height,
+                             ERROR_BACKGROUND)
+            painter.setPen(ERROR_FOREGROUND)
+        else:
+            painter.setPen(foreground)
+        static, text_width = self.glyph(number, error)
+        painter.drawStaticText(
+            QPointF(width - self.RIGHT_MARGIN - text_width, top), static
+        )
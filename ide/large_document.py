@@ -0,0 +1,395 @@
+# File: ide/large_document.py
+"""
+Large-document support for NovaLang IDE: chunked loading and a read-only
+memory-mapped viewer
+"""
+
+import bisect
+import mmap
+import os
+from array import array
+from collections import OrderedDict
+
+from PyQt6.QtWidgets import QAbstractScrollArea
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QFontMetrics, QPainter
+
+from gutter import GutterRenderer
+from syntax_highlighter import KIND_NAMES, STATE_NORMAL, scan_block
+from themes import get_theme
+
+# Files from this size on are loaded in chunks and highlighted lazily
+LARGE_FILE_BYTES = 1024 * 1024
+# Files from this size on open read-only in a MappedFileView; a
+# QTextDocument takes them in at about 10 MB/s
+MAPPED_FILE_BYTES = 8 * 1024 * 1024
+
+
+class MappedDocument:
+    """
+    Read-only, line-addressable view of a file through mmap.
+
+    Opening only counts the newlines of each CHUNK-sized piece, which runs
+    at memory speed. The offsets of the lines in a chunk are found when a
+    line in it is first asked for and kept for the last few chunks used,
+    so jumping anywhere in a file of hundreds of MB stays cheap.
+    """
+
+    CHUNK = 1024 * 1024
+    CACHED_CHUNKS = 32
+    # Lines longer than this are cut off for display
+    MAX_LINE_BYTES = 64 * 1024
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        try:
+            self.size = os.fstat(self._file.fileno()).st_size
+            if self.size:
+                self.data = mmap.mmap(
+                    self._file.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            else:
+                self.data = b""
+        except (OSError, ValueError):
+            self._file.close()
+            raise
+        # newlines_before[c]: newlines in the chunks before chunk c
+        self.newlines_before = array('Q', [0])
+        for start in range(0, self.size, self.CHUNK):
+            count = self.data[start:start + self.CHUNK].count(b"\n")
+            self.newlines_before.append(self.newlines_before[-1] + count)
+        self._offsets = OrderedDict()
+
+    @property
+    def line_count(self):
+        return self.newlines_before[-1] + 1
+
+    def close(self):
+        if isinstance(self.data, mmap.mmap):
+            self.data.close()
+        self._file.close()
+
+    def _newline_offsets(self, chunk):
+        offsets = self._offsets.get(chunk)
+        if offsets is not None:
+            self._offsets.move_to_end(chunk)
+            return offsets
+        base = chunk * self.CHUNK
+        piece = self.data[base:base + self.CHUNK]
+        offsets = array('Q')
+        find = piece.find
+        pos = find(b"\n")
+        while pos >= 0:
+            offsets.append(base + pos)
+            pos = find(b"\n", pos + 1)
+        self._offsets[chunk] = offsets
+        if len(self._offsets) > self.CACHED_CHUNKS:
+            self._offsets.popitem(last=False)
+        return offsets
+
+    def line_start(self, n):
+        """Byte offset of line n (0-based)"""
+        if n <= 0:
+            return 0
+        # The n-th newline ends line n - 1
+        chunk = bisect.bisect_left(self.newlines_before, n) - 1
+        offsets = self._newline_offsets(chunk)
+        return offsets[n - self.newlines_before[chunk] - 1] + 1
+
+    def line(self, n):
+        """Text of line n (0-based), without its line break"""
+        start = self.line_start(n)
+        end = self.data.find(b"\n", start, start + self.MAX_LINE_BYTES)
+        if end < 0:
+            end = min(self.size, start + self.MAX_LINE_BYTES)
+        raw = self.data[start:end]
+        if raw.endswith(b"\r"):
+            raw = raw[:-1]
+        return raw.decode('utf-8', errors='replace')
+
+    def source_bytes(self):
+        """The whole file, e.g. to pipe it to the backend"""
+        return bytes(self.data)
+
+
+class MappedFileView(QAbstractScrollArea):
+    """
+    Read-only view of a MappedDocument, painted a line at a time.
+
+    Nothing is laid out up front: a paint decodes and highlights only the
+    visible lines (cached for the last CACHED_LINES), with the block state
+    taken from MARGIN lines above the first one so a string literal that
+    opens just off screen is still colored. The vertical scroll bar counts
+    lines. It offers the same error highlighting calls as the editor.
+    """
+
+    CACHED_LINES = 4096
+    MARGIN = 50
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.document = None
+        self.text_font = QFont(
+            "Consolas" if QFont("Consolas").exactMatch() else "Courier New",
+            11
+        )
+        self.bold_font = QFont(self.text_font)
+        self.bold_font.setWeight(QFont.Weight.Bold)
+        self.metrics = QFontMetrics(self.text_font)
+        self.line_height = self.metrics.height()
+        self.gutter = GutterRenderer(self.text_font)
+        self.error_line = -1
+        self.error_lines = set()
+        # ASCII text in a fixed-pitch font is measured by counting
+        self._fixed = (self.metrics.horizontalAdvance('W')
+                       == self.metrics.horizontalAdvance('i'))
+        self._char_width = self.metrics.horizontalAdvance(' ')
+        # line number -> (in_state, runs, out_state, width); runs are
+        # (x, text, kind or None), measured once
+        self._lines = OrderedDict()
+        self._widest = 0
+        self.verticalScrollBar().setSingleStep(1)
+        self.horizontalScrollBar().setSingleStep(self.metrics.horizontalAdvance(' ') * 4)
+        self.apply_theme("dark")
+
+    # ---------- document ----------
+
+    def set_document(self, document):
+        """Show document (a MappedDocument, or None); the caller closes it"""
+        self.document = document
+        self._lines.clear()
+        self._widest = 0
+        self.error_line = -1
+        self.error_lines = set()
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self._update_scroll_ranges()
+        self.viewport().update()
+
+    def source_bytes(self):
+        return self.document.source_bytes() if self.document else b""
+
+    def gutter_width(self):
+        return self.gutter.width(self.document.line_count if self.document else 1)
+
+    def visible_rows(self):
+        return max(1, self.viewport().height() // self.line_height)
+
+    def _update_scroll_ranges(self):
+        count = self.document.line_count if self.document else 0
+        vbar = self.verticalScrollBar()
+        vbar.setPageStep(self.visible_rows())
+        vbar.setRange(0, max(0, count - self.visible_rows()))
+        text_width = self.viewport().width() - self.gutter_width()
+        self.horizontalScrollBar().setPageStep(max(1, text_width))
+        self.horizontalScrollBar().setRange(0, max(0, self._widest - text_width))
+
+    # ---------- highlighting ----------
+
+    def _scan(self, n, state):
+        entry = self._lines.get(n)
+        if entry is not None and entry[0] == state:
+            self._lines.move_to_end(n)
+            return entry
+        text = self.document.line(n).expandtabs(4)
+        spans, out_state = scan_block(text, state)
+        # Runs of plain and token-colored text, left to right
+        bounds = []
+        pos = 0
+        for start, length, kind in spans:
+            if start > pos:
+                bounds.append((pos, start, None))
+            bounds.append((start, start + length, kind))
+            pos = start + length
+        if pos < len(text):
+            bounds.append((pos, len(text), None))
+        if self._fixed and text.isascii():
+            def x_of(i):
+                return i * self._char_width
+        else:
+            def x_of(i):
+                return self.metrics.horizontalAdvance(text[:i])
+        runs = [(x_of(start), text[start:end], kind)
+                for start, end, kind in bounds]
+        entry = (state, runs, out_state, x_of(len(text)))
+        self._lines[n] = entry
+        if len(self._lines) > self.CACHED_LINES:
+            self._lines.popitem(last=False)
+        return entry
+
+    def _state_before(self, first):
+        state = STATE_NORMAL
+        for n in range(max(0, first - self.MARGIN), first):
+            state = self._scan(n, state)[2]
+        return state
+
+    # ---------- errors ----------
+
+    def highlight_error_lines(self, line_nums, scroll=True):
+        """Mark every line with an error, scrolling to the first one"""
+        if not line_nums:
+            self.clear_error_highlighting()
+            return
+        self.error_line = line_nums[0]
+        self.error_lines = set(line_nums)
+        if scroll:
+            self.goto_line(self.error_line)
+        self.viewport().update()
+
+    def highlight_error_line(self, line_num, scroll=True):
+        self.highlight_error_lines([line_num], scroll)
+
+    def clear_error_highlighting(self):
+        self.error_line = -1
+        self.error_lines = set()
+        self.viewport().update()
+
+    def goto_line(self, line_num):
+        """Scroll so 1-based line_num is a third of the way down"""
+        self.verticalScrollBar().setValue(
+            line_num - 1 - self.visible_rows() // 3
+        )
+
+    # ---------- themes ----------
+
+    def apply_theme(self, name):
+        theme = get_theme(name)
+        self.background = QColor(theme['background'])
+        self.foreground = QColor(theme['foreground'])
+        self.gutter_bg = QColor(theme['line_numbers']['background'])
+        self.gutter_fg = QColor(theme['line_numbers']['foreground'])
+        self.token_colors = [QColor(theme['tokens'][k]) for k in KIND_NAMES]
+        self.viewport().update()
+
+    def apply_dark_theme(self):
+        self.apply_theme("dark")
+
+    def apply_light_theme(self):
+        self.apply_theme("light")
+
+    # ---------- Qt events ----------
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scroll_ranges()
+
+    def scrollContentsBy(self, dx, dy):
+        if dx == 0 and abs(dy) < self.visible_rows():
+            # Move what is on screen and paint only the rows scrolled in
+            self.viewport().scroll(0, dy * self.line_height)
+        else:
+            self.viewport().update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        rect = event.rect()
+        painter.fillRect(rect, self.background)
+        gutter = self.gutter_width()
+        painter.fillRect(0, rect.top(), gutter, rect.height(), self.gutter_bg)
+        if self.document is None:
+            return
+
+        # Only the rows in the exposed rect: after a scroll that is the
+        # few lines that came into view
+        first_row = max(0, rect.top() // self.line_height)
+        last_row = rect.bottom() // self.line_height + 1
+        first = self.verticalScrollBar().value()
+        last = min(self.document.line_count, first + last_row)
+        full_width = self.viewport().width()
+        left = gutter + 4 - self.horizontalScrollBar().value()
+        ascent = self.metrics.ascent()
+        widest = self._widest
+        paint_number = self.gutter.paint_line
+        state = self._state_before(first + first_row)
+        for row, n in enumerate(range(first + first_row, last), first_row):
+            top = row * self.line_height
+            number = n + 1
+            _, runs, state, width = self._scan(n, state)
+
+            error = number in self.error_lines
+            if error:
+                alpha = 180 if number == self.error_line else 90
+                painter.fillRect(gutter, top, full_width - gutter,
+                                 self.line_height, QColor(220, 50, 47, alpha))
+            painter.setFont(self.text_font)
+            paint_number(painter, gutter, top, number, self.gutter_fg, error)
+
+            painter.setClipRect(gutter, top, full_width - gutter,
+                                self.line_height)
+            for x, piece, kind in runs:
+                if kind is None:
+                    painter.setPen(self.foreground)
+                    painter.setFont(self.text_font)
+                else:
+                    painter.setPen(self.token_colors[kind])
+                    painter.setFont(self.bold_font if kind == 0 else self.text_font)
+                painter.drawText(left + x, top + ascent, piece)
+            painter.setClipping(False)
+            widest = max(widest, width + 8)
+        if widest != self._widest:
+            self._widest = widest
+            self._update_scroll_ranges()
+
+
+class ChunkedLoader(QObject):
+    """
+    Loads a file into a CodeEditorWithLineNumbers a chunk at a time.
+
+    Each chunk is inserted from a zero-length timer, so the window keeps
+    painting and answering input between chunks, and progress() reports
+    how far the load is. The editor is in large-document mode for the
+    whole load: no full highlighting pass, no live analysis, no undo
+    history and no gutter relayout per chunk.
+    """
+
+    CHUNK_CHARS = 512 * 1024
+
+    # percent
+    progress = pyqtSignal(int)
+    finished = pyqtSignal()
+    # message
+    failed = pyqtSignal(str)
+
+    def __init__(self, editor, path, parent=None):
+        super().__init__(parent)
+        self.editor = editor
+        self.path = path
+        self.file = None
+        self.size = 1
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._load_chunk)
+
+    def start(self):
+        """Open the file and start loading; errors are raised here"""
+        # Universal newlines, as the plain open_file() path reads
+        self.file = open(self.path, 'r', encoding='utf-8')
+        self.size = max(1, os.fstat(self.file.fileno()).st_size)
+        self.editor.begin_chunked_load()
+        self.timer.start()
+
+    def cancel(self):
+        """Stop loading, keeping what has been read"""
+        if self.file is None:
+            return
+        self.timer.stop()
+        self.file.close()
+        self.file = None
+        self.editor.end_chunked_load()
+
+    def _load_chunk(self):
+        try:
+            text = self.file.read(self.CHUNK_CHARS)
+            done = self.file.buffer.tell()
+        except (OSError, UnicodeDecodeError) as e:
+            self.cancel()
+            self.failed.emit(str(e))
+            return
+        if not text:
+            self.cancel()
+            self.progress.emit(100)
+            self.finished.emit()
+            return
+        self.editor.append_chunk(text)
+        self.progress.emit(min(99, done * 100 // self.size))
@@ -0,0 +1,133 @@
+# File: ide/live_analysis.py
+"""
+Background as-you-type analysis for NovaLang IDE
+"""
+
+import os
+import sys
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+# The in-process front end lives in the nova_lang package at the repo root
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+# DEFAULT_MAX_ERRORS is also the IDE's default error limit
+from nova_lang.diagnostics import DEFAULT_MAX_ERRORS, Diagnostic  # noqa: E402
+from nova_lang.incremental import IncrementalAnalyzer  # noqa: E402
+
+
+class _Cancelled(Exception):
+    pass
+
+
+class LiveAnalyzer(QObject):
+    """
+    Runs the Python front end on a single worker thread.
+
+    submit() hands over an immutable snapshot of the text. There is only
+    one pending slot: a newer snapshot replaces any request that has not
+    started yet, and a run in flight stops at the next unit boundary
+    once it has been superseded. Results are only emitted for the latest
+    revision, so stale diagnostics never reach the editor.
+
+    Analysis is incremental: only the top-level units that changed since
+    the previous run are parsed and checked again.
+    """
+
+    # revision, list of nova_lang.Diagnostic
+    finished = pyqtSignal(int, list)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._pending = None
+        self._latest = 0
+        self._stopped = False
+        self._thread = None
+        self._max_errors = DEFAULT_MAX_ERRORS
+        # Only touched by the worker thread
+        self._incremental = IncrementalAnalyzer()
+
+    def submit(self, revision, text):
+        """
+        Queue text for analysis, superseding any older request
+
+        Args:
+            revision: Increasing document revision the text belongs to
+            text: Snapshot of the document text
+        """
+        with self._cond:
+            if self._stopped:
+                return
+            self._pending = (revision, text)
+            self._latest = revision
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="nova-live-analysis", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify()
+
+    def set_max_errors(self, max_errors):
+        """Report at most max_errors errors (0: no limit) from the next run"""
+        with self._cond:
+            self._max_errors = max_errors
+
+    def cancel(self):
+        """Drop the pending request and stop the one in flight"""
+        with self._cond:
+            self._pending = None
+            self._latest += 1
+
+    def stop(self):
+        """Shut the worker thread down"""
+        with self._cond:
+            self._stopped = True
+            self._pending = None
+            self._latest += 1
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join(1.0)
+            self._thread = None
+
+    def _is_stale(self, revision):
+        return self._stopped or revision != self._latest
+
+    def _check(self, revision):
+        if self._is_stale(revision):
+            raise _Cancelled()
+
+    def _analyze(self, revision, text):
+        return self._incremental.analyze(
+            text, check=lambda: self._check(revision)
+        )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+                revision, text = self._pending
+                self._pending = None
+                self._incremental.max_errors = self._max_errors
+            try:
+                diagnostics = self._analyze(revision, text)
+            except _Cancelled:
+                continue
+            except Exception as e:
+                # Reported instead of ending the thread, which would stop
+                # live diagnostics for the session; the caches may hold
+                # half a run, so start over
+                self._incremental = IncrementalAnalyzer()
+                diagnostics = [Diagnostic(
+                    "error", "internal", f"Analysis failed: {e!r}"
+                )]
+            with self._cond:
+                if self._is_stale(revision):
+                    continue
+            self.finished.emit(revision, diagnostics)
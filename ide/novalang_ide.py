@@ -6,29 +6,89 @@ Professional IDE with modern UI for NovaLang programming language
 
 import sys
 import os
-import subprocess
-import re
+from collections import deque
 
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-    QTextEdit, QSplitter, QStatusBar, QToolBar, QFileDialog,
-    QMessageBox, QPushButton, QLabel, QFrame
+    QSplitter, QStatusBar, QToolBar, QFileDialog,
+    QMessageBox, QPushButton, QLabel, QFrame, QProgressBar, QInputDialog,
+    QStackedWidget, QTabBar
 )
 from PyQt6.QtGui import QAction, QFont, QKeySequence
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QStandardPaths
 
 from editor import CodeEditorWithLineNumbers
+from compile_runner import CompileRunner
+from compile_cache import CompileCache, CompileResult
+from document_tabs import DocumentTab
+from file_saver import FileSaver
+from output_console import OutputConsole
+from large_document import (
+    LARGE_FILE_BYTES, MAPPED_FILE_BYTES, ChunkedLoader, MappedDocument,
+    MappedFileView
+)
+from diagnostics import parse_diagnostics
+from live_analysis import DEFAULT_MAX_ERRORS
 from themes import get_theme
+from workspace_index import WorkspaceIndex, WorkspaceIndexer
 
 
 class NovaLangIDE(QMainWindow):
     """Main IDE window for NovaLang"""
     
+    # Background tabs that keep their document, and the characters they
+    # may hold between them; older ones are kept as text
+    LIVE_DOCUMENTS = 8
+    LIVE_DOCUMENT_CHARS = 8 * 1024 * 1024
+    # Closed tabs that Reopen Closed Tab can bring back
+    CLOSED_TABS = 20
+    
     def __init__(self):
         super().__init__()
         self.setWindowTitle("NovaLang IDE")
         self.setGeometry(100, 100, 1400, 800)
-        self.current_file = None
+        
+        # Open files are the tab data of tab_bar; current_tab is shown
+        self.current_tab = None
+        self.shown_count = 0
+        self.closed_tabs = deque(maxlen=self.CLOSED_TABS)
+        
+        # Backend runs asynchronously; late results of killed runs are dropped
+        self.compile_runner = CompileRunner(timeout_ms=30000, parent=self)
+        self.compile_runner.started.connect(self.on_compile_started)
+        self.compile_runner.output.connect(self.on_compile_output)
+        self.compile_runner.finished.connect(self.on_compile_finished)
+        self.compile_runner.failed.connect(self.on_compile_failed)
+        self.compile_runner.cancelled.connect(self.on_compile_cancelled)
+        self.compile_runner.timed_out.connect(self.on_compile_timed_out)
+        
+        # Results of earlier runs, keyed by source, backend and flags
+        cache_root = QStandardPaths.writableLocation(
+            QStandardPaths.StandardLocation.CacheLocation
+        ) or os.path.join(os.path.expanduser("~"), ".cache", "novalang")
+        self.compile_cache = CompileCache(os.path.join(cache_root, "compile"))
+        self.pending_cache_key = None
+        self.compile_tab = None
+        
+        # Symbols of every file in the open folder, kept on disk next to
+        # the compile cache and updated as files change
+        self.workspace = WorkspaceIndexer(os.path.join(cache_root, "index"), self)
+        self.workspace.progress.connect(self.on_index_progress)
+        self.workspace.updated.connect(self.on_index_updated)
+        
+        # Documents are written on a worker thread, atomically
+        self.file_saver = FileSaver(self)
+        self.file_saver.saved.connect(self.on_file_saved)
+        self.file_saver.failed.connect(self.on_save_failed)
+        
+        # Errors reported per compile and per live analysis (0: no limit)
+        self.max_errors = DEFAULT_MAX_ERRORS
+        
+        # Lines the program reads with take when it runs
+        self.program_input = ""
+        
+        # Chunked load in progress, if any
+        self.loader = None
         
         self.init_ui()
         self.create_actions()
@@ -88,11 +148,49 @@ class NovaLangIDE(QMainWindow):
         self.run_btn.clicked.connect(self.compile_code_backend)
         editor_header_layout.addWidget(self.run_btn)
         
+        # Cancel button, only enabled while a compile is in flight
+        self.cancel_btn = QPushButton("■ Cancel")
+        self.cancel_btn.setStyleSheet("""
+            QPushButton {
+                background-color: #3c3c3c;
+                color: #cccccc;
+                border: none;
+                padding: 6px 16px;
+                border-radius: 4px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #a1260d;
+                color: white;
+            }
+            QPushButton:disabled {
+                color: #6f6f6f;
+            }
+        """)
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.clicked.connect(self.cancel_compile)
+        editor_header_layout.addWidget(self.cancel_btn)
+        
         editor_layout.addWidget(editor_header)
         
-        # Code editor
+        # One tab per open file, all shown in the same editor
+        self.tab_bar = QTabBar()
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setMovable(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.currentChanged.connect(self.on_tab_changed)
+        self.tab_bar.tabCloseRequested.connect(self.close_tab)
+        editor_layout.addWidget(self.tab_bar)
+        
+        # Code editor; files too large to edit are shown read-only in
+        # the mapped view instead
         self.editor = CodeEditorWithLineNumbers()
-        editor_layout.addWidget(self.editor)
+        self.mapped_view = MappedFileView()
+        self.editor_stack = QStackedWidget()
+        self.editor_stack.addWidget(self.editor)
+        self.editor_stack.addWidget(self.mapped_view)
+        editor_layout.addWidget(self.editor_stack)
         
         # Right panel - Output
         output_panel = QWidget()
@@ -131,13 +229,8 @@ class NovaLangIDE(QMainWindow):
         
         output_layout.addWidget(output_header)
         
-        # Output text area
-        self.output_text = QTextEdit()
-        self.output_text.setReadOnly(True)
-        self.output_text.setFont(QFont(
-            "Consolas" if QFont("Consolas").exactMatch() else "Courier New", 
-            10
-        ))
+        # Output console: streamed, and bounded to its last lines
+        self.output_text = OutputConsole()
         output_layout.addWidget(self.output_text)
         
         # Add panels to splitter
@@ -153,6 +246,38 @@ class NovaLangIDE(QMainWindow):
         self.status_label = QLabel("Ready")
         self.status_bar.addWidget(self.status_label)
         
+        # Busy indicator shown while the backend is running
+        self.compile_progress = QProgressBar()
+        self.compile_progress.setRange(0, 0)
+        self.compile_progress.setMaximumWidth(120)
+        self.compile_progress.setMaximumHeight(14)
+        self.compile_progress.setTextVisible(False)
+        self.compile_progress.hide()
+        self.status_bar.addWidget(self.compile_progress)
+        
+        # Progress of a chunked file load
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_progress.setMaximumWidth(120)
+        self.load_progress.setMaximumHeight(14)
+        self.load_progress.hide()
+        self.status_bar.addWidget(self.load_progress)
+        
+        # Live diagnostics summary in status bar
+        self.live_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.live_label)
+        self.editor.live_diagnostics_changed.connect(
+            self.on_live_diagnostics_changed
+        )
+        
+        # Workspace index state in status bar
+        self.index_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.index_label)
+        
+        # Compile cache hit/miss counts in status bar
+        self.cache_label = QLabel("")
+        self.status_bar.addPermanentWidget(self.cache_label)
+        
         # File info in status bar
         self.file_label = QLabel("No file")
         self.status_bar.addPermanentWidget(self.file_label)
@@ -175,6 +300,17 @@ class NovaLangIDE(QMainWindow):
         self.save_as_action = QAction("Save As", self)
         self.save_as_action.triggered.connect(self.save_file_as)
         
+        self.open_folder_action = QAction("Open Folder...", self)
+        self.open_folder_action.triggered.connect(self.open_folder)
+        
+        self.close_tab_action = QAction("Close Tab", self)
+        self.close_tab_action.setShortcut(QKeySequence.StandardKey.Close)
+        self.close_tab_action.triggered.connect(self.close_current_tab)
+        
+        self.reopen_tab_action = QAction("Reopen Closed Tab", self)
+        self.reopen_tab_action.setShortcut("Ctrl+Shift+T")
+        self.reopen_tab_action.triggered.connect(self.reopen_closed_tab)
+        
         self.exit_action = QAction("Exit", self)
         self.exit_action.triggered.connect(self.close)
         
@@ -183,6 +319,30 @@ class NovaLangIDE(QMainWindow):
         self.run_action.setShortcut("F5")
         self.run_action.triggered.connect(self.compile_code_backend)
         
+        self.cancel_action = QAction("Cancel Run", self)
+        self.cancel_action.setShortcut("Shift+F5")
+        self.cancel_action.setEnabled(False)
+        self.cancel_action.triggered.connect(self.cancel_compile)
+        
+        self.input_action = QAction("Program Input...", self)
+        self.input_action.triggered.connect(self.set_program_input)
+        
+        self.error_limit_action = QAction("Error Limit...", self)
+        self.error_limit_action.triggered.connect(self.set_error_limit)
+        
+        self.output_log_action = QAction("Log Output to File...", self)
+        self.output_log_action.setCheckable(True)
+        self.output_log_action.toggled.connect(self.toggle_output_log)
+        
+        # Navigation through the workspace index
+        self.goto_definition_action = QAction("Go to Definition", self)
+        self.goto_definition_action.setShortcut("F12")
+        self.goto_definition_action.triggered.connect(self.go_to_definition)
+        
+        self.find_references_action = QAction("Find References", self)
+        self.find_references_action.setShortcut("Shift+F12")
+        self.find_references_action.triggered.connect(self.find_references)
+        
         # Theme actions
         self.light_theme_action = QAction("Light Theme", self)
         self.light_theme_action.triggered.connect(self.apply_light_theme)
@@ -190,6 +350,13 @@ class NovaLangIDE(QMainWindow):
         self.dark_theme_action = QAction("Dark Theme", self)
         self.dark_theme_action.triggered.connect(self.apply_dark_theme)
         
+        # Live diagnostics toggle
+        self.live_diagnostics_action = QAction("Live Diagnostics", self)
+        self.live_diagnostics_action.setCheckable(True)
+        self.live_diagnostics_action.setChecked(True)
+        self.live_diagnostics_action.toggled.connect(self.toggle_live_diagnostics)
+        self.editor.set_live_diagnostics(True)
+        
         # Debug action - Test error highlighting
         self.test_error_action = QAction("Test Error Highlight (Line 4)", self)
         self.test_error_action.triggered.connect(
@@ -207,16 +374,33 @@ class NovaLangIDE(QMainWindow):
         file_menu.addAction(self.save_action)
         file_menu.addAction(self.save_as_action)
         file_menu.addSeparator()
+        file_menu.addAction(self.open_folder_action)
+        file_menu.addSeparator()
+        file_menu.addAction(self.close_tab_action)
+        file_menu.addAction(self.reopen_tab_action)
+        file_menu.addSeparator()
         file_menu.addAction(self.exit_action)
         
         # Run menu
         run_menu = menubar.addMenu("Run")
         run_menu.addAction(self.run_action)
+        run_menu.addAction(self.cancel_action)
+        run_menu.addSeparator()
+        run_menu.addAction(self.input_action)
+        run_menu.addAction(self.error_limit_action)
+        run_menu.addAction(self.output_log_action)
+        
+        # Navigate menu
+        navigate_menu = menubar.addMenu("Navigate")
+        navigate_menu.addAction(self.goto_definition_action)
+        navigate_menu.addAction(self.find_references_action)
         
         # View menu
         view_menu = menubar.addMenu("View")
         view_menu.addAction(self.light_theme_action)
         view_menu.addAction(self.dark_theme_action)
+        view_menu.addSeparator()
+        view_menu.addAction(self.live_diagnostics_action)
         
         # Debug menu (can be removed in production)
         debug_menu = menubar.addMenu("Debug")
@@ -235,58 +419,351 @@ class NovaLangIDE(QMainWindow):
 
     # ==================== File Operations ====================
     
+    @property
+    def current_file(self):
+        """Path of the file in the current tab (None while untitled)"""
+        return self.current_tab.path if self.current_tab else None
+
+    @current_file.setter
+    def current_file(self, path):
+        self.current_tab.path = path
+        self.update_tab_title(self.current_tab)
+
     def new_file(self):
-        """Create a new file"""
-        if self.check_save():
-            self.editor.set_text("")
-            self.current_file = None
-            self.setWindowTitle("NovaLang IDE - Untitled")
-            self.file_label.setText("No file")
-            self.status_label.setText("New file created")
+        """Open an empty Untitled tab"""
+        self.add_tab(DocumentTab())
+        self.status_label.setText("New file created")
 
     def open_file(self):
-        """Open an existing file"""
-        if self.check_save():
-            file_path, _ = QFileDialog.getOpenFileName(
-                self, "Open NovaLang File", "",
-                "NovaLang Files (*.nova);;All Files (*.*)"
-            )
-            if file_path:
-                try:
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        content = f.read()
-                    self.editor.set_text(content)
-                    self.current_file = file_path
-                    filename = os.path.basename(file_path)
-                    self.setWindowTitle(f"NovaLang IDE - {filename}")
-                    self.file_label.setText(filename)
-                    self.status_label.setText(f"Opened: {filename}")
-                except Exception as e:
-                    QMessageBox.critical(
-                        self, "Error", 
-                        f"Could not open file:\n{str(e)}"
-                    )
+        """Open existing files, each in its own tab"""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self, "Open NovaLang Files", "",
+            "NovaLang Files (*.nova);;All Files (*.*)"
+        )
+        # Only the last one is shown; the others stay text until selected
+        for n, file_path in enumerate(file_paths):
+            self.load_file(file_path, show=n == len(file_paths) - 1)
 
-    def save_file(self):
-        """Save the current file"""
-        if self.current_file is None:
-            return self.save_file_as()
+    def load_file(self, file_path, show=True):
+        """
+        Open a file in a tab, or show the tab it is already open in
+
+        Small files are read right away and kept as text until their tab
+        is shown. Large ones are loaded in chunks when the tab is first
+        shown, and the largest are read-only through a memory-mapped view.
+        """
+        tab = self.find_tab(file_path)
+        if tab is not None:
+            self.tab_bar.setCurrentIndex(self.tab_index(tab))
+            return
+        filename = os.path.basename(file_path)
         try:
-            with open(self.current_file, 'w', encoding='utf-8') as f:
-                f.write(self.editor.get_text())
-            self.editor.document().setModified(False)
-            filename = os.path.basename(self.current_file)
-            self.status_label.setText(f"Saved: {filename}")
-            return True
+            size = os.path.getsize(file_path)
+            if size >= MAPPED_FILE_BYTES:
+                tab = DocumentTab(file_path, mapped=MappedDocument(file_path))
+                status = f"Opened read-only: {filename} ({size // (1024 * 1024)} MB)"
+            elif size >= LARGE_FILE_BYTES:
+                # No text yet: read when the tab is first shown
+                tab = DocumentTab(file_path, text=None)
+                tab.large = True
+                status = f"Opened: {filename}"
+            else:
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    tab = DocumentTab(file_path, f.read())
+                status = f"Opened: {filename}"
         except Exception as e:
             QMessageBox.critical(
                 self, "Error", 
-                f"Could not save file:\n{str(e)}"
+                f"Could not open file:\n{str(e)}"
+            )
+            return
+        # Tabs cannot change while a file loads
+        self.add_tab(tab, show and self.loader is None)
+        if self.loader is None:
+            self.status_label.setText(status)
+
+    # ==================== Tabs ====================
+
+    def tabs(self):
+        """Every open tab, in tab bar order"""
+        return [self.tab_bar.tabData(i) for i in range(self.tab_bar.count())]
+
+    def tab_index(self, tab):
+        """Index of tab in the tab bar, or -1"""
+        for i in range(self.tab_bar.count()):
+            if self.tab_bar.tabData(i) is tab:
+                return i
+        return -1
+
+    def find_tab(self, path):
+        """The tab a file is open in, if any"""
+        path = os.path.abspath(path)
+        for tab in self.tabs():
+            if tab.path and os.path.abspath(tab.path) == path:
+                return tab
+        return None
+
+    def add_tab(self, tab, show=True):
+        """Add a tab for tab, and show it unless show is False"""
+        index = self.tab_bar.addTab(tab.title())
+        self.tab_bar.setTabData(index, tab)
+        self.tab_bar.setTabToolTip(index, tab.path or "")
+        if show or self.current_tab is None:
+            # The first tab is current as soon as it is added, before
+            # it has its data
+            self.tab_bar.setCurrentIndex(index)
+            self.on_tab_changed(index)
+        return index
+
+    def update_tab_title(self, tab):
+        """Refresh the tab text (modified marker) and, if current, the title"""
+        index = self.tab_index(tab)
+        if index >= 0:
+            self.tab_bar.setTabText(index, tab.title())
+            self.tab_bar.setTabToolTip(index, tab.path or "")
+        if tab is self.current_tab:
+            filename = os.path.basename(tab.path) if tab.path else None
+            self.setWindowTitle(f"NovaLang IDE - {filename or 'Untitled'}")
+            self.file_label.setText(filename or "No file")
+
+    def store_view_state(self):
+        """Remember where the current tab was scrolled to"""
+        tab = self.current_tab
+        if tab is None:
+            return
+        if tab.mapped is not None:
+            tab.scroll = self.mapped_view.verticalScrollBar().value()
+        elif tab.document is not None and tab.document is self.editor.document():
+            tab.cursor_position = self.editor.textCursor().position()
+            tab.scroll = self.editor.verticalScrollBar().value()
+            tab.large = self.editor.large_document
+
+    def on_tab_changed(self, index):
+        """Show the tab at index in the editor or the mapped view"""
+        tab = self.tab_bar.tabData(index) if index >= 0 else None
+        if tab is None or tab is self.current_tab:
+            return
+        self.store_view_state()
+        self.current_tab = tab
+        self.shown_count += 1
+        tab.last_shown = self.shown_count
+        self.live_label.setText("")
+        error = None
+        
+        if tab.mapped is not None:
+            self.mapped_view.set_document(tab.mapped)
+            self.mapped_view.verticalScrollBar().setValue(tab.scroll)
+            self.editor_stack.setCurrentWidget(self.mapped_view)
+        else:
+            unread = tab.document is None and tab.text is None
+            if tab.document is None:
+                document = tab.materialize()
+                document.modificationChanged.connect(
+                    lambda _, t=tab: self.update_tab_title(t)
+                )
+            self.editor.show_document(tab.document, tab.large)
+            self.editor_stack.setCurrentWidget(self.editor)
+            if unread:
+                error = self.start_chunked_load(tab)
+            else:
+                cursor = self.editor.textCursor()
+                cursor.setPosition(
+                    min(tab.cursor_position, tab.document.characterCount() - 1)
+                )
+                self.editor.setTextCursor(cursor)
+                self.editor.verticalScrollBar().setValue(tab.scroll)
+        self.update_tab_title(tab)
+        self.release_documents()
+        if error is not None:
+            # The file went away after its tab was opened
+            self.close_tab(self.tab_index(tab))
+            self.status_label.setText(
+                f"✗ Could not open {os.path.basename(tab.path)}: {error}"
             )
+
+    def release_documents(self):
+        """
+        Turn background tabs back into text, keeping the documents of the
+        most recently shown ones up to LIVE_DOCUMENTS tabs and
+        LIVE_DOCUMENT_CHARS characters; tabs with unsaved changes keep
+        their document (and undo history), as do large files
+        """
+        idle = [
+            tab for tab in self.tabs()
+            if tab.document is not None and tab is not self.current_tab
+            and not tab.large and not tab.is_modified()
+        ]
+        idle.sort(key=lambda tab: tab.last_shown, reverse=True)
+        kept = 0
+        chars = 0
+        for tab in idle:
+            chars += tab.text_bytes()
+            if kept < self.LIVE_DOCUMENTS and chars <= self.LIVE_DOCUMENT_CHARS:
+                kept += 1
+            else:
+                tab.release()
+
+    def close_tab(self, index):
+        """
+        Close the tab at index, asking to save changes
+
+        Returns:
+            False if the user cancelled
+        """
+        tab = self.tab_bar.tabData(index)
+        if tab is None:
+            return False
+        if not self.check_save(tab):
             return False
+        if tab is self.current_tab:
+            self.stop_loading()
+            self.store_view_state()
+            self.current_tab = None
+        if self.tab_bar.count() == 1:
+            self.add_tab(DocumentTab(), show=False)
+        self.tab_bar.removeTab(index)
+        if tab.mapped is not None and self.mapped_view.document is tab.mapped:
+            self.mapped_view.set_document(None)
+        # Read again from disk on reopening: large files, and those
+        # whose load was cut short. Others are kept as text
+        if tab.mapped is not None or tab.large:
+            tab.close()
+            self.closed_tabs.append(tab.path)
+        else:
+            tab.release()
+            self.closed_tabs.append(tab)
+        return True
+
+    def close_current_tab(self):
+        """Close the current tab"""
+        self.close_tab(self.tab_bar.currentIndex())
+
+    def reopen_closed_tab(self):
+        """Open the most recently closed tab again"""
+        while self.closed_tabs:
+            closed = self.closed_tabs.pop()
+            if isinstance(closed, str):
+                self.load_file(closed)
+                return
+            if closed.path and self.find_tab(closed.path):
+                continue
+            self.add_tab(closed, self.loader is None)
+            return
+        self.status_label.setText("No closed tabs")
+
+    def start_chunked_load(self, tab):
+        """
+        Fill the current tab's document from its file, a chunk at a time
+
+        Returns:
+            None, or the error message when the file cannot be opened
+        """
+        loader = ChunkedLoader(self.editor, tab.path, self)
+        loader.progress.connect(self.load_progress.setValue)
+        loader.finished.connect(self.on_load_finished)
+        loader.failed.connect(self.on_load_failed)
+        try:
+            loader.start()
+        except OSError as e:
+            loader.deleteLater()
+            return e.strerror or str(e)
+        self.loader = loader
+        self.tab_bar.setEnabled(False)
+        self.load_progress.setValue(0)
+        self.load_progress.show()
+        self.status_label.setText(f"Opening: {os.path.basename(tab.path)}")
+        return None
+
+    def stop_loading(self):
+        """Cancel a chunked load in progress"""
+        if self.loader is not None:
+            self.loader.cancel()
+            self.loader.deleteLater()
+            self.loader = None
+            self.load_progress.hide()
+            self.tab_bar.setEnabled(True)
+
+    def on_load_finished(self):
+        """Handle the end of a chunked load"""
+        self.stop_loading()
+        if self.current_file:
+            self.status_label.setText(
+                f"Opened: {os.path.basename(self.current_file)}"
+            )
+
+    def on_load_failed(self, message):
+        """Handle a chunked load that could not read the file"""
+        self.stop_loading()
+        # A partial document must not be saved over the file
+        self.current_tab.document.setModified(False)
+        self.close_tab(self.tab_bar.currentIndex())
+        self.status_label.setText("✗ Open failed")
+        QMessageBox.critical(
+            self, "Error",
+            f"Could not open file:\n{message}"
+        )
+
+    def is_mapped(self):
+        """Return True while a large file is shown read-only"""
+        return self.editor_stack.currentWidget() is self.mapped_view
+
+    def active_view(self):
+        """The editor, or the mapped view while it is shown"""
+        return self.mapped_view if self.is_mapped() else self.editor
+
+    def save_file(self):
+        """Save the current file in the background"""
+        return self.save_tab(self.current_tab)
+
+    def save_tab(self, tab):
+        """Save a tab's text in the background"""
+        if tab.mapped is not None or (tab is self.current_tab
+                                      and self.loader is not None):
+            self.status_label.setText(
+                "Large file is read-only" if tab.mapped is not None
+                else "Still loading"
+            )
+            return False
+        if tab.path is None:
+            self.tab_bar.setCurrentIndex(self.tab_index(tab))
+            return self.save_file_as()
+        # Edits made while the snapshot is written mark it modified again
+        self.file_saver.save(tab.path, tab.get_text())
+        if tab.document is not None:
+            tab.document.setModified(False)
+        else:
+            tab.modified = False
+            self.update_tab_title(tab)
+        self.status_label.setText(
+            f"Saving: {os.path.basename(tab.path)}"
+        )
+        return True
+
+    def on_file_saved(self, path):
+        """Report a finished background save"""
+        self.status_label.setText(f"Saved: {os.path.basename(path)}")
+        # The watcher reports it too, but not right away
+        self.workspace.refresh_file(path)
+
+    def on_save_failed(self, path, message):
+        """Report a background save that failed; the document stays modified"""
+        tab = self.find_tab(path)
+        if tab is not None:
+            if tab.document is not None:
+                tab.document.setModified(True)
+            else:
+                tab.modified = True
+                self.update_tab_title(tab)
+        self.status_label.setText(f"✗ Not saved: {os.path.basename(path)}")
+        QMessageBox.critical(
+            self, "Error",
+            f"Could not save file:\n{message}"
+        )
 
     def save_file_as(self):
         """Save the current file with a new name"""
+        if self.is_mapped() or self.loader is not None:
+            return self.save_file()
         file_path, _ = QFileDialog.getSaveFileName(
             self, "Save NovaLang File", "",
             "NovaLang Files (*.nova);;All Files (*.*)"
@@ -295,178 +772,378 @@ class NovaLangIDE(QMainWindow):
             if not file_path.endswith('.nova'):
                 file_path += '.nova'
             self.current_file = file_path
-            filename = os.path.basename(file_path)
-            self.setWindowTitle(f"NovaLang IDE - {filename}")
-            self.file_label.setText(filename)
             return self.save_file()
         return False
 
-    def check_save(self):
-        """Check if the file needs to be saved before proceeding"""
-        if self.editor.document().isModified():
+    def check_save(self, tab=None):
+        """Check if a tab (the current one by default) needs to be saved"""
+        tab = tab or self.current_tab
+        if tab.is_modified():
+            self.tab_bar.setCurrentIndex(self.tab_index(tab))
             reply = QMessageBox.question(
                 self, "Save Changes",
-                "The document has been modified. Save changes?",
+                f"{os.path.basename(tab.path) if tab.path else 'Untitled'} "
+                "has been modified. Save changes?",
                 QMessageBox.StandardButton.Yes | 
                 QMessageBox.StandardButton.No | 
                 QMessageBox.StandardButton.Cancel
             )
             if reply == QMessageBox.StandardButton.Yes:
-                return self.save_file()
+                # The document goes away next, so the save must be done
+                return self.save_tab(tab) and self.file_saver.wait()
             elif reply == QMessageBox.StandardButton.Cancel:
                 return False
         return True
 
+    # ==================== Workspace ====================
+
+    def open_folder(self):
+        """Index every NovaLang file under a folder"""
+        folder = QFileDialog.getExistingDirectory(self, "Open Folder")
+        if folder:
+            self.workspace.open(folder)
+            self.index_label.setText("Index: loading")
+            self.status_label.setText(f"Workspace: {folder}")
+
+    def on_index_progress(self, done, total):
+        """Show how far a scan of the workspace is"""
+        self.index_label.setText(f"Index: {done}/{total} files")
+
+    def on_index_updated(self, files, parsed):
+        """Show the size of the index once it is up to date"""
+        self.index_label.setText(f"Index: {files} files")
+
+    def query_symbols(self, query):
+        """
+        Ask the workspace index about the name at the cursor
+
+        Args:
+            query: WorkspaceIndex.definition_at or references_at, unbound
+
+        Returns:
+            List of Location, or None when the current tab has no
+            editable text
+        """
+        tab = self.current_tab
+        if tab is None or tab.mapped is not None or self.loader is not None:
+            self.status_label.setText("Not available for this file")
+            return None
+        index = self.workspace.index
+        text = None
+        # Unsaved text, and files outside the workspace, are indexed on
+        # the spot; the rest of the workspace comes from the index
+        if (index is None or tab.path is None or tab.is_modified()
+                or tab.path not in index):
+            text = self.editor.get_text()
+            if index is None:
+                index = WorkspaceIndex(os.getcwd())
+        cursor = self.editor.textCursor()
+        try:
+            return query(index, tab.path, cursor.blockNumber() + 1,
+                         cursor.positionInBlock() + 1, text)
+        except Exception as e:
+            # Text the index cannot handle must not take the IDE down
+            self.status_label.setText(f"✗ Symbol lookup failed: {e}")
+            return None
+
+    def go_to_location(self, location):
+        """Open the file of a Location and put the cursor on it"""
+        if location.path is not None:
+            current = self.current_file
+            if current is None or os.path.abspath(current) != location.path:
+                self.load_file(location.path)
+                current = self.current_file
+                if current is None or os.path.abspath(current) != location.path:
+                    return
+        # Mapped files take no cursor; chunked ones are not there yet
+        if self.current_tab.mapped is not None or self.loader is not None:
+            return
+        block = self.editor.document().findBlockByNumber(location.line - 1)
+        if not block.isValid():
+            return
+        cursor = self.editor.textCursor()
+        cursor.setPosition(block.position() + location.col - 1)
+        self.editor.setTextCursor(cursor)
+        self.editor.centerCursor()
+        self.editor.setFocus()
+
+    def describe_location(self, location):
+        """A Location as path:line:col, relative to the workspace"""
+        path = location.path or "Untitled"
+        index = self.workspace.index
+        if index is not None and location.path and \
+                location.path.startswith(os.path.join(index.root, '')):
+            path = os.path.relpath(location.path, index.root)
+        return f"{path}:{location.line}:{location.col}"
+
+    def go_to_definition(self):
+        """Jump to where the name at the cursor is declared"""
+        found = self.query_symbols(WorkspaceIndex.definition_at)
+        if found is None:
+            return
+        if not found:
+            self.status_label.setText("No definition found")
+            return
+        self.go_to_location(found[0])
+        self.status_label.setText(
+            f"{found[0].kind} {found[0].name}: {self.describe_location(found[0])}"
+            + (f" (1 of {len(found)})" if len(found) > 1 else "")
+        )
+
+    def find_references(self):
+        """List the declaration and uses of the name at the cursor"""
+        found = self.query_symbols(WorkspaceIndex.references_at)
+        if found is None:
+            return
+        if not found:
+            self.status_label.setText("No name at the cursor")
+            return
+        # A run in progress keeps its output
+        if not self.compile_runner.is_running():
+            self.output_text.clear()
+        self.output_text.write_message(
+            f"References to {found[0].name}: {len(found)}", "#4ec9b0"
+        )
+        self.output_text.write("".join(
+            f"{self.describe_location(loc)}  {loc.kind}\n" for loc in found
+        ))
+        self.output_text.flush()
+        self.status_label.setText(f"{len(found)} references to {found[0].name}")
+
     # ==================== Compilation ====================
     
     def compile_code_backend(self):
-        """Compile the code using the backend compiler"""
-        if self.current_file is None:
-            self.save_file_as()
-            if self.current_file is None:
-                return
-        
-        # Save file before compiling
-        self.save_file()
+        """Check the code with the backend compiler and run it"""
+        if self.loader is not None:
+            self.status_label.setText("Still loading")
+            return
+        # The backend reads the editor text from stdin, so the file is
+        # only written when it has unsaved changes, and not waited for
+        if self.current_file is not None and self.current_tab.is_modified():
+            self.save_file()
         
         current_dir = os.path.dirname(os.path.abspath(__file__))
         backend_exe = os.path.join(current_dir, "Project2.exe")
         
         if not os.path.exists(backend_exe):
-            self.output_text.setHtml(
-                f'<p style="color: #ff6b6b;"><b>❌ Error:</b> '
-                f'Backend compiler not found</p>'
-                f'<p style="color: #999;">Expected location: {backend_exe}</p>'
+            self.output_text.begin()
+            self.output_text.write_message(
+                "❌ Error: Backend compiler not found", "#ff6b6b"
+            )
+            self.output_text.write_message(
+                f"Expected location: {backend_exe}", "#999999", bold=False
             )
+            self.output_text.end()
             return
         
-        self.output_text.clear()
-        self.editor.clear_error_highlighting()
-        self.status_label.setText("⚙️ Compiling...")
-        self.run_btn.setEnabled(False)
+        view = self.active_view()
+        view.clear_error_highlighting()
+        # Errors are marked in this tab, if it is still shown then
+        self.compile_tab = self.current_tab
         
-        try:
-            result = subprocess.run(
-                [backend_exe, self.current_file],
-                capture_output=True,
-                text=True,
-                timeout=30
+        flags = ["--diagnostics=json", f"--max-errors={self.max_errors}", "-O2", "--run"]
+        if view is self.mapped_view:
+            source = self.mapped_view.source_bytes()
+        else:
+            source = self.editor.get_text().encode('utf-8')
+        stdin = self.program_input.encode('utf-8')
+        key = CompileCache.make_key(source, backend_exe, flags, stdin)
+        cached = self.compile_cache.get(key)
+        self.update_cache_label()
+        if cached is not None:
+            if self.compile_runner.is_running():
+                self.compile_runner.cancel()
+            self.output_text.begin()
+            self.show_compile_result(
+                cached.returncode, cached.stdout, cached.stderr, cached=True
             )
-            
-            output = result.stdout + result.stderr
-            
-            # Try multiple patterns to extract line number
-            line_num = None
-            
-            # First, look for "Error:" line which contains the actual error
-            error_line_match = re.search(r'Error:.*', output, re.IGNORECASE)
-            if error_line_match:
-                error_text = error_line_match.group(0)
-                print(f"DEBUG: Error line found: {error_text}")
-                
-                # Try to extract variable/identifier name from error
-                # Pattern: "undeclared variable 'result'" or similar
-                var_match = re.search(r"['\"](\w+)['\"]", error_text)
-                if var_match:
-                    var_name = var_match.group(1)
-                    print(f"DEBUG: Error involves identifier: {var_name}")
-                    
-                    # Find the line where this identifier appears
-                    # Look for IDENT('var_name') @LINE:COL pattern
-                    ident_pattern = rf"IDENT\(['\"]?{re.escape(var_name)}['\"]?\)\s+@(\d+):\d+"
-                    ident_matches = list(re.finditer(ident_pattern, output))
-                    if ident_matches:
-                        # Get the LAST occurrence of this identifier (where error likely is)
-                        line_num = int(ident_matches[-1].group(1))
-                        print(f"DEBUG: Found '{var_name}' at line {line_num}")
-            
-            # Pattern 2: "at 15:1" in the error line
-            if not line_num and error_line_match:
-                match = re.search(r'at\s+(\d+):\d+', error_line_match.group(0))
-                if match:
-                    line_num = int(match.group(1))
-                    print(f"DEBUG: Found line number in error: {line_num}")
-            
-            # Pattern 3: Look for the LAST non-EOF token before "Error:"
-            if not line_num:
-                # Find all @LINE:COL patterns, excluding EOF
-                matches = list(re.finditer(r"(?!EOF)IDENT.*?@(\d+):\d+", output))
-                if not matches:
-                    matches = list(re.finditer(r"(?!EOF)\w+\([^)]*\)\s+@(\d+):\d+", output))
-                if matches:
-                    # Get the last match before "Error:"
-                    error_pos = output.find('Error:')
-                    if error_pos > 0:
-                        for match in reversed(matches):
-                            if match.start() < error_pos:
-                                line_num = int(match.group(1))
-                                print(f"DEBUG: Found line number from last token before error: {line_num}")
-                                break
-            
-            # Pattern 4: "at 15:1" anywhere in output
-            if not line_num:
-                match = re.search(r'at\s+(\d+):\d+', output)
-                if match:
-                    line_num = int(match.group(1))
-                    print(f"DEBUG: Found line number using 'at LINE:COL': {line_num}")
-            
-            # Pattern 5: "line 4" or "Line 4"
-            if not line_num:
-                match = re.search(r'[Ll]ine\s+(\d+)', output)
-                if match:
-                    line_num = int(match.group(1))
-                    print(f"DEBUG: Found line number using 'line N': {line_num}")
-            
-            # Highlight the error line if found
-            if line_num and result.returncode != 0:
-                self.editor.highlight_error_line(line_num)
-            else:
-                if result.returncode != 0:
-                    print(f"DEBUG: No line number found in output: {output[:200]}")
-            
-            # Format output with colors
-            if result.returncode == 0:
-                self.output_text.setHtml(
-                    f'<p style="color: #4ec9b0;"><b>✓ Compilation Successful</b></p>'
-                    f'<pre style="color: #d4d4d4;">{output}</pre>'
-                )
-                self.status_label.setText("✓ Compilation successful")
-            else:
-                # Show line number in error message if found
-                error_msg = '✗ Compilation Failed'
-                if line_num:
-                    error_msg += f' (Line {line_num})'
-                
-                self.output_text.setHtml(
-                    f'<p style="color: #ff6b6b;"><b>{error_msg}</b></p>'
-                    f'<pre style="color: #f48771;">{output}</pre>'
-                )
-                status_msg = "✗ Compilation failed"
-                if line_num:
-                    status_msg += f" at line {line_num}"
-                self.status_label.setText(status_msg)
-        
-        except subprocess.TimeoutExpired:
-            self.output_text.setHtml(
-                '<p style="color: #ff6b6b;"><b>✗ Error:</b> '
-                'Compilation timed out</p>'
+            return
+        
+        # Starting a new run kills any compile still in flight. "-" reads
+        # the program up to the NUL; take reads what follows it
+        self.output_text.begin()
+        run_id = self.compile_runner.start(
+            backend_exe, flags + ["-"], source + b"\0" + stdin
+        )
+        self.pending_cache_key = (run_id, key)
+
+    def cancel_compile(self):
+        """Cancel the compile in flight"""
+        self.compile_runner.cancel()
+
+    def set_error_limit(self):
+        """Ask for the most errors a compile or live analysis reports"""
+        limit, ok = QInputDialog.getInt(
+            self, "Error Limit", "Stop after this many errors (0 for no limit):",
+            self.max_errors, 0, 10000
+        )
+        if ok:
+            self.max_errors = limit
+            self.editor.set_max_errors(limit)
+
+    def set_program_input(self):
+        """Ask for the lines the program reads with take"""
+        text, ok = QInputDialog.getMultiLineText(
+            self, "Program Input", "One line per take:", self.program_input
+        )
+        if ok:
+            self.program_input = text if not text or text.endswith("\n") else text + "\n"
+
+    def toggle_output_log(self, enabled):
+        """Write the full output of each run to a file the user picks"""
+        path = None
+        if enabled:
+            path, _ = QFileDialog.getSaveFileName(
+                self, "Log Output to File", "output.log",
+                "Log Files (*.log *.txt);;All Files (*)"
             )
-            self.status_label.setText("✗ Timeout")
-        except Exception as e:
-            self.output_text.setHtml(
-                f'<p style="color: #ff6b6b;"><b>✗ Error:</b> {str(e)}</p>'
+            if not path:
+                self.output_log_action.setChecked(False)
+                return
+        self.output_text.set_log_path(path)
+        self.status_label.setText(
+            f"Logging output to {os.path.basename(path)}" if path
+            else "Output log off"
+        )
+
+    def set_compiling(self, compiling):
+        """Toggle the busy indicator and the Cancel controls"""
+        self.compile_progress.setVisible(compiling)
+        self.cancel_btn.setEnabled(compiling)
+        self.cancel_action.setEnabled(compiling)
+
+    def on_compile_started(self, run_id):
+        """Handle the start of a backend run"""
+        self.set_compiling(True)
+        self.status_label.setText("⚙️ Running...")
+
+    def on_compile_cancelled(self, run_id):
+        """Handle a run cancelled by the user"""
+        self.set_compiling(False)
+        self.output_text.write_message("■ Run cancelled", "#cca700")
+        self.output_text.end()
+        self.status_label.setText("■ Cancelled")
+
+    def on_compile_timed_out(self, run_id):
+        """Handle a run killed by the timeout"""
+        self.set_compiling(False)
+        self.output_text.write_message("✗ Error: Run timed out", "#ff6b6b")
+        self.output_text.end()
+        self.status_label.setText("✗ Timeout")
+
+    def on_compile_failed(self, run_id, message):
+        """Handle a backend that could not be started or crashed"""
+        self.set_compiling(False)
+        self.output_text.write_message(f"✗ Error: {message}", "#ff6b6b")
+        self.output_text.end()
+        self.status_label.setText("✗ Error")
+
+    def on_compile_output(self, run_id, text):
+        """Show program output as the running program writes it"""
+        self.output_text.write(text)
+
+    def update_cache_label(self):
+        """Show compile cache hit/miss counts in the status bar"""
+        self.cache_label.setText(
+            f"Cache: {self.compile_cache.hits} hit / "
+            f"{self.compile_cache.misses} miss"
+        )
+
+    def on_compile_finished(self, run_id, returncode, stdout, stderr):
+        """Handle the results of the current backend run"""
+        self.set_compiling(False)
+        if self.pending_cache_key and self.pending_cache_key[0] == run_id:
+            # Output too long to keep is not cached; a rerun streams it
+            if self.compile_runner.output_complete:
+                self.compile_cache.put(
+                    self.pending_cache_key[1],
+                    CompileResult(returncode, stdout, stderr)
+                )
+            self.pending_cache_key = None
+        # The program output is already in the console
+        self.show_compile_result(returncode, "", stderr)
+
+    def show_compile_result(self, returncode, stdout, stderr, cached=False):
+        """
+        Render a backend result in the output panel and status bar
+
+        Args:
+            stdout: Program output not yet in the console (a cached
+                run's), written ahead of the result
+        """
+        diagnostics, other = parse_diagnostics(stderr)
+        errors = [d for d in diagnostics if d.is_error()]
+        console = self.output_text
+        console.write(stdout)
+        if other:
+            console.write("\n".join(other) + "\n")
+        
+        # Highlight every error the backend located, scrolling to the first
+        lines = [d.line for d in errors if d.line > 0]
+        line_num = lines[0] if lines else None
+        if lines and returncode != 0 and self.compile_tab is self.current_tab:
+            self.active_view().highlight_error_lines(lines)
+        
+        # Status after the output, colored
+        if returncode == 0:
+            console.write_message("✓ Program Finished", "#4ec9b0")
+            console.end()
+            self.status_label.setText(
+                "✓ Program finished" + (" (cached)" if cached else "")
             )
-            self.status_label.setText("✗ Error")
-        finally:
-            self.run_btn.setEnabled(True)
+        else:
+            # Show line number in error message if found; a runtime error
+            # stops a program that compiled
+            stopped = any(d.stage == "runtime" for d in errors)
+            error_msg = '✗ Program Stopped' if stopped else '✗ Compilation Failed'
+            if len(errors) > 1:
+                error_msg += f' ({len(errors)} errors, first at line {line_num})'
+            elif line_num:
+                error_msg += f' (Line {line_num})'
+            
+            # Notes (such as the error limit) follow the errors
+            console.write_message(error_msg, "#ff6b6b")
+            for d in diagnostics:
+                where = f" (line {d.line}, col {d.column})" if d.line > 0 else ""
+                console.write_message(
+                    f'• {d.stage}{where}: '
+                    f'{"" if d.is_error() else d.severity + ": "}'
+                    f'{d.message}',
+                    "#f48771", bold=False
+                )
+            console.end()
+            status_msg = "✗ Program stopped" if stopped else "✗ Compilation failed"
+            if line_num:
+                status_msg += f" at line {line_num}"
+            if cached:
+                status_msg += " (cached)"
+            self.status_label.setText(status_msg)
 
     # ==================== Themes ====================
     
+    def toggle_live_diagnostics(self, enabled):
+        """Turn as-you-type diagnostics on or off"""
+        self.editor.set_live_diagnostics(enabled)
+        if not enabled:
+            self.live_label.setText("")
+
+    def on_live_diagnostics_changed(self, diagnostics):
+        """Summarize the latest background analysis in the status bar"""
+        errors = [d for d in diagnostics if d.is_error()]
+        if errors:
+            more = f" (+{len(errors) - 1} more)" if len(errors) > 1 else ""
+            self.live_label.setText(
+                f"✗ Line {errors[0].line}: {errors[0].message}{more}"
+            )
+        else:
+            self.live_label.setText("✓ No problems")
+
     def apply_light_theme(self):
         """Apply light theme to the IDE"""
         self.editor.apply_light_theme()
+        self.mapped_view.apply_light_theme()
         self.output_text.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #ffffff;
                 color: #333333;
                 border: none;
@@ -503,8 +1180,9 @@ class NovaLangIDE(QMainWindow):
     def apply_dark_theme(self):
         """Apply dark theme to the IDE"""
         self.editor.apply_dark_theme()
+        self.mapped_view.apply_dark_theme()
         self.output_text.setStyleSheet("""
-            QTextEdit {
+            QPlainTextEdit {
                 background-color: #1e1e1e;
                 color: #d4d4d4;
                 border: none;
@@ -555,7 +1233,7 @@ class NovaLangIDE(QMainWindow):
         """Load sample NovaLang code into the editor"""
         sample = """start
 # Welcome to NovaLang IDE!
-# Press F5 or click Run to compile
+# Press F5 or click Run to run it
 
 num count = 10
 text greeting = "Hello, NovaLang!"
@@ -580,14 +1258,25 @@ show result
 
 end
 """
-        self.editor.set_text(sample)
+        self.add_tab(DocumentTab(text=sample))
 
     def closeEvent(self, event):
         """Handle window close event"""
-        if self.check_save():
-            event.accept()
-        else:
-            event.ignore()
+        for tab in self.tabs():
+            if not self.check_save(tab):
+                event.ignore()
+                return
+        self.compile_runner.cancel()
+        self.output_text.end()
+        self.stop_loading()
+        self.mapped_view.set_document(None)
+        for tab in self.tabs():
+            if tab.mapped is not None:
+                tab.close()
+        self.editor.stop_live_analysis()
+        self.file_saver.stop()
+        self.workspace.stop()
+        event.accept()
 
 
 # ==================== Main ====================
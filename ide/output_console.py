@@ -0,0 +1,183 @@
+# File: ide/output_console.py
+"""
+Streaming output panel for NovaLang IDE
+"""
+
+from PyQt6.QtWidgets import QPlainTextEdit
+from PyQt6.QtCore import QTimer
+from PyQt6.QtGui import QColor, QFont, QTextCharFormat, QTextCursor
+
+
+class OutputConsole(QPlainTextEdit):
+    """
+    Program output, appended as it arrives and kept to the last lines.
+
+    write() only queues text; it reaches the document in one insertion
+    per FLUSH_MS, as plain text, so nothing a program prints is read as
+    markup. The document is a ring buffer of max_lines lines
+    (maximumBlockCount), lines longer than MAX_LINE_CHARS are shown
+    wrapped onto several, and text queued faster than it is shown is
+    trimmed to what would remain on screen, so memory stays bounded
+    however much a program prints. With a log file set, every run's
+    full output, messages included, is also written there.
+    """
+
+    FLUSH_MS = 50
+    MAX_LINE_CHARS = 1024
+    PENDING_CHARS = 1 << 22
+
+    def __init__(self, max_lines=10000, parent=None):
+        super().__init__(parent)
+        self.setReadOnly(True)
+        self.setUndoRedoEnabled(False)
+        self.setFont(QFont(
+            "Consolas" if QFont("Consolas").exactMatch() else "Courier New",
+            10
+        ))
+        self.max_lines = max_lines
+        self.setMaximumBlockCount(max_lines)
+        self.pending = []
+        self.pending_chars = 0
+        # Characters of the current last line, for MAX_LINE_CHARS
+        self.line_chars = 0
+        self.log_path = None
+        self.log_file = None
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(self.FLUSH_MS)
+        self.flush_timer.timeout.connect(self.flush)
+
+    # ---------- log file ----------
+
+    def set_log_path(self, path):
+        """Also write each run's full output to path (None: stop)"""
+        self.close_log()
+        self.log_path = path
+
+    def end(self):
+        """Finish a run: show what is queued and close the log"""
+        self.flush()
+        self.close_log()
+
+    def close_log(self):
+        if self.log_file is not None:
+            self.log_file.close()
+            self.log_file = None
+
+    # ---------- output ----------
+
+    def begin(self):
+        """Start the output of a new run: clear, and restart the log"""
+        self.clear()
+        self.close_log()
+        if self.log_path:
+            try:
+                self.log_file = open(self.log_path, 'w', encoding='utf-8')
+            except OSError as e:
+                self.write_message(f"Output log not written: {e}", "#cca700")
+
+    def write(self, text):
+        """Queue program output to be shown"""
+        if not text:
+            return
+        if self.log_file is not None:
+            self.log_file.write(text)
+        self.pending.append(text)
+        self.pending_chars += len(text)
+        if self.pending_chars > self.PENDING_CHARS:
+            # Only the last max_lines lines would survive the ring anyway
+            self._trim_pending()
+        if not self.flush_timer.isActive():
+            self.flush_timer.start()
+
+    def write_message(self, text, color, bold=True):
+        """Show a line of IDE status after the output so far"""
+        self.flush()
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor(color))
+        if bold:
+            fmt.setFontWeight(QFont.Weight.Bold)
+        text = ("\n" if self.line_chars else "") + text + "\n"
+        if self.log_file is not None:
+            self.log_file.write(text)
+        self._insert(text, fmt)
+        self.line_chars = 0
+
+    def flush(self):
+        """Show the queued output now"""
+        self.flush_timer.stop()
+        if self.log_file is not None:
+            self.log_file.flush()
+        if not self.pending:
+            return
+        # Never insert more than the ring keeps
+        self._trim_pending()
+        text = self.pending[0]
+        self.pending = []
+        self.pending_chars = 0
+        self._insert(self._wrap_long_lines(text), QTextCharFormat())
+
+    def clear(self):
+        self.flush_timer.stop()
+        self.pending = []
+        self.pending_chars = 0
+        self.line_chars = 0
+        super().clear()
+
+    def _trim_pending(self):
+        text = "".join(self.pending)
+        keep = self.max_lines * self.MAX_LINE_CHARS
+        dropped = len(text) > keep
+        lines = text[-keep:].split("\n")
+        if len(lines) > self.max_lines:
+            lines = lines[-self.max_lines:]
+            dropped = True
+        text = "\n".join(lines)
+        if dropped and self.line_chars:
+            # The dropped text ended the line shown last
+            text = "\n" + text
+        self.pending = [text]
+        self.pending_chars = len(text)
+
+    def _wrap_long_lines(self, text):
+        limit = self.MAX_LINE_CHARS
+        lines = text.split("\n")
+        if self.line_chars + len(lines[0]) <= limit and all(
+                len(line) <= limit for line in lines[1:]):
+            self.line_chars = (self.line_chars + len(text)
+                               if len(lines) == 1 else len(lines[-1]))
+            return text
+        pieces = []
+        used = self.line_chars
+        for n, line in enumerate(lines):
+            if n:
+                pieces.append("\n")
+                used = 0
+            while used + len(line) > limit:
+                pieces.append(line[:limit - used])
+                pieces.append("\n")
+                line = line[limit - used:]
+                used = 0
+            pieces.append(line)
+            used += len(line)
+        self.line_chars = used
+        return "".join(pieces)
+
+    def _insert(self, text, fmt):
+        bar = self.verticalScrollBar()
+        follow = bar.value() == bar.maximum()
+        document = self.document()
+        cursor = QTextCursor(document)
+        overflow = document.blockCount() + text.count("\n") - self.max_lines
+        if overflow >= document.blockCount():
+            document.clear()
+        elif overflow > 0:
+            # One removal instead of letting the ring evict blocks one by
+            # one; the lines that stay keep their formats
+            cursor.movePosition(QTextCursor.MoveOperation.NextBlock,
+                                QTextCursor.MoveMode.KeepAnchor, overflow)
+            cursor.removeSelectedText()
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.insertText(text, fmt)
+        if follow:
+            bar.setValue(bar.maximum())
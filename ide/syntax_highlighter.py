@@ -3,28 +3,163 @@
 Syntax highlighter for NovaLang
 """
 
-from PyQt6.QtGui import QSyntaxHighlighter, QTextCharFormat, QBrush, QColor, QFont
-from PyQt6.QtCore import QRegularExpression
+import re
+from array import array
+
+from PyQt6.QtCore import QObject, QTimer
+from PyQt6.QtGui import (
+    QSyntaxHighlighter, QTextBlockUserData, QTextCharFormat, QTextLayout,
+    QBrush, QColor, QFont
+)
+
+
+# Token kinds produced by scan_block(), indexed into the theme's token colors
+KEYWORD, NUMBER, STRING, COMMENT, OPERATOR, FUNCTION = range(6)
+KIND_NAMES = ('keyword', 'number', 'string', 'comment', 'operator', 'function')
+
+# Block states: a string literal may run across lines, as in the backend lexer
+STATE_NORMAL = -1
+STATE_IN_STRING = 1
+
+KEYWORDS = (
+    'start', 'end', 'show', 'take', 'when', 'elsewhen',
+    'else', 'loop', 'break', 'func', 'back', 'num',
+    'text', 'flag', 'true', 'false', 'to'
+)
+
+# One alternation for the whole token set, compiled once per process.
+# Plain identifiers are deliberately not matched: the regex engine skips
+# them without returning to Python, and the \b anchors keep keywords,
+# calls and numbers from matching inside a longer identifier. Keywords are
+# case-insensitive, as in the backend lexer.
+TOKEN_PATTERN = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<string>"(?:[^"\\]|\\.)*(?P<closed>")?(?:\\$)?)
+  | (?P<keyword>\b(?i:%s)\b)
+  | (?P<function>\b[A-Za-z_][A-Za-z0-9_]*(?=\s*\())
+  | (?P<number>\b[0-9]+)
+  | (?P<operator>==|!=|>=|<=|[-+*/=<>])
+""" % "|".join(sorted(KEYWORDS, key=len, reverse=True)), re.VERBOSE)
+
+# Remainder of a string literal continued from the previous block
+STRING_TAIL_PATTERN = re.compile(r'(?:[^"\\]|\\.)*"')
+
+_GROUP_KIND = {
+    TOKEN_PATTERN.groupindex['comment']: COMMENT,
+    TOKEN_PATTERN.groupindex['string']: STRING,
+    TOKEN_PATTERN.groupindex['keyword']: KEYWORD,
+    TOKEN_PATTERN.groupindex['function']: FUNCTION,
+    TOKEN_PATTERN.groupindex['number']: NUMBER,
+    TOKEN_PATTERN.groupindex['operator']: OPERATOR,
+}
+
+
+def scan_block(text, state=STATE_NORMAL):
+    """
+    Classify one line of NovaLang source in a single pass
+
+    Args:
+        text: The text of the block
+        state: Block state left by the previous block
+
+    Returns:
+        (list of (start, length, kind) spans, block state for the next block)
+    """
+    spans = []
+    pos = 0
+    if state == STATE_IN_STRING:
+        match = STRING_TAIL_PATTERN.match(text)
+        if match is None:
+            spans.append((0, len(text), STRING))
+            return spans, STATE_IN_STRING
+        pos = match.end()
+        spans.append((0, pos, STRING))
+
+    group_kind = _GROUP_KIND
+    for match in TOKEN_PATTERN.finditer(text, pos):
+        start, end = match.span()
+        kind = group_kind[match.lastindex]
+        spans.append((start, end - start, kind))
+        if kind == STRING and match.group('closed') is None:
+            return spans, STATE_IN_STRING
+    return spans, STATE_NORMAL
+
+
+# Formats per set of theme colors, shared by every highlighter
+_FORMATS = {}
+
+
+def make_formats(colors):
+    """
+    One QTextCharFormat per token kind, built once per process for each
+    set of colors and shared by every highlighter using it; do not
+    modify the formats
+
+    Args:
+        colors: Theme token colors, as hex strings or QColor
+
+    Returns:
+        List of formats indexed by token kind
+    """
+    key = tuple(QColor(colors[name]).rgba() for name in KIND_NAMES)
+    formats = _FORMATS.get(key)
+    if formats is None:
+        formats = []
+        for name in KIND_NAMES:
+            fmt = QTextCharFormat()
+            fmt.setForeground(QBrush(QColor(colors[name])))
+            if name == 'keyword':
+                fmt.setFontWeight(QFont.Weight.Bold)
+            formats.append(fmt)
+        _FORMATS[key] = formats
+    return formats
+
+
+class BlockTokens(QTextBlockUserData):
+    """
+    Token classification cached on a block
+
+    spans is a flat array of (start, length, kind) triples. The cache is
+    valid while the block text (by hash) and the incoming block state are
+    unchanged, so a rehighlight for a theme change only re-applies formats.
+    generation is the ViewportHighlighter pass that last applied them.
+    """
+
+    def __init__(self, text_hash, in_state, spans, out_state):
+        super().__init__()
+        self.text_hash = text_hash
+        self.in_state = in_state
+        self.spans = spans
+        self.out_state = out_state
+        self.generation = 0
+
+
+def scan_to_array(text, in_state):
+    """scan_block() with the spans packed into a flat array"""
+    triples, state = scan_block(text, in_state)
+    spans = array('I')
+    for span in triples:
+        spans.extend(span)
+    return spans, state
 
 
 class NovaLangHighlighter(QSyntaxHighlighter):
     """Syntax highlighter for NovaLang programming language"""
-    
+
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.highlighting_rules = []
+        self.formats = []
         self.theme_colors = {}
-        
+
         # Set default colors (will be overridden by theme)
         from themes import get_theme
         theme = get_theme("dark")
         self.set_theme_colors(theme['tokens'])
-        self.setup_rules()
 
     def set_theme_colors(self, colors):
         """
         Set colors for syntax highlighting from theme
-        
+
         Args:
             colors: Dictionary mapping token types to color values
         """
@@ -36,81 +171,138 @@ class NovaLangHighlighter(QSyntaxHighlighter):
             else:
                 # Assume it's already a QColor
                 self.theme_colors[key] = value
-        self.setup_rules()
-
-    def setup_rules(self):
-        """Setup highlighting rules with current theme colors"""
-        self.highlighting_rules = []
-
-        # Keywords
-        keyword_format = QTextCharFormat()
-        keyword_format.setForeground(QBrush(self.theme_colors["keyword"]))
-        keyword_format.setFontWeight(QFont.Weight.Bold)
-        
-        keywords = [
-            'start', 'end', 'show', 'take', 'when', 'elsewhen', 
-            'else', 'loop', 'break', 'func', 'back', 'num', 
-            'text', 'flag', 'true', 'false', 'to'
-        ]
-        
-        for keyword in keywords:
-            pattern = QRegularExpression(r"\b" + keyword + r"\b")
-            self.highlighting_rules.append((pattern, keyword_format))
-
-        # Numbers
-        number_format = QTextCharFormat()
-        number_format.setForeground(QBrush(self.theme_colors["number"]))
-        self.highlighting_rules.append(
-            (QRegularExpression(r"\b[0-9]+\b"), number_format)
-        )
-
-        # Strings
-        string_format = QTextCharFormat()
-        string_format.setForeground(QBrush(self.theme_colors["string"]))
-        self.highlighting_rules.append(
-            (QRegularExpression(r'"[^"]*"'), string_format)
-        )
-
-        # Comments
-        comment_format = QTextCharFormat()
-        comment_format.setForeground(QBrush(self.theme_colors["comment"]))
-        self.highlighting_rules.append(
-            (QRegularExpression(r'#.*'), comment_format)
-        )
-
-        # Operators
-        operator_format = QTextCharFormat()
-        operator_format.setForeground(QBrush(self.theme_colors["operator"]))
-        
-        operators = [
-            r'\+', r'-', r'\*', r'/', r'=', r'==', 
-            r'!=', r'>', r'<', r'>=', r'<='
-        ]
-        
-        for op in operators:
-            pattern = QRegularExpression(op)
-            self.highlighting_rules.append((pattern, operator_format))
-
-        # Functions (identifiers followed by parentheses)
-        function_format = QTextCharFormat()
-        function_format.setForeground(QBrush(self.theme_colors["function"]))
-        self.highlighting_rules.append(
-            (QRegularExpression(r'\b[A-Za-z_][A-Za-z0-9_]*\s*(?=\()'), function_format)
-        )
+        self.setup_formats()
+
+    def setup_formats(self):
+        """Build one QTextCharFormat per token kind from the theme colors"""
+        self.formats = make_formats(self.theme_colors)
 
     def highlightBlock(self, text):
         """
         Apply syntax highlighting to a block of text
-        
+
         Args:
             text: The text block to highlight
         """
-        for pattern, fmt in self.highlighting_rules:
-            match_iterator = pattern.globalMatch(text)
-            while match_iterator.hasNext():
-                match = match_iterator.next()
-                self.setFormat(
-                    match.capturedStart(), 
-                    match.capturedLength(), 
-                    fmt
-                )
\ No newline at end of file
+        in_state = self.previousBlockState()
+        text_hash = hash(text)
+        data = self.currentBlockUserData()
+        if (isinstance(data, BlockTokens) and data.text_hash == text_hash
+                and data.in_state == in_state):
+            spans = data.spans
+            state = data.out_state
+        else:
+            spans, state = scan_to_array(text, in_state)
+            self.setCurrentBlockUserData(
+                BlockTokens(text_hash, in_state, spans, state)
+            )
+
+        formats = self.formats
+        set_format = self.setFormat
+        for i in range(0, len(spans), 3):
+            set_format(spans[i], spans[i + 1], formats[spans[i + 2]])
+        # Qt only moves on to the next block when this state changes
+        self.setCurrentBlockState(state)
+
+
+class ViewportHighlighter(QObject):
+    """
+    Highlights only the blocks on screen, for documents too large to
+    highlight up front.
+
+    NovaLangHighlighter formats every block when the text is set, which
+    for a large document costs seconds before the window responds. This
+    one formats the visible blocks plus MARGIN blocks on either side,
+    after each scroll, resize or edit, so blocks are formatted as they
+    come into view. A string literal running in from an unvisited region
+    is not seen until that region has been shown once.
+
+    It has the same set_theme_colors()/rehighlight() interface as
+    NovaLangHighlighter; detach() disconnects it from the editor.
+    """
+
+    MARGIN = 50
+
+    def __init__(self, editor):
+        super().__init__(editor)
+        self.editor = editor
+        self.formats = []
+        # Bumped by rehighlight() so every block picks up new formats
+        self.generation = 1
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self.highlight_visible)
+        editor.updateRequest.connect(self.schedule)
+
+        from themes import get_theme
+        self.set_theme_colors(get_theme("dark")['tokens'])
+
+    def set_theme_colors(self, colors):
+        """Use the given theme token colors from the next pass on"""
+        self.formats = make_formats(colors)
+
+    def rehighlight(self):
+        """Re-apply formats to the visible blocks"""
+        self.generation += 1
+        self.highlight_visible()
+
+    def detach(self):
+        """Stop following the editor"""
+        self.timer.stop()
+        self.editor.updateRequest.disconnect(self.schedule)
+        self.deleteLater()
+
+    def schedule(self, *_):
+        # updateRequest fires during painting; format once it is over
+        self.timer.start()
+
+    def highlight_visible(self):
+        """Format the visible blocks and the margin around them"""
+        editor = self.editor
+        doc = editor.document()
+        first = editor.firstVisibleBlock()
+        if not first.isValid():
+            return
+        rows = editor.viewport().height() // max(1, editor.fontMetrics().height())
+        block = doc.findBlockByNumber(max(0, first.blockNumber() - self.MARGIN))
+        count = rows + 1 + 2 * self.MARGIN
+
+        data = block.previous().userData()
+        state = data.out_state if isinstance(data, BlockTokens) else STATE_NORMAL
+        formats = self.formats
+        dirty_start = dirty_end = -1
+        while block.isValid() and count > 0:
+            count -= 1
+            text = block.text()
+            text_hash = hash(text)
+            data = block.userData()
+            if (isinstance(data, BlockTokens) and data.text_hash == text_hash
+                    and data.in_state == state):
+                if data.generation == self.generation:
+                    state = data.out_state
+                    block = block.next()
+                    continue
+            else:
+                spans, out_state = scan_to_array(text, state)
+                data = BlockTokens(text_hash, state, spans, out_state)
+                block.setUserData(data)
+            data.generation = self.generation
+            spans = data.spans
+            ranges = []
+            for i in range(0, len(spans), 3):
+                r = QTextLayout.FormatRange()
+                r.start = spans[i]
+                r.length = spans[i + 1]
+                r.format = formats[spans[i + 2]]
+                ranges.append(r)
+            block.layout().setFormats(ranges)
+            if dirty_start < 0:
+                dirty_start = block.position()
+            dirty_end = block.position() + block.length()
+            state = data.out_state
+            block = block.next()
+        if dirty_start >= 0:
+            # Relayout and repaint; this is not an edit, so neither the
+            # modified flag nor live analysis is touched
+            doc.markContentsDirty(dirty_start, dirty_end - dirty_start)
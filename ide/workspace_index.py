@@ -0,0 +1,716 @@
+# File: ide/workspace_index.py
+"""
+Persistent symbol index of the .nova files under a workspace folder
+"""
+
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+
+from PyQt6.QtCore import QObject, QFileSystemWatcher, pyqtSignal
+
+# The in-process front end lives in the nova_lang package at the repo root
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+from nova_lang.ast_nodes import (  # noqa: E402
+    Assign, BinOp, FuncCall, FuncDef, Identifier, Loop, Show, Take, UnaryOp,
+    VarDecl, When
+)
+from nova_lang.diagnostics import CompileError, LexerError  # noqa: E402
+from nova_lang.lexer import Lexer  # noqa: E402
+from nova_lang.parser import Parser  # noqa: E402
+from nova_lang.token import TokenType  # noqa: E402
+
+# Bumped whenever the layout of the saved index changes
+INDEX_VERSION = 1
+
+# Declaration kinds, as named by SemanticAnalyzer's symbol records
+VARIABLE_KINDS = ("var", "param", "loopvar")
+
+
+def content_hash(data):
+    """Hash of a file's bytes, to tell real changes from touched files"""
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class Location:
+    """A declaration or use of a name in a file (1-based line and column)"""
+
+    __slots__ = ('path', 'name', 'kind', 'line', 'col')
+
+    def __init__(self, path, name, kind, line, col):
+        self.path = path
+        self.name = name
+        self.kind = kind
+        self.line = line
+        self.col = col
+
+    def __repr__(self):
+        return f"{self.path}:{self.line}:{self.col}: {self.kind} {self.name}"
+
+
+def _tokens(text):
+    """Tokens of text; a line the lexer rejects ends the file early"""
+    while True:
+        try:
+            return Lexer(text).tokenize()
+        except LexerError as e:
+            # Cut before that line; a string that closes on it now runs
+            # to the end of the prefix, so that is cut in turn. The
+            # parser recovers from the missing 'end'
+            cut = 0
+            for _ in range(e.line - 1):
+                cut = text.index('\n', cut) + 1
+            text = text[:cut]
+
+
+def _param_positions(tokens):
+    """(line, col) of each function name -> [(param, line, col)]"""
+    positions = {}
+    IDENT = TokenType.IDENT
+    for i, tok in enumerate(tokens):
+        if (tok.type is not TokenType.FUNC or i + 2 >= len(tokens)
+                or tokens[i + 1].type is not IDENT
+                or tokens[i + 2].type is not TokenType.LPAREN):
+            continue
+        params = []
+        j = i + 3
+        while j < len(tokens) and tokens[j].type in (IDENT, TokenType.COMMA):
+            if tokens[j].type is IDENT:
+                params.append((tokens[j].value, tokens[j].line, tokens[j].col))
+            j += 1
+        name = tokens[i + 1]
+        positions[(name.line, name.col)] = params
+    return positions
+
+
+class FileSymbols:
+    """
+    Declarations and uses of names in one file.
+
+    symbols: [name, kind, line, col] per declaration, kind one of
+    "func", "param", "var" and "loopvar".
+    refs: name -> [kind, line, col, target] per use of that name, kind
+    "call" or "var"; target is the index in symbols of the declaration
+    it resolves to under the language's scope rules, or -1. Grouped by
+    name so the index can hand the lists on as they are.
+    """
+
+    __slots__ = ('symbols', 'refs')
+
+    def __init__(self, symbols=None, refs=None):
+        self.symbols = symbols if symbols is not None else []
+        self.refs = refs if refs is not None else {}
+
+    @classmethod
+    def from_text(cls, text):
+        """Index source text, using what the parser recovers from errors"""
+        tokens = _tokens(text)
+        try:
+            program = Parser(tokens, max_errors=0).parse()
+        except CompileError:
+            return cls()
+        collector = _Collector(_param_positions(tokens))
+        collector.block(program.statements, scope=False)
+        collector.resolve_calls()
+        return cls(collector.symbols, collector.refs)
+
+    def occurrence_at(self, line, col):
+        """
+        The declaration or use covering a position
+
+        Returns:
+            (name, is a function, index of its declaration or -1), or
+            None
+        """
+        for index, (name, kind, l, c) in enumerate(self.symbols):
+            # The cursor may also sit just after the name
+            if l == line and c <= col <= c + len(name):
+                return name, kind == "func", index
+        for name, uses in self.refs.items():
+            for kind, l, c, target in uses:
+                if l == line and c <= col <= c + len(name):
+                    return name, kind == "call", target
+        return None
+
+    def uses_of(self, name, index):
+        """Uses of name that resolve to the declaration at index"""
+        return [use for use in self.refs.get(name, ()) if use[3] == index]
+
+
+class _Collector:
+    """Walks a Program the way SemanticAnalyzer scopes it"""
+
+    def __init__(self, params):
+        self.params = params
+        self.symbols = []
+        self.refs = {}
+        self.scopes = [{}]
+
+    def declare(self, name, kind, line, col):
+        index = len(self.symbols)
+        self.symbols.append([name, kind, line, col])
+        # The first declaration in a scope stays in effect
+        self.scopes[-1].setdefault(name, index)
+        return index
+
+    def use(self, name, line, col):
+        for scope in reversed(self.scopes):
+            index = scope.get(name)
+            if index is not None:
+                break
+        else:
+            index = -1
+        self.refs.setdefault(name, []).append(["var", line, col, index])
+
+    def resolve_calls(self):
+        """Point calls at the first function of that name in the file"""
+        funcs = {}
+        for index, (name, kind, _, _) in enumerate(self.symbols):
+            if kind == "func":
+                funcs.setdefault(name, index)
+        for name, uses in self.refs.items():
+            for use in uses:
+                if use[0] == "call":
+                    use[3] = funcs.get(name, -1)
+            uses.sort(key=lambda use: (use[1], use[2]))
+
+    def block(self, stmts, scope=True):
+        if scope:
+            self.scopes.append({})
+        for stmt in stmts:
+            self.statement(stmt)
+        if scope:
+            self.scopes.pop()
+
+    def statement(self, node):
+        cls = type(node)
+        if cls is VarDecl:
+            self.expr(node.expr)
+            self.declare(node.name, "var", node.line, node.col)
+        elif cls is Assign:
+            self.expr(node.expr)
+            self.use(node.name, node.line, node.col)
+        elif cls is Take:
+            self.use(node.name, node.line, node.col)
+        elif cls is When:
+            for cond, body in node.cases:
+                self.expr(cond)
+                self.block(body)
+            self.block(node.else_block)
+        elif cls is Loop:
+            self.expr(node.start_expr)
+            self.expr(node.end_expr)
+            self.scopes.append({})
+            self.declare(node.var, "loopvar", node.line, node.col)
+            self.block(node.body, scope=False)
+            self.scopes.pop()
+        elif cls is FuncDef:
+            self.declare(node.name, "func", node.line, node.col)
+            self.scopes.append({})
+            for name, line, col in self.params.get((node.line, node.col), ()):
+                self.declare(name, "param", line, col)
+            self.block(node.body, scope=False)
+            self.expr(node.back_expr)
+            self.scopes.pop()
+        elif cls is Show:
+            self.expr(node.expr)
+        elif cls is FuncCall:
+            self.expr(node)
+
+    def expr(self, node):
+        # Long operator chains nest deeply, so no recursion here
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            cls = type(node)
+            if cls is Identifier:
+                self.use(node.name, node.line, node.col)
+            elif cls is BinOp:
+                stack.append(node.right)
+                stack.append(node.left)
+            elif cls is UnaryOp:
+                stack.append(node.expr)
+            elif cls is FuncCall:
+                self.refs.setdefault(node.name, []).append(
+                    ["call", node.line, node.col, -1]
+                )
+                stack.extend(reversed(node.args))
+
+
+class _Entry:
+    """What the index knows about one file"""
+
+    __slots__ = ('hash', 'mtime_ns', 'size', 'symbols')
+
+    def __init__(self, hash, mtime_ns, size, symbols):
+        self.hash = hash
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.symbols = symbols
+
+    def names(self):
+        """Names declared in the file"""
+        return {symbol[0] for symbol in self.symbols.symbols}
+
+
+class WorkspaceIndex:
+    """
+    Declarations and uses of names across every .nova file under root.
+
+    Each file is indexed on its own (a NovaLang program is one file), and
+    inverted maps from a name to the files and positions that declare or
+    use it answer workspace-wide queries without touching the files.
+
+    A file is read again only when its size or mtime changed, and parsed
+    again only when the hash of its bytes changed. The index is saved to
+    cache_path as JSON lines, one per file, and loaded from there on the
+    next start, so only files changed in between are parsed. Queries and
+    updates may come from different threads.
+    """
+
+    def __init__(self, root, cache_path=None):
+        self.root = os.path.abspath(root)
+        self.cache_path = cache_path
+        self.parsed = 0
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._files = {}
+        # name -> paths that declare it
+        self._defs = {}
+        # name -> {path: uses in that file, as in FileSymbols.refs}
+        self._uses = {}
+
+    def __len__(self):
+        return len(self._files)
+
+    def __contains__(self, path):
+        return os.path.abspath(path) in self._files
+
+    def paths(self):
+        """Every indexed file"""
+        with self._lock:
+            return sorted(self._files)
+
+    # Updates
+
+    def _unlink(self, path):
+        entry = self._files.pop(path, None)
+        if entry is None:
+            return
+        for name in entry.names():
+            paths = self._defs[name]
+            paths.discard(path)
+            if not paths:
+                del self._defs[name]
+        for name in entry.symbols.refs:
+            by_path = self._uses[name]
+            del by_path[path]
+            if not by_path:
+                del self._uses[name]
+
+    def _link(self, path, entry):
+        self._unlink(path)
+        self._files[path] = entry
+        for name in entry.names():
+            self._defs.setdefault(name, set()).add(path)
+        for name, uses in entry.symbols.refs.items():
+            self._uses.setdefault(name, {})[path] = uses
+
+    def refresh(self, path, st=None):
+        """
+        Index a file again if its content changed, or drop it if it is gone
+
+        Returns:
+            True when the file was parsed
+        """
+        path = os.path.abspath(path)
+        try:
+            st = st or os.stat(path)
+            with self._lock:
+                entry = self._files.get(path)
+            if (entry is not None and entry.size == st.st_size
+                    and entry.mtime_ns == st.st_mtime_ns):
+                return False
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            self.remove(path)
+            return False
+        digest = content_hash(data)
+        if entry is not None and entry.hash == digest:
+            # Touched, not changed
+            with self._lock:
+                self._files[path] = _Entry(
+                    digest, st.st_mtime_ns, st.st_size, entry.symbols
+                )
+                self.dirty = True
+            return False
+        symbols = FileSymbols.from_text(data.decode('utf-8', errors='replace'))
+        with self._lock:
+            self._link(path, _Entry(digest, st.st_mtime_ns, st.st_size, symbols))
+            self.dirty = True
+        self.parsed += 1
+        return True
+
+    def remove(self, path):
+        """Forget a file"""
+        with self._lock:
+            if path in self._files:
+                self._unlink(path)
+                self.dirty = True
+
+    def scan(self, folder=None, progress=None, cancelled=None, folders=None):
+        """
+        Bring the files under folder (default: root) up to date
+
+        Args:
+            progress: Called with (done, total) every 64 files
+            cancelled: Returns True to stop between files
+            folders: List that receives every folder walked
+
+        Returns:
+            Number of files parsed
+        """
+        folder = os.path.abspath(folder or self.root)
+        found = []
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+            if folders is not None:
+                folders.append(root)
+            for name in sorted(files):
+                if name.endswith('.nova'):
+                    found.append(os.path.join(root, name))
+        present = set(found)
+        prefix = os.path.join(folder, '')
+        with self._lock:
+            gone = [p for p in self._files
+                    if p.startswith(prefix) and p not in present]
+        for path in gone:
+            self.remove(path)
+        parsed = 0
+        for done, path in enumerate(found):
+            if cancelled is not None and cancelled():
+                break
+            if progress is not None and done % 64 == 0:
+                progress(done, len(found))
+            parsed += self.refresh(path)
+        if progress is not None:
+            progress(len(found), len(found))
+        return parsed
+
+    # Persistence
+
+    def load(self):
+        """
+        Read the index saved for this root
+
+        Returns:
+            True when one was found; files are still checked by scan()
+        """
+        if not self.cache_path:
+            return False
+        entries = {}
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                if (header['version'] != INDEX_VERSION
+                        or header['root'] != self.root):
+                    return False
+                # One line per file keeps each step short, so a load on
+                # the worker thread never holds the GIL for long
+                for line in f:
+                    rel, digest, mtime_ns, size, symbols, refs = json.loads(line)
+                    entries[os.path.join(self.root, rel)] = _Entry(
+                        digest, mtime_ns, size, FileSymbols(symbols, refs)
+                    )
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+        with self._lock:
+            for path, entry in entries.items():
+                self._link(path, entry)
+            self.dirty = False
+        return True
+
+    def save(self):
+        """Write the index to cache_path atomically"""
+        if not self.cache_path:
+            return False
+        # Entries are replaced, never changed, once indexed
+        with self._lock:
+            entries = list(self._files.items())
+            self.dirty = False
+        folder = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(folder, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=folder, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    f.write(json.dumps(
+                        {'version': INDEX_VERSION, 'root': self.root}
+                    ) + '\n')
+                    for path, e in entries:
+                        f.write(json.dumps([
+                            os.path.relpath(path, self.root), e.hash,
+                            e.mtime_ns, e.size, e.symbols.symbols,
+                            e.symbols.refs,
+                        ], separators=(',', ':')) + '\n')
+                os.replace(tmp, self.cache_path)
+            except OSError:
+                os.unlink(tmp)
+                raise
+        except OSError:
+            self.dirty = True
+            return False
+        return True
+
+    # Queries
+
+    def definitions(self, name, kinds=None):
+        """Declarations of name in any file, optionally of some kinds only"""
+        with self._lock:
+            return [
+                Location(path, *symbol)
+                for path in sorted(self._defs.get(name, ()))
+                for symbol in self._files[path].symbols.symbols
+                if symbol[0] == name and (kinds is None or symbol[1] in kinds)
+            ]
+
+    def references(self, name):
+        """Uses of name in any file"""
+        with self._lock:
+            by_path = self._uses.get(name, {})
+            return [
+                Location(path, name, kind, line, col)
+                for path in sorted(by_path)
+                for kind, line, col, _ in by_path[path]
+            ]
+
+    def files_using(self, name):
+        """Files that use name"""
+        with self._lock:
+            return sorted(self._uses.get(name, ()))
+
+    def _file_symbols(self, path, text):
+        if text is not None:
+            return FileSymbols.from_text(text)
+        with self._lock:
+            entry = self._files.get(path)
+        return entry.symbols if entry is not None else FileSymbols()
+
+    def definition_at(self, path, line, col, text=None):
+        """
+        Where the name at a position is declared
+
+        The file's own scopes are tried first. A name they do not declare
+        is looked up in the whole workspace: functions for a call,
+        variables otherwise.
+
+        Args:
+            path: The file (None for an unsaved buffer)
+            text: The file's current text, when it differs from what
+                was indexed
+
+        Returns:
+            List of Location, empty when the name is unknown
+        """
+        path = os.path.abspath(path) if path else None
+        symbols = self._file_symbols(path, text)
+        hit = symbols.occurrence_at(line, col)
+        if hit is None:
+            return []
+        name, is_func, index = hit
+        if index >= 0:
+            return [Location(path, *symbols.symbols[index])]
+        return self.definitions(name, ("func",) if is_func else VARIABLE_KINDS)
+
+    def references_at(self, path, line, col, text=None):
+        """
+        The declaration of the name at a position, followed by its uses
+
+        A name the file declares has exactly the uses that resolve to that
+        declaration. One it does not declare is searched for across the
+        workspace.
+
+        Returns:
+            List of Location, empty when there is no name at the position
+        """
+        path = os.path.abspath(path) if path else None
+        symbols = self._file_symbols(path, text)
+        hit = symbols.occurrence_at(line, col)
+        if hit is None:
+            return []
+        name, _, index = hit
+        if index < 0:
+            return self.references(name)
+        found = [Location(path, *symbols.symbols[index])]
+        for kind, line, col, _ in symbols.uses_of(name, index):
+            found.append(Location(path, name, kind, line, col))
+        return found
+
+
+class WorkspaceIndexer(QObject):
+    """
+    Keeps a WorkspaceIndex of a folder up to date on a worker thread.
+
+    open() loads the saved index and then checks every file. From then
+    on a QFileSystemWatcher reports changed files and folders (a folder
+    changes when a file in it is added, removed or atomically replaced),
+    and only those are checked again. Requests queue up in order and
+    repeats of a queued one are dropped.
+
+    The index is saved by stop(), and when the queue runs dry after
+    SAVE_AFTER files were parsed since the last save. A saved index
+    that misses some changes costs nothing but those files' parsing on
+    the next start.
+    """
+
+    SAVE_AFTER = 32
+
+    # files done, files in the scan
+    progress = pyqtSignal(int, int)
+    # files indexed, files parsed by the last batch of requests
+    updated = pyqtSignal(int, int)
+    # folders and files to watch, found by a scan
+    _found = pyqtSignal(list)
+
+    def __init__(self, cache_dir, parent=None):
+        super().__init__(parent)
+        self.cache_dir = cache_dir
+        self.index = None
+        self._cond = threading.Condition()
+        # path -> True for a folder to scan, False for a file
+        self._pending = {}
+        self._busy = False
+        self._stopped = False
+        self._thread = None
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self.refresh_folder)
+        self._watcher.fileChanged.connect(self.refresh_file)
+        self._found.connect(self._watch)
+
+    def cache_path(self, root):
+        """Where the index of root is saved"""
+        key = hashlib.sha256(os.path.abspath(root).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, key[:24] + '.jsonl')
+
+    def open(self, root):
+        """Index root, replacing the workspace indexed so far"""
+        self.stop()
+        watched = self._watcher.directories() + self._watcher.files()
+        if watched:
+            self._watcher.removePaths(watched)
+        self.index = WorkspaceIndex(root, self.cache_path(root))
+        self._stopped = False
+        self._queue(self.index.root, True, load=True)
+
+    def refresh_folder(self, path):
+        """Check a folder's files again (added, removed or replaced ones)"""
+        self._queue(path, True)
+
+    def refresh_file(self, path):
+        """Check one file again"""
+        self._queue(path, False)
+
+    def _queue(self, path, folder, load=False):
+        if self.index is None:
+            return
+        with self._cond:
+            if self._stopped:
+                return
+            if load:
+                self._pending[None] = None
+            self._pending.setdefault(os.path.abspath(path), folder)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, args=(self.index,),
+                    name="nova-workspace-index", daemon=True
+                )
+                self._thread.start()
+            self._cond.notify_all()
+
+    def _watch(self, paths):
+        watched = set(self._watcher.directories() + self._watcher.files())
+        new = [p for p in paths if p not in watched and os.path.exists(p)]
+        if new:
+            # Files beyond the system's watch limit are still covered by
+            # their folder, for atomic saves at least
+            self._watcher.addPaths(new)
+
+    def wait(self, timeout=None):
+        """Block until every queued request is done"""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: not self._pending and not self._busy, timeout
+            )
+
+    def stop(self):
+        """Drop queued requests, end the one in flight and save the index"""
+        with self._cond:
+            self._stopped = True
+            self._pending.clear()
+            self._cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(10.0)
+            self._thread = None
+
+    def _cancelled(self):
+        return self._stopped
+
+    def _handle(self, index, path, folder):
+        """Carry out one queued request; returns the files parsed"""
+        if path is None:
+            index.load()
+            return 0
+        if not folder:
+            return index.refresh(path)
+        if not os.path.isdir(path):
+            # A watched folder that is gone takes its files along
+            index.scan(path)
+            return 0
+        folders = []
+        parsed = index.scan(path, self.progress.emit, self._cancelled, folders)
+        prefix = os.path.join(path, '')
+        self._found.emit(folders + [
+            p for p in index.paths() if p.startswith(prefix)
+        ])
+        return parsed
+
+    def _run(self, index):
+        parsed = 0
+        unsaved = 0
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    break
+                path = next(iter(self._pending))
+                folder = self._pending.pop(path)
+                self._busy = True
+            try:
+                parsed += self._handle(index, path, folder)
+            except Exception:
+                # A bug met on one file must not end indexing for the
+                # session; the request is dropped
+                pass
+            with self._cond:
+                self._busy = False
+                idle = not self._pending
+                self._cond.notify_all()
+            if idle and not self._stopped:
+                unsaved += parsed
+                if unsaved >= self.SAVE_AFTER and index.save():
+                    unsaved = 0
+                self.updated.emit(len(index), parsed)
+                parsed = 0
+        if index.dirty:
+            index.save()
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
@@ -1,54 +1,177 @@
 // Parser.cpp — corrected version
 
-#include "parser.hpp"
+#include "Parser.hpp"
 #include <sstream>
 #include <stdexcept>
 
+static int token_length(const Token& t) {
+    if (t.type == TokenType::STRING) return (int)t.value.size() + 2;
+    return t.value.empty() ? 1 : (int)t.value.size();
+}
+
+static std::string describe(const Token& t) {
+    if (t.type == TokenType::EOF_T) return "end of file";
+    return "'" + t.value + "'";
+}
+
+static bool starts_statement(TokenType t) {
+    switch (t) {
+        case TokenType::NUM: case TokenType::TEXT: case TokenType::FLAG:
+        case TokenType::SHOW: case TokenType::TAKE: case TokenType::WHEN:
+        case TokenType::LOOP: case TokenType::BREAK: case TokenType::FUNC:
+            return true;
+        default:
+            return false;
+    }
+}
+
+ParserError::ParserError(const std::string& s, const Token& at)
+    : CompileError("parser", s, at.line, at.col, token_length(at)) {}
+
 Parser::Parser(const std::vector<Token>& toks) : tokens(toks), i(0) {
     if (tokens.empty()) throw ParserError("Empty token stream");
 }
 
 const Token& Parser::current() const {
     if (i < tokens.size()) return tokens[i];
-    static Token eof_t(TokenType::EOF_T, "", 0, 0);
+    static const Token eof_t(TokenType::EOF_T, "", 0, 0);
     return eof_t;
 }
 
-Token Parser::advance() {
+// Tokens are handed out by reference; the stream always ends in EOF, which
+// is returned again once the end is reached
+const Token& Parser::advance() {
     if (i < tokens.size()) return tokens[i++];
-    return Token(TokenType::EOF_T, "", tokens.back().line, tokens.back().col);
+    return tokens.back();
 }
 
-Token Parser::match(std::initializer_list<TokenType> types) {
+const Token& Parser::match(std::initializer_list<TokenType> types) {
     for (auto t : types) {
         if (current().type == t) {
             return advance();
         }
     }
     std::ostringstream ss;
-    ss << "Expected token(s) at " << current().line << ":" << current().col;
-    throw ParserError(ss.str());
+    ss << "Expected ";
+    for (auto it = types.begin(); it != types.end(); ++it) {
+        if (it != types.begin()) ss << " or ";
+        ss << tokenTypeName(*it);
+    }
+    ss << ", found " << describe(current());
+    throw ParserError(ss.str(), current());
+}
+
+void Parser::enter(const Token& at) {
+    if (depth >= MAX_NESTING) throw ParserError("Nesting too deep", at);
+    ++depth;
+}
+
+Ast Parser::parse() {
+    Program* root = ast.make<Program>(current());
+    ast.root = root;
+    try {
+        try {
+            program(root);
+        } catch (const ParserError& e) {
+            log.report(e);
+        }
+    } catch (const ErrorLimitReached&) {
+    }
+    return std::move(ast);
 }
 
-std::unique_ptr<Program> Parser::parse() {
-    match({TokenType::START});
-    StmtList stmts = statements();
+// 'start' statements 'end'; errors after the last statement end it
+void Parser::program(Program* root) {
+    try {
+        match({TokenType::START});
+    } catch (const ParserError& e) {
+        log.report(e);
+        if (!starts_statement(current().type)) synchronize(i);
+    }
+    size_t mark = pending.size();
+    // A '}' with no block to close is reported and skipped
+    for (;;) {
+        statement_list();
+        if (current().type != TokenType::RBRACE) break;
+        try {
+            match({TokenType::END});
+        } catch (const ParserError& e) {
+            log.report(e);
+        }
+        advance();
+    }
+    root->statements = finish_list(mark);
     match({TokenType::END});
     match({TokenType::EOF_T});
-    return std::make_unique<Program>(std::move(stmts));
 }
 
-StmtList Parser::statements() {
-    StmtList stmts;
+// Lists are gathered on the shared pending stack and copied into the arena
+// once complete, so building them needs no per-list heap allocation
+NodeList Parser::finish_list(size_t mark) {
+    NodeList list = ast.list(pending.data() + mark, pending.size() - mark);
+    pending.resize(mark);
+    return list;
+}
+
+NodeList Parser::statements() {
+    size_t mark = pending.size();
+    statement_list();
+    return finish_list(mark);
+}
+
+void Parser::statement_list() {
     while (current().type != TokenType::END &&
            current().type != TokenType::RBRACE &&
            current().type != TokenType::EOF_T) {
-        stmts.push_back(statement());
+        recovering_statement();
+    }
+}
+
+// Panic mode: a statement with a syntax error is logged and dropped, and
+// parsing resumes at the next statement. An error that leaves nothing to
+// skip (the statement list ended early) is passed on to the enclosing one.
+void Parser::recovering_statement() {
+    size_t from = i;
+    size_t keep = pending.size();
+    int saved_depth = depth;
+    try {
+        Node* s = statement();
+        pending.push_back(s);
+    } catch (const ParserError& e) {
+        pending.resize(keep);
+        depth = saved_depth;
+        synchronize(from);
+        if (i == from) throw;
+        log.report(e);
     }
-    return stmts;
 }
 
-ASTNodePtr Parser::statement() {
+// Skips to the next statement keyword (or 'back', which ends a function
+// body), to a '}' that closes an enclosing block, or to 'end'. Blocks
+// opened by the broken statement starting at token `from` are skipped
+// as a whole.
+void Parser::synchronize(size_t from) {
+    int open = 0;
+    for (size_t k = from; k < i; ++k) {
+        if (tokens[k].type == TokenType::LBRACE) ++open;
+        else if (tokens[k].type == TokenType::RBRACE && open > 0) --open;
+    }
+    for (;;) {
+        TokenType t = current().type;
+        if (t == TokenType::END || t == TokenType::EOF_T) return;
+        if (t == TokenType::RBRACE) {
+            if (open == 0) return;
+            --open;
+        } else if (t == TokenType::LBRACE) {
+            ++open;
+        } else if (open == 0 && i > from && (starts_statement(t) || t == TokenType::BACK)) {
+            return;
+        }
+        advance();
+    }
+}
+
+Node* Parser::statement() {
     TokenType t = current().type;
     if (t == TokenType::NUM || t == TokenType::TEXT || t == TokenType::FLAG) return var_decl();
     else if (t == TokenType::IDENT) return assign_or_func_call();
@@ -56,214 +179,229 @@ ASTNodePtr Parser::statement() {
     else if (t == TokenType::TAKE) return take_stmt();
     else if (t == TokenType::WHEN) return when_stmt();
     else if (t == TokenType::LOOP) return loop_stmt();
-    else if (t == TokenType::BREAK) { match({TokenType::BREAK}); return std::make_unique<Break>(); }
+    else if (t == TokenType::BREAK) return ast.make<Break>(match({TokenType::BREAK}));
     else if (t == TokenType::FUNC) return func_def();
     else {
-        std::ostringstream ss; ss << "Unexpected token at " << current().line << ":" << current().col; 
-        throw ParserError(ss.str());
+        throw ParserError("Unexpected token " + describe(current()), current());
     }
 }
 
-ASTNodePtr Parser::var_decl() {
-    Token vt = match({TokenType::NUM, TokenType::TEXT, TokenType::FLAG});
-    Token name = match({TokenType::IDENT});
+Node* Parser::var_decl() {
+    const Token& vt = match({TokenType::NUM, TokenType::TEXT, TokenType::FLAG});
+    const Token& name = match({TokenType::IDENT});
     match({TokenType::ASSIGN});
-    ASTNodePtr ex = expr();
-    return std::make_unique<VarDecl>(vt.value, name.value, std::move(ex));
+    VarDecl* n = ast.make<VarDecl>(name);
+    n->vartype = vt.type == TokenType::NUM ? VarType::NUM : vt.type == TokenType::TEXT ? VarType::TEXT : VarType::FLAG;
+    n->name = name_of(name);
+    n->expr = expr();
+    return n;
 }
 
-ASTNodePtr Parser::assign_or_func_call() {
-    Token name = match({TokenType::IDENT});
+Node* Parser::assign_or_func_call() {
+    const Token& name = match({TokenType::IDENT});
     if (current().type == TokenType::ASSIGN) {
         match({TokenType::ASSIGN});
-        ASTNodePtr e = expr();
-        return std::make_unique<Assign>(name.value, std::move(e));
+        Assign* n = ast.make<Assign>(name);
+        n->name = name_of(name);
+        n->expr = expr();
+        return n;
     } else if (current().type == TokenType::LPAREN) {
-        match({TokenType::LPAREN});
-        std::vector<ASTNodePtr> args;
-        if (current().type != TokenType::RPAREN) {
-            args.push_back(expr());
-            while (current().type == TokenType::COMMA) { match({TokenType::COMMA}); args.push_back(expr()); }
-        }
-        match({TokenType::RPAREN});
-        return std::make_unique<FuncCall>(name.value, std::move(args));
+        FuncCall* n = ast.make<FuncCall>(name);
+        n->name = name_of(name);
+        n->args = call_args();
+        return n;
     } else {
-        std::ostringstream ss; ss << "Expected assign or func-call at " << current().line << ":" << current().col; throw ParserError(ss.str());
+        throw ParserError("Expected assign or func-call after '" + name.value + "'", current());
     }
 }
 
-ASTNodePtr Parser::show_stmt() { match({TokenType::SHOW}); ASTNodePtr e = expr(); return std::make_unique<Show>(std::move(e)); }
-ASTNodePtr Parser::take_stmt() { match({TokenType::TAKE}); Token id = match({TokenType::IDENT}); return std::make_unique<Take>(id.value); }
-
-ASTNodePtr Parser::when_stmt() {
-    // We'll collect cases as (condition ASTNodePtr, StmtList)
-    std::vector<std::pair<ASTNodePtr, StmtList>> cases;
-    StmtList else_block;
+Node* Parser::show_stmt() {
+    Show* n = ast.make<Show>(match({TokenType::SHOW}));
+    n->expr = expr();
+    return n;
+}
 
-    Token when_tok = match({TokenType::WHEN});
-    ASTNodePtr cond = expr();
+Node* Parser::take_stmt() {
+    match({TokenType::TAKE});
+    const Token& id = match({TokenType::IDENT});
+    Take* n = ast.make<Take>(id);
+    n->name = name_of(id);
+    return n;
+}
 
-    // block() returns ASTNodePtr (Program). Extract statements from it.
-    ASTNodePtr block_node = block(when_tok);
-    Program* prog = dynamic_cast<Program*>(block_node.get());
-    if (!prog) throw ParserError("Internal parser error: expected Program node from block()");
-    StmtList body = std::move(prog->statements);
-    cases.emplace_back(std::move(cond), std::move(body));
+Node* Parser::when_stmt() {
+    const Token& when_tok = match({TokenType::WHEN});
+    When* n = ast.make<When>(when_tok);
+    std::vector<WhenCase> cases;
+    Node* cond = expr();
+    cases.push_back(WhenCase{cond, block(when_tok)});
 
     while (current().type == TokenType::ELSEWHEN) {
-        Token t = match({TokenType::ELSEWHEN});
-        ASTNodePtr cond2 = expr();
-        ASTNodePtr block_node2 = block(t);
-        Program* prog2 = dynamic_cast<Program*>(block_node2.get());
-        if (!prog2) throw ParserError("Internal parser error: expected Program node from block()");
-        StmtList b2 = std::move(prog2->statements);
-        cases.emplace_back(std::move(cond2), std::move(b2));
+        const Token& t = match({TokenType::ELSEWHEN});
+        Node* cond2 = expr();
+        cases.push_back(WhenCase{cond2, block(t)});
     }
 
     if (current().type == TokenType::ELSE) {
-        Token t = match({TokenType::ELSE});
-        ASTNodePtr else_node = block(t);
-        Program* prog_else = dynamic_cast<Program*>(else_node.get());
-        if (!prog_else) throw ParserError("Internal parser error: expected Program node from block()");
-        else_block = std::move(prog_else->statements);
+        const Token& t = match({TokenType::ELSE});
+        n->else_block = block(t);
     }
 
-    return std::make_unique<When>(std::move(cases), std::move(else_block));
+    n->cases = ast.array(cases.data(), cases.size());
+    n->case_count = (uint32_t)cases.size();
+    return n;
 }
 
-ASTNodePtr Parser::loop_stmt() {
-    Token loop_t = match({TokenType::LOOP});
-    Token var = match({TokenType::IDENT});
+Node* Parser::loop_stmt() {
+    const Token& loop_t = match({TokenType::LOOP});
+    const Token& var = match({TokenType::IDENT});
+    Loop* n = ast.make<Loop>(var);
+    n->var = name_of(var);
     match({TokenType::ASSIGN});
-    ASTNodePtr s = expr();
+    n->start_expr = expr();
     match({TokenType::TO});
-    ASTNodePtr e = expr();
-
-    ASTNodePtr block_node = block(loop_t);
-    Program* prog = dynamic_cast<Program*>(block_node.get());
-    if (!prog) throw ParserError("Internal parser error: expected Program node from block()");
-    StmtList body = std::move(prog->statements);
-
-    return std::make_unique<Loop>(var.value, std::move(s), std::move(e), std::move(body));
+    n->end_expr = expr();
+    n->body = block(loop_t);
+    return n;
 }
 
-ASTNodePtr Parser::func_def() {
+Node* Parser::func_def() {
     match({TokenType::FUNC});
-    Token name = match({TokenType::IDENT});
+    const Token& name = match({TokenType::IDENT});
+    FuncDef* n = ast.make<FuncDef>(name);
+    n->name = name_of(name);
     match({TokenType::LPAREN});
-    std::vector<std::string> params;
+    std::vector<NameId> params;
     if (current().type != TokenType::RPAREN) {
-        params.push_back(match({TokenType::IDENT}).value);
-        while (current().type == TokenType::COMMA) { match({TokenType::COMMA}); params.push_back(match({TokenType::IDENT}).value); }
+        params.push_back(name_of(match({TokenType::IDENT})));
+        while (current().type == TokenType::COMMA) { match({TokenType::COMMA}); params.push_back(name_of(match({TokenType::IDENT}))); }
     }
     match({TokenType::RPAREN});
-    match({TokenType::LBRACE});
-    StmtList body;
-    ASTNodePtr back_expr;
+    n->params = ast.array(params.data(), params.size());
+    n->param_count = (uint32_t)params.size();
+    enter(match({TokenType::LBRACE}));
+    size_t mark = pending.size();
     while (current().type != TokenType::BACK) {
-        if (current().type == TokenType::RBRACE) throw ParserError("Function must contain a 'back' statement");
-        body.push_back(statement());
+        if (current().type == TokenType::RBRACE) throw ParserError("Function must contain a 'back' statement", current());
+        recovering_statement();
     }
+    n->body = finish_list(mark);
     match({TokenType::BACK});
-    back_expr = expr();
+    n->back_expr = expr();
     match({TokenType::RBRACE});
-    return std::make_unique<FuncDef>(name.value, std::move(params), std::move(body), std::move(back_expr));
+    leave();
+    return n;
 }
 
-ASTNodePtr Parser::block(const Token& context_token) {
+NodeList Parser::block(const Token& context_token) {
     if (current().type != TokenType::LBRACE) {
-        std::ostringstream ss;
-        ss << "Expected LBRACE at " << context_token.line << ":" << context_token.col << " (after '" << context_token.value << "')";
-        throw ParserError(ss.str());
+        throw ParserError("Expected LBRACE after '" + context_token.value + "'", context_token);
     }
-    match({TokenType::LBRACE});
-    StmtList stmts = statements();
+    enter(match({TokenType::LBRACE}));
+    NodeList stmts = statements();
     match({TokenType::RBRACE});
-    // Return a Program node containing the block statements
-    return std::make_unique<Program>(std::move(stmts));
-}
-
-// Expressions
-ASTNodePtr Parser::expr() { return equality(); }
-
-ASTNodePtr Parser::equality() {
-    ASTNodePtr node = comparison();
-    while (current().type == TokenType::EQEQ || current().type == TokenType::NOTEQ) {
-        Token op = advance();
-        ASTNodePtr right = comparison();
-        node = std::make_unique<BinOp>(std::move(node), op.type, op.value, std::move(right));
-    }
-    return node;
+    leave();
+    return stmts;
 }
 
-ASTNodePtr Parser::comparison() {
-    ASTNodePtr node = term();
-    while (current().type == TokenType::GT || current().type == TokenType::LT || current().type == TokenType::GTEQ || current().type == TokenType::LTEQ) {
-        Token op = advance();
-        ASTNodePtr right = term();
-        node = std::make_unique<BinOp>(std::move(node), op.type, op.value, std::move(right));
+// Expressions: precedence climbing over this table. All binary operators
+// are left-associative; 0 means the token does not continue an expression.
+static int binary_precedence(TokenType t) {
+    switch (t) {
+        case TokenType::EQEQ: case TokenType::NOTEQ: return 1;
+        case TokenType::GT: case TokenType::LT:
+        case TokenType::GTEQ: case TokenType::LTEQ: return 2;
+        case TokenType::PLUS: case TokenType::MINUS: return 3;
+        case TokenType::STAR: case TokenType::SLASH: return 4;
+        default: return 0;
     }
-    return node;
 }
 
-ASTNodePtr Parser::term() {
-    ASTNodePtr node = factor();
-    while (current().type == TokenType::PLUS || current().type == TokenType::MINUS) {
-        Token op = advance();
-        ASTNodePtr right = factor();
-        node = std::make_unique<BinOp>(std::move(node), op.type, op.value, std::move(right));
+// The chain is built in a loop, but later stages walk the left-deep tree
+// recursively, so each operator counts as a nesting level.
+Node* Parser::expr(int min_prec) {
+    Node* node = prefix();
+    int chain = 0;
+    for (;;) {
+        const Token& op = current();
+        int prec = binary_precedence(op.type);
+        if (prec < min_prec) {
+            depth -= chain;
+            return node;
+        }
+        advance();
+        enter(op);
+        ++chain;
+        BinOp* b = ast.make<BinOp>(op);
+        b->op = binary_op(op.type);
+        b->left = node;
+        // The right operand only takes tighter operators, so recursion is
+        // bounded by the number of precedence levels
+        b->right = expr(prec + 1);
+        node = b;
     }
-    return node;
 }
 
-ASTNodePtr Parser::factor() {
-    ASTNodePtr node = unary();
-    while (current().type == TokenType::STAR || current().type == TokenType::SLASH) {
-        Token op = advance();
-        ASTNodePtr right = unary();
-        node = std::make_unique<BinOp>(std::move(node), op.type, op.value, std::move(right));
+// Unary minus binds tighter than every binary operator. A run of them is
+// read in a loop and applied innermost first; each one still counts as a
+// nesting level, since later stages walk the chain recursively.
+Node* Parser::prefix() {
+    size_t first = i;
+    while (current().type == TokenType::MINUS) enter(advance());
+    size_t last = i;
+    Node* node = primary();
+    while (last > first) {
+        UnaryOp* u = ast.make<UnaryOp>(tokens[--last]);
+        u->op = OpKind::NEG;
+        u->expr = node;
+        node = u;
+        leave();
     }
     return node;
 }
 
-ASTNodePtr Parser::unary() {
-    if (current().type == TokenType::MINUS) {
-        Token op = advance();
-        ASTNodePtr e = unary();
-        return std::make_unique<UnaryOp>(op.type, op.value, std::move(e));
+NodeList Parser::call_args() {
+    enter(match({TokenType::LPAREN}));
+    size_t mark = pending.size();
+    if (current().type != TokenType::RPAREN) {
+        Node* a = expr();
+        pending.push_back(a);
+        while (current().type == TokenType::COMMA) {
+            match({TokenType::COMMA});
+            a = expr();
+            pending.push_back(a);
+        }
     }
-    return primary();
+    match({TokenType::RPAREN});
+    leave();
+    return finish_list(mark);
 }
 
-ASTNodePtr Parser::primary() {
-    Token t = current();
-    if (t.type == TokenType::NUMBER) {
-        advance();
-        return std::make_unique<Literal>(t.value, "num");
-    } else if (t.type == TokenType::STRING) {
+Node* Parser::primary() {
+    const Token& t = current();
+    if (t.type == TokenType::NUMBER || t.type == TokenType::STRING || t.type == TokenType::BOOL) {
         advance();
-        return std::make_unique<Literal>(t.value, "text");
-    } else if (t.type == TokenType::BOOL) {
-        advance();
-        return std::make_unique<Literal>(t.value, "bool");
+        Literal* n = ast.make<Literal>(t);
+        n->lit = t.type == TokenType::NUMBER ? LitKind::NUM : t.type == TokenType::STRING ? LitKind::TEXT : LitKind::BOOL;
+        n->value = ast.text(t.value);
+        return n;
     } else if (t.type == TokenType::IDENT) {
         advance();
         if (current().type == TokenType::LPAREN) {
-            match({TokenType::LPAREN});
-            std::vector<ASTNodePtr> args;
-            if (current().type != TokenType::RPAREN) {
-                args.push_back(expr());
-                while (current().type == TokenType::COMMA) { match({TokenType::COMMA}); args.push_back(expr()); }
-            }
-            match({TokenType::RPAREN});
-            return std::make_unique<FuncCall>(t.value, std::move(args));
+            FuncCall* n = ast.make<FuncCall>(t);
+            n->name = name_of(t);
+            n->args = call_args();
+            return n;
         }
-        return std::make_unique<Identifier>(t.value);
+        Identifier* n = ast.make<Identifier>(t);
+        n->name = name_of(t);
+        return n;
     } else if (t.type == TokenType::LPAREN) {
-        match({TokenType::LPAREN});
-        ASTNodePtr n = expr();
+        enter(advance());
+        Node* n = expr();
         match({TokenType::RPAREN});
+        leave();
         return n;
     }
-    std::ostringstream ss; ss << "Unexpected token in expression at " << t.line << ":" << t.col; throw ParserError(ss.str());
+    throw ParserError("Unexpected token in expression: " + describe(t), t);
 }
@@ -3,42 +3,65 @@
 
 #include "token.hpp"
 #include "ast.hpp"
+#include "diagnostics.hpp"
 #include <vector>
 #include <memory>
 
-class ParserError : public std::runtime_error { public: ParserError(const std::string& s): std::runtime_error(s){} };
+class ParserError : public CompileError {
+public:
+    ParserError(const std::string& s, int l = 0, int c = 0, int len = 1) : CompileError("parser", s, l, c, len) {}
+    ParserError(const std::string& s, const Token& at);
+};
 
 class Parser {
 private:
     const std::vector<Token>& tokens;
     size_t i = 0;
+    Ast ast;
+    std::vector<Node*> pending;  // items of the lists being built, innermost last
+    int depth = 0;  // open parentheses, argument lists, blocks and operators
+    ErrorLog log;
     const Token& current() const;
-    Token advance();
-    Token match(std::initializer_list<TokenType> types);
+    const Token& advance();
+    const Token& match(std::initializer_list<TokenType> types);
+    void enter(const Token& at);
+    void leave() { --depth; }
     // grammar helpers
-    StmtList statements();
-    ASTNodePtr statement();
-    ASTNodePtr block(const Token& context_token);
+    void program(Program* root);
+    void statement_list();
+    void recovering_statement();
+    void synchronize(size_t from);
+    NodeList statements();
+    NodeList finish_list(size_t mark);
+    Node* statement();
+    NodeList block(const Token& context_token);
     // productions
-    ASTNodePtr var_decl();
-    ASTNodePtr assign_or_func_call();
-    ASTNodePtr show_stmt();
-    ASTNodePtr take_stmt();
-    ASTNodePtr when_stmt();
-    ASTNodePtr loop_stmt();
-    ASTNodePtr func_def();
-    ASTNodePtr break_stmt();
+    Node* var_decl();
+    Node* assign_or_func_call();
+    Node* show_stmt();
+    Node* take_stmt();
+    Node* when_stmt();
+    Node* loop_stmt();
+    Node* func_def();
     // expressions
-    ASTNodePtr expr();
-    ASTNodePtr equality();
-    ASTNodePtr comparison();
-    ASTNodePtr term();
-    ASTNodePtr factor();
-    ASTNodePtr unary();
-    ASTNodePtr primary();
+    Node* expr(int min_prec = 1);
+    Node* prefix();
+    Node* primary();
+    NodeList call_args();
+    NameId name_of(const Token& t) { return ast.names.intern(t.value); }
 public:
+    // Deepest nesting of parentheses, argument lists, blocks, unary minus
+    // and binary operator chains; deeper input is rejected with "Nesting
+    // too deep" instead of exhausting the stack
+    static constexpr int MAX_NESTING = 128;
     Parser(const std::vector<Token>& toks);
-    std::unique_ptr<Program> parse();
+    // Stop after this many syntax errors (0: no limit)
+    void set_max_errors(size_t n) { log.limit = n; }
+    // The Ast is moved out; parse() can be called once. Syntax errors are
+    // logged rather than thrown, and the Ast is only complete when the log
+    // is empty.
+    Ast parse();
+    const ErrorLog& errors() const { return log; }
 };
 
 #endif // NOVA_PARSER_HPP
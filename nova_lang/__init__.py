@@ -0,0 +1,59 @@
+"""
+NovaLang compiler package
+
+In-process Python front end (lexer, parser, semantic analyzer) that
+produces the same tokens, AST and diagnostics as the C++ backend, and an
+optimizer, bytecode compiler and VM that run checked programs the same way,
+or a C generator for native builds (native.py).
+"""
+
+from .diagnostics import (
+    DEFAULT_MAX_ERRORS, CompileError, Diagnostic, ErrorLog, LexerError
+)
+from .lexer import Lexer
+from .parser import Parser, ParserError
+from .semantic import SemanticAnalyzer, SemanticError
+from .ast_nodes import Program
+from .optimizer import Optimizer
+from .bytecode import CodegenError, Compiler
+from .vm import VM, ExecutionError
+from .cgen import CGenerator
+
+__version__ = "1.0.0"
+__author__ = "NovaLang Team"
+__description__ = "Educational compiler front-end for NovaLang"
+
+
+def analyze(source, max_errors=DEFAULT_MAX_ERRORS):
+    """
+    Run lexer, parser and semantic analyzer over source text
+
+    Args:
+        max_errors: Stop after this many errors (0: no limit); a note
+            says so at the end of the list
+
+    Returns:
+        List of Diagnostic from the first stage that found errors (empty
+        when the program is valid)
+    """
+    try:
+        parser = Parser(Lexer(source).tokenize(), max_errors)
+        program = parser.parse()
+        if parser.log:
+            return parser.log.diagnostics()
+        sem = SemanticAnalyzer(max_errors=max_errors)
+        sem.analyze(program)
+    except CompileError as e:
+        return [Diagnostic.from_error(e)]
+    except RecursionError:
+        # The parser's nesting limit should keep the tree shallow enough
+        return [Diagnostic("error", "semantic", "Nesting too deep")]
+    return sem.log.diagnostics()
+
+
+__all__ = [
+    'DEFAULT_MAX_ERRORS', 'CompileError', 'Diagnostic', 'ErrorLog',
+    'LexerError', 'Lexer', 'Parser', 'ParserError', 'SemanticAnalyzer',
+    'SemanticError', 'Program', 'Optimizer', 'CodegenError', 'Compiler', 'VM',
+    'ExecutionError', 'CGenerator', 'analyze',
+]
@@ -0,0 +1,95 @@
+#include "ast.hpp"
+#include <algorithm>
+#include <cstring>
+
+void Arena::grow(size_t at_least) {
+    // Blocks double up to 1 MiB, so small programs stay small
+    size_t size = blocks.empty() ? 16 * 1024 : std::min<size_t>(reserved, 1024 * 1024);
+    if (size < at_least) size = at_least;
+    blocks.emplace_back(new char[size]);
+    cur = blocks.back().get();
+    left = size;
+    reserved += size;
+}
+
+NameId Names::intern(std::string_view name) {
+    auto it = ids.find(name);
+    if (it != ids.end()) return it->second;
+    char* copy = static_cast<char*>(storage.allocate(name.size() ? name.size() : 1, 1));
+    std::memcpy(copy, name.data(), name.size());
+    std::string_view stored(copy, name.size());
+    NameId id = (NameId)spellings.size();
+    spellings.push_back(stored);
+    ids.emplace(stored, id);
+    return id;
+}
+
+size_t Names::memory_bytes() const {
+    return storage.bytes_reserved()
+         + spellings.capacity() * sizeof(std::string_view)
+         + ids.size() * (sizeof(std::string_view) + sizeof(NameId) + 2 * sizeof(void*))
+         + ids.bucket_count() * sizeof(void*);
+}
+
+StrRef Ast::text(const std::string& s) {
+    char* copy = static_cast<char*>(arena.allocate(s.size() ? s.size() : 1, 1));
+    std::memcpy(copy, s.data(), s.size());
+    return StrRef{copy, (uint32_t)s.size()};
+}
+
+const char* var_type_name(VarType t) {
+    switch (t) {
+        case VarType::NUM: return "num";
+        case VarType::TEXT: return "text";
+        case VarType::FLAG: return "flag";
+    }
+    return "unknown";
+}
+
+const char* lit_kind_name(LitKind k) {
+    switch (k) {
+        case LitKind::NUM: return "num";
+        case LitKind::TEXT: return "text";
+        case LitKind::BOOL: return "bool";
+    }
+    return "unknown";
+}
+
+const char* op_text(OpKind op) {
+    switch (op) {
+        case OpKind::ADD: return "+";
+        case OpKind::SUB: return "-";
+        case OpKind::MUL: return "*";
+        case OpKind::DIV: return "/";
+        case OpKind::EQ: return "==";
+        case OpKind::NE: return "!=";
+        case OpKind::GT: return ">";
+        case OpKind::LT: return "<";
+        case OpKind::GE: return ">=";
+        case OpKind::LE: return "<=";
+        case OpKind::NEG: return "-";
+    }
+    return "?";
+}
+
+OpKind binary_op(TokenType t) {
+    switch (t) {
+        case TokenType::PLUS: return OpKind::ADD;
+        case TokenType::MINUS: return OpKind::SUB;
+        case TokenType::STAR: return OpKind::MUL;
+        case TokenType::SLASH: return OpKind::DIV;
+        case TokenType::EQEQ: return OpKind::EQ;
+        case TokenType::NOTEQ: return OpKind::NE;
+        case TokenType::GT: return OpKind::GT;
+        case TokenType::LT: return OpKind::LT;
+        case TokenType::GTEQ: return OpKind::GE;
+        case TokenType::LTEQ: return OpKind::LE;
+        default: break;
+    }
+    // The parser only passes tokens with a binary precedence
+    return OpKind::LE;
+}
+
+bool is_arithmetic(OpKind op) {
+    return op == OpKind::ADD || op == OpKind::SUB || op == OpKind::MUL || op == OpKind::DIV;
+}
@@ -1,101 +1,233 @@
 #ifndef NOVA_AST_HPP
 #define NOVA_AST_HPP
 
-#include <vector>
+#include <cstddef>
+#include <cstdint>
 #include <memory>
+#include <new>
 #include <string>
+#include <string_view>
+#include <type_traits>
+#include <unordered_map>
+#include <vector>
 #include "token.hpp"
-struct ASTNode { virtual ~ASTNode() = default; };
-using ASTNodePtr = std::unique_ptr<ASTNode>;
-using StmtList = std::vector<ASTNodePtr>;
+
+// The AST lives in an Arena owned by its Ast. Nodes are bump-allocated and
+// carry a kind tag instead of a vtable; the whole tree is released with the
+// arena's few blocks, so teardown cost does not depend on the node count.
+// Nodes are therefore trivially destructible: text is copied into the
+// arena (StrRef) and identifiers are interned (NameId).
+
+class Arena {
+private:
+    std::vector<std::unique_ptr<char[]>> blocks;
+    char* cur = nullptr;
+    size_t left = 0;
+    size_t reserved = 0;
+    void grow(size_t at_least);
+public:
+    Arena() = default;
+    Arena(Arena&&) = default;
+    Arena& operator=(Arena&&) = default;
+
+    void* allocate(size_t n, size_t align) {
+        size_t pad = (align - ((uintptr_t)cur & (align - 1))) & (align - 1);
+        if (pad + n > left) {
+            grow(n + align);
+            pad = (align - ((uintptr_t)cur & (align - 1))) & (align - 1);
+        }
+        char* p = cur + pad;
+        cur = p + n;
+        left -= pad + n;
+        return p;
+    }
+    size_t bytes_reserved() const { return reserved; }
+};
+
+using NameId = uint32_t;
+
+// Identifier spellings, each stored once; equal names get equal ids
+class Names {
+private:
+    Arena storage;
+    std::vector<std::string_view> spellings;
+    std::unordered_map<std::string_view, NameId> ids;
+public:
+    NameId intern(std::string_view name);
+    std::string_view spelling(NameId id) const { return spellings[id]; }
+    size_t size() const { return spellings.size(); }
+    size_t memory_bytes() const;
+};
+
+// Text owned by the arena
+struct StrRef {
+    const char* data;
+    uint32_t size;
+    std::string_view view() const { return std::string_view(data, size); }
+};
+
+enum class NodeKind : uint8_t {
+    PROGRAM, VAR_DECL, ASSIGN, SHOW, TAKE, WHEN, LOOP, BREAK,
+    FUNC_DEF, FUNC_CALL, BIN_OP, UNARY_OP, LITERAL, IDENTIFIER
+};
+enum class VarType : uint8_t { NUM, TEXT, FLAG };
+enum class LitKind : uint8_t { NUM, TEXT, BOOL };
+enum class OpKind : uint8_t { ADD, SUB, MUL, DIV, EQ, NE, GT, LT, GE, LE, NEG };
+
+const char* var_type_name(VarType t);   // "num", "text", "flag"
+const char* lit_kind_name(LitKind k);   // "num", "text", "bool"
+const char* op_text(OpKind op);         // as written in the source
+OpKind binary_op(TokenType t);
+bool is_arithmetic(OpKind op);
+
+// Every node records the 1-based source position of the token that anchors it
+// (the name for declarations, the operator for BinOp, else the first token).
+struct Node {
+    NodeKind kind;
+    int line;
+    int col;
+};
+
+struct NodeList {
+    Node** items = nullptr;
+    uint32_t size = 0;
+    Node** begin() const { return items; }
+    Node** end() const { return items + size; }
+    bool empty() const { return size == 0; }
+};
 
 // Statements
-struct Program : ASTNode {
-    StmtList statements;
-    Program(StmtList s = {}) : statements(std::move(s)) {}
+struct Program : Node {
+    static constexpr NodeKind KIND = NodeKind::PROGRAM;
+    NodeList statements;
 };
 
-struct VarDecl : ASTNode {
-    std::string vartype;
-    std::string name;
-    ASTNodePtr expr;
-    VarDecl(std::string vt, std::string n, ASTNodePtr e) : vartype(std::move(vt)), name(std::move(n)), expr(std::move(e)) {}
+struct VarDecl : Node {
+    static constexpr NodeKind KIND = NodeKind::VAR_DECL;
+    VarType vartype;
+    NameId name;
+    Node* expr;
 };
 
-struct Assign : ASTNode {
-    std::string name;
-    ASTNodePtr expr;
-    Assign(std::string n, ASTNodePtr e) : name(std::move(n)), expr(std::move(e)) {}
+struct Assign : Node {
+    static constexpr NodeKind KIND = NodeKind::ASSIGN;
+    NameId name;
+    Node* expr;
 };
 
-struct Show : ASTNode {
-    ASTNodePtr expr;
-    Show(ASTNodePtr e) : expr(std::move(e)) {}
+struct Show : Node {
+    static constexpr NodeKind KIND = NodeKind::SHOW;
+    Node* expr;
 };
 
-struct Take : ASTNode {
-    std::string name;
-    Take(std::string n) : name(std::move(n)) {}
+struct Take : Node {
+    static constexpr NodeKind KIND = NodeKind::TAKE;
+    NameId name;
 };
 
-struct When : ASTNode {
-    // pair: condition, statements
-    std::vector<std::pair<ASTNodePtr, StmtList>> cases;
-    StmtList else_block;
-    When(std::vector<std::pair<ASTNodePtr, StmtList>> c = {}, StmtList e = {}) : cases(std::move(c)), else_block(std::move(e)) {}
+struct WhenCase {
+    Node* cond;
+    NodeList body;
 };
 
-struct Loop : ASTNode {
-    std::string var;
-    ASTNodePtr start_expr;
-    ASTNodePtr end_expr;
-    StmtList body;
-    Loop(std::string v, ASTNodePtr s, ASTNodePtr e, StmtList b) : var(std::move(v)), start_expr(std::move(s)), end_expr(std::move(e)), body(std::move(b)) {}
+struct When : Node {
+    static constexpr NodeKind KIND = NodeKind::WHEN;
+    WhenCase* cases;
+    uint32_t case_count;
+    NodeList else_block;
+    WhenCase* begin() const { return cases; }
+    WhenCase* end() const { return cases + case_count; }
 };
 
-struct Break : ASTNode {};
+struct Loop : Node {
+    static constexpr NodeKind KIND = NodeKind::LOOP;
+    NameId var;
+    Node* start_expr;
+    Node* end_expr;
+    NodeList body;
+};
+
+struct Break : Node {
+    static constexpr NodeKind KIND = NodeKind::BREAK;
+};
 
 // Functions
-struct FuncDef : ASTNode {
-    std::string name;
-    std::vector<std::string> params;
-    StmtList body;
-    ASTNodePtr back_expr;
-    FuncDef(std::string n, std::vector<std::string> p, StmtList b, ASTNodePtr be) : name(std::move(n)), params(std::move(p)), body(std::move(b)), back_expr(std::move(be)) {}
+struct FuncDef : Node {
+    static constexpr NodeKind KIND = NodeKind::FUNC_DEF;
+    NameId name;
+    uint32_t param_count;
+    NameId* params;
+    NodeList body;
+    Node* back_expr;
 };
 
-struct FuncCall : ASTNode {
-    std::string name;
-    std::vector<ASTNodePtr> args;
-    FuncCall(std::string n, std::vector<ASTNodePtr> a) : name(std::move(n)), args(std::move(a)) {}
+struct FuncCall : Node {
+    static constexpr NodeKind KIND = NodeKind::FUNC_CALL;
+    NameId name;
+    NodeList args;
 };
 
 // Expressions
-struct BinOp : ASTNode {
-    ASTNodePtr left;
-    // store operator as token-ish string for simplicity
-    TokenType op_type;
-    std::string op_value;
-    ASTNodePtr right;
-    BinOp(ASTNodePtr l, TokenType ot, std::string ov, ASTNodePtr r) : left(std::move(l)), op_type(ot), op_value(std::move(ov)), right(std::move(r)) {}
+struct BinOp : Node {
+    static constexpr NodeKind KIND = NodeKind::BIN_OP;
+    OpKind op;
+    Node* left;
+    Node* right;
+};
+
+struct UnaryOp : Node {
+    static constexpr NodeKind KIND = NodeKind::UNARY_OP;
+    OpKind op;
+    Node* expr;
 };
 
-struct UnaryOp : ASTNode {
-    TokenType op_type;
-    std::string op_value;
-    ASTNodePtr expr;
-    UnaryOp(TokenType ot, std::string ov, ASTNodePtr e) : op_type(ot), op_value(std::move(ov)), expr(std::move(e)) {}
+struct Literal : Node {
+    static constexpr NodeKind KIND = NodeKind::LITERAL;
+    LitKind lit;
+    StrRef value;
 };
 
-struct Literal : ASTNode {
-    std::string value;
-    std::string lit_type; // "num","text","bool"
-    Literal(std::string v, std::string t) : value(std::move(v)), lit_type(std::move(t)) {}
+struct Identifier : Node {
+    static constexpr NodeKind KIND = NodeKind::IDENTIFIER;
+    NameId name;
 };
 
-struct Identifier : ASTNode {
-    std::string name;
-    Identifier(std::string n) : name(std::move(n)) {}
+// Checked downcast on the kind tag
+template <typename T>
+inline const T* as(const Node* n) {
+    return n && n->kind == T::KIND ? static_cast<const T*>(n) : nullptr;
+}
+
+// A parsed program: the nodes, their names and the root
+class Ast {
+public:
+    Arena arena;
+    Names names;
+    Program* root = nullptr;
+
+    template <typename T>
+    T* make(int line, int col) {
+        static_assert(std::is_trivially_destructible<T>::value, "arena nodes are never destroyed");
+        T* n = new (arena.allocate(sizeof(T), alignof(T))) T();
+        n->kind = T::KIND;
+        n->line = line;
+        n->col = col;
+        return n;
+    }
+    template <typename T>
+    T* make(const Token& at) { return make<T>(at.line, at.col); }
+    template <typename T>
+    T* array(const T* items, size_t count) {
+        if (count == 0) return nullptr;
+        T* out = static_cast<T*>(arena.allocate(sizeof(T) * count, alignof(T)));
+        for (size_t k = 0; k < count; ++k) out[k] = items[k];
+        return out;
+    }
+    NodeList list(Node* const* items, size_t count) {
+        return NodeList{array(items, count), (uint32_t)count};
+    }
+    StrRef text(const std::string& s);
+    size_t memory_bytes() const { return arena.bytes_reserved() + names.memory_bytes(); }
 };
 
 #endif // NOVA_AST_HPP
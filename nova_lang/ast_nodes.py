@@ -0,0 +1,154 @@
+"""
+AST node classes for NovaLang (mirrors ast.hpp)
+
+Every node records the 1-based source position of the token that anchors
+it: the name for declarations, the operator for BinOp, else the first token.
+"""
+
+
+class ASTNode:
+    __slots__ = ('line', 'col')
+
+
+class Program(ASTNode):
+    __slots__ = ('statements',)
+
+    def __init__(self, statements=None, line=0, col=0):
+        self.statements = statements if statements is not None else []
+        self.line = line
+        self.col = col
+
+
+class VarDecl(ASTNode):
+    __slots__ = ('vartype', 'name', 'expr')
+
+    def __init__(self, vartype, name, expr, line=0, col=0):
+        self.vartype = vartype
+        self.name = name
+        self.expr = expr
+        self.line = line
+        self.col = col
+
+
+class Assign(ASTNode):
+    __slots__ = ('name', 'expr')
+
+    def __init__(self, name, expr, line=0, col=0):
+        self.name = name
+        self.expr = expr
+        self.line = line
+        self.col = col
+
+
+class Show(ASTNode):
+    __slots__ = ('expr',)
+
+    def __init__(self, expr, line=0, col=0):
+        self.expr = expr
+        self.line = line
+        self.col = col
+
+
+class Take(ASTNode):
+    __slots__ = ('name',)
+
+    def __init__(self, name, line=0, col=0):
+        self.name = name
+        self.line = line
+        self.col = col
+
+
+class When(ASTNode):
+    # cases: list of (condition, statements)
+    __slots__ = ('cases', 'else_block')
+
+    def __init__(self, cases, else_block, line=0, col=0):
+        self.cases = cases
+        self.else_block = else_block
+        self.line = line
+        self.col = col
+
+
+class Loop(ASTNode):
+    __slots__ = ('var', 'start_expr', 'end_expr', 'body')
+
+    def __init__(self, var, start_expr, end_expr, body, line=0, col=0):
+        self.var = var
+        self.start_expr = start_expr
+        self.end_expr = end_expr
+        self.body = body
+        self.line = line
+        self.col = col
+
+
+class Break(ASTNode):
+    __slots__ = ()
+
+    def __init__(self, line=0, col=0):
+        self.line = line
+        self.col = col
+
+
+class FuncDef(ASTNode):
+    __slots__ = ('name', 'params', 'body', 'back_expr')
+
+    def __init__(self, name, params, body, back_expr, line=0, col=0):
+        self.name = name
+        self.params = params
+        self.body = body
+        self.back_expr = back_expr
+        self.line = line
+        self.col = col
+
+
+class FuncCall(ASTNode):
+    __slots__ = ('name', 'args')
+
+    def __init__(self, name, args, line=0, col=0):
+        self.name = name
+        self.args = args
+        self.line = line
+        self.col = col
+
+
+class BinOp(ASTNode):
+    __slots__ = ('left', 'op_type', 'op_value', 'right')
+
+    def __init__(self, left, op_type, op_value, right, line=0, col=0):
+        self.left = left
+        self.op_type = op_type
+        self.op_value = op_value
+        self.right = right
+        self.line = line
+        self.col = col
+
+
+class UnaryOp(ASTNode):
+    __slots__ = ('op_type', 'op_value', 'expr')
+
+    def __init__(self, op_type, op_value, expr, line=0, col=0):
+        self.op_type = op_type
+        self.op_value = op_value
+        self.expr = expr
+        self.line = line
+        self.col = col
+
+
+class Literal(ASTNode):
+    # lit_type: "num", "text" or "bool"
+    __slots__ = ('value', 'lit_type')
+
+    def __init__(self, value, lit_type, line=0, col=0):
+        self.value = value
+        self.lit_type = lit_type
+        self.line = line
+        self.col = col
+
+
+class Identifier(ASTNode):
+    __slots__ = ('name',)
+
+    def __init__(self, name, line=0, col=0):
+        self.name = name
+        self.line = line
+        self.col = col
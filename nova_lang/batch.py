@@ -0,0 +1,208 @@
+"""
+Headless batch checker for whole directories of NovaLang programs
+
+Usage: python -m nova_lang.batch [options] PATH [PATH...]
+
+Every .nova file under the given paths is checked, either by the
+in-process front end in a pool of worker processes or by the C++ backend
+(--backend), one process per job. One JSON object per file is written to
+stdout as soon as that file is done, followed by a summary object. The
+exit code is 1 when any file fails.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import (
+    ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+)
+
+from . import analyze
+
+
+def discover(paths):
+    """
+    Return the sorted .nova files under paths
+
+    Files are taken as is, and so are paths that do not exist: checking
+    them fails, so a mistyped path is reported instead of skipped.
+    """
+    found = []
+    for path in paths:
+        if os.path.isfile(path) or not os.path.exists(path):
+            found.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            for name in sorted(files):
+                if name.endswith('.nova'):
+                    found.append(os.path.join(root, name))
+    return found
+
+
+def check_in_process(path):
+    """
+    Check one file with the Python front end
+
+    Returns:
+        (exit code, list of diagnostic records, seconds)
+    """
+    t = time.perf_counter()
+    try:
+        with open(path, encoding="utf-8", errors="surrogateescape",
+                  newline="") as f:
+            source = f.read()
+    except OSError:
+        record = {
+            "severity": "error", "stage": "driver",
+            "message": f"Cannot open file {path}", "line": 0, "column": 0,
+        }
+        return 1, [record], time.perf_counter() - t
+    try:
+        records = [d.to_record() for d in analyze(source)]
+    except Exception as e:
+        # A front end bug fails this file, not the whole batch
+        record = {
+            "severity": "error", "stage": "internal",
+            "message": f"Analysis failed: {e!r}", "line": 0, "column": 0,
+        }
+        return 1, [record], time.perf_counter() - t
+    code = 1 if any(r["severity"] == "error" for r in records) else 0
+    return code, records, time.perf_counter() - t
+
+
+def check_with_backend(backend, path, timeout):
+    """
+    Check one file with the C++ backend
+
+    Returns:
+        (exit code, list of diagnostic records, seconds)
+    """
+    t = time.perf_counter()
+    try:
+        proc = subprocess.run(
+            [backend, "--diagnostics=json", path],
+            capture_output=True, text=True, errors="replace", timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        record = {
+            "severity": "error", "stage": "driver",
+            "message": f"Timed out after {timeout} s", "line": 0, "column": 0,
+        }
+        return 1, [record], time.perf_counter() - t
+    except OSError as e:
+        # Missing or not executable
+        record = {
+            "severity": "error", "stage": "driver",
+            "message": f"Cannot run backend {backend}: {e.strerror or e}",
+            "line": 0, "column": 0,
+        }
+        return 1, [record], time.perf_counter() - t
+    records = []
+    for line in proc.stderr.splitlines():
+        try:
+            record = json.loads(line)
+        except ValueError:
+            continue
+        if isinstance(record, dict) and "message" in record:
+            records.append(record)
+    code = proc.returncode
+    if code != 0 and not records:
+        records.append({
+            "severity": "error", "stage": "driver",
+            "message": f"Backend exited with code {code}",
+            "line": 0, "column": 0,
+        })
+    return code, records, time.perf_counter() - t
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m nova_lang.batch",
+        description="Check every .nova file under the given paths."
+    )
+    parser.add_argument("paths", nargs="+", metavar="PATH",
+                        help="directories to search, or single files")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="parallel workers (default: one per core)")
+    parser.add_argument("--backend", metavar="EXE",
+                        help="run this backend executable instead of the "
+                             "in-process front end")
+    parser.add_argument("--timeout", type=float, default=30.0,
+                        help="per-file backend timeout in seconds")
+    parser.add_argument("--slowest", type=int, default=5,
+                        help="number of slowest files in the summary")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    opt = parse_args(sys.argv[1:] if argv is None else argv)
+    files = discover(opt.paths)
+    if not files:
+        sys.stderr.write("No .nova files found\n")
+        return 2
+    jobs = max(1, min(opt.jobs, len(files)))
+
+    start = time.perf_counter()
+    if opt.backend:
+        # Each worker thread just waits on its own backend process
+        pool = ThreadPoolExecutor(max_workers=jobs)
+        submit = lambda p: pool.submit(  # noqa: E731
+            check_with_backend, opt.backend, p, opt.timeout
+        )
+    else:
+        pool = ProcessPoolExecutor(max_workers=jobs)
+        submit = lambda p: pool.submit(check_in_process, p)  # noqa: E731
+
+    timings = []
+    failed = 0
+    out = sys.stdout
+    with pool:
+        futures = {submit(path): path for path in files}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                code, records, seconds = future.result()
+            except Exception as e:
+                # The worker itself died
+                code, seconds = 1, 0.0
+                records = [{
+                    "severity": "error", "stage": "driver",
+                    "message": f"Check failed: {e!r}", "line": 0, "column": 0,
+                }]
+            ok = code == 0
+            if not ok:
+                failed += 1
+            timings.append((seconds, path))
+            out.write(json.dumps({
+                "file": path, "ok": ok, "exit_code": code,
+                "seconds": round(seconds, 6), "diagnostics": records,
+            }) + "\n")
+            out.flush()
+    wall = time.perf_counter() - start
+
+    timings.sort(reverse=True)
+    summary = {
+        "files": len(files),
+        "passed": len(files) - failed,
+        "failed": failed,
+        "jobs": jobs,
+        "wall_seconds": round(wall, 6),
+        "slowest": [
+            {"file": path, "seconds": round(seconds, 6)}
+            for seconds, path in timings[:opt.slowest]
+        ],
+    }
+    out.write(json.dumps({"summary": summary}) + "\n")
+    sys.stderr.write(
+        f"{summary['passed']} passed, {failed} failed, "
+        f"{len(files)} files in {wall:.2f} s ({jobs} jobs)\n"
+    )
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,401 @@
+#include "bytecode.hpp"
+#include <algorithm>
+#include <cstdio>
+
+const char* op_name(Op op) {
+    switch (op) {
+        case Op::NUM: return "NUM";
+        case Op::TEXT: return "TEXT";
+        case Op::LOAD: return "LOAD";
+        case Op::STORE: return "STORE";
+        case Op::LOAD_TEXT: return "LOAD_TEXT";
+        case Op::STORE_TEXT: return "STORE_TEXT";
+        case Op::LOAD_GLOBAL: return "LOAD_GLOBAL";
+        case Op::STORE_GLOBAL: return "STORE_GLOBAL";
+        case Op::LOAD_GLOBAL_TEXT: return "LOAD_GLOBAL_TEXT";
+        case Op::STORE_GLOBAL_TEXT: return "STORE_GLOBAL_TEXT";
+        case Op::POP: return "POP";
+        case Op::ADD: return "ADD";
+        case Op::SUB: return "SUB";
+        case Op::MUL: return "MUL";
+        case Op::DIV: return "DIV";
+        case Op::NEG: return "NEG";
+        case Op::CONCAT: return "CONCAT";
+        case Op::EQ: return "EQ";
+        case Op::NE: return "NE";
+        case Op::GT: return "GT";
+        case Op::LT: return "LT";
+        case Op::GE: return "GE";
+        case Op::LE: return "LE";
+        case Op::COMPARE_TEXT: return "COMPARE_TEXT";
+        case Op::JUMP: return "JUMP";
+        case Op::JUMP_IF_FALSE: return "JUMP_IF_FALSE";
+        case Op::LOOP_TEST: return "LOOP_TEST";
+        case Op::LOOP_NEXT: return "LOOP_NEXT";
+        case Op::CALL: return "CALL";
+        case Op::RETURN: return "RETURN";
+        case Op::SHOW_NUM: return "SHOW_NUM";
+        case Op::SHOW_FLAG: return "SHOW_FLAG";
+        case Op::SHOW_TEXT: return "SHOW_TEXT";
+        case Op::TAKE_NUM: return "TAKE_NUM";
+        case Op::TAKE_FLAG: return "TAKE_FLAG";
+        case Op::TAKE_TEXT: return "TAKE_TEXT";
+        case Op::HALT: return "HALT";
+    }
+    return "?";
+}
+
+// Operands following each op
+static int operand_count(Op op) {
+    switch (op) {
+        case Op::LOOP_TEST:
+        case Op::LOOP_NEXT:
+            return 2;
+        case Op::NUM: case Op::TEXT:
+        case Op::LOAD: case Op::STORE: case Op::LOAD_TEXT: case Op::STORE_TEXT:
+        case Op::LOAD_GLOBAL: case Op::STORE_GLOBAL:
+        case Op::LOAD_GLOBAL_TEXT: case Op::STORE_GLOBAL_TEXT:
+        case Op::COMPARE_TEXT: case Op::JUMP: case Op::JUMP_IF_FALSE: case Op::CALL:
+            return 1;
+        default:
+            return 0;
+    }
+}
+
+const CodeSpan* Function::span_at(uint32_t pc) const {
+    auto it = std::lower_bound(spans.begin(), spans.end(), pc,
+                               [](const CodeSpan& s, uint32_t p) { return s.pc < p; });
+    return it != spans.end() && it->pc == pc ? &*it : nullptr;
+}
+
+size_t Module::code_bytes() const {
+    size_t n = 0;
+    for (const auto& f : functions) n += f.code.size();
+    return n;
+}
+
+void Compiler::emit(Op op, int stack_effect) {
+    current().code.push_back((uint8_t)op);
+    depth = (uint32_t)((int)depth + stack_effect);
+    if (depth > current().max_stack) current().max_stack = depth;
+}
+
+void Compiler::emit_operand(uint32_t v) {
+    auto& code = current().code;
+    size_t at = code.size();
+    code.resize(at + sizeof v);
+    std::memcpy(code.data() + at, &v, sizeof v);
+}
+
+void Compiler::patch(uint32_t at, uint32_t v) {
+    std::memcpy(current().code.data() + at, &v, sizeof v);
+}
+
+void Compiler::mark(const Node* at, int length) {
+    current().spans.push_back(CodeSpan{pc(), at->line, at->col, length});
+}
+
+uint32_t Compiler::num_constant(double v) {
+    uint64_t bits;
+    std::memcpy(&bits, &v, sizeof bits);
+    auto it = num_index.find(bits);
+    if (it != num_index.end()) return it->second;
+    uint32_t k = (uint32_t)module.nums.size();
+    module.nums.push_back(v);
+    num_index.emplace(bits, k);
+    return k;
+}
+
+uint32_t Compiler::text_constant(std::string_view s) {
+    std::string key(s);
+    auto it = text_index.find(key);
+    if (it != text_index.end()) return it->second;
+    uint32_t k = (uint32_t)module.texts.size();
+    module.texts.push_back(key);
+    text_index.emplace(std::move(key), k);
+    return k;
+}
+
+void Compiler::enter_scope() { scope_marks.push_back((uint32_t)bindings.size()); }
+
+void Compiler::exit_scope() {
+    uint32_t mark = scope_marks.back();
+    scope_marks.pop_back();
+    while (bindings.size() > mark) {
+        visible[bindings.back().name] = bindings.back().shadowed;
+        bindings.pop_back();
+    }
+}
+
+uint32_t Compiler::declare(NameId id, VarType type, uint32_t slots) {
+    Function& f = current();
+    uint32_t slot = f.slot_count;
+    f.slot_count += slots;
+    if (type == VarType::TEXT) f.text_slots.push_back(slot);
+    bindings.push_back(Binding{id, type, level, slot, visible[id]});
+    visible[id] = (int32_t)bindings.size() - 1;
+    return slot;
+}
+
+const Compiler::Binding& Compiler::resolve(NameId id, const Node* at) {
+    const Binding& b = bindings[visible[id]];
+    if (b.level != level && b.level != 0) {
+        // Frames are not linked, so only the own frame and the bottom one
+        // are reachable
+        throw CodegenError("Function '" + current().name + "' cannot use '" + name(id) +
+                           "' of the enclosing function",
+                           at->line, at->col, (int)ast->names.spelling(id).size());
+    }
+    return b;
+}
+
+void Compiler::load(const Binding& b) {
+    bool text = b.type == VarType::TEXT;
+    if (b.level == level) emit(text ? Op::LOAD_TEXT : Op::LOAD, 1);
+    else emit(text ? Op::LOAD_GLOBAL_TEXT : Op::LOAD_GLOBAL, 1);
+    emit_operand(b.slot);
+}
+
+void Compiler::store(const Binding& b) {
+    bool text = b.type == VarType::TEXT;
+    if (b.level == level) emit(text ? Op::STORE_TEXT : Op::STORE, -1);
+    else emit(text ? Op::STORE_GLOBAL_TEXT : Op::STORE_GLOBAL, -1);
+    emit_operand(b.slot);
+}
+
+Module Compiler::compile(const Ast& a) {
+    ast = &a;
+    module = Module();
+    visible.assign(a.names.size(), -1);
+    functions.assign(a.names.size(), -1);
+    module.functions.emplace_back();
+    module.functions[0].name = "<program>";
+    fn = 0;
+    level = 0;
+    depth = 0;
+    block(a.root->statements);
+    emit(Op::HALT, 0);
+    return std::move(module);
+}
+
+void Compiler::block(const NodeList& stmts) {
+    for (const Node* s : stmts) statement(s);
+}
+
+void Compiler::statement(const Node* node) {
+    switch (node->kind) {
+        case NodeKind::VAR_DECL: {
+            auto d = static_cast<const VarDecl*>(node);
+            expr(d->expr);
+            declare(d->name, d->vartype);
+            store(bindings.back());
+            return;
+        }
+        case NodeKind::ASSIGN: {
+            auto s = static_cast<const Assign*>(node);
+            const Binding& b = resolve(s->name, s);
+            expr(s->expr);
+            store(b);
+            return;
+        }
+        case NodeKind::SHOW: {
+            Type t = expr(static_cast<const Show*>(node)->expr);
+            emit(t == Type::TEXT ? Op::SHOW_TEXT : t == Type::BOOL ? Op::SHOW_FLAG : Op::SHOW_NUM, -1);
+            return;
+        }
+        case NodeKind::TAKE: {
+            auto t = static_cast<const Take*>(node);
+            const Binding& b = resolve(t->name, t);
+            mark(t, (int)ast->names.spelling(t->name).size());
+            emit(b.type == VarType::TEXT ? Op::TAKE_TEXT : b.type == VarType::FLAG ? Op::TAKE_FLAG : Op::TAKE_NUM, 1);
+            store(b);
+            return;
+        }
+        case NodeKind::WHEN: when(static_cast<const When*>(node)); return;
+        case NodeKind::LOOP: loop(static_cast<const Loop*>(node)); return;
+        case NodeKind::BREAK:
+            emit(Op::JUMP, 0);
+            loops.back().breaks.push_back(pc());
+            emit_operand(0);
+            return;
+        case NodeKind::FUNC_DEF: func_def(static_cast<const FuncDef*>(node)); return;
+        case NodeKind::FUNC_CALL:
+            call(static_cast<const FuncCall*>(node));
+            emit(Op::POP, -1);
+            return;
+        default:
+            throw CodegenError("Unhandled statement in code generator", node->line, node->col);
+    }
+}
+
+void Compiler::when(const When* node) {
+    std::vector<uint32_t> exits;
+    for (const WhenCase& c : *node) {
+        expr(c.cond);
+        emit(Op::JUMP_IF_FALSE, -1);
+        uint32_t next = pc();
+        emit_operand(0);
+        enter_scope();
+        block(c.body);
+        exit_scope();
+        if (&c != node->end() - 1 || !node->else_block.empty()) {
+            emit(Op::JUMP, 0);
+            exits.push_back(pc());
+            emit_operand(0);
+        }
+        patch(next, pc());
+    }
+    if (!node->else_block.empty()) {
+        enter_scope();
+        block(node->else_block);
+        exit_scope();
+    }
+    for (uint32_t at : exits) patch(at, pc());
+}
+
+void Compiler::loop(const Loop* node) {
+    // Bounds are evaluated once, before the loop variable exists; the end
+    // bound is kept in the slot after the variable's
+    expr(node->start_expr);
+    expr(node->end_expr);
+    enter_scope();
+    uint32_t slot = declare(node->var, VarType::NUM, 2);
+    emit(Op::STORE, -1);
+    emit_operand(slot + 1);
+    emit(Op::STORE, -1);
+    emit_operand(slot);
+    emit(Op::LOOP_TEST, 0);
+    emit_operand(slot);
+    uint32_t exit = pc();
+    emit_operand(0);
+    uint32_t top = pc();
+    loops.emplace_back();
+    block(node->body);
+    emit(Op::LOOP_NEXT, 0);
+    emit_operand(slot);
+    emit_operand(top);
+    patch(exit, pc());
+    for (uint32_t at : loops.back().breaks) patch(at, pc());
+    loops.pop_back();
+    exit_scope();
+}
+
+void Compiler::func_def(const FuncDef* node) {
+    // A redeclared function keeps its first definition, as in the checker
+    uint32_t index = (uint32_t)module.functions.size();
+    module.functions.emplace_back();
+    if (functions[node->name] < 0) functions[node->name] = (int32_t)index;
+    Function& f = module.functions.back();
+    f.name = name(node->name);
+    f.param_count = node->param_count;
+
+    uint32_t outer_fn = fn, outer_depth = depth;
+    std::vector<OpenLoop> outer_loops;
+    outer_loops.swap(loops);
+    fn = index;
+    level++;
+    depth = 0;
+    enter_scope();
+    for (uint32_t k = 0; k < node->param_count; ++k) declare(node->params[k], VarType::NUM);
+    block(node->body);
+    expr(node->back_expr);
+    emit(Op::RETURN, -1);
+    exit_scope();
+    level--;
+    fn = outer_fn;
+    depth = outer_depth;
+    loops.swap(outer_loops);
+}
+
+Type Compiler::call(const FuncCall* node) {
+    for (const Node* a : node->args) expr(a);
+    mark(node, (int)ast->names.spelling(node->name).size());
+    emit(Op::CALL, 1 - (int)node->args.size);
+    emit_operand((uint32_t)functions[node->name]);
+    return Type::NUM;
+}
+
+Type Compiler::expr(const Node* node) {
+    switch (node->kind) {
+        case NodeKind::LITERAL: {
+            auto l = static_cast<const Literal*>(node);
+            if (l->lit == LitKind::TEXT) {
+                emit(Op::TEXT, 1);
+                emit_operand(text_constant(l->value.view()));
+                return Type::TEXT;
+            }
+            double v = l->lit == LitKind::BOOL ? (l->value.view() == "true" ? 1.0 : 0.0)
+                                               : std::strtod(std::string(l->value.view()).c_str(), nullptr);
+            emit(Op::NUM, 1);
+            emit_operand(num_constant(v));
+            return l->lit == LitKind::BOOL ? Type::BOOL : Type::NUM;
+        }
+        case NodeKind::IDENTIFIER: {
+            const Binding& b = resolve(static_cast<const Identifier*>(node)->name, node);
+            load(b);
+            return b.type == VarType::TEXT ? Type::TEXT : b.type == VarType::FLAG ? Type::BOOL : Type::NUM;
+        }
+        case NodeKind::FUNC_CALL: return call(static_cast<const FuncCall*>(node));
+        case NodeKind::UNARY_OP:
+            expr(static_cast<const UnaryOp*>(node)->expr);
+            emit(Op::NEG, 0);
+            return Type::NUM;
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(node);
+            Type t = expr(b->left);
+            expr(b->right);
+            if (is_arithmetic(b->op)) {
+                if (t == Type::TEXT) {
+                    emit(Op::CONCAT, -1);
+                    return Type::TEXT;
+                }
+                if (b->op == OpKind::DIV) mark(b, 1);
+                static const Op arith[] = {Op::ADD, Op::SUB, Op::MUL, Op::DIV};
+                emit(arith[(int)b->op - (int)OpKind::ADD], -1);
+                return Type::NUM;
+            }
+            if (t == Type::TEXT) {
+                emit(Op::COMPARE_TEXT, -1);
+                emit_operand((uint32_t)b->op);
+            } else {
+                static const Op cmp[] = {Op::EQ, Op::NE, Op::GT, Op::LT, Op::GE, Op::LE};
+                emit(cmp[(int)b->op - (int)OpKind::EQ], -1);
+            }
+            return Type::BOOL;
+        }
+        default:
+            throw CodegenError("Unhandled expression in code generator", node->line, node->col);
+    }
+}
+
+static std::string quoted(const std::string& s) {
+    std::string out = "\"";
+    for (char c : s) {
+        if (c == '"' || c == '\\') out.push_back('\\');
+        if (c == '\n') out += "\\n";
+        else out.push_back(c);
+    }
+    return out + "\"";
+}
+
+void print_bytecode(std::ostream& os, const Module& m) {
+    char num[32];
+    for (size_t k = 0; k < m.nums.size(); ++k) {
+        std::snprintf(num, sizeof num, "%.17g", m.nums[k]);
+        os << "num " << k << " " << num << "\n";
+    }
+    for (size_t k = 0; k < m.texts.size(); ++k) os << "text " << k << " " << quoted(m.texts[k]) << "\n";
+    for (size_t f = 0; f < m.functions.size(); ++f) {
+        const Function& fn = m.functions[f];
+        os << "function " << f << " " << fn.name << " params=" << fn.param_count
+           << " slots=" << fn.slot_count << " stack=" << fn.max_stack << "\n";
+        for (size_t pc = 0; pc < fn.code.size();) {
+            Op op = (Op)fn.code[pc];
+            os << "  " << pc << " " << op_name(op);
+            size_t at = pc + 1;
+            for (int k = 0; k < operand_count(op); ++k, at += 4) os << " " << fn.operand(at);
+            os << "\n";
+            pc = at;
+        }
+    }
+}
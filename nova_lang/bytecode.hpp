@@ -0,0 +1,147 @@
+#ifndef NOVA_BYTECODE_HPP
+#define NOVA_BYTECODE_HPP
+
+#include <cstdint>
+#include <cstring>
+#include <ostream>
+#include <string>
+#include <unordered_map>
+#include <vector>
+#include "ast.hpp"
+#include "diagnostics.hpp"
+#include "semantic.hpp"
+
+// A checked program lowered for the VM (vm.hpp). Types are known after
+// semantic analysis, so every instruction is typed and the VM never looks
+// at a tag: nums and flags are doubles (a flag is 0 or 1), text is a
+// reference-counted string. Variables are resolved to frame slots here;
+// each declaration gets its own slot, and top-level variables live in the
+// bottom frame where functions reach them as globals.
+//
+// Code is a byte stream: a one-byte Op, then its operands as native-endian
+// uint32 (see Function::operand).
+enum class Op : uint8_t {
+    NUM,              // k: push nums[k]
+    TEXT,             // k: push texts[k]
+    LOAD,             // s: push slot s of this frame
+    STORE,            // s: pop into slot s of this frame
+    LOAD_TEXT,        // s
+    STORE_TEXT,       // s
+    LOAD_GLOBAL,      // s: push slot s of the bottom frame
+    STORE_GLOBAL,     // s
+    LOAD_GLOBAL_TEXT, // s
+    STORE_GLOBAL_TEXT,// s
+    POP,
+    ADD, SUB, MUL, DIV, NEG,
+    CONCAT,
+    EQ, NE, GT, LT, GE, LE,   // nums and flags
+    COMPARE_TEXT,     // OpKind: pop two texts, push the comparison
+    JUMP,             // pc
+    JUMP_IF_FALSE,    // pc: pop
+    LOOP_TEST,        // s pc: jump to pc unless slot s <= slot s+1
+    LOOP_NEXT,        // s pc: add 1 to slot s, jump to pc if slot s <= slot s+1
+    CALL,             // f: the arguments are the first slots of its frame
+    RETURN,           // pop the result, drop the frame, push the result
+    SHOW_NUM, SHOW_FLAG, SHOW_TEXT,
+    TAKE_NUM, TAKE_FLAG, TAKE_TEXT,   // push a value read from the input
+    HALT
+};
+
+const char* op_name(Op op);
+
+// Where the instructions that can fail at run time came from
+struct CodeSpan {
+    uint32_t pc;
+    int line;
+    int col;
+    int length;
+};
+
+struct Function {
+    std::string name;
+    uint32_t param_count = 0;
+    uint32_t slot_count = 0;            // parameters first, then one per declaration
+    uint32_t max_stack = 0;             // deepest the operand stack gets above the slots
+    std::vector<uint32_t> text_slots;   // slots holding text, released on return
+    std::vector<uint8_t> code;
+    std::vector<CodeSpan> spans;        // ordered by pc
+
+    uint32_t operand(size_t at) const {
+        uint32_t v;
+        std::memcpy(&v, code.data() + at, sizeof v);
+        return v;
+    }
+    const CodeSpan* span_at(uint32_t pc) const;
+};
+
+// functions[0] is the top-level program
+struct Module {
+    std::vector<double> nums;
+    std::vector<std::string> texts;
+    std::vector<Function> functions;
+    size_t code_bytes() const;
+};
+
+// What the VM cannot run although the checker accepts it
+class CodegenError : public CompileError {
+public:
+    CodegenError(const std::string& s, int l = 0, int c = 0, int len = 1) : CompileError("codegen", s, l, c, len) {}
+};
+
+// Lowers a program that passed semantic analysis; anything else is undefined
+class Compiler {
+private:
+    struct Binding {
+        NameId name;
+        VarType type;
+        uint32_t level;     // function nesting of the declaring frame, 0 at top level
+        uint32_t slot;
+        int32_t shadowed;   // previous binding of the same name, or -1
+    };
+    struct OpenLoop {
+        std::vector<uint32_t> breaks;   // operands to patch with the exit pc
+    };
+    const Ast* ast = nullptr;
+    Module module;
+    std::vector<Binding> bindings;
+    std::vector<int32_t> visible;       // NameId -> innermost binding, or -1
+    std::vector<uint32_t> scope_marks;
+    std::vector<int32_t> functions;     // NameId -> first function of that name, or -1
+    std::unordered_map<uint64_t, uint32_t> num_index;
+    std::unordered_map<std::string, uint32_t> text_index;
+    // The function being compiled
+    uint32_t fn = 0;
+    uint32_t level = 0;
+    uint32_t depth = 0;                 // operand stack depth at this point
+    std::vector<OpenLoop> loops;
+
+    Function& current() { return module.functions[fn]; }
+    std::string name(NameId id) const { return std::string(ast->names.spelling(id)); }
+    uint32_t pc() { return (uint32_t)current().code.size(); }
+    void emit(Op op, int stack_effect);
+    void emit_operand(uint32_t v);
+    void patch(uint32_t at, uint32_t v);
+    void mark(const Node* at, int length);
+    uint32_t num_constant(double v);
+    uint32_t text_constant(std::string_view s);
+    void enter_scope();
+    void exit_scope();
+    uint32_t declare(NameId id, VarType type, uint32_t slots = 1);
+    const Binding& resolve(NameId id, const Node* at);
+    void load(const Binding& b);
+    void store(const Binding& b);
+    void block(const NodeList& stmts);
+    void statement(const Node* node);
+    void when(const When* node);
+    void loop(const Loop* node);
+    void func_def(const FuncDef* node);
+    Type expr(const Node* node);
+    Type call(const FuncCall* node);
+public:
+    Module compile(const Ast& ast);
+};
+
+// Human-readable listing, one instruction per line
+void print_bytecode(std::ostream& os, const Module& m);
+
+#endif // NOVA_BYTECODE_HPP
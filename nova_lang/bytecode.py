@@ -0,0 +1,410 @@
+"""
+Bytecode for checked programs (mirrors bytecode.hpp)
+
+Types are known after semantic analysis, so every instruction is typed:
+nums and flags are floats (a flag is 0 or 1) and text is str. Variables
+are resolved to frame slots here; each declaration gets its own slot, and
+top-level variables live in the bottom frame where functions reach them as
+globals. Code is a byte stream: a one-byte op, then its operands as
+uint32, so pcs and listings match the backend's.
+"""
+
+import struct
+from enum import IntEnum
+
+from .ast_nodes import (
+    VarDecl, Assign, Show, Take, When, Loop, Break, FuncDef, FuncCall,
+    BinOp, UnaryOp, Literal, Identifier
+)
+from .diagnostics import CompileError
+from .token import TokenType
+
+
+class Op(IntEnum):
+    NUM = 0                 # k: push nums[k]
+    TEXT = 1                # k: push texts[k]
+    LOAD = 2                # s: push slot s of this frame
+    STORE = 3               # s: pop into slot s of this frame
+    LOAD_TEXT = 4
+    STORE_TEXT = 5
+    LOAD_GLOBAL = 6         # s: push slot s of the bottom frame
+    STORE_GLOBAL = 7
+    LOAD_GLOBAL_TEXT = 8
+    STORE_GLOBAL_TEXT = 9
+    POP = 10
+    ADD = 11
+    SUB = 12
+    MUL = 13
+    DIV = 14
+    NEG = 15
+    CONCAT = 16
+    EQ = 17                 # nums and flags
+    NE = 18
+    GT = 19
+    LT = 20
+    GE = 21
+    LE = 22
+    COMPARE_TEXT = 23       # OpKind: pop two texts, push the comparison
+    JUMP = 24               # pc
+    JUMP_IF_FALSE = 25      # pc: pop
+    LOOP_TEST = 26          # s pc: jump to pc unless slot s <= slot s+1
+    LOOP_NEXT = 27          # s pc: add 1 to slot s, jump to pc if s <= s+1
+    CALL = 28               # f: the arguments are the first slots of its frame
+    RETURN = 29
+    SHOW_NUM = 30
+    SHOW_FLAG = 31
+    SHOW_TEXT = 32
+    TAKE_NUM = 33           # push a value read from the input
+    TAKE_FLAG = 34
+    TAKE_TEXT = 35
+    HALT = 36
+
+
+# Operands following each op
+OPERANDS = dict.fromkeys(Op, 0)
+OPERANDS.update(dict.fromkeys((
+    Op.NUM, Op.TEXT, Op.LOAD, Op.STORE, Op.LOAD_TEXT, Op.STORE_TEXT,
+    Op.LOAD_GLOBAL, Op.STORE_GLOBAL, Op.LOAD_GLOBAL_TEXT,
+    Op.STORE_GLOBAL_TEXT, Op.COMPARE_TEXT, Op.JUMP, Op.JUMP_IF_FALSE, Op.CALL,
+), 1))
+OPERANDS[Op.LOOP_TEST] = OPERANDS[Op.LOOP_NEXT] = 2
+
+# Operators in OpKind order (ast.hpp); COMPARE_TEXT takes the OpKind
+_ARITHMETIC = {
+    TokenType.PLUS: Op.ADD, TokenType.MINUS: Op.SUB,
+    TokenType.STAR: Op.MUL, TokenType.SLASH: Op.DIV,
+}
+_COMPARISON = {
+    TokenType.EQEQ: (Op.EQ, 4), TokenType.NOTEQ: (Op.NE, 5),
+    TokenType.GT: (Op.GT, 6), TokenType.LT: (Op.LT, 7),
+    TokenType.GTEQ: (Op.GE, 8), TokenType.LTEQ: (Op.LE, 9),
+}
+_VALUE_TYPE = {"num": "num", "text": "text", "flag": "bool"}
+_WORD = struct.Struct("=I")
+
+
+class CodegenError(CompileError):
+    """What the VM cannot run although the checker accepts it"""
+
+    stage = "codegen"
+
+
+class Function:
+    __slots__ = (
+        'name', 'param_count', 'slot_count', 'max_stack', 'text_slots',
+        'code', 'spans'
+    )
+
+    def __init__(self, name, param_count=0):
+        self.name = name
+        self.param_count = param_count
+        self.slot_count = 0
+        self.max_stack = 0
+        self.text_slots = []
+        self.code = bytearray()
+        # pc -> (line, col, length) of the instructions that can fail
+        self.spans = {}
+
+    def operand(self, at):
+        return _WORD.unpack_from(self.code, at)[0]
+
+
+class Module:
+    """functions[0] is the top-level program"""
+
+    __slots__ = ('nums', 'texts', 'functions')
+
+    def __init__(self):
+        self.nums = []
+        self.texts = []
+        self.functions = []
+
+    def code_bytes(self):
+        return sum(len(f.code) for f in self.functions)
+
+
+class _Binding:
+    __slots__ = ('type', 'level', 'slot')
+
+    def __init__(self, type, level, slot):
+        self.type = type
+        self.level = level
+        self.slot = slot
+
+
+class Compiler:
+    """Lowers a program that passed semantic analysis"""
+
+    def compile(self, program):
+        self.module = Module()
+        self.scopes = [{}]
+        self.functions = {}
+        self.num_index = {}
+        self.text_index = {}
+        self.fn = Function("<program>")
+        self.module.functions.append(self.fn)
+        self.level = 0
+        self.depth = 0
+        self.loops = []
+        self.block(program.statements)
+        self.emit(Op.HALT, 0)
+        return self.module
+
+    # Emission
+    def emit(self, op, stack_effect, *operands):
+        fn = self.fn
+        fn.code.append(op)
+        for v in operands:
+            fn.code += _WORD.pack(v)
+        self.depth += stack_effect
+        if self.depth > fn.max_stack:
+            fn.max_stack = self.depth
+
+    def pc(self):
+        return len(self.fn.code)
+
+    def patch(self, at, value):
+        _WORD.pack_into(self.fn.code, at, value)
+
+    def mark(self, node, length):
+        self.fn.spans[self.pc()] = (node.line, node.col, length)
+
+    def num_constant(self, value):
+        key = struct.pack("d", value)
+        k = self.num_index.get(key)
+        if k is None:
+            k = self.num_index[key] = len(self.module.nums)
+            self.module.nums.append(value)
+        return k
+
+    def text_constant(self, value):
+        k = self.text_index.get(value)
+        if k is None:
+            k = self.text_index[value] = len(self.module.texts)
+            self.module.texts.append(value)
+        return k
+
+    # Scopes
+    def declare(self, name, type, slots=1):
+        fn = self.fn
+        slot = fn.slot_count
+        fn.slot_count += slots
+        if type == "text":
+            fn.text_slots.append(slot)
+        self.scopes[-1][name] = _Binding(type, self.level, slot)
+        return slot
+
+    def resolve(self, name, at):
+        for scope in reversed(self.scopes):
+            b = scope.get(name)
+            if b is not None:
+                break
+        if b.level != self.level and b.level != 0:
+            # Frames are not linked, so only the own frame and the bottom
+            # one are reachable
+            raise CodegenError(
+                f"Function '{self.fn.name}' cannot use '{name}' of the "
+                "enclosing function", at.line, at.col, len(name)
+            )
+        return b
+
+    def load(self, b):
+        text = b.type == "text"
+        if b.level == self.level:
+            op = Op.LOAD_TEXT if text else Op.LOAD
+        else:
+            op = Op.LOAD_GLOBAL_TEXT if text else Op.LOAD_GLOBAL
+        self.emit(op, 1, b.slot)
+
+    def store(self, b):
+        text = b.type == "text"
+        if b.level == self.level:
+            op = Op.STORE_TEXT if text else Op.STORE
+        else:
+            op = Op.STORE_GLOBAL_TEXT if text else Op.STORE_GLOBAL
+        self.emit(op, -1, b.slot)
+
+    def scoped_block(self, stmts):
+        self.scopes.append({})
+        self.block(stmts)
+        self.scopes.pop()
+
+    # Statements
+    def block(self, stmts):
+        for s in stmts:
+            self.statement(s)
+
+    def statement(self, node):
+        cls = type(node)
+        if cls is VarDecl:
+            self.expr(node.expr)
+            self.declare(node.name, node.vartype)
+            self.store(self.scopes[-1][node.name])
+        elif cls is Assign:
+            b = self.resolve(node.name, node)
+            self.expr(node.expr)
+            self.store(b)
+        elif cls is Show:
+            t = self.expr(node.expr)
+            op = {"text": Op.SHOW_TEXT, "bool": Op.SHOW_FLAG}.get(t, Op.SHOW_NUM)
+            self.emit(op, -1)
+        elif cls is Take:
+            b = self.resolve(node.name, node)
+            self.mark(node, len(node.name))
+            op = {"text": Op.TAKE_TEXT, "flag": Op.TAKE_FLAG}.get(b.type, Op.TAKE_NUM)
+            self.emit(op, 1)
+            self.store(b)
+        elif cls is When:
+            self.when(node)
+        elif cls is Loop:
+            self.loop(node)
+        elif cls is Break:
+            self.emit(Op.JUMP, 0)
+            self.loops[-1].append(self.pc())
+            self.fn.code += _WORD.pack(0)
+        elif cls is FuncDef:
+            self.func_def(node)
+        elif cls is FuncCall:
+            self.call(node)
+            self.emit(Op.POP, -1)
+        else:
+            raise CodegenError("Unhandled statement in code generator",
+                               node.line, node.col)
+
+    def when(self, node):
+        exits = []
+        for k, (cond, stmts) in enumerate(node.cases):
+            self.expr(cond)
+            self.emit(Op.JUMP_IF_FALSE, -1, 0)
+            after_cond = self.pc() - 4
+            self.scoped_block(stmts)
+            if k != len(node.cases) - 1 or node.else_block:
+                self.emit(Op.JUMP, 0, 0)
+                exits.append(self.pc() - 4)
+            self.patch(after_cond, self.pc())
+        if node.else_block:
+            self.scoped_block(node.else_block)
+        for at in exits:
+            self.patch(at, self.pc())
+
+    def loop(self, node):
+        # Bounds are evaluated once, before the loop variable exists; the
+        # end bound is kept in the slot after the variable's
+        self.expr(node.start_expr)
+        self.expr(node.end_expr)
+        self.scopes.append({})
+        slot = self.declare(node.var, "num", 2)
+        self.emit(Op.STORE, -1, slot + 1)
+        self.emit(Op.STORE, -1, slot)
+        self.emit(Op.LOOP_TEST, 0, slot, 0)
+        exit_at = self.pc() - 4
+        top = self.pc()
+        self.loops.append([])
+        self.block(node.body)
+        self.emit(Op.LOOP_NEXT, 0, slot, top)
+        self.patch(exit_at, self.pc())
+        for at in self.loops.pop():
+            self.patch(at, self.pc())
+        self.scopes.pop()
+
+    def func_def(self, node):
+        # A redeclared function keeps its first definition, as in the checker
+        index = len(self.module.functions)
+        fn = Function(node.name, len(node.params))
+        self.module.functions.append(fn)
+        self.functions.setdefault(node.name, index)
+
+        outer = (self.fn, self.depth, self.loops)
+        self.fn, self.depth, self.loops = fn, 0, []
+        self.level += 1
+        self.scopes.append({})
+        for p in node.params:
+            self.declare(p, "num")
+        self.block(node.body)
+        self.expr(node.back_expr)
+        self.emit(Op.RETURN, -1)
+        self.scopes.pop()
+        self.level -= 1
+        self.fn, self.depth, self.loops = outer
+
+    # Expressions
+    def call(self, node):
+        for a in node.args:
+            self.expr(a)
+        self.mark(node, len(node.name))
+        self.emit(Op.CALL, 1 - len(node.args), self.functions[node.name])
+        return "num"
+
+    def expr(self, node):
+        cls = type(node)
+        if cls is Literal:
+            if node.lit_type == "text":
+                self.emit(Op.TEXT, 1, self.text_constant(node.value))
+                return "text"
+            if node.lit_type == "bool":
+                value = 1.0 if node.value == "true" else 0.0
+            else:
+                value = float(node.value)
+            self.emit(Op.NUM, 1, self.num_constant(value))
+            return node.lit_type
+        if cls is Identifier:
+            b = self.resolve(node.name, node)
+            self.load(b)
+            return _VALUE_TYPE[b.type]
+        if cls is FuncCall:
+            return self.call(node)
+        if cls is UnaryOp:
+            self.expr(node.expr)
+            self.emit(Op.NEG, 0)
+            return "num"
+        if cls is BinOp:
+            t = self.expr(node.left)
+            self.expr(node.right)
+            op = _ARITHMETIC.get(node.op_type)
+            if op is not None:
+                if t == "text":
+                    self.emit(Op.CONCAT, -1)
+                    return "text"
+                if op == Op.DIV:
+                    self.mark(node, 1)
+                self.emit(op, -1)
+                return "num"
+            op, kind = _COMPARISON[node.op_type]
+            if t == "text":
+                self.emit(Op.COMPARE_TEXT, -1, kind)
+            else:
+                self.emit(op, -1)
+            return "bool"
+        raise CodegenError("Unhandled expression in code generator",
+                           node.line, node.col)
+
+
+def _quoted(s):
+    out = ['"']
+    for ch in s:
+        if ch in '"\\':
+            out.append('\\')
+        out.append('\\n' if ch == '\n' else ch)
+    out.append('"')
+    return ''.join(out)
+
+
+def print_bytecode(out, module):
+    """Human-readable listing, one instruction per line (--emit=bytecode)"""
+    for k, v in enumerate(module.nums):
+        out.write(f"num {k} {'%.17g' % v}\n")
+    for k, s in enumerate(module.texts):
+        out.write(f"text {k} {_quoted(s)}\n")
+    for k, fn in enumerate(module.functions):
+        out.write(
+            f"function {k} {fn.name} params={fn.param_count} "
+            f"slots={fn.slot_count} stack={fn.max_stack}\n"
+        )
+        pc = 0
+        code = fn.code
+        while pc < len(code):
+            op = code[pc]
+            words = [fn.operand(pc + 1 + 4 * i) for i in range(OPERANDS[op])]
+            out.write(f"  {pc} {Op(op).name}"
+                      + "".join(f" {w}" for w in words) + "\n")
+            pc += 1 + 4 * len(words)
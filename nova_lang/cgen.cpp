@@ -0,0 +1,363 @@
+#include "cgen.hpp"
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+
+// Literal pieces longer than this are split, for compilers that limit them
+static constexpr size_t STRING_PIECE = 256;
+
+std::string c_number(double v) {
+    if (std::isnan(v)) return "NAN";
+    if (std::isinf(v)) return v > 0 ? "HUGE_VAL" : "(-HUGE_VAL)";
+    char buf[32];
+    std::snprintf(buf, sizeof buf, "%.17g", v);
+    std::string s = buf;
+    if (s.find_first_of(".e") == std::string::npos) s += ".0";
+    return s[0] == '-' ? "(" + s + ")" : s;
+}
+
+std::string c_string(std::string_view s) {
+    std::string out = "\"";
+    for (size_t k = 0; k < s.size(); ++k) {
+        if (k > 0 && k % STRING_PIECE == 0) out += "\" \"";
+        unsigned char c = (unsigned char)s[k];
+        if (c == '"' || c == '\\' || c == '?') {
+            out.push_back('\\');
+            out.push_back((char)c);
+        } else if (c >= 0x20 && c < 0x7f) {
+            out.push_back((char)c);
+        } else {
+            char esc[8];
+            std::snprintf(esc, sizeof esc, "\\%03o", c);
+            out += esc;
+        }
+    }
+    return out + "\"";
+}
+
+// A call, or a division that can fail
+static bool may_fail(const Node* n) {
+    switch (n->kind) {
+        case NodeKind::FUNC_CALL: return true;
+        case NodeKind::UNARY_OP: return may_fail(static_cast<const UnaryOp*>(n)->expr);
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(n);
+            return b->op == OpKind::DIV || may_fail(b->left) || may_fail(b->right);
+        }
+        default: return false;
+    }
+}
+
+static const char* c_type(VarType t) { return t == VarType::TEXT ? "nv_text* " : "double "; }
+
+static Type value_type(VarType t) {
+    return t == VarType::TEXT ? Type::TEXT : t == VarType::FLAG ? Type::BOOL : Type::NUM;
+}
+
+void CGenerator::line(const std::string& code) {
+    out->body.append(4 * out->indent, ' ');
+    out->body += code;
+    out->body.push_back('\n');
+}
+
+std::string CGenerator::site(const Node* at, int length) {
+    sites.push_back(CodeSpan{(uint32_t)sites.size(), at->line, at->col, length});
+    return "&nv_sites[" + std::to_string(sites.size() - 1) + "]";
+}
+
+uint32_t CGenerator::text_constant(std::string_view s) {
+    std::string key(s);
+    auto it = text_index.find(key);
+    if (it != text_index.end()) return it->second;
+    uint32_t k = (uint32_t)texts.size();
+    texts.push_back(key);
+    text_index.emplace(std::move(key), k);
+    return k;
+}
+
+void CGenerator::enter_scope() { scope_marks.push_back((uint32_t)bindings.size()); }
+
+void CGenerator::exit_scope() {
+    uint32_t mark = scope_marks.back();
+    scope_marks.pop_back();
+    while (bindings.size() > mark) {
+        visible[bindings.back().name] = bindings.back().shadowed;
+        bindings.pop_back();
+    }
+}
+
+const CGenerator::Binding& CGenerator::declare(NameId id, VarType type) {
+    std::string cname = (level == 0 ? "g" : "v") + std::to_string(variables++) + "_" + name(id);
+    bool text = type == VarType::TEXT;
+    if (level == 0) {
+        globals += std::string("static ") + c_type(type) + cname + ";\n";
+        if (text) global_texts += "    " + cname + " = nv_ref(nv_empty);\n";
+    } else {
+        out->locals += "    " + std::string(c_type(type)) + cname + (text ? " = nv_ref(nv_empty);\n" : " = 0;\n");
+        if (text) out->texts.push_back(cname);
+    }
+    bindings.push_back(Binding{id, type, level, std::move(cname), visible[id]});
+    visible[id] = (int32_t)bindings.size() - 1;
+    return bindings.back();
+}
+
+const CGenerator::Binding& CGenerator::resolve(NameId id, const Node* at) {
+    const Binding& b = bindings[visible[id]];
+    if (b.level != level && b.level != 0) {
+        throw CodegenError("Function '" + out->name + "' cannot use '" + name(id) +
+                           "' of the enclosing function",
+                           at->line, at->col, (int)ast->names.spelling(id).size());
+    }
+    return b;
+}
+
+std::string CGenerator::temp(const Value& v) {
+    std::string t = "t" + std::to_string(++out->temps);
+    line((v.type == Type::TEXT ? "nv_text* " : "double ") + t + " = " + v.code + ";");
+    return t;
+}
+
+void CGenerator::store(const Binding& b, const Value& v) {
+    if (b.type == VarType::TEXT) line("nv_set(&" + b.cname + ", " + v.code + ");");
+    else line(b.cname + " = " + v.code + ";");
+}
+
+std::string CGenerator::generate(const Ast& a) {
+    ast = &a;
+    visible.assign(a.names.size(), -1);
+    functions.assign(a.names.size(), -1);
+    Output program;
+    program.name = "<program>";
+    out = &program;
+    level = 0;
+    block(a.root->statements);
+
+    std::string c = "/* Generated by the NovaLang compiler (--emit=c). Build it with\n"
+                    "   nova_runtime.h on the include path: cc -O2 -I nova_lang prog.c */\n"
+                    "#include \"nova_runtime.h\"\n";
+    if (!sites.empty()) {
+        c += "\nstatic const nv_site nv_sites[] = {\n";
+        for (const CodeSpan& s : sites)
+            c += "    {" + std::to_string(s.line) + ", " + std::to_string(s.col) + ", " + std::to_string(s.length) + "},\n";
+        c += "};\n";
+    }
+    if (!texts.empty()) c += "static nv_text* nv_texts[" + std::to_string(texts.size()) + "];\n";
+    if (!globals.empty()) c += "\n" + globals;
+    if (!prototypes.empty()) {
+        c += "\n";
+        for (const std::string& p : prototypes) c += p + ";\n";
+    }
+    for (const std::string& d : definitions) c += "\n" + d;
+    c += "\nint main(int argc, char** argv)\n{\n    nv_start(argc, argv);\n";
+    for (size_t k = 0; k < texts.size(); ++k)
+        c += "    nv_texts[" + std::to_string(k) + "] = nv_make(" + c_string(texts[k]) + ", " +
+             std::to_string(texts[k].size()) + ");\n";
+    c += global_texts + program.body + "    nv_finish();\n    return 0;\n}\n";
+    out = nullptr;
+    return c;
+}
+
+void CGenerator::block(const NodeList& stmts) {
+    for (const Node* s : stmts) statement(s);
+}
+
+void CGenerator::statement(const Node* node) {
+    switch (node->kind) {
+        case NodeKind::VAR_DECL: {
+            auto d = static_cast<const VarDecl*>(node);
+            Value v = expr(d->expr);
+            store(declare(d->name, d->vartype), v);
+            return;
+        }
+        case NodeKind::ASSIGN: {
+            auto s = static_cast<const Assign*>(node);
+            const Binding& b = resolve(s->name, s);
+            store(b, expr(s->expr));
+            return;
+        }
+        case NodeKind::SHOW: {
+            Value v = expr(static_cast<const Show*>(node)->expr);
+            const char* fn = v.type == Type::TEXT ? "nv_show_text(" : v.type == Type::BOOL ? "nv_show_flag(" : "nv_show_num(";
+            line(fn + v.code + ");");
+            return;
+        }
+        case NodeKind::TAKE: {
+            auto t = static_cast<const Take*>(node);
+            const Binding& b = resolve(t->name, t);
+            const char* fn = b.type == VarType::TEXT ? "nv_take_text(" : b.type == VarType::FLAG ? "nv_take_flag(" : "nv_take_num(";
+            std::string at = site(t, (int)ast->names.spelling(t->name).size());
+            store(b, Value{fn + at + ")", value_type(b.type), true, false});
+            return;
+        }
+        case NodeKind::WHEN: when(static_cast<const When*>(node)); return;
+        case NodeKind::LOOP: loop(static_cast<const Loop*>(node)); return;
+        case NodeKind::BREAK: line("break;"); return;
+        case NodeKind::FUNC_DEF: func_def(static_cast<const FuncDef*>(node)); return;
+        case NodeKind::FUNC_CALL: line(call(static_cast<const FuncCall*>(node)).code + ";"); return;
+        default:
+            throw CodegenError("Unhandled statement in code generator", node->line, node->col);
+    }
+}
+
+void CGenerator::when(const When* node) {
+    // A later condition that needs temporaries gets an else block of its
+    // own, so they are only computed when the earlier ones were false
+    uint32_t opened = 0;
+    for (uint32_t k = 0; k < node->case_count; ++k) {
+        const WhenCase& c = node->cases[k];
+        if (k > 0 && may_fail(c.cond)) {
+            line("} else {");
+            out->indent++;
+            opened++;
+            line("if (" + expr(c.cond).code + ") {");
+        } else if (k > 0) {
+            line("} else if (" + expr(c.cond).code + ") {");
+        } else {
+            line("if (" + expr(c.cond).code + ") {");
+        }
+        out->indent++;
+        enter_scope();
+        block(c.body);
+        exit_scope();
+        out->indent--;
+    }
+    if (node->case_count == 0) {
+        // Left by the optimizer when it keeps only the else block
+        line("{");
+        out->indent++;
+        enter_scope();
+        block(node->else_block);
+        exit_scope();
+        out->indent--;
+    } else if (!node->else_block.empty()) {
+        line("} else {");
+        out->indent++;
+        enter_scope();
+        block(node->else_block);
+        exit_scope();
+        out->indent--;
+    }
+    line("}");
+    for (; opened > 0; --opened) {
+        out->indent--;
+        line("}");
+    }
+}
+
+void CGenerator::loop(const Loop* node) {
+    // Bounds are evaluated once, before the loop variable exists
+    Value start = expr(node->start_expr);
+    if (!start.constant && may_fail(node->end_expr)) start.code = temp(start);
+    Value end = expr(node->end_expr);
+    enter_scope();
+    std::string var = declare(node->var, VarType::NUM).cname;
+    std::string limit = var + "_end";
+    if (level == 0) globals += "static double " + limit + ";\n";
+    else out->locals += "    double " + limit + " = 0;\n";
+    line(var + " = " + start.code + ";");
+    line(limit + " = " + end.code + ";");
+    line("for (; " + var + " <= " + limit + "; " + var + " += 1) {");
+    out->indent++;
+    block(node->body);
+    out->indent--;
+    line("}");
+    exit_scope();
+}
+
+void CGenerator::func_def(const FuncDef* node) {
+    // A redeclared function keeps its first definition, as in the checker
+    uint32_t index = (uint32_t)definitions.size() + 1;
+    std::string cname = "f" + std::to_string(index) + "_" + name(node->name);
+    if (functions[node->name] < 0) functions[node->name] = (int32_t)index;
+    function_names.push_back(cname);
+    definitions.emplace_back();
+
+    Output fn;
+    fn.name = name(node->name);
+    Output* outer = out;
+    out = &fn;
+    level++;
+    enter_scope();
+    std::string signature = "static double " + cname + "(const nv_site* site";
+    for (uint32_t k = 0; k < node->param_count; ++k) {
+        std::string param = "v" + std::to_string(variables++) + "_" + name(node->params[k]);
+        signature += ", double " + param;
+        bindings.push_back(Binding{node->params[k], VarType::NUM, level, param, visible[node->params[k]]});
+        visible[node->params[k]] = (int32_t)bindings.size() - 1;
+    }
+    signature += ")";
+    prototypes.push_back(signature);
+    block(node->body);
+    line("result = " + expr(node->back_expr).code + ";");
+    for (const std::string& t : fn.texts) line("nv_release(" + t + ");");
+    line("nv_depth--;");
+    line("return result;");
+    exit_scope();
+    level--;
+    out = outer;
+    definitions[index - 1] = signature + "\n{\n" + fn.locals + "    double result;\n    nv_enter(site);\n" + fn.body + "}\n";
+}
+
+CGenerator::Value CGenerator::call(const FuncCall* node) {
+    // Arguments run left to right: all but the last go to temporaries
+    // when any of them calls or can fail
+    bool ordered = false;
+    for (const Node* a : node->args) ordered = ordered || may_fail(a);
+    std::vector<std::string> args;
+    for (uint32_t k = 0; k < node->args.size; ++k) {
+        Value v = expr(node->args.items[k]);
+        if (ordered && k + 1 < node->args.size && !v.constant) v.code = temp(v);
+        args.push_back(std::move(v.code));
+    }
+    std::string code = function_names[functions[node->name] - 1] + "(" +
+                       site(node, (int)ast->names.spelling(node->name).size());
+    for (const std::string& a : args) code += ", " + a;
+    return Value{code + ")", Type::NUM, true, false};
+}
+
+CGenerator::Value CGenerator::expr(const Node* node) {
+    switch (node->kind) {
+        case NodeKind::LITERAL: {
+            auto l = static_cast<const Literal*>(node);
+            if (l->lit == LitKind::TEXT)
+                return Value{"nv_ref(nv_texts[" + std::to_string(text_constant(l->value.view())) + "])", Type::TEXT, false, true};
+            double v = l->lit == LitKind::BOOL ? (l->value.view() == "true" ? 1.0 : 0.0)
+                                               : std::strtod(std::string(l->value.view()).c_str(), nullptr);
+            return Value{c_number(v), l->lit == LitKind::BOOL ? Type::BOOL : Type::NUM, false, true};
+        }
+        case NodeKind::IDENTIFIER: {
+            const Binding& b = resolve(static_cast<const Identifier*>(node)->name, node);
+            std::string code = b.type == VarType::TEXT ? "nv_ref(" + b.cname + ")" : b.cname;
+            return Value{code, value_type(b.type), false, false};
+        }
+        case NodeKind::FUNC_CALL: return call(static_cast<const FuncCall*>(node));
+        case NodeKind::UNARY_OP: {
+            Value v = expr(static_cast<const UnaryOp*>(node)->expr);
+            return Value{"(-" + v.code + ")", Type::NUM, v.effects, false};
+        }
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(node);
+            Value l = expr(b->left);
+            // The left operand is computed first when either side calls or
+            // can fail, unless one of them is a constant
+            if (!l.constant && b->right->kind != NodeKind::LITERAL && (l.effects || may_fail(b->right))) {
+                l.code = temp(l);
+                l.effects = false;
+            }
+            Value r = expr(b->right);
+            bool effects = l.effects || r.effects;
+            if (is_arithmetic(b->op)) {
+                if (l.type == Type::TEXT)
+                    return Value{"nv_concat(" + l.code + ", " + r.code + ")", Type::TEXT, effects, false};
+                if (b->op == OpKind::DIV)
+                    return Value{"nv_div(" + l.code + ", " + r.code + ", " + site(b, 1) + ")", Type::NUM, true, false};
+                return Value{"(" + l.code + " " + op_text(b->op) + " " + r.code + ")", Type::NUM, effects, false};
+            }
+            if (l.type == Type::TEXT)
+                return Value{"(nv_compare(" + l.code + ", " + r.code + ") " + op_text(b->op) + " 0)", Type::BOOL, effects, false};
+            return Value{"(" + l.code + " " + op_text(b->op) + " " + r.code + ")", Type::BOOL, effects, false};
+        }
+        default:
+            throw CodegenError("Unhandled expression in code generator", node->line, node->col);
+    }
+}
@@ -0,0 +1,92 @@
+#ifndef NOVA_CGEN_HPP
+#define NOVA_CGEN_HPP
+
+#include <cstdint>
+#include <string>
+#include <unordered_map>
+#include <vector>
+#include "ast.hpp"
+#include "bytecode.hpp"
+#include "semantic.hpp"
+
+// Lowers a checked program to C for the system compiler (--emit=c). The
+// file includes nova_runtime.h, which holds everything the VM does besides
+// dispatch, so a native build behaves like --run: the same output, the same
+// runtime errors at the same places, and the same codegen errors as the
+// bytecode compiler.
+//
+// Every declaration becomes its own C variable: top-level ones are file
+// statics that functions reach as globals, the others are locals of their
+// C function, set to 0 or "" on entry as the VM does with slots. Functions
+// are hoisted to file scope and take the call site first, for the call
+// depth check. C leaves the order of operands and arguments unspecified,
+// so an operand that must run before a later call or division is first
+// stored in a temporary.
+class CGenerator {
+private:
+    struct Binding {
+        NameId name;
+        VarType type;
+        uint32_t level;     // function nesting of the declaration, 0 at top level
+        std::string cname;
+        int32_t shadowed;   // previous binding of the same name, or -1
+    };
+    // A generated C expression
+    struct Value {
+        std::string code;
+        Type type;
+        bool effects;       // calls a function or may fail
+        bool constant;      // a literal
+    };
+    struct Output {
+        std::string name;
+        std::string locals;
+        std::string body;
+        std::vector<std::string> texts;     // local text variables
+        uint32_t temps = 0;
+        int indent = 1;
+    };
+    const Ast* ast = nullptr;
+    std::vector<Binding> bindings;
+    std::vector<int32_t> visible;           // NameId -> innermost binding, or -1
+    std::vector<uint32_t> scope_marks;
+    std::vector<int32_t> functions;         // NameId -> number of its first definition, or -1
+    std::vector<std::string> function_names;    // C names, by number - 1
+    std::vector<std::string> prototypes;
+    std::vector<std::string> definitions;
+    std::vector<CodeSpan> sites;            // pc holds the site's index
+    std::vector<std::string> texts;
+    std::unordered_map<std::string, uint32_t> text_index;
+    std::string globals;
+    std::string global_texts;
+    uint32_t variables = 0;
+    uint32_t level = 0;
+    Output* out = nullptr;
+
+    std::string name(NameId id) const { return std::string(ast->names.spelling(id)); }
+    void line(const std::string& code);
+    std::string site(const Node* at, int length);
+    uint32_t text_constant(std::string_view s);
+    void enter_scope();
+    void exit_scope();
+    const Binding& declare(NameId id, VarType type);
+    const Binding& resolve(NameId id, const Node* at);
+    std::string temp(const Value& v);
+    void store(const Binding& b, const Value& v);
+    void block(const NodeList& stmts);
+    void statement(const Node* node);
+    void when(const When* node);
+    void loop(const Loop* node);
+    void func_def(const FuncDef* node);
+    Value expr(const Node* node);
+    Value call(const FuncCall* node);
+public:
+    std::string generate(const Ast& ast);
+};
+
+// A C double literal that reads back as v
+std::string c_number(double v);
+// A C string literal holding exactly the bytes of s
+std::string c_string(std::string_view s);
+
+#endif // NOVA_CGEN_HPP
@@ -0,0 +1,411 @@
+"""
+C code for checked programs (mirrors cgen.hpp)
+
+The file includes nova_runtime.h, which holds everything the VM does
+besides dispatch, so a native build behaves like --run: the same output,
+the same runtime errors at the same places, and the same codegen errors as
+the bytecode compiler. Every declaration becomes its own C variable:
+top-level ones are file statics, the others are locals of their C
+function. Functions are hoisted to file scope and take the call site first.
+C leaves the order of operands and arguments unspecified, so an operand
+that must run before a later call or division is first stored in a
+temporary.
+"""
+
+import math
+
+from .ast_nodes import (
+    VarDecl, Assign, Show, Take, When, Loop, Break, FuncDef, FuncCall,
+    BinOp, UnaryOp, Literal, Identifier
+)
+from .bytecode import CodegenError
+from .token import TokenType
+
+# Literal pieces longer than this are split, for compilers that limit them
+STRING_PIECE = 256
+
+_SHOW = {"text": "nv_show_text(", "bool": "nv_show_flag("}
+_TAKE = {"text": "nv_take_text(", "flag": "nv_take_flag("}
+_VALUE_TYPE = {"num": "num", "text": "text", "flag": "bool"}
+_ARITHMETIC = (TokenType.PLUS, TokenType.MINUS, TokenType.STAR, TokenType.SLASH)
+
+
+def c_number(v):
+    """A C double literal that reads back as v"""
+    if math.isnan(v):
+        return "NAN"
+    if math.isinf(v):
+        return "HUGE_VAL" if v > 0 else "(-HUGE_VAL)"
+    s = "%.17g" % v
+    if "." not in s and "e" not in s:
+        s += ".0"
+    return f"({s})" if s[0] == "-" else s
+
+
+def c_string(data):
+    """A C string literal holding exactly the given bytes"""
+    out = ['"']
+    for k, c in enumerate(data):
+        if k and k % STRING_PIECE == 0:
+            out.append('" "')
+        if c in b'"\\?':
+            out.append("\\" + chr(c))
+        elif 0x20 <= c < 0x7f:
+            out.append(chr(c))
+        else:
+            out.append("\\%03o" % c)
+    out.append('"')
+    return "".join(out)
+
+
+def _may_fail(n):
+    """A call, or a division that can fail"""
+    cls = type(n)
+    if cls is FuncCall:
+        return True
+    if cls is UnaryOp:
+        return _may_fail(n.expr)
+    if cls is BinOp:
+        return (n.op_type == TokenType.SLASH or _may_fail(n.left)
+                or _may_fail(n.right))
+    return False
+
+
+class _Binding:
+    __slots__ = ('type', 'level', 'cname')
+
+    def __init__(self, type, level, cname):
+        self.type = type
+        self.level = level
+        self.cname = cname
+
+
+class _Value:
+    """A generated C expression"""
+
+    __slots__ = ('code', 'type', 'effects', 'constant')
+
+    def __init__(self, code, type, effects=False, constant=False):
+        self.code = code
+        self.type = type
+        # Calls a function or may fail
+        self.effects = effects
+        # A literal
+        self.constant = constant
+
+
+class _Output:
+    __slots__ = ('name', 'locals', 'body', 'texts', 'temps', 'indent')
+
+    def __init__(self, name):
+        self.name = name
+        self.locals = []
+        self.body = []
+        # Local text variables
+        self.texts = []
+        self.temps = 0
+        self.indent = 1
+
+
+class CGenerator:
+    """Lowers a program that passed semantic analysis to C (--emit=c)"""
+
+    def generate(self, program):
+        self.scopes = [{}]
+        self.functions = {}
+        self.function_names = []
+        self.prototypes = []
+        self.definitions = []
+        self.sites = []
+        self.texts = []
+        self.text_index = {}
+        self.globals = []
+        self.global_texts = []
+        self.variables = 0
+        self.level = 0
+        main = self.out = _Output("<program>")
+        self.block(program.statements)
+
+        c = ["/* Generated by the NovaLang compiler (--emit=c). Build it with\n"
+             "   nova_runtime.h on the include path: cc -O2 -I nova_lang prog.c */\n"
+             "#include \"nova_runtime.h\"\n"]
+        if self.sites:
+            c.append("\nstatic const nv_site nv_sites[] = {\n")
+            c += [f"    {{{line}, {col}, {length}}},\n"
+                  for line, col, length in self.sites]
+            c.append("};\n")
+        if self.texts:
+            c.append(f"static nv_text* nv_texts[{len(self.texts)}];\n")
+        if self.globals:
+            c.append("\n")
+            c += self.globals
+        if self.prototypes:
+            c.append("\n")
+            c += [p + ";\n" for p in self.prototypes]
+        for d in self.definitions:
+            c.append("\n" + d)
+        c.append("\nint main(int argc, char** argv)\n{\n"
+                 "    nv_start(argc, argv);\n")
+        c += [f"    nv_texts[{k}] = nv_make({c_string(t)}, {len(t)});\n"
+              for k, t in enumerate(self.texts)]
+        c += self.global_texts
+        c += main.body
+        c.append("    nv_finish();\n    return 0;\n}\n")
+        self.out = None
+        return "".join(c)
+
+    # Emission
+    def line(self, code):
+        self.out.body.append("    " * self.out.indent + code + "\n")
+
+    def site(self, at, length):
+        self.sites.append((at.line, at.col, length))
+        return f"&nv_sites[{len(self.sites) - 1}]"
+
+    def text_constant(self, value):
+        data = value.encode("utf-8", "surrogateescape")
+        k = self.text_index.get(data)
+        if k is None:
+            k = self.text_index[data] = len(self.texts)
+            self.texts.append(data)
+        return k
+
+    def temp(self, v):
+        self.out.temps += 1
+        t = f"t{self.out.temps}"
+        ctype = "nv_text* " if v.type == "text" else "double "
+        self.line(f"{ctype}{t} = {v.code};")
+        return t
+
+    # Scopes
+    def declare(self, name, type):
+        prefix = "g" if self.level == 0 else "v"
+        cname = f"{prefix}{self.variables}_{name}"
+        self.variables += 1
+        ctype = "nv_text* " if type == "text" else "double "
+        if self.level == 0:
+            self.globals.append(f"static {ctype}{cname};\n")
+            if type == "text":
+                self.global_texts.append(f"    {cname} = nv_ref(nv_empty);\n")
+        else:
+            init = " = nv_ref(nv_empty);\n" if type == "text" else " = 0;\n"
+            self.out.locals.append(f"    {ctype}{cname}{init}")
+            if type == "text":
+                self.out.texts.append(cname)
+        b = self.scopes[-1][name] = _Binding(type, self.level, cname)
+        return b
+
+    def resolve(self, name, at):
+        for scope in reversed(self.scopes):
+            b = scope.get(name)
+            if b is not None:
+                break
+        if b.level != self.level and b.level != 0:
+            raise CodegenError(
+                f"Function '{self.out.name}' cannot use '{name}' of the "
+                "enclosing function", at.line, at.col, len(name)
+            )
+        return b
+
+    def store(self, b, v):
+        if b.type == "text":
+            self.line(f"nv_set(&{b.cname}, {v.code});")
+        else:
+            self.line(f"{b.cname} = {v.code};")
+
+    def scoped_block(self, stmts):
+        self.scopes.append({})
+        self.block(stmts)
+        self.scopes.pop()
+
+    # Statements
+    def block(self, stmts):
+        for s in stmts:
+            self.statement(s)
+
+    def statement(self, node):
+        cls = type(node)
+        if cls is VarDecl:
+            v = self.expr(node.expr)
+            self.store(self.declare(node.name, node.vartype), v)
+        elif cls is Assign:
+            b = self.resolve(node.name, node)
+            self.store(b, self.expr(node.expr))
+        elif cls is Show:
+            v = self.expr(node.expr)
+            self.line(_SHOW.get(v.type, "nv_show_num(") + v.code + ");")
+        elif cls is Take:
+            b = self.resolve(node.name, node)
+            at = self.site(node, len(node.name))
+            fn = _TAKE.get(b.type, "nv_take_num(")
+            self.store(b, _Value(fn + at + ")", _VALUE_TYPE[b.type], True))
+        elif cls is When:
+            self.when(node)
+        elif cls is Loop:
+            self.loop(node)
+        elif cls is Break:
+            self.line("break;")
+        elif cls is FuncDef:
+            self.func_def(node)
+        elif cls is FuncCall:
+            self.line(self.call(node).code + ";")
+        else:
+            raise CodegenError("Unhandled statement in code generator",
+                               node.line, node.col)
+
+    def when(self, node):
+        # A later condition that needs temporaries gets an else block of
+        # its own, so they are only computed when the earlier ones were false
+        out = self.out
+        opened = 0
+        for k, (cond, stmts) in enumerate(node.cases):
+            if k and _may_fail(cond):
+                self.line("} else {")
+                out.indent += 1
+                opened += 1
+                self.line(f"if ({self.expr(cond).code}) {{")
+            elif k:
+                self.line(f"}} else if ({self.expr(cond).code}) {{")
+            else:
+                self.line(f"if ({self.expr(cond).code}) {{")
+            out.indent += 1
+            self.scoped_block(stmts)
+            out.indent -= 1
+        if not node.cases:
+            # Left by the optimizer when it keeps only the else block
+            self.line("{")
+            out.indent += 1
+            self.scoped_block(node.else_block)
+            out.indent -= 1
+        elif node.else_block:
+            self.line("} else {")
+            out.indent += 1
+            self.scoped_block(node.else_block)
+            out.indent -= 1
+        self.line("}")
+        for _ in range(opened):
+            out.indent -= 1
+            self.line("}")
+
+    def loop(self, node):
+        # Bounds are evaluated once, before the loop variable exists
+        start = self.expr(node.start_expr)
+        if not start.constant and _may_fail(node.end_expr):
+            start.code = self.temp(start)
+        end = self.expr(node.end_expr)
+        self.scopes.append({})
+        var = self.declare(node.var, "num").cname
+        limit = var + "_end"
+        if self.level == 0:
+            self.globals.append(f"static double {limit};\n")
+        else:
+            self.out.locals.append(f"    double {limit} = 0;\n")
+        self.line(f"{var} = {start.code};")
+        self.line(f"{limit} = {end.code};")
+        self.line(f"for (; {var} <= {limit}; {var} += 1) {{")
+        self.out.indent += 1
+        self.block(node.body)
+        self.out.indent -= 1
+        self.line("}")
+        self.scopes.pop()
+
+    def func_def(self, node):
+        # A redeclared function keeps its first definition, as in the checker
+        index = len(self.definitions) + 1
+        cname = f"f{index}_{node.name}"
+        self.functions.setdefault(node.name, index)
+        self.function_names.append(cname)
+        self.definitions.append(None)
+
+        fn = _Output(node.name)
+        outer, self.out = self.out, fn
+        self.level += 1
+        scope = {}
+        self.scopes.append(scope)
+        signature = [f"static double {cname}(const nv_site* site"]
+        for p in node.params:
+            param = f"v{self.variables}_{p}"
+            self.variables += 1
+            signature.append(f", double {param}")
+            scope[p] = _Binding("num", self.level, param)
+        signature = "".join(signature) + ")"
+        self.prototypes.append(signature)
+        self.block(node.body)
+        self.line(f"result = {self.expr(node.back_expr).code};")
+        for t in fn.texts:
+            self.line(f"nv_release({t});")
+        self.line("nv_depth--;")
+        self.line("return result;")
+        self.scopes.pop()
+        self.level -= 1
+        self.out = outer
+        self.definitions[index - 1] = (
+            signature + "\n{\n" + "".join(fn.locals)
+            + "    double result;\n    nv_enter(site);\n"
+            + "".join(fn.body) + "}\n"
+        )
+
+    # Expressions
+    def call(self, node):
+        # Arguments run left to right: all but the last go to temporaries
+        # when any of them calls or can fail
+        ordered = any(_may_fail(a) for a in node.args)
+        args = []
+        for k, a in enumerate(node.args):
+            v = self.expr(a)
+            if ordered and k + 1 < len(node.args) and not v.constant:
+                v.code = self.temp(v)
+            args.append(v.code)
+        code = (self.function_names[self.functions[node.name] - 1] + "("
+                + self.site(node, len(node.name)))
+        return _Value(code + "".join(", " + a for a in args) + ")", "num", True)
+
+    def expr(self, node):
+        cls = type(node)
+        if cls is Literal:
+            if node.lit_type == "text":
+                k = self.text_constant(node.value)
+                return _Value(f"nv_ref(nv_texts[{k}])", "text", constant=True)
+            if node.lit_type == "bool":
+                value = 1.0 if node.value == "true" else 0.0
+            else:
+                value = float(node.value)
+            return _Value(c_number(value), node.lit_type, constant=True)
+        if cls is Identifier:
+            b = self.resolve(node.name, node)
+            code = f"nv_ref({b.cname})" if b.type == "text" else b.cname
+            return _Value(code, _VALUE_TYPE[b.type])
+        if cls is FuncCall:
+            return self.call(node)
+        if cls is UnaryOp:
+            v = self.expr(node.expr)
+            return _Value(f"(-{v.code})", "num", v.effects)
+        if cls is BinOp:
+            left = self.expr(node.left)
+            # The left operand is computed first when either side calls or
+            # can fail, unless one of them is a constant
+            if (not left.constant and type(node.right) is not Literal
+                    and (left.effects or _may_fail(node.right))):
+                left.code = self.temp(left)
+                left.effects = False
+            right = self.expr(node.right)
+            effects = left.effects or right.effects
+            op = node.op_value
+            if node.op_type in _ARITHMETIC:
+                if left.type == "text":
+                    return _Value(f"nv_concat({left.code}, {right.code})",
+                                  "text", effects)
+                if node.op_type == TokenType.SLASH:
+                    at = self.site(node, 1)
+                    return _Value(f"nv_div({left.code}, {right.code}, {at})",
+                                  "num", True)
+                return _Value(f"({left.code} {op} {right.code})", "num",
+                              effects)
+            if left.type == "text":
+                return _Value(
+                    f"(nv_compare({left.code}, {right.code}) {op} 0)", "bool",
+                    effects
+                )
+            return _Value(f"({left.code} {op} {right.code})", "bool", effects)
+        raise CodegenError("Unhandled expression in code generator",
+                           node.line, node.col)
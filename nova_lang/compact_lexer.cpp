@@ -0,0 +1,279 @@
+#include "compact_lexer.hpp"
+#include "diagnostics.hpp"
+#include <algorithm>
+
+// ---------------------------------------------------------------------------
+// Keywords
+
+// Word characters are letters, digits and '_'; OR-ing 0x20 lowercases the
+// letters and maps digits and '_' to characters no keyword contains
+static bool same_word(const char* p, const char* kw, size_t n) {
+    for (size_t k = 0; k < n; ++k)
+        if ((char)(p[k] | 0x20) != kw[k]) return false;
+    return true;
+}
+
+TokenType classify_word(const char* p, size_t n) {
+    switch (n) {
+        case 2:
+            if (same_word(p, "to", 2)) return TokenType::TO;
+            break;
+        case 3:
+            if (same_word(p, "end", 3)) return TokenType::END;
+            if (same_word(p, "num", 3)) return TokenType::NUM;
+            break;
+        case 4:
+            switch (p[0] | 0x20) {
+                case 's': if (same_word(p, "show", 4)) return TokenType::SHOW; break;
+                case 't':
+                    if (same_word(p, "take", 4)) return TokenType::TAKE;
+                    if (same_word(p, "text", 4)) return TokenType::TEXT;
+                    if (same_word(p, "true", 4)) return TokenType::BOOL;
+                    break;
+                case 'w': if (same_word(p, "when", 4)) return TokenType::WHEN; break;
+                case 'e': if (same_word(p, "else", 4)) return TokenType::ELSE; break;
+                case 'l': if (same_word(p, "loop", 4)) return TokenType::LOOP; break;
+                case 'f':
+                    if (same_word(p, "func", 4)) return TokenType::FUNC;
+                    if (same_word(p, "flag", 4)) return TokenType::FLAG;
+                    break;
+                case 'b': if (same_word(p, "back", 4)) return TokenType::BACK; break;
+            }
+            break;
+        case 5:
+            if (same_word(p, "start", 5)) return TokenType::START;
+            if (same_word(p, "break", 5)) return TokenType::BREAK;
+            if (same_word(p, "false", 5)) return TokenType::BOOL;
+            break;
+        case 8:
+            if (same_word(p, "elsewhen", 8)) return TokenType::ELSEWHEN;
+            break;
+    }
+    return TokenType::IDENT;
+}
+
+// ---------------------------------------------------------------------------
+// NameTable
+
+static uint32_t hash_bytes(const char* p, size_t n) {
+    uint32_t h = 2166136261u;  // FNV-1a
+    for (size_t k = 0; k < n; ++k) h = (h ^ (unsigned char)p[k]) * 16777619u;
+    return h;
+}
+
+void NameTable::grow() {
+    std::vector<uint32_t> bigger(slots.size() * 2, 0);
+    size_t mask = bigger.size() - 1;
+    for (uint32_t id = 0; id < names.size(); ++id) {
+        const CompactToken& n = names[id];
+        size_t s = hash_bytes(base + n.offset, n.length) & mask;
+        while (bigger[s]) s = (s + 1) & mask;
+        bigger[s] = id + 1;
+    }
+    slots.swap(bigger);
+}
+
+uint32_t NameTable::intern(uint32_t offset, uint32_t length) {
+    const char* p = base + offset;
+    size_t mask = slots.size() - 1;
+    size_t s = hash_bytes(p, length) & mask;
+    while (uint32_t entry = slots[s]) {
+        const CompactToken& n = names[entry - 1];
+        if (n.length == length && std::equal(p, p + length, base + n.offset)) return entry - 1;
+        s = (s + 1) & mask;
+    }
+    uint32_t id = (uint32_t)names.size();
+    names.push_back(CompactToken{TokenType::IDENT, offset, length, id});
+    slots[s] = id + 1;
+    if (names.size() * 2 > slots.size()) grow();
+    return id;
+}
+
+std::string_view NameTable::spelling(uint32_t id) const {
+    const CompactToken& n = names[id];
+    return std::string_view(base + n.offset, n.length);
+}
+
+size_t NameTable::memory_bytes() const {
+    return names.capacity() * sizeof(CompactToken) + slots.capacity() * sizeof(uint32_t);
+}
+
+// ---------------------------------------------------------------------------
+// TokenStream
+
+int TokenStream::line_of(uint32_t offset) const {
+    auto it = std::upper_bound(line_starts.begin(), line_starts.end(), offset);
+    return (int)(it - line_starts.begin());
+}
+
+int TokenStream::col_of(uint32_t offset) const {
+    return (int)(offset - line_starts[line_of(offset) - 1]) + 1;
+}
+
+static bool is_keyword(TokenType t) {
+    return (t >= TokenType::START && t <= TokenType::FALSE_T) || t == TokenType::BOOL || t == TokenType::TO;
+}
+
+static Token make_token(const char* source, const CompactToken& t, int line, uint32_t line_start) {
+    const char* p = source + t.offset;
+    std::string value;
+    if (t.type == TokenType::STRING) {
+        value.reserve(t.length - 2);
+        for (uint32_t k = 1; k + 1 < t.length; ++k) {
+            char ch = p[k];
+            if (ch == '\\') {
+                char esc = p[++k];
+                value.push_back(esc == 'n' ? '\n' : esc);
+            } else value.push_back(ch);
+        }
+    } else {
+        value.assign(p, t.length);
+        // Keywords are reported in lower case, like Lexer does
+        if (is_keyword(t.type))
+            for (auto& ch : value) ch = (char)(ch | 0x20);
+    }
+    return Token(t.type, std::move(value), line, (int)(t.offset - line_start) + 1);
+}
+
+Token TokenStream::materialize(const CompactToken& t) const {
+    int line = line_of(t.offset);
+    return make_token(source, t, line, line_starts[line - 1]);
+}
+
+std::vector<Token> TokenStream::to_tokens() const {
+    std::vector<Token> out;
+    out.reserve(tokens.size());
+    // Tokens are in source order, so the line only ever moves forward
+    size_t line = 0;
+    for (const auto& t : tokens) {
+        while (line + 1 < line_starts.size() && line_starts[line + 1] <= t.offset) ++line;
+        out.push_back(make_token(source, t, (int)line + 1, line_starts[line]));
+    }
+    return out;
+}
+
+size_t TokenStream::memory_bytes() const {
+    return tokens.capacity() * sizeof(CompactToken)
+         + line_starts.capacity() * sizeof(uint32_t)
+         + names.memory_bytes();
+}
+
+// ---------------------------------------------------------------------------
+// CompactLexer
+
+static inline bool is_digit(char c) { return c >= '0' && c <= '9'; }
+static inline bool is_word_start(char c) { return (c >= 'a' && c <= 'z') || (c >= 'A' && c <= 'Z') || c == '_'; }
+static inline bool is_word(char c) { return is_word_start(c) || is_digit(c); }
+
+CompactLexer::CompactLexer(const char* data, size_t length) : text(data), size(length) {
+    if (size >= NO_NAME) throw LexerError("Source file too large", 0, 0);
+}
+
+TokenStream CompactLexer::tokenize() {
+    TokenStream out;
+    out.source = text;
+    out.names = NameTable(text);
+    // Roughly one token per 5 bytes of typical source
+    out.tokens.reserve(size / 5 + 16);
+    out.line_starts.push_back(0);
+
+    auto& toks = out.tokens;
+    auto& lines = out.line_starts;
+    const char* const begin = text;
+    const char* const end = text + size;
+    const char* p = begin;
+
+    auto offset = [begin](const char* q) { return (uint32_t)(q - begin); };
+    auto emit = [&](TokenType type, const char* from, const char* to) {
+        toks.push_back(CompactToken{type, offset(from), offset(to) - offset(from), NO_NAME});
+    };
+    auto fail = [&](const std::string& msg, const char* at) {
+        throw LexerError(msg, (int)lines.size(), (int)(offset(at) - lines.back()) + 1);
+    };
+
+    while (p < end) {
+        char c = *p;
+        switch (c) {
+            case ' ': case '\t': case '\r':
+                ++p;
+                continue;
+            case '\n':
+                ++p;
+                lines.push_back(offset(p));
+                continue;
+            case '#':
+                while (p < end && *p != '\n' && *p != '\0') ++p;
+                continue;
+            case '"': {
+                const char* start = p++;
+                int start_line = (int)lines.size();
+                int start_col = (int)(offset(start) - lines.back()) + 1;
+                while (p < end && *p != '"' && *p != '\0') {
+                    if (*p == '\\' && p + 1 < end && p[1] != '\0') {
+                        if (p[1] == '\n') lines.push_back(offset(p + 2));
+                        p += 2;
+                        continue;
+                    }
+                    if (*p == '\n') lines.push_back(offset(p + 1));
+                    ++p;
+                }
+                if (p == end || *p != '"') throw LexerError("Unterminated string", start_line, start_col);
+                ++p;
+                emit(TokenType::STRING, start, p);
+                continue;
+            }
+            case '=':
+                if (p + 1 < end && p[1] == '=') { emit(TokenType::EQEQ, p, p + 2); p += 2; }
+                else { emit(TokenType::ASSIGN, p, p + 1); ++p; }
+                continue;
+            case '!':
+                if (p + 1 < end && p[1] == '=') { emit(TokenType::NOTEQ, p, p + 2); p += 2; continue; }
+                break;
+            case '>':
+                if (p + 1 < end && p[1] == '=') { emit(TokenType::GTEQ, p, p + 2); p += 2; }
+                else { emit(TokenType::GT, p, p + 1); ++p; }
+                continue;
+            case '<':
+                if (p + 1 < end && p[1] == '=') { emit(TokenType::LTEQ, p, p + 2); p += 2; }
+                else { emit(TokenType::LT, p, p + 1); ++p; }
+                continue;
+            case '+': emit(TokenType::PLUS, p, p + 1); ++p; continue;
+            case '-': emit(TokenType::MINUS, p, p + 1); ++p; continue;
+            case '*': emit(TokenType::STAR, p, p + 1); ++p; continue;
+            case '/': emit(TokenType::SLASH, p, p + 1); ++p; continue;
+            case ',': emit(TokenType::COMMA, p, p + 1); ++p; continue;
+            case '(': emit(TokenType::LPAREN, p, p + 1); ++p; continue;
+            case ')': emit(TokenType::RPAREN, p, p + 1); ++p; continue;
+            case '{': emit(TokenType::LBRACE, p, p + 1); ++p; continue;
+            case '}': emit(TokenType::RBRACE, p, p + 1); ++p; continue;
+            default:
+                break;
+        }
+
+        if (is_digit(c)) {
+            const char* start = p;
+            while (p < end && is_digit(*p)) ++p;
+            emit(TokenType::NUMBER, start, p);
+            continue;
+        }
+        if (is_word_start(c)) {
+            const char* start = p;
+            while (p < end && is_word(*p)) ++p;
+            TokenType tt = classify_word(start, (size_t)(p - start));
+            if (tt == TokenType::IDENT) {
+                uint32_t off = offset(start), len = offset(p) - off;
+                toks.push_back(CompactToken{tt, off, len, out.names.intern(off, len)});
+            } else {
+                emit(tt, start, p);
+            }
+            continue;
+        }
+
+        std::string msg = "Unexpected character: ";
+        msg.push_back(c);
+        fail(msg, p);
+    }
+
+    emit(TokenType::EOF_T, p, p);
+    return out;
+}
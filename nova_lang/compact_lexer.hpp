@@ -0,0 +1,73 @@
+#ifndef NOVA_COMPACT_LEXER_HPP
+#define NOVA_COMPACT_LEXER_HPP
+
+#include "token.hpp"
+#include <cstdint>
+#include <string>
+#include <string_view>
+#include <vector>
+
+// A token that points into the source instead of owning its text.
+// offset/length cover the whole lexeme (string tokens include their
+// quotes); id is the interned name of an IDENT and NO_NAME otherwise.
+// Line and column are recovered from the stream's line table.
+struct CompactToken {
+    TokenType type;
+    uint32_t offset;
+    uint32_t length;
+    uint32_t id;
+};
+
+constexpr uint32_t NO_NAME = 0xFFFFFFFFu;
+
+// Interns identifier spellings as views into the source: equal names get
+// equal dense ids, so later stages can compare and hash names as integers.
+class NameTable {
+private:
+    const char* base = nullptr;
+    std::vector<CompactToken> names;  // offset/length of each id's spelling
+    std::vector<uint32_t> slots;      // open addressing, id + 1 (0 = empty)
+    void grow();
+public:
+    explicit NameTable(const char* source = nullptr) : base(source), slots(64, 0) {}
+    uint32_t intern(uint32_t offset, uint32_t length);
+    std::string_view spelling(uint32_t id) const;
+    size_t size() const { return names.size(); }
+    size_t memory_bytes() const;
+};
+
+// Output of CompactLexer: the tokens, the names they refer to and the
+// start offset of every line. Only valid while the source is.
+class TokenStream {
+public:
+    const char* source = nullptr;
+    std::vector<CompactToken> tokens;
+    std::vector<uint32_t> line_starts;
+    NameTable names;
+
+    int line_of(uint32_t offset) const;
+    int col_of(uint32_t offset) const;
+    std::string_view text(const CompactToken& t) const { return std::string_view(source + t.offset, t.length); }
+
+    // Classic Token with the same value, line and column the Lexer gives
+    Token materialize(const CompactToken& t) const;
+    std::vector<Token> to_tokens() const;
+    size_t memory_bytes() const;
+};
+
+// Keyword type of a word, compared case-insensitively in place; IDENT
+// when the word is not a keyword
+TokenType classify_word(const char* p, size_t n);
+
+// Single-pass lexer over a borrowed buffer (e.g. a SourceBuffer). Accepts
+// and rejects exactly what Lexer does, with the same diagnostics.
+class CompactLexer {
+private:
+    const char* text;
+    size_t size;
+public:
+    CompactLexer(const char* data, size_t length);
+    TokenStream tokenize();
+};
+
+#endif // NOVA_COMPACT_LEXER_HPP
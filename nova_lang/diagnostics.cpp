@@ -0,0 +1,81 @@
+#include "diagnostics.hpp"
+#include <cstdio>
+
+Diagnostic make_diagnostic(const CompileError& e) {
+    Diagnostic d;
+    d.severity = Severity::ERROR;
+    d.stage = e.stage;
+    d.message = e.what();
+    d.line = e.line;
+    d.col = e.col;
+    d.end_line = e.line;
+    d.end_col = e.col + e.length;
+    return d;
+}
+
+void ErrorLog::report(const CompileError& e) {
+    if (limit && errors.size() >= limit) {
+        truncated = true;
+        throw ErrorLimitReached();
+    }
+    errors.push_back(make_diagnostic(e));
+}
+
+const char* severity_name(Severity s) {
+    switch (s) {
+        case Severity::ERROR: return "error";
+        case Severity::WARNING: return "warning";
+        case Severity::NOTE: return "note";
+    }
+    return "error";
+}
+
+std::string json_escape(const std::string& s) {
+    std::string out;
+    out.reserve(s.size() + 2);
+    for (unsigned char c : s) {
+        switch (c) {
+            case '"': out += "\\\""; break;
+            case '\\': out += "\\\\"; break;
+            case '\n': out += "\\n"; break;
+            case '\r': out += "\\r"; break;
+            case '\t': out += "\\t"; break;
+            default:
+                if (c < 0x20) {
+                    char buf[8];
+                    std::snprintf(buf, sizeof(buf), "\\u%04x", c);
+                    out += buf;
+                } else out.push_back((char)c);
+        }
+    }
+    return out;
+}
+
+void write_diagnostic(std::ostream& os, const Diagnostic& d, DiagnosticFormat fmt) {
+    if (fmt == DiagnosticFormat::JSON) {
+        os << "{\"severity\":\"" << severity_name(d.severity) << "\""
+           << ",\"stage\":\"" << json_escape(d.stage) << "\""
+           << ",\"message\":\"" << json_escape(d.message) << "\""
+           << ",\"line\":" << d.line
+           << ",\"column\":" << d.col
+           << ",\"span\":{\"start_line\":" << d.line
+           << ",\"start_column\":" << d.col
+           << ",\"end_line\":" << d.end_line
+           << ",\"end_column\":" << d.end_col << "}}\n";
+        return;
+    }
+    os << (d.severity == Severity::ERROR ? "Error: " : d.severity == Severity::WARNING ? "Warning: " : "Note: ")
+       << d.message;
+    if (d.line > 0) os << " at " << d.line << ":" << d.col;
+    os << "\n";
+}
+
+void write_errors(std::ostream& os, const ErrorLog& log, DiagnosticFormat fmt) {
+    for (const Diagnostic& d : log.errors) write_diagnostic(os, d, fmt);
+    if (!log.truncated) return;
+    Diagnostic note;
+    note.severity = Severity::NOTE;
+    note.stage = log.errors.back().stage;
+    note.message = "Too many errors, stopping after " + std::to_string(log.limit);
+    write_diagnostic(os, note, fmt);
+}
@@ -0,0 +1,68 @@
+#ifndef NOVA_DIAGNOSTICS_HPP
+#define NOVA_DIAGNOSTICS_HPP
+
+#include <cstddef>
+#include <ostream>
+#include <stdexcept>
+#include <string>
+#include <vector>
+
+enum class Severity { ERROR, WARNING, NOTE };
+
+// Base class for every error raised by the front end. Carries the stage that
+// raised it and the source span it refers to (1-based, end column exclusive).
+class CompileError : public std::runtime_error {
+public:
+    std::string stage;
+    int line;
+    int col;
+    int length;
+    CompileError(std::string st, const std::string& msg, int l, int c, int len = 1)
+        : std::runtime_error(msg), stage(std::move(st)), line(l), col(c), length(len < 1 ? 1 : len) {}
+};
+
+class LexerError : public CompileError {
+public:
+    LexerError(const std::string& msg, int l, int c, int len = 1) : CompileError("lexer", msg, l, c, len) {}
+};
+
+struct Diagnostic {
+    Severity severity = Severity::ERROR;
+    std::string stage;
+    std::string message;
+    int line = 0;
+    int col = 0;
+    int end_line = 0;
+    int end_col = 0;
+};
+
+// Errors a stage reported and recovered from. Reporting one more than
+// `limit` (0: no limit) sets `truncated` and throws ErrorLimitReached, which
+// the stage lets through to stop.
+struct ErrorLimitReached {};
+
+class ErrorLog {
+public:
+    size_t limit = 0;
+    bool truncated = false;
+    std::vector<Diagnostic> errors;
+    void report(const CompileError& e);
+    bool empty() const { return errors.empty(); }
+};
+
+// Errors used by the driver and the Python front end unless told otherwise
+constexpr size_t DEFAULT_MAX_ERRORS = 20;
+
+enum class DiagnosticFormat { TEXT, JSON };
+
+Diagnostic make_diagnostic(const CompileError& e);
+const char* severity_name(Severity s);
+std::string json_escape(const std::string& s);
+
+// TEXT: "Error: <message> at L:C" (the historical format)
+// JSON: one self-contained JSON object per line
+void write_diagnostic(std::ostream& os, const Diagnostic& d, DiagnosticFormat fmt);
+// Every logged error, then a note if the log stopped at its limit
+void write_errors(std::ostream& os, const ErrorLog& log, DiagnosticFormat fmt);
+
+#endif // NOVA_DIAGNOSTICS_HPP
@@ -0,0 +1,169 @@
+"""
+Diagnostics for the NovaLang front end (mirrors diagnostics.hpp)
+"""
+
+# Errors reported before a stage stops, unless told otherwise
+# (DEFAULT_MAX_ERRORS in diagnostics.hpp)
+DEFAULT_MAX_ERRORS = 20
+
+_JSON_ESCAPES = {'"': '\\"', '\\': '\\\\', '\n': '\\n', '\r': '\\r', '\t': '\\t'}
+
+
+def json_escape(s):
+    """Escape a string exactly as the backend's json_escape does"""
+    out = []
+    for ch in s:
+        esc = _JSON_ESCAPES.get(ch)
+        if esc is not None:
+            out.append(esc)
+        elif ch < ' ':
+            out.append('\\u%04x' % ord(ch))
+        else:
+            out.append(ch)
+    return ''.join(out)
+
+
+class CompileError(Exception):
+    """
+    Base class for every error raised by the front end
+
+    Carries the stage that raised it and the source span it refers to
+    (1-based, end column exclusive).
+    """
+
+    stage = "internal"
+
+    def __init__(self, message, line=0, col=0, length=1):
+        super().__init__(message)
+        self.message = message
+        self.line = line
+        self.col = col
+        self.length = length if length >= 1 else 1
+
+
+class LexerError(CompileError):
+    stage = "lexer"
+
+
+class Diagnostic:
+    """A single diagnostic, in the same shape as the backend's JSON records"""
+
+    __slots__ = (
+        'severity', 'stage', 'message', 'line', 'column',
+        'end_line', 'end_column'
+    )
+
+    def __init__(self, severity, stage, message, line=0, column=0,
+                 end_line=None, end_column=None):
+        self.severity = severity
+        self.stage = stage
+        self.message = message
+        self.line = line
+        self.column = column
+        self.end_line = line if end_line is None else end_line
+        self.end_column = column if end_column is None else end_column
+
+    @classmethod
+    def from_error(cls, error):
+        return cls(
+            "error", error.stage, error.message, error.line, error.col,
+            error.line, error.col + error.length
+        )
+
+    @classmethod
+    def from_record(cls, record):
+        """A Diagnostic from a decoded JSON record, as to_record makes"""
+        span = record.get("span") or {}
+        line = int(record.get("line", 0))
+        column = int(record.get("column", 0))
+        return cls(
+            record.get("severity", "error"), record.get("stage", ""),
+            record.get("message", ""), line, column,
+            int(span.get("end_line", line)),
+            int(span.get("end_column", column))
+        )
+
+    def is_error(self):
+        return self.severity == "error"
+
+    def to_record(self):
+        return {
+            "severity": self.severity,
+            "stage": self.stage,
+            "message": self.message,
+            "line": self.line,
+            "column": self.column,
+            "span": {
+                "start_line": self.line,
+                "start_column": self.column,
+                "end_line": self.end_line,
+                "end_column": self.end_column,
+            },
+        }
+
+    def format(self, fmt="text"):
+        """Render as the backend does for --diagnostics=text|json"""
+        if fmt == "json":
+            return (
+                f'{{"severity":"{self.severity}"'
+                f',"stage":"{json_escape(self.stage)}"'
+                f',"message":"{json_escape(self.message)}"'
+                f',"line":{self.line},"column":{self.column}'
+                f',"span":{{"start_line":{self.line}'
+                f',"start_column":{self.column}'
+                f',"end_line":{self.end_line}'
+                f',"end_column":{self.end_column}}}}}'
+            )
+        prefix = {"error": "Error: ", "warning": "Warning: "}.get(
+            self.severity, "Note: "
+        )
+        location = f" at {self.line}:{self.column}" if self.line > 0 else ""
+        return f"{prefix}{self.message}{location}"
+
+    def __repr__(self):
+        return (
+            f"Diagnostic({self.severity!r}, {self.message!r}, "
+            f"{self.line}:{self.column})"
+        )
+
+
+class ErrorLimitReached(Exception):
+    """Raised by ErrorLog.report past the limit; the stage lets it through"""
+
+
+class ErrorLog:
+    """
+    Errors a stage reported and recovered from (mirrors ErrorLog)
+
+    Reporting one more than limit (0: no limit) sets truncated and raises
+    ErrorLimitReached.
+    """
+
+    __slots__ = ('limit', 'truncated', 'errors')
+
+    def __init__(self, limit=DEFAULT_MAX_ERRORS):
+        self.limit = limit
+        self.truncated = False
+        self.errors = []
+
+    def __len__(self):
+        return len(self.errors)
+
+    def report(self, error):
+        """Log a CompileError"""
+        self.add(Diagnostic.from_error(error))
+
+    def add(self, diagnostic):
+        if self.limit and len(self.errors) >= self.limit:
+            self.truncated = True
+            raise ErrorLimitReached()
+        self.errors.append(diagnostic)
+
+    def diagnostics(self):
+        """Every logged error, then a note if the log stopped at its limit"""
+        if not self.truncated:
+            return list(self.errors)
+        return self.errors + [Diagnostic(
+            "note", self.errors[-1].stage,
+            f"Too many errors, stopping after {self.limit}"
+        )]
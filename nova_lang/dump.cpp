@@ -0,0 +1,128 @@
+#include "dump.hpp"
+#include <string>
+
+void print_tokens(std::ostream& os, const std::vector<Token>& tokens) {
+    os << "Tokens: " << tokens.size() << "\n";
+    for (auto &t : tokens) os << t << "\n";
+}
+
+static void indent(std::ostream& os, int depth) {
+    for (int k = 0; k < depth; ++k) os << "  ";
+}
+
+static void at(std::ostream& os, const Node* n) {
+    os << " @" << n->line << ":" << n->col << "\n";
+}
+
+static void print_node(std::ostream& os, const Names& names, const Node* node, int depth);
+
+static void print_block(std::ostream& os, const Names& names, const char* label, const NodeList& stmts, int depth) {
+    indent(os, depth);
+    os << label << "\n";
+    for (const Node* s : stmts) print_node(os, names, s, depth + 1);
+}
+
+static void print_node(std::ostream& os, const Names& names, const Node* node, int depth) {
+    if (!node) return;
+    indent(os, depth);
+    switch (node->kind) {
+        case NodeKind::PROGRAM: {
+            os << "Program"; at(os, node);
+            for (const Node* s : static_cast<const Program*>(node)->statements) print_node(os, names, s, depth + 1);
+            break;
+        }
+        case NodeKind::VAR_DECL: {
+            auto v = static_cast<const VarDecl*>(node);
+            os << "VarDecl(" << var_type_name(v->vartype) << ", " << names.spelling(v->name) << ")"; at(os, v);
+            print_node(os, names, v->expr, depth + 1);
+            break;
+        }
+        case NodeKind::ASSIGN: {
+            auto a = static_cast<const Assign*>(node);
+            os << "Assign(" << names.spelling(a->name) << ")"; at(os, a);
+            print_node(os, names, a->expr, depth + 1);
+            break;
+        }
+        case NodeKind::SHOW:
+            os << "Show"; at(os, node);
+            print_node(os, names, static_cast<const Show*>(node)->expr, depth + 1);
+            break;
+        case NodeKind::TAKE:
+            os << "Take(" << names.spelling(static_cast<const Take*>(node)->name) << ")"; at(os, node);
+            break;
+        case NodeKind::WHEN: {
+            auto w = static_cast<const When*>(node);
+            os << "When"; at(os, w);
+            for (const WhenCase& c : *w) {
+                indent(os, depth + 1); os << "Case\n";
+                print_node(os, names, c.cond, depth + 2);
+                print_block(os, names, "Then", c.body, depth + 2);
+            }
+            if (!w->else_block.empty()) print_block(os, names, "Else", w->else_block, depth + 1);
+            break;
+        }
+        case NodeKind::LOOP: {
+            auto lp = static_cast<const Loop*>(node);
+            os << "Loop(" << names.spelling(lp->var) << ")"; at(os, lp);
+            print_node(os, names, lp->start_expr, depth + 1);
+            print_node(os, names, lp->end_expr, depth + 1);
+            print_block(os, names, "Body", lp->body, depth + 1);
+            break;
+        }
+        case NodeKind::BREAK:
+            os << "Break"; at(os, node);
+            break;
+        case NodeKind::FUNC_DEF: {
+            auto f = static_cast<const FuncDef*>(node);
+            os << "FuncDef(" << names.spelling(f->name);
+            for (uint32_t k = 0; k < f->param_count; ++k) os << ", " << names.spelling(f->params[k]);
+            os << ")"; at(os, f);
+            print_block(os, names, "Body", f->body, depth + 1);
+            indent(os, depth + 1); os << "Back\n";
+            print_node(os, names, f->back_expr, depth + 2);
+            break;
+        }
+        case NodeKind::FUNC_CALL: {
+            auto fc = static_cast<const FuncCall*>(node);
+            os << "FuncCall(" << names.spelling(fc->name) << ")"; at(os, fc);
+            for (const Node* arg : fc->args) print_node(os, names, arg, depth + 1);
+            break;
+        }
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(node);
+            os << "BinOp(" << op_text(b->op) << ")"; at(os, b);
+            print_node(os, names, b->left, depth + 1);
+            print_node(os, names, b->right, depth + 1);
+            break;
+        }
+        case NodeKind::UNARY_OP: {
+            auto u = static_cast<const UnaryOp*>(node);
+            os << "UnaryOp(" << op_text(u->op) << ")"; at(os, u);
+            print_node(os, names, u->expr, depth + 1);
+            break;
+        }
+        case NodeKind::LITERAL: {
+            auto l = static_cast<const Literal*>(node);
+            os << "Literal(" << lit_kind_name(l->lit) << ", ";
+            if (l->lit == LitKind::TEXT) os << "\"" << l->value.view() << "\"";
+            else os << l->value.view();
+            os << ")"; at(os, l);
+            break;
+        }
+        case NodeKind::IDENTIFIER:
+            os << "Identifier(" << names.spelling(static_cast<const Identifier*>(node)->name) << ")"; at(os, node);
+            break;
+    }
+}
+
+void print_ast(std::ostream& os, const Ast& ast) {
+    print_node(os, ast.names, ast.root, 0);
+}
+
+void print_symbols(std::ostream& os, const std::vector<SymbolEntry>& symbols) {
+    os << "Symbols: " << symbols.size() << "\n";
+    for (auto &s : symbols) {
+        indent(os, s.depth);
+        os << s.kind << " " << s.name << " : " << s.type << " @" << s.line << ":" << s.col << "\n";
+    }
+}
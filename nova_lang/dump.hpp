@@ -0,0 +1,15 @@
+#ifndef NOVA_DUMP_HPP
+#define NOVA_DUMP_HPP
+
+#include <ostream>
+#include <vector>
+#include "token.hpp"
+#include "ast.hpp"
+#include "semantic.hpp"
+
+// Debug printers behind the driver's --emit option
+void print_tokens(std::ostream& os, const std::vector<Token>& tokens);
+void print_ast(std::ostream& os, const Ast& ast);
+void print_symbols(std::ostream& os, const std::vector<SymbolEntry>& symbols);
+
+#endif // NOVA_DUMP_HPP
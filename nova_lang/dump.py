@@ -0,0 +1,94 @@
+"""
+Debug dumps for --emit=tokens|ast|symbols (mirrors dump.cpp)
+"""
+
+from .ast_nodes import (
+    Program, VarDecl, Assign, Show, Take, When, Loop, Break, FuncDef,
+    FuncCall, BinOp, UnaryOp, Literal, Identifier
+)
+
+
+def print_tokens(out, tokens):
+    out.write(f"Tokens: {len(tokens)}\n")
+    for t in tokens:
+        out.write(f"{t!r}\n")
+
+
+def _at(node):
+    return f" @{node.line}:{node.col}\n"
+
+
+def _print_block(out, label, stmts, depth):
+    out.write("  " * depth + label + "\n")
+    for s in stmts:
+        print_ast(out, s, depth + 1)
+
+
+def print_ast(out, node, depth=0):
+    if node is None:
+        return
+    out.write("  " * depth)
+    cls = type(node)
+    if cls is Program:
+        out.write("Program" + _at(node))
+        for s in node.statements:
+            print_ast(out, s, depth + 1)
+    elif cls is VarDecl:
+        out.write(f"VarDecl({node.vartype}, {node.name})" + _at(node))
+        print_ast(out, node.expr, depth + 1)
+    elif cls is Assign:
+        out.write(f"Assign({node.name})" + _at(node))
+        print_ast(out, node.expr, depth + 1)
+    elif cls is Show:
+        out.write("Show" + _at(node))
+        print_ast(out, node.expr, depth + 1)
+    elif cls is Take:
+        out.write(f"Take({node.name})" + _at(node))
+    elif cls is When:
+        out.write("When" + _at(node))
+        for cond, stmts in node.cases:
+            out.write("  " * (depth + 1) + "Case\n")
+            print_ast(out, cond, depth + 2)
+            _print_block(out, "Then", stmts, depth + 2)
+        if node.else_block:
+            _print_block(out, "Else", node.else_block, depth + 1)
+    elif cls is Loop:
+        out.write(f"Loop({node.var})" + _at(node))
+        print_ast(out, node.start_expr, depth + 1)
+        print_ast(out, node.end_expr, depth + 1)
+        _print_block(out, "Body", node.body, depth + 1)
+    elif cls is Break:
+        out.write("Break" + _at(node))
+    elif cls is FuncDef:
+        params = "".join(f", {p}" for p in node.params)
+        out.write(f"FuncDef({node.name}{params})" + _at(node))
+        _print_block(out, "Body", node.body, depth + 1)
+        out.write("  " * (depth + 1) + "Back\n")
+        print_ast(out, node.back_expr, depth + 2)
+    elif cls is FuncCall:
+        out.write(f"FuncCall({node.name})" + _at(node))
+        for arg in node.args:
+            print_ast(out, arg, depth + 1)
+    elif cls is BinOp:
+        out.write(f"BinOp({node.op_value})" + _at(node))
+        print_ast(out, node.left, depth + 1)
+        print_ast(out, node.right, depth + 1)
+    elif cls is UnaryOp:
+        out.write(f"UnaryOp({node.op_value})" + _at(node))
+        print_ast(out, node.expr, depth + 1)
+    elif cls is Literal:
+        value = f'"{node.value}"' if node.lit_type == "text" else node.value
+        out.write(f"Literal({node.lit_type}, {value})" + _at(node))
+    elif cls is Identifier:
+        out.write(f"Identifier({node.name})" + _at(node))
+    else:
+        out.write("<unknown>" + _at(node))
+
+
+def print_symbols(out, symbols):
+    out.write(f"Symbols: {len(symbols)}\n")
+    for s in symbols:
+        out.write(
+            "  " * s.depth
+            + f"{s.kind} {s.name} : {s.type} @{s.line}:{s.col}\n"
+        )
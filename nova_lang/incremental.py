@@ -0,0 +1,356 @@
+"""
+Incremental analysis for live diagnostics
+
+The program text is split into top-level units: every 'func' definition
+is a unit of its own, and runs of top-level statements are grouped into
+units at content-defined boundaries, so an edit only moves the units it
+touches. Each unit is lexed and parsed on its own, with line numbers
+relative to the unit, and cached by its text.
+
+Semantic results are cached per unit together with every answer the unit
+took from the global environment (global variables and function
+signatures declared by earlier units). A cached result is reused as long
+as those answers are unchanged, so editing a function body does not
+re-check its callers, but changing its parameter count does.
+
+The diagnostics are the same ones the whole-program analysis reports.
+Units are parsed without error recovery; while the program has syntax
+errors they come from a whole-program parse, so that recovery resumes
+exactly where it would there.
+"""
+
+import re
+
+from . import analyze
+from .diagnostics import (
+    DEFAULT_MAX_ERRORS, CompileError, Diagnostic, ErrorLimitReached, ErrorLog
+)
+from .lexer import Lexer
+from .parser import Parser, ParserError
+from .semantic import SemanticAnalyzer
+from .token import TokenType
+
+# One match per line start that begins with a word (captured by a
+# lookahead), per string, per comment and per brace; the possessive
+# prefix skips everything else inside the regex engine
+_SCAN_PATTERN = re.compile(
+    r'[^\n"#{}]*+(?:\n(?=[ \t\r]*([A-Za-z_][A-Za-z0-9_]*))'
+    r'|"(?:[^"\\]|\\.)*+(?:"|\Z)|\#[^\n]*|([{}]))'
+)
+
+# Words that can begin a line without beginning a statement
+_CONTINUATION_WORDS = frozenset(
+    ('else', 'elsewhen', 'to', 'back', 'start', 'true', 'false')
+)
+
+# About one statement boundary in GROUP_MASK + 1 ends a group
+GROUP_MASK = 15
+MAX_GROUP_STATEMENTS = 256
+
+
+class _Fallback(Exception):
+    """Raised when a unit cannot be parsed on its own"""
+
+
+class UnitParser(Parser):
+    """Parses one unit: the statements between two top-level boundaries"""
+
+    def recovering_statement(self, stmts):
+        # The first syntax error ends the unit's parse
+        stmts.append(self.statement())
+
+    def parse_unit(self, is_first, is_last):
+        """
+        Returns:
+            List of statements
+
+        Raises:
+            ParserError: on a syntax error inside the unit
+            _Fallback: when the unit does not end at a statement boundary
+        """
+        try:
+            if is_first:
+                self.match(TokenType.START)
+            stmts = self.statements()
+            t = self.current().type
+            if t is TokenType.EOF_T and not is_last:
+                return stmts
+            if t is TokenType.END and not is_last:
+                raise _Fallback()
+            self.match(TokenType.END)
+            self.match(TokenType.EOF_T)
+        except RecursionError:
+            raise _Fallback() from None
+        return stmts
+
+
+class _TrackedScope:
+    """
+    Global names seen by one unit: its own declarations over the ones
+    exported by earlier units. Every answer taken from the earlier units
+    is recorded in deps.
+    """
+
+    __slots__ = ('env', 'local', 'deps', 'summary')
+
+    def __init__(self, env, summary):
+        self.env = env
+        self.local = {}
+        self.deps = {}
+        self.summary = summary
+
+    def _from_env(self, name):
+        sym = self.env.get(name)
+        if name not in self.deps:
+            self.deps[name] = None if sym is None else self.summary(sym)
+        return sym
+
+    def __contains__(self, name):
+        return name in self.local or self._from_env(name) is not None
+
+    def get(self, name, default=None):
+        sym = self.local.get(name)
+        if sym is None:
+            sym = self._from_env(name)
+        return default if sym is None else sym
+
+    def __setitem__(self, name, value):
+        self.local[name] = value
+
+
+def _var_summary(sym):
+    return sym.type
+
+
+def _func_summary(fs):
+    return len(fs.params)
+
+
+def _deps_hold(deps, env, summary):
+    for name, seen in deps.items():
+        sym = env.get(name)
+        if (None if sym is None else summary(sym)) != seen:
+            return False
+    return True
+
+
+class _SemanticResult:
+    __slots__ = ('var_deps', 'func_deps', 'vars', 'funcs', 'errors')
+
+    def __init__(self, var_deps, func_deps, vars, funcs, errors):
+        self.var_deps = var_deps
+        self.func_deps = func_deps
+        self.vars = vars
+        self.funcs = funcs
+        self.errors = errors
+
+    def holds(self, env_vars, env_funcs):
+        return (_deps_hold(self.var_deps, env_vars, _var_summary)
+                and _deps_hold(self.func_deps, env_funcs, _func_summary))
+
+
+class _Unit:
+    """Cached lex/parse result of one unit's text"""
+
+    __slots__ = ('stmts', 'error', 'needs_merge', 'fallback', 'semantic')
+
+    def __init__(self):
+        self.stmts = None
+        self.error = None
+        self.needs_merge = False
+        self.fallback = False
+        self.semantic = None
+
+
+def split_units(text):
+    """
+    Split source text into top-level units
+
+    Returns:
+        List of (start offset, end offset, first line) per unit
+    """
+    spans = []
+    start = 0
+    start_line = 1
+    grouped = 0
+    depth = 0
+    in_func = False
+    count = text.count
+    continuation = _CONTINUATION_WORDS
+    mask = GROUP_MASK
+    for match in _SCAN_PATTERN.finditer(text):
+        word, brace = match.group(1, 2)
+        if word is None:
+            if brace == '{':
+                depth += 1
+            elif brace == '}' and depth:
+                depth -= 1
+            continue
+        if depth:
+            continue
+        kw = word.lower()
+        if kw in continuation:
+            continue
+        pos = match.end()
+        if not (in_func or kw == 'func' or kw == 'end'):
+            # Content-defined grouping: whether a boundary is taken
+            # depends only on the start of its own line, so an edit can
+            # move at most the boundary in front of the edited line
+            head = text[pos:pos + 32]
+            eol = head.find('\n')
+            if hash(head if eol < 0 else head[:eol]) & mask:
+                grouped += 1
+                if grouped < MAX_GROUP_STATEMENTS:
+                    continue
+        spans.append((start, pos, start_line))
+        start_line += count('\n', start, pos)
+        start = pos
+        grouped = 0
+        in_func = kw == 'func'
+    spans.append((start, len(text), start_line))
+    return spans
+
+
+def _diagnostic(error, first_line):
+    return _shifted(Diagnostic.from_error(error), first_line)
+
+
+def _shifted(d, first_line):
+    """A copy of a unit-relative Diagnostic with absolute lines"""
+    if d.line <= 0:
+        return d
+    return Diagnostic(
+        d.severity, d.stage, d.message, d.line + first_line - 1, d.column,
+        d.end_line + first_line - 1, d.end_column
+    )
+
+
+class IncrementalAnalyzer:
+    """
+    Reports the same diagnostics as nova_lang.analyze(), reusing the work
+    done for units whose text and dependencies did not change.
+
+    Not thread safe; keep one instance per worker thread.
+    """
+
+    def __init__(self, max_errors=DEFAULT_MAX_ERRORS):
+        self.max_errors = max_errors
+        self._cache = {}
+        self._older = {}
+        self.stats = {'units': 0, 'parsed': 0, 'checked': 0}
+
+    def _unit(self, key, used):
+        unit = used.get(key)
+        if unit is not None:
+            return unit
+        unit = self._cache.get(key) or self._older.get(key)
+        if unit is None:
+            unit = self._parse(*key)
+            self.stats['parsed'] += 1
+        used[key] = unit
+        return unit
+
+    def _parse(self, text, is_first, is_last):
+        unit = _Unit()
+        try:
+            parser = UnitParser(Lexer(text).tokenize())
+            try:
+                unit.stmts = parser.parse_unit(is_first, is_last)
+            except ParserError:
+                if parser.current().type is TokenType.EOF_T and not is_last:
+                    unit.needs_merge = True
+                else:
+                    raise
+        except CompileError as e:
+            unit.error = e
+        except _Fallback:
+            unit.fallback = True
+        return unit
+
+    def _check(self, stmts, env_vars, env_funcs):
+        self.stats['checked'] += 1
+        # Every error in the unit is kept; the limit applies to the program
+        sem = SemanticAnalyzer(max_errors=0)
+        scope = _TrackedScope(env_vars, _var_summary)
+        funcs = _TrackedScope(env_funcs, _func_summary)
+        sem.scopes = [scope]
+        sem.functions = funcs
+        for s in stmts:
+            sem.visit(s)
+        return _SemanticResult(
+            scope.deps, funcs.deps, scope.local, funcs.local, sem.log.errors
+        )
+
+    def analyze(self, text, check=None):
+        """
+        Analyze the whole program, reusing cached units
+
+        Args:
+            text: Program source
+            check: Optional callable run between units; it may raise to
+                abandon the analysis
+
+        Returns:
+            List of Diagnostic (empty when the program is valid)
+        """
+        self.stats = {'units': 0, 'parsed': 0, 'checked': 0}
+        spans = split_units(text)
+        used = {}
+        units = []
+        n = len(spans)
+        i = 0
+        while i < n:
+            if check is not None and not i & 255:
+                check()
+            start, _, first_line = spans[i]
+            j = i
+            while True:
+                key = (text[start:spans[j][1]], i == 0, j == n - 1)
+                unit = self._unit(key, used)
+                if not unit.needs_merge:
+                    break
+                j += 1
+            if unit.fallback:
+                return self._analyze_full(text)
+            units.append((unit, first_line))
+            i = j + 1
+        self.stats['units'] = len(units)
+
+        # Lex errors win over parse errors, which win over semantic errors
+        syntax_errors = False
+        for unit, first_line in units:
+            if unit.error is None:
+                continue
+            if unit.error.stage == "lexer":
+                return self._finish(used, [_diagnostic(unit.error, first_line)])
+            syntax_errors = True
+        if syntax_errors:
+            return self._finish(used, self._analyze_full(text))
+
+        log = ErrorLog(self.max_errors)
+        env_vars = {}
+        env_funcs = {}
+        try:
+            for k, (unit, first_line) in enumerate(units):
+                if check is not None and not k & 255:
+                    check()
+                sem = unit.semantic
+                if sem is None or not sem.holds(env_vars, env_funcs):
+                    sem = self._check(unit.stmts, env_vars, env_funcs)
+                    unit.semantic = sem
+                for d in sem.errors:
+                    log.add(_shifted(d, first_line))
+                env_vars.update(sem.vars)
+                env_funcs.update(sem.funcs)
+        except ErrorLimitReached:
+            pass
+        return self._finish(used, log.diagnostics())
+
+    def _finish(self, used, diagnostics):
+        # Keep two generations so undoing a large edit still hits the cache
+        self._older = self._cache
+        self._cache = used
+        return diagnostics
+
+    def _analyze_full(self, text):
+        return analyze(text, self.max_errors)
@@ -1,6 +1,6 @@
 #include "lexer.hpp"
+#include "diagnostics.hpp"
 #include <cctype>
-#include <stdexcept>
 #include <unordered_map>
 
 Lexer::Lexer(std::string s) : text(std::move(s)), pos(0), line(1), col(1) {}
@@ -88,7 +88,7 @@ std::vector<Token> Lexer::tokenize() {
                     else s.push_back(esc);
                 } else s.push_back(ch);
             }
-            if (peek() != '"') throw std::runtime_error("Unterminated string");
+            if (peek() != '"') throw LexerError("Unterminated string", start_line, start_col);
             advanceChar(); // consume closing "
             addToken(toks, TokenType::STRING, s, start_line, start_col);
             continue;
@@ -118,7 +118,7 @@ std::vector<Token> Lexer::tokenize() {
                 {
                     std::string msg = "Unexpected character: ";
                     msg.push_back(c);
-                    throw std::runtime_error(msg);
+                    throw LexerError(msg, start_line, start_col);
                 }
         }
     }
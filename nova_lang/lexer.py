@@ -0,0 +1,125 @@
+"""
+Table-driven lexer for NovaLang (mirrors Lexer::tokenize)
+"""
+
+import re
+
+from .diagnostics import LexerError
+from .token import Token, TokenType
+
+KEYWORDS = {
+    'start': TokenType.START, 'end': TokenType.END, 'show': TokenType.SHOW,
+    'take': TokenType.TAKE, 'when': TokenType.WHEN,
+    'elsewhen': TokenType.ELSEWHEN, 'else': TokenType.ELSE,
+    'loop': TokenType.LOOP, 'break': TokenType.BREAK,
+    'func': TokenType.FUNC, 'back': TokenType.BACK, 'num': TokenType.NUM,
+    'text': TokenType.TEXT, 'flag': TokenType.FLAG, 'to': TokenType.TO,
+    'true': TokenType.BOOL, 'false': TokenType.BOOL,
+}
+
+OPERATORS = {
+    '==': TokenType.EQEQ, '!=': TokenType.NOTEQ,
+    '>=': TokenType.GTEQ, '<=': TokenType.LTEQ,
+    '+': TokenType.PLUS, '-': TokenType.MINUS,
+    '*': TokenType.STAR, '/': TokenType.SLASH,
+    '=': TokenType.ASSIGN, '>': TokenType.GT, '<': TokenType.LT,
+    ',': TokenType.COMMA, '(': TokenType.LPAREN, ')': TokenType.RPAREN,
+    '{': TokenType.LBRACE, '}': TokenType.RBRACE,
+}
+
+# (group, pattern) table compiled into a single master pattern. Every
+# character of the input is covered by exactly one group, so a scan over
+# the table never skips input silently; 'error' catches anything else.
+TOKEN_TABLE = (
+    ('skip', r'[ \t\r]+'),
+    ('newline', r'\n'),
+    ('comment', r'\#[^\n]*'),
+    ('number', r'[0-9]+'),
+    ('word', r'[A-Za-z_][A-Za-z0-9_]*'),
+    ('string', r'"(?:[^"\\]|\\.)*"'),
+    ('op', r'==|!=|>=|<=|[-+*/=><,(){}]'),
+    ('error', r'.'),
+)
+
+MASTER_PATTERN = re.compile(
+    '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_TABLE),
+    re.DOTALL
+)
+
+_ESCAPE_PATTERN = re.compile(r'\\(.)', re.DOTALL)
+
+
+def _unescape(match):
+    ch = match.group(1)
+    return '\n' if ch == 'n' else ch
+
+
+class Lexer:
+    """Converts NovaLang source text into a list of Tokens"""
+
+    def __init__(self, text):
+        self.text = text
+
+    def tokenize(self):
+        """
+        Tokenize the whole source
+
+        Returns:
+            List of Token, terminated by an EOF_T token
+
+        Raises:
+            LexerError: on an unterminated string or unexpected character
+        """
+        text = self.text
+        toks = []
+        append = toks.append
+        keywords = KEYWORDS
+        operators = OPERATORS
+        IDENT = TokenType.IDENT
+        NUMBER = TokenType.NUMBER
+        STRING = TokenType.STRING
+        line = 1
+        line_start = 0
+
+        for match in MASTER_PATTERN.finditer(text):
+            kind = match.lastgroup
+            if kind == 'skip' or kind == 'comment':
+                continue
+            start = match.start()
+            if kind == 'newline':
+                line += 1
+                line_start = start + 1
+                continue
+            col = start - line_start + 1
+            value = match.group()
+            if kind == 'word':
+                tt = keywords.get(value)
+                if tt is None and not value.islower():
+                    lower = value.lower()
+                    tt = keywords.get(lower)
+                    if tt is not None:
+                        value = lower
+                if tt is None:
+                    append(Token(IDENT, value, line, col))
+                else:
+                    append(Token(tt, value, line, col))
+            elif kind == 'number':
+                append(Token(NUMBER, value, line, col))
+            elif kind == 'op':
+                append(Token(operators[value], value, line, col))
+            elif kind == 'string':
+                body = value[1:-1]
+                if '\\' in body:
+                    body = _ESCAPE_PATTERN.sub(_unescape, body)
+                append(Token(STRING, body, line, col))
+                newlines = value.count('\n')
+                if newlines:
+                    line += newlines
+                    line_start = start + value.rfind('\n') + 1
+            elif value == '"':
+                raise LexerError("Unterminated string", line, col)
+            else:
+                raise LexerError(f"Unexpected character: {value}", line, col)
+
+        append(Token(TokenType.EOF_T, "", line, len(text) - line_start + 1))
+        return toks
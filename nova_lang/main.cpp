@@ -1,39 +1,271 @@
 #include <iostream>
 #include <fstream>
+#include <sstream>
+#include <string>
+#include <chrono>
+#include <cstdlib>
 #include "lexer.hpp"
-#include "parser.hpp"
+#include "compact_lexer.hpp"
+#include "source_buffer.hpp"
+#include "Parser.hpp"
 #include "semantic.hpp"
+#include "diagnostics.hpp"
+#include "dump.hpp"
+#include "optimizer.hpp"
+#include "cgen.hpp"
+#include "bytecode.hpp"
+#include "vm.hpp"
+
+enum class LexerMode { CLASSIC, COMPACT };
+enum class Stage { LEX, PARSE, SEMANTIC };
+
+struct Options {
+    DiagnosticFormat diag_format = DiagnosticFormat::TEXT;
+    bool emit_tokens = false;
+    bool emit_ast = false;
+    bool emit_symbols = false;
+    bool emit_passes = false;
+    bool emit_bytecode = false;
+    bool emit_c = false;
+    bool run = false;
+    bool verbose = false;
+    bool timing = false;
+    LexerMode lexer = LexerMode::CLASSIC;
+    Stage stop_after = Stage::SEMANTIC;
+    int opt_level = 0;
+    size_t max_errors = DEFAULT_MAX_ERRORS;
+    const char* path = nullptr;
+};
+
+static void usage(const char* prog) {
+    std::cerr << "Usage: " << prog << " [options] <file.nova | ->\n"
+              << "  -                         read the program from stdin up to a NUL byte or the end;\n"
+              << "                            with --run, take reads what follows the NUL\n"
+              << "  --diagnostics=text|json   error report format (default text)\n"
+              << "  --emit=STAGE[,STAGE...]   dump none|tokens|ast|symbols|passes|bytecode|c to stdout (default none)\n"
+              << "  --run                     execute the program after checking it, reading take from stdin\n"
+              << "  -O0|-O1|-O2               optimize the checked program (default -O0; -O is -O1)\n"
+              << "  -v, --verbose             report each completed stage\n"
+              << "  --time                    print per-stage timings as JSON to stdout\n"
+              << "  --lexer=classic|compact   compact: memory-mapped input, tokens as views (default classic)\n"
+              << "  --stop-after=STAGE        stop after lex|parse|semantic (default semantic)\n"
+              << "  --max-errors=N            stop after N errors, 0 for no limit (default " << DEFAULT_MAX_ERRORS << ")\n";
+}
+
+static bool parse_emit(const std::string& list, Options& opt) {
+    std::stringstream ss(list);
+    std::string stage;
+    while (std::getline(ss, stage, ',')) {
+        if (stage == "none") { opt.emit_tokens = opt.emit_ast = opt.emit_symbols = opt.emit_passes = opt.emit_bytecode = opt.emit_c = false; }
+        else if (stage == "tokens") opt.emit_tokens = true;
+        else if (stage == "ast") opt.emit_ast = true;
+        else if (stage == "symbols") opt.emit_symbols = true;
+        else if (stage == "passes") opt.emit_passes = true;
+        else if (stage == "bytecode") opt.emit_bytecode = true;
+        else if (stage == "c") opt.emit_c = true;
+        else return false;
+    }
+    return true;
+}
+
+static bool parse_args(int argc, char** argv, Options& opt) {
+    for (int a = 1; a < argc; ++a) {
+        std::string arg = argv[a];
+        if (arg == "--diagnostics=json") opt.diag_format = DiagnosticFormat::JSON;
+        else if (arg == "--diagnostics=text") opt.diag_format = DiagnosticFormat::TEXT;
+        else if (arg.rfind("--emit=", 0) == 0) {
+            if (!parse_emit(arg.substr(7), opt)) {
+                std::cerr << "Unknown emit stage in: " << arg << "\n";
+                return false;
+            }
+        }
+        else if (arg == "-v" || arg == "--verbose") opt.verbose = true;
+        else if (arg == "--time") opt.timing = true;
+        else if (arg == "--run") opt.run = true;
+        else if (arg == "-O") opt.opt_level = 1;
+        else if (arg.size() == 3 && arg[0] == '-' && arg[1] == 'O' && arg[2] >= '0' && arg[2] - '0' <= MAX_OPT_LEVEL)
+            opt.opt_level = arg[2] - '0';
+        else if (arg == "--lexer=classic") opt.lexer = LexerMode::CLASSIC;
+        else if (arg == "--lexer=compact") opt.lexer = LexerMode::COMPACT;
+        else if (arg == "--stop-after=lex") opt.stop_after = Stage::LEX;
+        else if (arg == "--stop-after=parse") opt.stop_after = Stage::PARSE;
+        else if (arg == "--stop-after=semantic") opt.stop_after = Stage::SEMANTIC;
+        else if (arg.rfind("--max-errors=", 0) == 0) {
+            std::string n = arg.substr(13);
+            if (n.empty() || n.find_first_not_of("0123456789") != std::string::npos) {
+                std::cerr << "Invalid error limit in: " << arg << "\n";
+                return false;
+            }
+            opt.max_errors = (size_t)std::strtoull(n.c_str(), nullptr, 10);
+        }
+        else if (arg.size() > 1 && arg[0] == '-') {
+            std::cerr << "Unknown option: " << arg << "\n";
+            return false;
+        } else if (!opt.path) opt.path = argv[a];
+        else return false;
+    }
+    return opt.path != nullptr;
+}
+
+using Clock = std::chrono::steady_clock;
+
+static double ms_since(Clock::time_point& t) {
+    auto now = Clock::now();
+    double ms = std::chrono::duration<double, std::milli>(now - t).count();
+    t = now;
+    return ms;
+}
 
 int main(int argc, char** argv) {
-    if (argc != 2) {
-        std::cerr << "Usage: " << argv[0] << " <file.nova>\n";
+    std::ios::sync_with_stdio(false);
+
+    Options opt;
+    if (!parse_args(argc, argv, opt)) {
+        usage(argv[0]);
         return 1;
     }
 
-    std::ifstream in(argv[1]);
-    if (!in.is_open()) {
-        std::cerr << "Cannot open file\n";
+    auto t0 = Clock::now();
+    auto t = t0;
+    double read_ms = 0, lex_ms = 0, parse_ms = 0, semantic_ms = 0, optimize_ms = 0, codegen_ms = 0, run_ms = 0, teardown_ms = 0;
+    size_t source_bytes = 0, token_count = 0, token_bytes = 0, ast_bytes = 0, code_bytes = 0;
+
+    std::string source;
+    SourceBuffer buffer;
+    bool opened = true;
+    if (std::string(opt.path) == "-") {
+        // The NUL keeps the program apart from the input it takes
+        std::getline(std::cin, source, '\0');
+        if (opt.lexer == LexerMode::COMPACT) buffer.assign(std::move(source));
+    } else if (opt.lexer == LexerMode::COMPACT) {
+        opened = buffer.open(opt.path);
+    } else {
+        std::ifstream in(opt.path);
+        opened = in.is_open();
+        if (opened) source.assign(std::istreambuf_iterator<char>(in), std::istreambuf_iterator<char>());
+    }
+    if (!opened) {
+        Diagnostic d;
+        d.stage = "driver";
+        d.message = std::string("Cannot open file ") + opt.path;
+        write_diagnostic(std::cerr, d, opt.diag_format);
         return 1;
     }
-    std::string source((std::istreambuf_iterator<char>(in)), std::istreambuf_iterator<char>());
+    source_bytes = opt.lexer == LexerMode::COMPACT ? buffer.size() : source.size();
+    read_ms = ms_since(t);
     try {
-        Lexer lx(source);
-        auto tokens = lx.tokenize();
-        std::cout << "Tokens: " << tokens.size() << "\n";
-        // debug print:
-        for (auto &t : tokens) std::cout << t << "\n";
+        std::vector<Token> tokens;
+        TokenStream stream;
+        if (opt.lexer == LexerMode::COMPACT) {
+            stream = CompactLexer(buffer.data(), buffer.size()).tokenize();
+            lex_ms = ms_since(t);
+            token_count = stream.tokens.size();
+            token_bytes = stream.memory_bytes();
+            // The parser still takes classic tokens; building them is
+            // charged to the parse stage below
+            if (opt.emit_tokens) print_tokens(std::cout, stream.to_tokens());
+        } else {
+            Lexer lx(source);
+            tokens = lx.tokenize();
+            lex_ms = ms_since(t);
+            token_count = tokens.size();
+            // Token values longer than the small-string buffer live on the heap
+            const size_t inline_capacity = std::string().capacity();
+            token_bytes = tokens.capacity() * sizeof(Token);
+            for (const auto& tok : tokens)
+                if (tok.value.capacity() > inline_capacity) token_bytes += tok.value.capacity() + 1;
+            if (opt.emit_tokens) print_tokens(std::cout, tokens);
+        }
+        if (opt.verbose) std::cout << "Tokens: " << token_count << "\n";
+
+        if (opt.stop_after != Stage::LEX) {
+            t = Clock::now();
+            if (opt.lexer == LexerMode::COMPACT) tokens = stream.to_tokens();
+            Parser p(tokens);
+            p.set_max_errors(opt.max_errors);
+            Ast ast = p.parse();
+            parse_ms = ms_since(t);
+            if (!p.errors().empty()) {
+                // The tree of a program with syntax errors is incomplete;
+                // it is neither dumped nor checked
+                std::cout.flush();
+                write_errors(std::cerr, p.errors(), opt.diag_format);
+                return 1;
+            }
+            ast_bytes = ast.memory_bytes();
+            if (opt.emit_ast) print_ast(std::cout, ast);
+            if (opt.verbose) std::cout << "Parsed AST\n";
+
+            if (opt.stop_after == Stage::SEMANTIC) {
+                t = Clock::now();
+                SemanticAnalyzer sem;
+                sem.set_record_symbols(opt.emit_symbols);
+                sem.set_max_errors(opt.max_errors);
+                sem.analyze(ast);
+                semantic_ms = ms_since(t);
+                if (!sem.errors().empty()) {
+                    std::cout.flush();
+                    write_errors(std::cerr, sem.errors(), opt.diag_format);
+                    return 1;
+                }
+                if (opt.emit_symbols) print_symbols(std::cout, sem.symbols());
+                if (opt.verbose) std::cout << "Semantic analysis OK\n";
 
-        Parser p(tokens);
-        auto ast = p.parse();
-        std::cout << "Parsed AST\n";
+                if (opt.opt_level > 0 || opt.emit_passes) {
+                    t = Clock::now();
+                    OptReport report = Optimizer(opt.opt_level).run(ast);
+                    optimize_ms = ms_since(t);
+                    if (opt.emit_passes) print_opt_report(std::cout, report);
+                }
 
-        SemanticAnalyzer sem;
-        sem.analyze(ast.get());
-        std::cout << "Semantic analysis OK\n";
+                if (opt.emit_c) std::cout << CGenerator().generate(ast);
 
+                if (opt.run || opt.emit_bytecode) {
+                    t = Clock::now();
+                    Module module = Compiler().compile(ast);
+                    codegen_ms = ms_since(t);
+                    code_bytes = module.code_bytes();
+                    if (opt.emit_bytecode) print_bytecode(std::cout, module);
+                    if (opt.run) {
+                        t = Clock::now();
+                        VM(std::cin, std::cout).run(module);
+                        run_ms = ms_since(t);
+                    }
+                }
+            }
+            t = Clock::now();
+            ast = Ast();  // releases the arena blocks, not individual nodes
+            teardown_ms = ms_since(t);
+        }
+    } catch (const CompileError& e) {
+        std::cout.flush();
+        write_diagnostic(std::cerr, make_diagnostic(e), opt.diag_format);
+        return 1;
     } catch (const std::exception& e) {
-        std::cerr << "Error: " << e.what() << "\n";
+        std::cout.flush();
+        Diagnostic d;
+        d.stage = "internal";
+        d.message = e.what();
+        write_diagnostic(std::cerr, d, opt.diag_format);
         return 1;
     }
+    if (opt.timing) {
+        // total_ms also covers the token teardown at the end of the try block
+        double total_ms = ms_since(t0);
+        std::cout << "{\"timing\":{\"bytes\":" << source_bytes
+                  << ",\"tokens\":" << token_count
+                  << ",\"token_bytes\":" << token_bytes
+                  << ",\"ast_bytes\":" << ast_bytes
+                  << ",\"code_bytes\":" << code_bytes
+                  << ",\"read_ms\":" << read_ms
+                  << ",\"lex_ms\":" << lex_ms
+                  << ",\"parse_ms\":" << parse_ms
+                  << ",\"semantic_ms\":" << semantic_ms
+                  << ",\"optimize_ms\":" << optimize_ms
+                  << ",\"codegen_ms\":" << codegen_ms
+                  << ",\"run_ms\":" << run_ms
+                  << ",\"teardown_ms\":" << teardown_ms
+                  << ",\"total_ms\":" << total_ms << "}}\n";
+    }
     return 0;
 }
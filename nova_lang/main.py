@@ -0,0 +1,266 @@
+"""
+Command-line driver for the in-process front end (mirrors main.cpp)
+
+Usage: python -m nova_lang.main [options] <file.nova | ->
+"""
+
+import io
+import json
+import sys
+import time
+
+from .diagnostics import DEFAULT_MAX_ERRORS, CompileError, Diagnostic
+from .bytecode import Compiler, print_bytecode
+from .cgen import CGenerator
+from .dump import print_ast, print_symbols, print_tokens
+from .lexer import Lexer
+from .optimizer import MAX_OPT_LEVEL, Optimizer, print_opt_report
+from .parser import Parser
+from .semantic import SemanticAnalyzer
+from .vm import VM
+
+
+def usage(prog):
+    sys.stderr.write(
+        f"Usage: {prog} [options] <file.nova | ->\n"
+        "  -                         read the program from stdin up to a NUL byte or the end;\n"
+        "                            with --run, take reads what follows the NUL\n"
+        "  --diagnostics=text|json   error report format (default text)\n"
+        "  --emit=STAGE[,STAGE...]   dump none|tokens|ast|symbols|passes|bytecode|c to stdout (default none)\n"
+        "  --run                     execute the program after checking it, reading take from stdin\n"
+        "  -O0|-O1|-O2               optimize the checked program (default -O0; -O is -O1)\n"
+        "  -v, --verbose             report each completed stage\n"
+        "  --time                    print per-stage timings as JSON to stdout\n"
+        "  --lexer=classic|compact   accepted for compatibility; there is one lexer\n"
+        "  --stop-after=STAGE        stop after lex|parse|semantic (default semantic)\n"
+        "  --max-errors=N            stop after N errors, 0 for no limit "
+        f"(default {DEFAULT_MAX_ERRORS})\n"
+    )
+
+
+_OPT_LEVELS = [str(n) for n in range(MAX_OPT_LEVEL + 1)]
+
+
+class Options:
+    __slots__ = (
+        'diag_format', 'emit', 'verbose', 'timing', 'run', 'stop_after',
+        'opt_level', 'max_errors', 'path'
+    )
+
+    def __init__(self):
+        self.diag_format = "text"
+        self.emit = set()
+        self.verbose = False
+        self.timing = False
+        self.run = False
+        self.stop_after = "semantic"
+        self.opt_level = 0
+        self.max_errors = DEFAULT_MAX_ERRORS
+        self.path = None
+
+
+def parse_args(argv, opt):
+    for arg in argv:
+        if arg == "--diagnostics=json":
+            opt.diag_format = "json"
+        elif arg == "--diagnostics=text":
+            opt.diag_format = "text"
+        elif arg.startswith("--emit="):
+            for stage in arg[7:].split(","):
+                if stage == "none":
+                    opt.emit.clear()
+                elif stage in ("tokens", "ast", "symbols", "passes", "bytecode",
+                               "c"):
+                    opt.emit.add(stage)
+                else:
+                    sys.stderr.write(f"Unknown emit stage in: {arg}\n")
+                    return False
+        elif arg in ("-v", "--verbose"):
+            opt.verbose = True
+        elif arg == "--time":
+            opt.timing = True
+        elif arg == "--run":
+            opt.run = True
+        elif arg == "-O":
+            opt.opt_level = 1
+        elif arg[:2] == "-O" and arg[2:] in _OPT_LEVELS:
+            opt.opt_level = int(arg[2:])
+        elif arg in ("--lexer=classic", "--lexer=compact"):
+            # The backend's compact lexer only changes how tokens are
+            # stored; the tokens and diagnostics are the same
+            pass
+        elif arg in ("--stop-after=lex", "--stop-after=parse",
+                     "--stop-after=semantic"):
+            opt.stop_after = arg[13:]
+        elif arg.startswith("--max-errors="):
+            n = arg[13:]
+            if not n.isdigit() or not n.isascii():
+                sys.stderr.write(f"Invalid error limit in: {arg}\n")
+                return False
+            opt.max_errors = int(n)
+        elif len(arg) > 1 and arg[0] == "-":
+            sys.stderr.write(f"Unknown option: {arg}\n")
+            return False
+        elif opt.path is None:
+            opt.path = arg
+        else:
+            return False
+    return opt.path is not None
+
+
+def read_stdin_source(stream=None):
+    """
+    Read a program from stdin, up to a NUL byte or the end (path "-")
+
+    Returns:
+        (source, inp): inp is the stream take reads from, positioned
+        just after the NUL
+    """
+    stream = sys.stdin if stream is None else stream
+    raw = getattr(stream, "buffer", None)
+    if raw is None or not hasattr(raw, "peek"):
+        # In-memory text streams cannot leave the rest unread
+        source, _, rest = stream.read().partition("\0")
+        return source, io.StringIO(rest)
+    # Consume exactly up to the NUL, so the rest stays in stdin for take
+    chunks = []
+    while True:
+        data = raw.peek(1 << 16)
+        if not data:
+            break
+        end = data.find(b"\0")
+        if end >= 0:
+            chunks.append(raw.read(end + 1)[:-1])
+            break
+        chunks.append(raw.read(len(data)))
+    return b"".join(chunks).decode("utf-8", "surrogateescape"), stream
+
+
+def run(opt, source, out=None, timing=None, inp=None):
+    """
+    Run the front end over source, writing emitted dumps to out
+
+    Args:
+        timing: Optional dict that receives per-stage times in ms
+        inp: Stream take reads from (default sys.stdin)
+
+    Returns:
+        List of Diagnostic from the first stage that found errors (empty
+        when there are none)
+
+    Raises:
+        CompileError: on a lexer error, and from the code generator and
+            the VM when the program is run
+    """
+    out = sys.stdout if out is None else out
+    timing = {} if timing is None else timing
+    t = time.perf_counter()
+    tokens = Lexer(source).tokenize()
+    timing["lex_ms"] = (time.perf_counter() - t) * 1000
+    timing["tokens"] = len(tokens)
+    if "tokens" in opt.emit:
+        print_tokens(out, tokens)
+    if opt.verbose:
+        out.write(f"Tokens: {len(tokens)}\n")
+    if opt.stop_after == "lex":
+        return []
+
+    t = time.perf_counter()
+    parser = Parser(tokens, opt.max_errors)
+    ast = parser.parse()
+    timing["parse_ms"] = (time.perf_counter() - t) * 1000
+    if parser.log:
+        # The tree of a program with syntax errors is incomplete; it is
+        # neither dumped nor checked
+        return parser.log.diagnostics()
+    if "ast" in opt.emit:
+        print_ast(out, ast)
+    if opt.verbose:
+        out.write("Parsed AST\n")
+    if opt.stop_after == "parse":
+        return []
+
+    t = time.perf_counter()
+    sem = SemanticAnalyzer(record_symbols="symbols" in opt.emit,
+                           max_errors=opt.max_errors)
+    sem.analyze(ast)
+    timing["semantic_ms"] = (time.perf_counter() - t) * 1000
+    if sem.log:
+        return sem.log.diagnostics()
+    if "symbols" in opt.emit:
+        print_symbols(out, sem.symbols)
+    if opt.verbose:
+        out.write("Semantic analysis OK\n")
+
+    if opt.opt_level > 0 or "passes" in opt.emit:
+        t = time.perf_counter()
+        report = Optimizer(opt.opt_level).run(ast)
+        timing["optimize_ms"] = (time.perf_counter() - t) * 1000
+        if "passes" in opt.emit:
+            print_opt_report(out, report)
+
+    if "c" in opt.emit:
+        out.write(CGenerator().generate(ast))
+
+    if opt.run or "bytecode" in opt.emit:
+        t = time.perf_counter()
+        module = Compiler().compile(ast)
+        timing["codegen_ms"] = (time.perf_counter() - t) * 1000
+        if "bytecode" in opt.emit:
+            print_bytecode(out, module)
+        if opt.run:
+            t = time.perf_counter()
+            VM(inp, out).run(module)
+            timing["run_ms"] = (time.perf_counter() - t) * 1000
+    return []
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    opt = Options()
+    if not parse_args(argv[1:], opt):
+        usage(argv[0])
+        return 1
+
+    t0 = time.perf_counter()
+    inp = None
+    try:
+        if opt.path == "-":
+            source, inp = read_stdin_source()
+        else:
+            # newline='' keeps '\r' in the text, as the backend's ifstream
+            # does
+            with open(opt.path, encoding="utf-8", errors="surrogateescape",
+                      newline="") as f:
+                source = f.read()
+    except OSError:
+        d = Diagnostic("error", "driver", f"Cannot open file {opt.path}")
+        sys.stderr.write(d.format(opt.diag_format) + "\n")
+        return 1
+
+    timing = {"read_ms": (time.perf_counter() - t0) * 1000}
+
+    try:
+        diagnostics = run(opt, source, timing=timing, inp=inp)
+    except CompileError as e:
+        diagnostics = [Diagnostic.from_error(e)]
+    if diagnostics:
+        sys.stdout.flush()
+        sys.stderr.write("".join(
+            d.format(opt.diag_format) + "\n" for d in diagnostics
+        ))
+        return 1
+    if opt.timing:
+        record = {"bytes": len(source.encode("utf-8", "surrogateescape"))}
+        for key in ("tokens", "read_ms", "lex_ms", "parse_ms", "semantic_ms",
+                    "optimize_ms", "codegen_ms", "run_ms"):
+            record[key] = timing.get(key, 0)
+        record["total_ms"] = (time.perf_counter() - t0) * 1000
+        sys.stdout.write(
+            json.dumps({"timing": record}, separators=(",", ":")) + "\n"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
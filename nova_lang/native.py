@@ -0,0 +1,321 @@
+"""
+Native builds of NovaLang programs, cached by source and flags
+
+Usage: python -m nova_lang.native [options] <file.nova>
+
+A program is checked, optionally optimized, lowered to C (cgen.py) and
+compiled with the system C compiler; the executable then runs with this
+process's stdin, stdout and stderr, and its exit code is returned. It
+behaves like --run, only faster for compute-heavy programs.
+
+Executables are cached under a key made of the source bytes, the -O
+level, the C compiler (path, size, mtime) and flags, the runtime header
+and the modules that generate the C, so running an unchanged program skips checking, code generation
+and compilation: the cached executable is started directly.
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shlex
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from .cgen import CGenerator
+from .diagnostics import DEFAULT_MAX_ERRORS, CompileError, Diagnostic
+from .lexer import Lexer
+from .optimizer import MAX_OPT_LEVEL, Optimizer
+from .parser import Parser
+from .semantic import SemanticAnalyzer
+
+RUNTIME_DIR = os.path.dirname(os.path.abspath(__file__))
+RUNTIME_HEADER = os.path.join(RUNTIME_DIR, "nova_runtime.h")
+# Everything that shapes the generated C; an edit to any of these must
+# not reuse executables built from the old output
+GENERATOR_SOURCES = [RUNTIME_HEADER] + [
+    os.path.join(RUNTIME_DIR, name + ".py") for name in (
+        "lexer", "parser", "ast_nodes", "semantic", "optimizer", "cgen"
+    )
+]
+EXE_SUFFIX = ".exe" if os.name == "nt" else ""
+# Calls nest 10000 deep at most (vm.py); Windows threads get 1 MiB of
+# stack unless the executable asks for more
+STACK_BYTES = 16 * 1024 * 1024
+
+
+class NativeError(CompileError):
+    """The C compiler rejected the generated code, or is missing"""
+
+    stage = "native"
+
+
+def find_c_compiler():
+    """
+    The C compiler command: $CC, else the first of cc, gcc, clang and cl
+    on the PATH
+
+    Returns:
+        Argument list, or None when there is none
+    """
+    if os.environ.get("CC"):
+        return shlex.split(os.environ["CC"])
+    for name in ("cc", "gcc", "clang", "cl"):
+        path = shutil.which(name)
+        if path:
+            return [path]
+    return None
+
+
+def _is_msvc(compiler):
+    return os.path.basename(compiler[0]).lower() in ("cl", "cl.exe")
+
+
+def compile_command(compiler, c_path, exe_path, cflags):
+    """Arguments that build exe_path from c_path with the runtime header"""
+    if _is_msvc(compiler):
+        return compiler + ["/nologo"] + cflags + [
+            f"/I{RUNTIME_DIR}", c_path, f"/Fe{exe_path}",
+            "/link", f"/STACK:{STACK_BYTES}",
+        ]
+    command = compiler + cflags + [f"-I{RUNTIME_DIR}", c_path, "-o", exe_path]
+    if os.name == "nt":
+        command.append(f"-Wl,--stack,{STACK_BYTES}")
+    return command
+
+
+def default_cache_dir():
+    """$NOVA_NATIVE_CACHE, else novalang/native in the user's cache folder"""
+    if os.environ.get("NOVA_NATIVE_CACHE"):
+        return os.environ["NOVA_NATIVE_CACHE"]
+    base = os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+    if not base:
+        base = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "novalang", "native")
+
+
+class NativeBuild:
+    """An executable for one program, and how it was obtained"""
+
+    __slots__ = ('path', 'cached', 'diagnostics', 'timing')
+
+    def __init__(self, path, cached, diagnostics=None, timing=None):
+        self.path = path
+        self.cached = cached
+        # Errors that stopped the build; path is None when there are any
+        self.diagnostics = diagnostics or []
+        # Per-stage times in ms
+        self.timing = timing or {}
+
+
+class NativeCache:
+    """
+    Size-bounded LRU of native executables, one file per entry.
+
+    Starting an entry bumps its mtime; when the directory grows past
+    max_bytes the entries with the oldest mtime are removed.
+    """
+
+    def __init__(self, directory=None, compiler=None, cflags=None,
+                 max_bytes=256 * 1024 * 1024):
+        self.directory = directory or default_cache_dir()
+        self.compiler = compiler or find_c_compiler()
+        self.cflags = list(cflags) if cflags is not None else (
+            ["/O2"] if self.compiler and _is_msvc(self.compiler) else ["-O2"]
+        )
+        self.max_bytes = max_bytes
+
+    def make_key(self, source, opt_level):
+        """
+        Build the cache key for a program
+
+        Args:
+            source: Program source as bytes
+
+        Returns:
+            Hex digest
+        """
+        h = hashlib.sha256()
+        h.update(source)
+        identity = list(self.compiler or [])
+        path = shutil.which(identity[0]) if identity else None
+        if path:
+            st = os.stat(path)
+            identity += [path, st.st_size, st.st_mtime_ns]
+        h.update(json.dumps([identity, self.cflags, opt_level]).encode("utf-8"))
+        for path in GENERATOR_SOURCES:
+            with open(path, "rb") as f:
+                h.update(hashlib.sha256(f.read()).digest())
+        return h.hexdigest()
+
+    def path(self, key):
+        return os.path.join(self.directory, key + EXE_SUFFIX)
+
+    def build(self, source, opt_level=0, max_errors=DEFAULT_MAX_ERRORS):
+        """
+        Return the executable for source, compiling it unless it is cached
+
+        Args:
+            source: Program text
+            opt_level: Optimizer level the C is generated at (0 to 2)
+
+        Returns:
+            NativeBuild; its diagnostics come from the first stage that
+            found errors, or from the C compiler
+        """
+        t = time.perf_counter()
+        key = self.make_key(source.encode("utf-8", "surrogateescape"),
+                            opt_level)
+        exe = self.path(key)
+        if os.path.isfile(exe):
+            try:
+                os.utime(exe)
+            except OSError:
+                pass
+            timing = {"lookup_ms": (time.perf_counter() - t) * 1000}
+            return NativeBuild(exe, True, timing=timing)
+
+        timing = {}
+        try:
+            t = time.perf_counter()
+            parser = Parser(Lexer(source).tokenize(), max_errors)
+            program = parser.parse()
+            if parser.log:
+                return NativeBuild(None, False, parser.log.diagnostics())
+            sem = SemanticAnalyzer(max_errors=max_errors)
+            sem.analyze(program)
+            if sem.log:
+                return NativeBuild(None, False, sem.log.diagnostics())
+            timing["check_ms"] = (time.perf_counter() - t) * 1000
+            t = time.perf_counter()
+            if opt_level > 0:
+                Optimizer(opt_level).run(program)
+            code = CGenerator().generate(program)
+            timing["codegen_ms"] = (time.perf_counter() - t) * 1000
+            t = time.perf_counter()
+            self._compile(code, exe)
+            timing["cc_ms"] = (time.perf_counter() - t) * 1000
+        except CompileError as e:
+            return NativeBuild(None, False, [Diagnostic.from_error(e)], timing)
+        self._prune(exe)
+        return NativeBuild(exe, False, timing=timing)
+
+    def _compile(self, code, exe):
+        if not self.compiler:
+            raise NativeError("No C compiler found; set CC")
+        os.makedirs(self.directory, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=self.directory) as tmp:
+            c_path = os.path.join(tmp, "program.c")
+            with open(c_path, "w", encoding="utf-8",
+                      errors="surrogateescape") as f:
+                f.write(code)
+            built = os.path.join(tmp, "program" + EXE_SUFFIX)
+            command = compile_command(self.compiler, c_path, built,
+                                      self.cflags)
+            try:
+                result = subprocess.run(command, cwd=tmp, capture_output=True,
+                                        text=True, errors="replace")
+            except OSError as e:
+                raise NativeError(f"Cannot run C compiler: {e}") from None
+            if result.returncode != 0 or not os.path.isfile(built):
+                output = (result.stderr or result.stdout).strip()
+                raise NativeError("C compiler failed: " + output[:2000])
+            # Another process building the same key writes the same file
+            os.replace(built, exe)
+
+    def _prune(self, keep):
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        entries = []
+        total = 0
+        for name in names:
+            path = os.path.join(self.directory, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if not os.path.isfile(path):
+                continue
+            total += st.st_size
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(
+        prog="python -m nova_lang.native",
+        description="Compile a NovaLang program to a native executable "
+                    "(cached) and run it."
+    )
+    parser.add_argument("path", metavar="FILE")
+    parser.add_argument("--diagnostics", choices=("text", "json"),
+                        default="text", help="error report format")
+    parser.add_argument("-O", dest="opt_level", type=int, default=0,
+                        choices=range(MAX_OPT_LEVEL + 1), metavar="LEVEL",
+                        help="optimize before generating C (default 0)")
+    parser.add_argument("--max-errors", type=int, default=DEFAULT_MAX_ERRORS,
+                        help="stop after N errors, 0 for no limit")
+    parser.add_argument("--cache-dir", metavar="DIR",
+                        help="executable cache (default: $NOVA_NATIVE_CACHE "
+                             "or the user cache folder)")
+    parser.add_argument("--cflags", default=None,
+                        help="C compiler flags (default -O2)")
+    parser.add_argument("--time", action="store_true",
+                        help="print build and run times as JSON to stdout")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    opt = parse_args(sys.argv[1:] if argv is None else argv)
+    t0 = time.perf_counter()
+    try:
+        with open(opt.path, encoding="utf-8", errors="surrogateescape",
+                  newline="") as f:
+            source = f.read()
+    except OSError:
+        d = Diagnostic("error", "driver", f"Cannot open file {opt.path}")
+        sys.stderr.write(d.format(opt.diagnostics) + "\n")
+        return 1
+
+    cflags = shlex.split(opt.cflags) if opt.cflags is not None else None
+    cache = NativeCache(opt.cache_dir, cflags=cflags)
+    build = cache.build(source, opt.opt_level, opt.max_errors)
+    if build.diagnostics:
+        sys.stderr.write("".join(
+            d.format(opt.diagnostics) + "\n" for d in build.diagnostics
+        ))
+        return 1
+
+    sys.stdout.flush()
+    t = time.perf_counter()
+    code = subprocess.run(
+        [build.path, f"--diagnostics={opt.diagnostics}"]
+    ).returncode
+    if opt.time:
+        record = {"cached": build.cached}
+        record.update(build.timing)
+        record["run_ms"] = (time.perf_counter() - t) * 1000
+        record["total_ms"] = (time.perf_counter() - t0) * 1000
+        sys.stdout.write(
+            json.dumps({"timing": record}, separators=(",", ":")) + "\n"
+        )
+    return code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+#ifndef NOVA_RUNTIME_H
+#define NOVA_RUNTIME_H
+
+/* Runtime for the C that --emit=c generates (cgen.hpp). It is plain C99
+   and behaves like the VM (vm.hpp): nums and flags are doubles (a flag is
+   0 or 1), text is an immutable reference-counted string, show output is
+   flushed at least every NV_FLUSH_MS and before take reads a line, and a
+   runtime error is reported the way the driver reports diagnostics, as
+   text or, when the program is run with --diagnostics=json, as JSON.
+
+   Ownership: a text expression yields one reference, and every function
+   below that takes an nv_text* consumes it, except nv_ref. */
+
+#if !defined(_WIN32) && !defined(_POSIX_C_SOURCE)
+#define _POSIX_C_SOURCE 199309L
+#endif
+#include <math.h>
+#include <stddef.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+#include <time.h>
+
+#define NV_MAX_CALL_DEPTH 10000
+#define NV_FLUSH_MS 50.0
+
+/* Unused helpers draw no warnings when inline */
+#if defined(_MSC_VER) && !defined(__cplusplus)
+#define NV_API static __inline
+#else
+#define NV_API static inline
+#endif
+
+#if defined(__GNUC__) || defined(__clang__)
+#define NV_NORETURN __attribute__((noreturn))
+#elif defined(_MSC_VER)
+#define NV_NORETURN __declspec(noreturn)
+#else
+#define NV_NORETURN
+#endif
+
+/* Where an operation that can fail at run time came from */
+typedef struct {
+    int line;
+    int col;
+    int length;
+} nv_site;
+
+typedef struct {
+    size_t refs;
+    size_t size;
+    char data[1];
+} nv_text;
+
+static int nv_json;
+static int nv_depth;
+static double nv_last_flush;
+static nv_text* nv_empty;
+static char* nv_line;
+static size_t nv_line_size;
+static size_t nv_line_capacity;
+
+NV_API double nv_now_ms(void) {
+    struct timespec ts;
+#if defined(CLOCK_MONOTONIC)
+    clock_gettime(CLOCK_MONOTONIC, &ts);
+#else
+    timespec_get(&ts, TIME_UTC);
+#endif
+    return (double)ts.tv_sec * 1e3 + (double)ts.tv_nsec / 1e6;
+}
+
+NV_API void nv_flush(void) {
+    fflush(stdout);
+    nv_last_flush = nv_now_ms();
+}
+
+NV_API void nv_json_string(const char* s, size_t size) {
+    size_t k;
+    for (k = 0; k < size; ++k) {
+        unsigned char c = (unsigned char)s[k];
+        switch (c) {
+            case '"': fputs("\\\"", stderr); break;
+            case '\\': fputs("\\\\", stderr); break;
+            case '\n': fputs("\\n", stderr); break;
+            case '\r': fputs("\\r", stderr); break;
+            case '\t': fputs("\\t", stderr); break;
+            default:
+                if (c < 0x20) fprintf(stderr, "\\u%04x", c);
+                else fputc(c, stderr);
+        }
+    }
+}
+
+/* Reports an error of the given stage and exits with status 1; at is NULL
+   when there is no source position */
+NV_API NV_NORETURN void nv_error(const char* stage, const nv_site* at, const char* msg, size_t size) {
+    int line = at ? at->line : 0, col = at ? at->col : 0, length = at ? at->length : 1;
+    fflush(stdout);
+    if (nv_json) {
+        fprintf(stderr, "{\"severity\":\"error\",\"stage\":\"%s\",\"message\":\"", stage);
+        nv_json_string(msg, size);
+        fprintf(stderr, "\",\"line\":%d,\"column\":%d,\"span\":{\"start_line\":%d,\"start_column\":%d"
+                        ",\"end_line\":%d,\"end_column\":%d}}\n",
+                line, col, line, col, line, col + length);
+    } else {
+        fputs("Error: ", stderr);
+        fwrite(msg, 1, size, stderr);
+        if (line > 0) fprintf(stderr, " at %d:%d", line, col);
+        fputc('\n', stderr);
+    }
+    exit(1);
+}
+
+NV_API NV_NORETURN void nv_fail(const nv_site* at, const char* msg) {
+    nv_error("runtime", at, msg, strlen(msg));
+}
+
+NV_API void* nv_alloc(size_t size) {
+    void* mem = malloc(size);
+    if (!mem) nv_error("internal", NULL, "std::bad_alloc", 14);
+    return mem;
+}
+
+NV_API nv_text* nv_new_text(size_t size) {
+    nv_text* t = (nv_text*)nv_alloc(offsetof(nv_text, data) + size + 1);
+    t->refs = 1;
+    t->size = size;
+    t->data[size] = '\0';
+    return t;
+}
+
+NV_API nv_text* nv_make(const char* data, size_t size) {
+    nv_text* t = nv_new_text(size);
+    memcpy(t->data, data, size);
+    return t;
+}
+
+NV_API nv_text* nv_ref(nv_text* t) {
+    t->refs++;
+    return t;
+}
+
+NV_API void nv_release(nv_text* t) {
+    if (--t->refs == 0) free(t);
+}
+
+NV_API void nv_set(nv_text** slot, nv_text* t) {
+    nv_release(*slot);
+    *slot = t;
+}
+
+NV_API nv_text* nv_concat(nv_text* a, nv_text* b) {
+    nv_text* t = nv_new_text(a->size + b->size);
+    memcpy(t->data, a->data, a->size);
+    memcpy(t->data + a->size, b->data, b->size);
+    nv_release(a);
+    nv_release(b);
+    return t;
+}
+
+NV_API int nv_compare(nv_text* a, nv_text* b) {
+    int c = memcmp(a->data, b->data, a->size < b->size ? a->size : b->size);
+    if (c == 0) c = a->size < b->size ? -1 : a->size > b->size ? 1 : 0;
+    nv_release(a);
+    nv_release(b);
+    return c;
+}
+
+NV_API double nv_div(double a, double b, const nv_site* at) {
+    if (b == 0) nv_fail(at, "Division by zero");
+    return a / b;
+}
+
+NV_API void nv_show(const char* data, size_t size) {
+    double now;
+    fwrite(data, 1, size, stdout);
+    putchar('\n');
+    now = nv_now_ms();
+    if (now - nv_last_flush >= NV_FLUSH_MS) {
+        fflush(stdout);
+        nv_last_flush = now;
+    }
+}
+
+NV_API void nv_show_num(double v) {
+    char buf[32];
+    /* printf may sign a NaN */
+    if (v != v) strcpy(buf, "nan");
+    else snprintf(buf, sizeof buf, "%.15g", v);
+    nv_show(buf, strlen(buf));
+}
+
+NV_API void nv_show_flag(double v) {
+    if (v != 0) nv_show("true", 4);
+    else nv_show("false", 5);
+}
+
+NV_API void nv_show_text(nv_text* t) {
+    nv_show(t->data, t->size);
+    nv_release(t);
+}
+
+/* Reads one line of stdin into nv_line without its '\n' and a trailing
+   '\r', leaving room for a terminator; 0 at the end of the input */
+NV_API int nv_read_line(void) {
+    int c;
+    /* A prompt shown just before take must reach the reader first */
+    nv_flush();
+    nv_line_size = 0;
+    while ((c = getchar()) != EOF && c != '\n') {
+        if (nv_line_size + 1 >= nv_line_capacity) {
+            char* grown = (char*)realloc(nv_line, nv_line_capacity * 2);
+            if (!grown) nv_error("internal", NULL, "std::bad_alloc", 14);
+            nv_line = grown;
+            nv_line_capacity *= 2;
+        }
+        nv_line[nv_line_size++] = (char)c;
+    }
+    if (c == EOF && nv_line_size == 0) return 0;
+    if (nv_line_size > 0 && nv_line[nv_line_size - 1] == '\r') nv_line_size--;
+    return 1;
+}
+
+NV_API NV_NORETURN void nv_invalid_input(const nv_site* at, const char* type) {
+    size_t prefix = strlen(type) + 16;
+    char* msg = (char*)nv_alloc(prefix + nv_line_size + 1);
+    sprintf(msg, "Invalid %s input '", type);
+    memcpy(msg + prefix, nv_line, nv_line_size);
+    msg[prefix + nv_line_size] = '\'';
+    nv_error("runtime", at, msg, prefix + nv_line_size + 1);
+}
+
+/* The line without leading and trailing spaces and tabs, as [*b, *e) */
+NV_API int nv_trim(size_t* b, size_t* e) {
+    *b = 0;
+    *e = nv_line_size;
+    while (*b < *e && (nv_line[*b] == ' ' || nv_line[*b] == '\t')) ++*b;
+    while (*e > *b && (nv_line[*e - 1] == ' ' || nv_line[*e - 1] == '\t')) --*e;
+    return *b < *e;
+}
+
+#define NV_DIGIT(c) ((c) >= '0' && (c) <= '9')
+
+/* Optional sign, digits with an optional fraction, optional exponent;
+   strtod would also take hex, "inf" and "nan" */
+NV_API double nv_take_num(const nv_site* at) {
+    size_t b, e, i, digits = 0, exp_digits = 0;
+    if (!nv_read_line()) nv_fail(at, "No input left for take");
+    if (!nv_trim(&b, &e)) nv_invalid_input(at, "num");
+    i = b;
+    if (nv_line[i] == '+' || nv_line[i] == '-') i++;
+    while (i < e && NV_DIGIT(nv_line[i])) i++, digits++;
+    if (i < e && nv_line[i] == '.') {
+        i++;
+        while (i < e && NV_DIGIT(nv_line[i])) i++, digits++;
+    }
+    if (digits == 0) nv_invalid_input(at, "num");
+    if (i < e && (nv_line[i] == 'e' || nv_line[i] == 'E')) {
+        i++;
+        if (i < e && (nv_line[i] == '+' || nv_line[i] == '-')) i++;
+        while (i < e && NV_DIGIT(nv_line[i])) i++, exp_digits++;
+        if (exp_digits == 0) nv_invalid_input(at, "num");
+    }
+    if (i != e) nv_invalid_input(at, "num");
+    nv_line[e] = '\0';
+    return strtod(nv_line + b, NULL);
+}
+
+NV_API double nv_take_flag(const nv_site* at) {
+    size_t b, e, k;
+    char word[6];
+    if (!nv_read_line()) nv_fail(at, "No input left for take");
+    if (!nv_trim(&b, &e) || e - b > 5) nv_invalid_input(at, "flag");
+    for (k = 0; k < e - b; ++k) {
+        char c = nv_line[b + k];
+        word[k] = c >= 'A' && c <= 'Z' ? (char)(c - 'A' + 'a') : c;
+    }
+    word[e - b] = '\0';
+    if (strcmp(word, "true") == 0) return 1;
+    if (strcmp(word, "false") == 0) return 0;
+    nv_invalid_input(at, "flag");
+}
+
+NV_API nv_text* nv_take_text(const nv_site* at) {
+    if (!nv_read_line()) nv_fail(at, "No input left for take");
+    return nv_make(nv_line, nv_line_size);
+}
+
+/* Called by a function on entry, with the site of the call */
+NV_API void nv_enter(const nv_site* at) {
+    if (nv_depth >= NV_MAX_CALL_DEPTH) nv_fail(at, "Too many nested calls (limit 10000)");
+    nv_depth++;
+}
+
+NV_API void nv_start(int argc, char** argv) {
+    int k;
+    for (k = 1; k < argc; ++k) {
+        if (strcmp(argv[k], "--diagnostics=json") == 0) nv_json = 1;
+        else if (strcmp(argv[k], "--diagnostics=text") == 0) nv_json = 0;
+    }
+    setvbuf(stdout, NULL, _IOFBF, 1 << 16);
+    nv_empty = nv_make("", 0);
+    nv_line_capacity = 256;
+    nv_line = (char*)nv_alloc(nv_line_capacity);
+    nv_last_flush = nv_now_ms();
+}
+
+NV_API void nv_finish(void) {
+    fflush(stdout);
+}
+
+#endif /* NOVA_RUNTIME_H */
@@ -0,0 +1,660 @@
+#include "optimizer.hpp"
+#include <algorithm>
+#include <cmath>
+#include <cstdio>
+#include <cstdlib>
+#include <string>
+
+static size_t count_nodes(const Node* n) {
+    switch (n->kind) {
+        case NodeKind::PROGRAM: return count_nodes(static_cast<const Program*>(n)->statements);
+        case NodeKind::VAR_DECL: return 1 + count_nodes(static_cast<const VarDecl*>(n)->expr);
+        case NodeKind::ASSIGN: return 1 + count_nodes(static_cast<const Assign*>(n)->expr);
+        case NodeKind::SHOW: return 1 + count_nodes(static_cast<const Show*>(n)->expr);
+        case NodeKind::WHEN: {
+            auto w = static_cast<const When*>(n);
+            size_t total = 1 + count_nodes(w->else_block);
+            for (const WhenCase& c : *w) total += count_nodes(c.cond) + count_nodes(c.body);
+            return total;
+        }
+        case NodeKind::LOOP: {
+            auto l = static_cast<const Loop*>(n);
+            return 1 + count_nodes(l->start_expr) + count_nodes(l->end_expr) + count_nodes(l->body);
+        }
+        case NodeKind::FUNC_DEF: {
+            auto f = static_cast<const FuncDef*>(n);
+            return 1 + count_nodes(f->body) + count_nodes(f->back_expr);
+        }
+        case NodeKind::FUNC_CALL: return 1 + count_nodes(static_cast<const FuncCall*>(n)->args);
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(n);
+            return 1 + count_nodes(b->left) + count_nodes(b->right);
+        }
+        case NodeKind::UNARY_OP: return 1 + count_nodes(static_cast<const UnaryOp*>(n)->expr);
+        default: return 1;
+    }
+}
+
+size_t count_nodes(const NodeList& stmts) {
+    size_t total = 0;
+    for (const Node* s : stmts) total += count_nodes(s);
+    return total;
+}
+
+static double literal_num(const Literal* l) {
+    if (l->lit == LitKind::BOOL) return l->value.view() == "true" ? 1.0 : 0.0;
+    return std::strtod(std::string(l->value.view()).c_str(), nullptr);
+}
+
+static const Literal* bool_literal(const Node* n) {
+    auto l = as<Literal>(n);
+    return l && l->lit == LitKind::BOOL ? l : nullptr;
+}
+
+static bool compare_holds(OpKind op, int c) {
+    switch (op) {
+        case OpKind::EQ: return c == 0;
+        case OpKind::NE: return c != 0;
+        case OpKind::GT: return c > 0;
+        case OpKind::LT: return c < 0;
+        case OpKind::GE: return c >= 0;
+        case OpKind::LE: return c <= 0;
+        default: return false;
+    }
+}
+
+// Cannot fail or change anything, so it may be evaluated any number of
+// times, or not at all
+static bool is_pure(const Node* n) {
+    switch (n->kind) {
+        case NodeKind::LITERAL:
+        case NodeKind::IDENTIFIER:
+            return true;
+        case NodeKind::UNARY_OP: return is_pure(static_cast<const UnaryOp*>(n)->expr);
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(n);
+            if (b->op == OpKind::DIV) {
+                auto d = as<Literal>(b->right);
+                if (!d || literal_num(d) == 0) return false;
+            }
+            return is_pure(b->left) && is_pure(b->right);
+        }
+        default:
+            return false;
+    }
+}
+
+static int param_index(const FuncDef* def, NameId id) {
+    for (uint32_t k = 0; k < def->param_count; ++k)
+        if (def->params[k] == id) return (int)k;
+    return -1;
+}
+
+// Nodes in an expression of literals, the function's parameters and
+// operators; 0 if it has anything else
+static size_t param_expr_size(const Node* n, const FuncDef* def) {
+    switch (n->kind) {
+        case NodeKind::LITERAL: return 1;
+        case NodeKind::IDENTIFIER:
+            return param_index(def, static_cast<const Identifier*>(n)->name) >= 0 ? 1 : 0;
+        case NodeKind::UNARY_OP: {
+            size_t e = param_expr_size(static_cast<const UnaryOp*>(n)->expr, def);
+            return e ? 1 + e : 0;
+        }
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(n);
+            size_t l = param_expr_size(b->left, def), r = param_expr_size(b->right, def);
+            return l && r ? 1 + l + r : 0;
+        }
+        default:
+            return 0;
+    }
+}
+
+static bool defines_function(const NodeList& stmts) {
+    for (const Node* s : stmts) {
+        switch (s->kind) {
+            case NodeKind::FUNC_DEF: return true;
+            case NodeKind::WHEN: {
+                auto w = static_cast<const When*>(s);
+                for (const WhenCase& c : *w)
+                    if (defines_function(c.body)) return true;
+                if (defines_function(w->else_block)) return true;
+                break;
+            }
+            case NodeKind::LOOP:
+                if (defines_function(static_cast<const Loop*>(s)->body)) return true;
+                break;
+            default:
+                break;
+        }
+    }
+    return false;
+}
+
+static bool declares_variable(const NodeList& stmts) {
+    for (const Node* s : stmts)
+        if (s->kind == NodeKind::VAR_DECL) return true;
+    return false;
+}
+
+OptReport Optimizer::run(Ast& a) {
+    ast = &a;
+    report = OptReport();
+    report.level = level;
+    report.nodes_before = count_nodes(a.root->statements);
+    if (level >= 2) {
+        functions.assign(a.names.size(), nullptr);
+        inlinable.assign(a.names.size(), false);
+        inline_block(a.root->statements);
+    }
+    if (level >= 1) {
+        propagating = level >= 2;
+        if (propagating) {
+            pinned.clear();
+            reset_scopes();
+            find_pinned(a.root->statements);
+        }
+        reset_scopes();
+        fold_block(a.root->statements);
+        dead_block(a.root->statements);
+    }
+    report.nodes_after = count_nodes(a.root->statements);
+    return report;
+}
+
+// Scopes, opened where the semantic analyzer opens them
+
+void Optimizer::reset_scopes() {
+    bindings.clear();
+    scope_marks.clear();
+    fn_level = 0;
+    visible.assign(ast->names.size(), -1);
+}
+
+void Optimizer::enter_scope() { scope_marks.push_back((uint32_t)bindings.size()); }
+
+void Optimizer::exit_scope() {
+    uint32_t mark = scope_marks.back();
+    scope_marks.pop_back();
+    while (bindings.size() > mark) {
+        visible[bindings.back().name] = bindings.back().shadowed;
+        bindings.pop_back();
+    }
+}
+
+void Optimizer::declare(NameId id, const VarDecl* decl, const Literal* value) {
+    bindings.push_back(Binding{id, decl, value, fn_level, scope_marks.empty(), visible[id]});
+    visible[id] = (int32_t)bindings.size() - 1;
+}
+
+const Optimizer::Binding* Optimizer::lookup(NameId id) const {
+    int32_t b = visible[id];
+    return b >= 0 ? &bindings[b] : nullptr;
+}
+
+// New nodes
+
+Literal* Optimizer::literal(const Node* at, LitKind kind, StrRef value) {
+    Literal* l = ast->make<Literal>(at->line, at->col);
+    l->lit = kind;
+    l->value = value;
+    return l;
+}
+
+Node* Optimizer::num(double v, const Node* at) {
+    // 17 digits read back as the same double
+    char buf[32];
+    std::snprintf(buf, sizeof buf, "%.17g", v);
+    return literal(at, LitKind::NUM, ast->text(buf));
+}
+
+Node* Optimizer::boolean(bool v, const Node* at) {
+    return literal(at, LitKind::BOOL, ast->text(v ? "true" : "false"));
+}
+
+Node* Optimizer::copy_expr(const Node* n, const FuncDef* def, const NodeList* args) {
+    switch (n->kind) {
+        case NodeKind::LITERAL: {
+            auto l = static_cast<const Literal*>(n);
+            return literal(l, l->lit, l->value);
+        }
+        case NodeKind::IDENTIFIER: {
+            NameId name = static_cast<const Identifier*>(n)->name;
+            if (def) return copy_expr(args->items[param_index(def, name)]);
+            Identifier* c = ast->make<Identifier>(n->line, n->col);
+            c->name = name;
+            return c;
+        }
+        case NodeKind::UNARY_OP: {
+            auto u = static_cast<const UnaryOp*>(n);
+            UnaryOp* c = ast->make<UnaryOp>(n->line, n->col);
+            c->op = u->op;
+            c->expr = copy_expr(u->expr, def, args);
+            return c;
+        }
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<const BinOp*>(n);
+            BinOp* c = ast->make<BinOp>(n->line, n->col);
+            c->op = b->op;
+            c->left = copy_expr(b->left, def, args);
+            c->right = copy_expr(b->right, def, args);
+            return c;
+        }
+        default:
+            // Callers only copy pure expressions
+            return nullptr;
+    }
+}
+
+// inline
+
+void Optimizer::inline_block(NodeList& stmts) {
+    for (Node* s : stmts) inline_statement(s);
+}
+
+void Optimizer::inline_statement(Node* node) {
+    switch (node->kind) {
+        case NodeKind::VAR_DECL: {
+            auto d = static_cast<VarDecl*>(node);
+            d->expr = inline_expr(d->expr);
+            return;
+        }
+        case NodeKind::ASSIGN: {
+            auto a = static_cast<Assign*>(node);
+            a->expr = inline_expr(a->expr);
+            return;
+        }
+        case NodeKind::SHOW: {
+            auto s = static_cast<Show*>(node);
+            s->expr = inline_expr(s->expr);
+            return;
+        }
+        case NodeKind::WHEN: {
+            auto w = static_cast<When*>(node);
+            for (WhenCase& c : *w) {
+                c.cond = inline_expr(c.cond);
+                inline_block(c.body);
+            }
+            inline_block(w->else_block);
+            return;
+        }
+        case NodeKind::LOOP: {
+            auto l = static_cast<Loop*>(node);
+            l->start_expr = inline_expr(l->start_expr);
+            l->end_expr = inline_expr(l->end_expr);
+            inline_block(l->body);
+            return;
+        }
+        case NodeKind::FUNC_DEF: {
+            // The body first: calls inlined into it can make it trivial
+            auto f = static_cast<FuncDef*>(node);
+            inline_block(f->body);
+            f->back_expr = inline_expr(f->back_expr);
+            if (!functions[f->name]) {
+                functions[f->name] = f;
+                size_t size = param_expr_size(f->back_expr, f);
+                inlinable[f->name] = f->body.empty() && size > 0 && size <= MAX_INLINE_NODES;
+            }
+            return;
+        }
+        case NodeKind::FUNC_CALL:
+            // The call itself stays: its value is dropped, and a statement
+            // cannot be an expression
+            for (Node*& a : static_cast<FuncCall*>(node)->args) a = inline_expr(a);
+            return;
+        default:
+            return;
+    }
+}
+
+Node* Optimizer::inline_expr(Node* node) {
+    switch (node->kind) {
+        case NodeKind::FUNC_CALL: {
+            auto c = static_cast<FuncCall*>(node);
+            bool pure = true;
+            for (Node*& a : c->args) {
+                a = inline_expr(a);
+                pure = pure && is_pure(a);
+            }
+            // Arguments are evaluated before the body runs; copies of pure
+            // ones can be evaluated where the parameters are used instead
+            if (!pure || !inlinable[c->name]) return node;
+            report.inlined_calls++;
+            const FuncDef* def = functions[c->name];
+            return copy_expr(def->back_expr, def, &c->args);
+        }
+        case NodeKind::UNARY_OP: {
+            auto u = static_cast<UnaryOp*>(node);
+            u->expr = inline_expr(u->expr);
+            return node;
+        }
+        case NodeKind::BIN_OP: {
+            auto b = static_cast<BinOp*>(node);
+            b->left = inline_expr(b->left);
+            b->right = inline_expr(b->right);
+            return node;
+        }
+        default:
+            return node;
+    }
+}
+
+// propagate: variables whose value is the same at every use
+
+void Optimizer::find_pinned(const NodeList& stmts) {
+    for (const Node* s : stmts) find_pinned(s);
+}
+
+void Optimizer::find_pinned(const Node* node) {
+    switch (node->kind) {
+        case NodeKind::VAR_DECL: {
+            auto d = static_cast<const VarDecl*>(node);
+            find_pinned_expr(d->expr);
+            declare(d->name, d);
+            return;
+        }
+        case NodeKind::ASSIGN: {
+            auto a = static_cast<const Assign*>(node);
+            const Binding* b = lookup(a->name);
+            if (b && b->decl) pinned.insert(b->decl);
+            find_pinned_expr(a->expr);
+            return;
+        }
+        case NodeKind::TAKE: {
+            const Binding* b = lookup(static_cast<const Take*>(node)->name);
+            if (b && b->decl) pinned.insert(b->decl);
+            return;
+        }
+        case NodeKind::SHOW: find_pinned_expr(static_cast<const Show*>(node)->expr); return;
+        case NodeKind::WHEN: {
+            auto w = static_cast<const When*>(node);
+            for (const WhenCase& c : *w) {
+                find_pinned_expr(c.cond);
+                enter_scope();
+                find_pinned(c.body);
+                exit_scope();
+            }
+            enter_scope();
+            find_pinned(w->else_block);
+            exit_scope();
+            return;
+        }
+        case NodeKind::LOOP: {
+            auto l = static_cast<const Loop*>(node);
+            find_pinned_expr(l->start_expr);
+            find_pinned_expr(l->end_expr);
+            enter_scope();
+            declare(l->var, nullptr);
+            find_pinned(l->body);
+            exit_scope();
+            return;
+        }
+        case NodeKind::FUNC_DEF: {
+            auto f = static_cast<const FuncDef*>(node);
+            enter_scope();
+            fn_level++;
+            for (uint32_t k = 0; k < f->param_count; ++k) declare(f->params[k], nullptr);
+            find_pinned(f->body);
+            find_pinned_expr(f->back_expr);
+            fn_level--;
+            exit_scope();
+            return;
+        }
+        case NodeKind::FUNC_CALL: find_pinned_expr(node); return;
+        default:
+            return;
+    }
+}
+
+void Optimizer::find_pinned_expr(const Node* node) {
+    switch (node->kind) {
+        case NodeKind::IDENTIFIER: {
+            // Top-level statements always run before any function that can
+            // see them is called; other declarations may not have run yet
+            const Binding* b = lookup(static_cast<const Identifier*>(node)->name);
+            if (b && b->decl && b->level != fn_level && !b->global) pinned.insert(b->decl);
+            return;
+        }
+        case NodeKind::FUNC_CALL:
+            for (const Node* a : static_cast<const FuncCall*>(node)->args) find_pinned_expr(a);
+            return;
+        case NodeKind::UNARY_OP: find_pinned_expr(static_cast<const UnaryOp*>(node)->expr); return;
+        case NodeKind::BIN_OP:
+            find_pinned_expr(static_cast<const BinOp*>(node)->left);
+            find_pinned_expr(static_cast<const BinOp*>(node)->right);
+            return;
+        default:
+            return;
+    }
+}
+
+// fold, and propagate while folding so that constants flow on
+
+void Optimizer::fold_block(NodeList& stmts) {
+    uint32_t kept = 0;
+    for (uint32_t k = 0; k < stmts.size; ++k) {
+        Node* s = stmts.items[k];
+        if (fold_statement(s)) stmts.items[kept++] = s;
+    }
+    stmts.size = kept;
+}
+
+// false when the statement is no longer needed
+bool Optimizer::fold_statement(Node* node) {
+    switch (node->kind) {
+        case NodeKind::VAR_DECL: {
+            auto d = static_cast<VarDecl*>(node);
+            d->expr = fold(d->expr);
+            // Every use is in scope after the declaration and gets the value
+            const Literal* value = propagating && !pinned.count(d) ? as<Literal>(d->expr) : nullptr;
+            declare(d->name, d, value);
+            if (!value) return true;
+            report.removed_decls++;
+            return false;
+        }
+        case NodeKind::ASSIGN: {
+            auto a = static_cast<Assign*>(node);
+            a->expr = fold(a->expr);
+            return true;
+        }
+        case NodeKind::SHOW: {
+            auto s = static_cast<Show*>(node);
+            s->expr = fold(s->expr);
+            return true;
+        }
+        case NodeKind::WHEN: {
+            auto w = static_cast<When*>(node);
+            for (WhenCase& c : *w) {
+                c.cond = fold(c.cond);
+                enter_scope();
+                fold_block(c.body);
+                exit_scope();
+            }
+            enter_scope();
+            fold_block(w->else_block);
+            exit_scope();
+            return true;
+        }
+        case NodeKind::LOOP: {
+            auto l = static_cast<Loop*>(node);
+            l->start_expr = fold(l->start_expr);
+            l->end_expr = fold(l->end_expr);
+            enter_scope();
+            declare(l->var, nullptr);
+            fold_block(l->body);
+            exit_scope();
+            return true;
+        }
+        case NodeKind::FUNC_DEF: {
+            auto f = static_cast<FuncDef*>(node);
+            enter_scope();
+            for (uint32_t k = 0; k < f->param_count; ++k) declare(f->params[k], nullptr);
+            fold_block(f->body);
+            f->back_expr = fold(f->back_expr);
+            exit_scope();
+            return true;
+        }
+        case NodeKind::FUNC_CALL:
+            for (Node*& a : static_cast<FuncCall*>(node)->args) a = fold(a);
+            return true;
+        default:
+            return true;
+    }
+}
+
+Node* Optimizer::fold(Node* node) {
+    switch (node->kind) {
+        case NodeKind::IDENTIFIER: {
+            if (!propagating) return node;
+            const Binding* b = lookup(static_cast<const Identifier*>(node)->name);
+            if (!b || !b->value) return node;
+            report.propagated_uses++;
+            return literal(node, b->value->lit, b->value->value);
+        }
+        case NodeKind::FUNC_CALL:
+            for (Node*& a : static_cast<FuncCall*>(node)->args) a = fold(a);
+            return node;
+        case NodeKind::UNARY_OP: {
+            auto u = static_cast<UnaryOp*>(node);
+            u->expr = fold(u->expr);
+            auto l = as<Literal>(u->expr);
+            if (!l || !std::isfinite(literal_num(l))) return node;
+            report.folded_exprs++;
+            return num(-literal_num(l), node);
+        }
+        case NodeKind::BIN_OP: return fold_binop(static_cast<BinOp*>(node));
+        default:
+            return node;
+    }
+}
+
+Node* Optimizer::fold_binop(BinOp* node) {
+    node->left = fold(node->left);
+    node->right = fold(node->right);
+    auto l = as<Literal>(node->left);
+    auto r = as<Literal>(node->right);
+    if (!l || !r) return node;
+    if (l->lit == LitKind::TEXT) {
+        std::string_view a = l->value.view(), b = r->value.view();
+        if (node->op == OpKind::ADD) {
+            if (a.size() + b.size() > MAX_FOLDED_TEXT) return node;
+            report.folded_exprs++;
+            return literal(node, LitKind::TEXT, ast->text(std::string(a) + std::string(b)));
+        }
+        // Byte order, as the VM compares
+        report.folded_exprs++;
+        return boolean(compare_holds(node->op, a.compare(b)), node);
+    }
+    double a = literal_num(l), b = literal_num(r), v;
+    switch (node->op) {
+        case OpKind::ADD: v = a + b; break;
+        case OpKind::SUB: v = a - b; break;
+        case OpKind::MUL: v = a * b; break;
+        case OpKind::DIV:
+            if (b == 0) return node;   // reported when it runs
+            v = a / b;
+            break;
+        default:
+            report.folded_exprs++;
+            return boolean(compare_holds(node->op, a < b ? -1 : a > b ? 1 : 0), node);
+    }
+    if (!std::isfinite(v)) return node;
+    report.folded_exprs++;
+    return num(v, node);
+}
+
+// dead
+
+void Optimizer::dead_block(NodeList& stmts) {
+    std::vector<Node*> out;
+    out.reserve(stmts.size);
+    for (Node* s : stmts) dead_statement(s, out);
+    if (out.size() == stmts.size && std::equal(out.begin(), out.end(), stmts.begin())) return;
+    stmts = ast->list(out.data(), out.size());
+}
+
+void Optimizer::dead_statement(Node* node, std::vector<Node*>& out) {
+    switch (node->kind) {
+        case NodeKind::WHEN: {
+            auto w = static_cast<When*>(node);
+            for (WhenCase& c : *w) dead_block(c.body);
+            dead_block(w->else_block);
+            // Arms after one whose condition is true can never run
+            std::vector<WhenCase> kept;
+            bool settled = false;
+            for (const WhenCase& c : *w) {
+                auto cond = bool_literal(c.cond);
+                bool never = settled || (cond && cond->value.view() == "false");
+                if (never && !defines_function(c.body)) {
+                    report.removed_arms++;
+                    continue;
+                }
+                kept.push_back(c);
+                if (cond && cond->value.view() == "true") settled = true;
+            }
+            if (settled && !w->else_block.empty() && !defines_function(w->else_block)) {
+                w->else_block = NodeList();
+                report.removed_arms++;
+            }
+            // A lone arm that always runs is a plain block
+            if (kept.size() == 1 && w->else_block.empty()) {
+                auto cond = bool_literal(kept[0].cond);
+                if (cond && cond->value.view() == "true") {
+                    w->else_block = kept[0].body;
+                    kept.clear();
+                }
+            }
+            if (kept.size() != w->case_count) {
+                w->cases = ast->array(kept.data(), kept.size());
+                w->case_count = (uint32_t)kept.size();
+            }
+            if (w->case_count > 0) {
+                out.push_back(w);
+            } else if (declares_variable(w->else_block)) {
+                // Still needs its scope; the code generator emits no test
+                out.push_back(w);
+            } else {
+                out.insert(out.end(), w->else_block.begin(), w->else_block.end());
+            }
+            return;
+        }
+        case NodeKind::LOOP: {
+            auto l = static_cast<Loop*>(node);
+            dead_block(l->body);
+            auto a = as<Literal>(l->start_expr);
+            auto b = as<Literal>(l->end_expr);
+            if (a && b && !(literal_num(a) <= literal_num(b)) && !defines_function(l->body)) {
+                report.removed_loops++;
+                return;
+            }
+            out.push_back(node);
+            return;
+        }
+        case NodeKind::FUNC_DEF:
+            dead_block(static_cast<FuncDef*>(node)->body);
+            out.push_back(node);
+            return;
+        default:
+            out.push_back(node);
+            return;
+    }
+}
+
+static std::string counted(size_t n, const char* one, const char* many) {
+    return std::to_string(n) + " " + (n == 1 ? one : many);
+}
+
+void print_opt_report(std::ostream& os, const OptReport& r) {
+    if (r.level >= 2) {
+        os << "inline: " << counted(r.inlined_calls, "call", "calls") << " inlined\n";
+        os << "propagate: " << counted(r.propagated_uses, "use", "uses") << " replaced, "
+           << counted(r.removed_decls, "declaration", "declarations") << " removed\n";
+    }
+    if (r.level >= 1) {
+        os << "fold: " << counted(r.folded_exprs, "expression", "expressions") << " folded\n";
+        os << "dead: " << counted(r.removed_arms, "when arm", "when arms") << " and "
+           << counted(r.removed_loops, "loop", "loops") << " removed\n";
+    }
+    os << "nodes: " << r.nodes_before << " -> " << r.nodes_after << "\n";
+}
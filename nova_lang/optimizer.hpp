@@ -0,0 +1,110 @@
+#ifndef NOVA_OPTIMIZER_HPP
+#define NOVA_OPTIMIZER_HPP
+
+#include <cstddef>
+#include <cstdint>
+#include <ostream>
+#include <unordered_set>
+#include <vector>
+#include "ast.hpp"
+
+// Rewrites a checked AST in place before code generation. The passes run
+// in this order, each from the -O level shown:
+//   inline     (2) calls of a function whose body is only `back` of an
+//                  expression over its parameters, with side-effect-free
+//                  arguments
+//   propagate  (2) uses of a variable that is never assigned or taken and
+//                  starts out as a literal; its declaration goes away
+//   fold       (1) num, text and flag operators over literals
+//   dead       (1) when arms that can never run and loops whose literal
+//                  bounds give no iterations
+// A pass never changes what the program shows or where it fails: a
+// division by zero is left for the VM, and so is any num result that is
+// not finite. Dead code that defines a function is kept, since functions
+// are visible from the point of definition to the end of the program.
+
+constexpr int MAX_OPT_LEVEL = 2;
+
+// What each pass did, for --emit=passes
+struct OptReport {
+    int level = 0;
+    uint32_t inlined_calls = 0;
+    uint32_t propagated_uses = 0;
+    uint32_t removed_decls = 0;
+    uint32_t folded_exprs = 0;
+    uint32_t removed_arms = 0;
+    uint32_t removed_loops = 0;
+    size_t nodes_before = 0;
+    size_t nodes_after = 0;
+};
+
+class Optimizer {
+private:
+    struct Binding {
+        NameId name;
+        const VarDecl* decl;    // nullptr for parameters and loop variables
+        const Literal* value;   // the constant it holds, if propagated
+        uint32_t level;         // function nesting of the declaration
+        bool global;            // declared at the top level of the program
+        int32_t shadowed;
+    };
+    Ast* ast = nullptr;
+    int level;
+    OptReport report;
+    std::vector<Binding> bindings;
+    std::vector<int32_t> visible;           // NameId -> innermost binding, or -1
+    std::vector<uint32_t> scope_marks;
+    // Declarations whose value is not known at every use: assigned or
+    // taken somewhere, or used by a function that can be called before the
+    // declaration runs (a function defined in a when arm or loop body
+    // outlives it)
+    std::unordered_set<const VarDecl*> pinned;
+    uint32_t fn_level = 0;
+    std::vector<const FuncDef*> functions;  // NameId -> first definition
+    std::vector<bool> inlinable;            // NameId -> its first definition can be inlined
+    bool propagating = false;
+
+    void reset_scopes();
+    void enter_scope();
+    void exit_scope();
+    void declare(NameId id, const VarDecl* decl, const Literal* value = nullptr);
+    const Binding* lookup(NameId id) const;
+
+    Literal* literal(const Node* at, LitKind kind, StrRef value);
+    Node* num(double v, const Node* at);
+    Node* boolean(bool v, const Node* at);
+    // Copies a literal/identifier/operator expression; with def, its
+    // parameters are replaced by copies of args
+    Node* copy_expr(const Node* n, const FuncDef* def = nullptr, const NodeList* args = nullptr);
+
+    void inline_block(NodeList& stmts);
+    void inline_statement(Node* node);
+    Node* inline_expr(Node* node);
+
+    void find_pinned(const NodeList& stmts);
+    void find_pinned(const Node* node);
+    void find_pinned_expr(const Node* node);
+    void fold_block(NodeList& stmts);
+    bool fold_statement(Node* node);
+    Node* fold(Node* node);
+    Node* fold_binop(BinOp* node);
+
+    void dead_block(NodeList& stmts);
+    void dead_statement(Node* node, std::vector<Node*>& out);
+public:
+    // Texts longer than this are built at run time instead of folded
+    static constexpr size_t MAX_FOLDED_TEXT = 1024;
+    // Largest `back` expression that is inlined, in nodes
+    static constexpr size_t MAX_INLINE_NODES = 16;
+
+    explicit Optimizer(int opt_level) : level(opt_level) {}
+    OptReport run(Ast& ast);
+};
+
+// Nodes in a statement list, expressions included
+size_t count_nodes(const NodeList& stmts);
+
+// One line per pass that ran at the report's level, then the node counts
+void print_opt_report(std::ostream& os, const OptReport& r);
+
+#endif // NOVA_OPTIMIZER_HPP
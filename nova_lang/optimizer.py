@@ -0,0 +1,515 @@
+"""
+AST optimizer for checked programs (mirrors optimizer.hpp)
+
+Rewrites the tree in place before code generation. The passes run in this
+order, each from the -O level shown:
+
+    inline     (2) calls of a function whose body is only `back` of an
+                   expression over its parameters, with side-effect-free
+                   arguments
+    propagate  (2) uses of a variable that is never assigned or taken and
+                   starts out as a literal; its declaration goes away
+    fold       (1) num, text and flag operators over literals
+    dead       (1) when arms that can never run and loops whose literal
+                   bounds give no iterations
+
+A pass never changes what the program shows or where it fails: a division
+by zero is left for the VM, and so is any num result that is not finite.
+Dead code that defines a function is kept, since functions are visible
+from the point of definition to the end of the program.
+"""
+
+import math
+
+from .ast_nodes import (
+    VarDecl, Assign, Show, Take, When, Loop, FuncDef, FuncCall, BinOp,
+    UnaryOp, Literal, Identifier
+)
+from .token import TokenType
+
+MAX_OPT_LEVEL = 2
+# Texts longer than this (in UTF-8 bytes) are built at run time instead
+MAX_FOLDED_TEXT = 1024
+# Largest `back` expression that is inlined, in nodes
+MAX_INLINE_NODES = 16
+
+_ARITHMETIC = {
+    TokenType.PLUS: lambda a, b: a + b,
+    TokenType.MINUS: lambda a, b: a - b,
+    TokenType.STAR: lambda a, b: a * b,
+    TokenType.SLASH: lambda a, b: a / b,
+}
+_COMPARISON = {
+    TokenType.EQEQ: lambda a, b: a == b, TokenType.NOTEQ: lambda a, b: a != b,
+    TokenType.GT: lambda a, b: a > b, TokenType.LT: lambda a, b: a < b,
+    TokenType.GTEQ: lambda a, b: a >= b, TokenType.LTEQ: lambda a, b: a <= b,
+}
+
+
+class OptReport:
+    """What each pass did, for --emit=passes"""
+
+    __slots__ = (
+        'level', 'inlined_calls', 'propagated_uses', 'removed_decls',
+        'folded_exprs', 'removed_arms', 'removed_loops', 'nodes_before',
+        'nodes_after'
+    )
+
+    def __init__(self, level=0):
+        self.level = level
+        self.inlined_calls = 0
+        self.propagated_uses = 0
+        self.removed_decls = 0
+        self.folded_exprs = 0
+        self.removed_arms = 0
+        self.removed_loops = 0
+        self.nodes_before = 0
+        self.nodes_after = 0
+
+
+def count_nodes(stmts):
+    """Nodes in a statement list, expressions included"""
+    return sum(_count(s) for s in stmts)
+
+
+def _count(n):
+    cls = type(n)
+    if cls in (VarDecl, Assign, Show):
+        return 1 + _count(n.expr)
+    if cls is When:
+        return 1 + count_nodes(n.else_block) + sum(
+            _count(cond) + count_nodes(body) for cond, body in n.cases
+        )
+    if cls is Loop:
+        return 1 + _count(n.start_expr) + _count(n.end_expr) + count_nodes(n.body)
+    if cls is FuncDef:
+        return 1 + count_nodes(n.body) + _count(n.back_expr)
+    if cls is FuncCall:
+        return 1 + count_nodes(n.args)
+    if cls is BinOp:
+        return 1 + _count(n.left) + _count(n.right)
+    if cls is UnaryOp:
+        return 1 + _count(n.expr)
+    return 1
+
+
+def _literal_num(lit):
+    if lit.lit_type == "bool":
+        return 1.0 if lit.value == "true" else 0.0
+    return float(lit.value)
+
+
+def _is_bool(n, value):
+    return type(n) is Literal and n.lit_type == "bool" and n.value == value
+
+
+def _is_pure(n):
+    """Cannot fail or change anything, so it may be evaluated any number
+    of times, or not at all"""
+    cls = type(n)
+    if cls is Literal or cls is Identifier:
+        return True
+    if cls is UnaryOp:
+        return _is_pure(n.expr)
+    if cls is BinOp:
+        if n.op_type == TokenType.SLASH:
+            if type(n.right) is not Literal or _literal_num(n.right) == 0:
+                return False
+        return _is_pure(n.left) and _is_pure(n.right)
+    return False
+
+
+def _param_expr_size(n, params):
+    """Nodes in an expression of literals, the parameters and operators; 0
+    if it has anything else"""
+    cls = type(n)
+    if cls is Literal:
+        return 1
+    if cls is Identifier:
+        return 1 if n.name in params else 0
+    if cls is UnaryOp:
+        e = _param_expr_size(n.expr, params)
+        return 1 + e if e else 0
+    if cls is BinOp:
+        left = _param_expr_size(n.left, params)
+        right = _param_expr_size(n.right, params)
+        return 1 + left + right if left and right else 0
+    return 0
+
+
+def _defines_function(stmts):
+    for s in stmts:
+        cls = type(s)
+        if cls is FuncDef:
+            return True
+        if cls is When:
+            if any(_defines_function(body) for _, body in s.cases):
+                return True
+            if _defines_function(s.else_block):
+                return True
+        elif cls is Loop and _defines_function(s.body):
+            return True
+    return False
+
+
+class _Binding:
+    __slots__ = ('decl', 'value', 'level', 'top')
+
+    def __init__(self, decl, value=None, level=0, top=False):
+        # decl is None for parameters and loop variables
+        self.decl = decl
+        # The constant it holds, if propagated
+        self.value = value
+        # Function nesting of the declaration, and whether it is at the
+        # top level of the program
+        self.level = level
+        self.top = top
+
+
+class Optimizer:
+    """Runs the passes of one -O level over a checked Program"""
+
+    def __init__(self, level):
+        self.level = level
+
+    def run(self, program):
+        report = self.report = OptReport(self.level)
+        report.nodes_before = count_nodes(program.statements)
+        if self.level >= 2:
+            self.functions = {}
+            self.inlinable = set()
+            self.inline_block(program.statements)
+        if self.level >= 1:
+            self.propagating = self.level >= 2
+            if self.propagating:
+                self.pinned = set()
+                self.scopes = [{}]
+                self.fn_level = 0
+                self.find_pinned(program.statements)
+            self.scopes = [{}]
+            self.fold_block(program.statements)
+            self.dead_block(program.statements)
+        report.nodes_after = count_nodes(program.statements)
+        return report
+
+    # Scopes, opened where the semantic analyzer opens them
+    def lookup(self, name):
+        for scope in reversed(self.scopes):
+            b = scope.get(name)
+            if b is not None:
+                return b
+        return None
+
+    def copy_expr(self, n, def_=None, args=None):
+        """Copies a literal/identifier/operator expression; with def_, its
+        parameters are replaced by copies of args"""
+        cls = type(n)
+        if cls is Literal:
+            return Literal(n.value, n.lit_type, n.line, n.col)
+        if cls is Identifier:
+            if def_ is not None:
+                return self.copy_expr(args[def_.params.index(n.name)])
+            return Identifier(n.name, n.line, n.col)
+        if cls is UnaryOp:
+            return UnaryOp(n.op_type, n.op_value,
+                           self.copy_expr(n.expr, def_, args), n.line, n.col)
+        return BinOp(self.copy_expr(n.left, def_, args), n.op_type,
+                     n.op_value, self.copy_expr(n.right, def_, args),
+                     n.line, n.col)
+
+    # inline
+    def inline_block(self, stmts):
+        for s in stmts:
+            self.inline_statement(s)
+
+    def inline_statement(self, node):
+        cls = type(node)
+        if cls in (VarDecl, Assign, Show):
+            node.expr = self.inline_expr(node.expr)
+        elif cls is When:
+            cases = []
+            for cond, body in node.cases:
+                cases.append((self.inline_expr(cond), body))
+                self.inline_block(body)
+            node.cases = cases
+            self.inline_block(node.else_block)
+        elif cls is Loop:
+            node.start_expr = self.inline_expr(node.start_expr)
+            node.end_expr = self.inline_expr(node.end_expr)
+            self.inline_block(node.body)
+        elif cls is FuncDef:
+            # The body first: calls inlined into it can make it trivial
+            self.inline_block(node.body)
+            node.back_expr = self.inline_expr(node.back_expr)
+            if node.name not in self.functions:
+                self.functions[node.name] = node
+                size = _param_expr_size(node.back_expr, node.params)
+                if not node.body and 0 < size <= MAX_INLINE_NODES:
+                    self.inlinable.add(node.name)
+        elif cls is FuncCall:
+            # The call itself stays: its value is dropped, and a statement
+            # cannot be an expression
+            node.args = [self.inline_expr(a) for a in node.args]
+
+    def inline_expr(self, node):
+        cls = type(node)
+        if cls is FuncCall:
+            node.args = [self.inline_expr(a) for a in node.args]
+            # Arguments are evaluated before the body runs; copies of pure
+            # ones can be evaluated where the parameters are used instead
+            if node.name not in self.inlinable or not all(map(_is_pure, node.args)):
+                return node
+            self.report.inlined_calls += 1
+            def_ = self.functions[node.name]
+            return self.copy_expr(def_.back_expr, def_, node.args)
+        if cls is UnaryOp:
+            node.expr = self.inline_expr(node.expr)
+        elif cls is BinOp:
+            node.left = self.inline_expr(node.left)
+            node.right = self.inline_expr(node.right)
+        return node
+
+    # propagate: variables whose value is the same at every use
+    def find_pinned(self, stmts):
+        """Collects the declarations whose value is not known at every use:
+        assigned or taken somewhere, or used by a function that can be
+        called before the declaration runs (a function defined in a when
+        arm or loop body outlives it)"""
+        for node in stmts:
+            cls = type(node)
+            if cls is VarDecl:
+                self.find_pinned_expr(node.expr)
+                self.scopes[-1][node.name] = _Binding(
+                    node, level=self.fn_level, top=len(self.scopes) == 1
+                )
+            elif cls is Assign or cls is Take:
+                b = self.lookup(node.name)
+                if b is not None and b.decl is not None:
+                    self.pinned.add(b.decl)
+                if cls is Assign:
+                    self.find_pinned_expr(node.expr)
+            elif cls is Show or cls is FuncCall:
+                self.find_pinned_expr(node.expr if cls is Show else node)
+            elif cls is When:
+                for cond, body in node.cases:
+                    self.find_pinned_expr(cond)
+                    self.scoped(self.find_pinned, body)
+                self.scoped(self.find_pinned, node.else_block)
+            elif cls is Loop:
+                self.find_pinned_expr(node.start_expr)
+                self.find_pinned_expr(node.end_expr)
+                self.scopes.append({node.var: _Binding(None)})
+                self.find_pinned(node.body)
+                self.scopes.pop()
+            elif cls is FuncDef:
+                self.scopes.append({p: _Binding(None) for p in node.params})
+                self.fn_level += 1
+                self.find_pinned(node.body)
+                self.find_pinned_expr(node.back_expr)
+                self.fn_level -= 1
+                self.scopes.pop()
+
+    def find_pinned_expr(self, node):
+        cls = type(node)
+        if cls is Identifier:
+            # Top-level statements always run before any function that can
+            # see them is called; other declarations may not have run yet
+            b = self.lookup(node.name)
+            if (b is not None and b.decl is not None
+                    and b.level != self.fn_level and not b.top):
+                self.pinned.add(b.decl)
+        elif cls is FuncCall:
+            for a in node.args:
+                self.find_pinned_expr(a)
+        elif cls is UnaryOp:
+            self.find_pinned_expr(node.expr)
+        elif cls is BinOp:
+            self.find_pinned_expr(node.left)
+            self.find_pinned_expr(node.right)
+
+    def scoped(self, walk, stmts):
+        self.scopes.append({})
+        walk(stmts)
+        self.scopes.pop()
+
+    # fold, and propagate while folding so that constants flow on
+    def fold_block(self, stmts):
+        stmts[:] = [s for s in stmts if self.fold_statement(s)]
+
+    def fold_statement(self, node):
+        """False when the statement is no longer needed"""
+        cls = type(node)
+        if cls is VarDecl:
+            node.expr = self.fold(node.expr)
+            # Every use is in scope after the declaration and gets the value
+            value = None
+            if (self.propagating and node not in self.pinned
+                    and type(node.expr) is Literal):
+                value = node.expr
+            self.scopes[-1][node.name] = _Binding(node, value)
+            if value is None:
+                return True
+            self.report.removed_decls += 1
+            return False
+        if cls is Assign or cls is Show:
+            node.expr = self.fold(node.expr)
+        elif cls is When:
+            cases = []
+            for cond, body in node.cases:
+                cases.append((self.fold(cond), body))
+                self.scoped(self.fold_block, body)
+            node.cases = cases
+            self.scoped(self.fold_block, node.else_block)
+        elif cls is Loop:
+            node.start_expr = self.fold(node.start_expr)
+            node.end_expr = self.fold(node.end_expr)
+            self.scopes.append({node.var: _Binding(None)})
+            self.fold_block(node.body)
+            self.scopes.pop()
+        elif cls is FuncDef:
+            self.scopes.append({p: _Binding(None) for p in node.params})
+            self.fold_block(node.body)
+            node.back_expr = self.fold(node.back_expr)
+            self.scopes.pop()
+        elif cls is FuncCall:
+            node.args = [self.fold(a) for a in node.args]
+        return True
+
+    def fold(self, node):
+        cls = type(node)
+        if cls is Identifier:
+            if not self.propagating:
+                return node
+            b = self.lookup(node.name)
+            if b is None or b.value is None:
+                return node
+            self.report.propagated_uses += 1
+            return Literal(b.value.value, b.value.lit_type, node.line, node.col)
+        if cls is FuncCall:
+            node.args = [self.fold(a) for a in node.args]
+            return node
+        if cls is UnaryOp:
+            node.expr = self.fold(node.expr)
+            if type(node.expr) is not Literal:
+                return node
+            v = _literal_num(node.expr)
+            if not math.isfinite(v):
+                return node
+            self.report.folded_exprs += 1
+            return self.num(-v, node)
+        if cls is BinOp:
+            return self.fold_binop(node)
+        return node
+
+    def fold_binop(self, node):
+        node.left = self.fold(node.left)
+        node.right = self.fold(node.right)
+        left, right = node.left, node.right
+        if type(left) is not Literal or type(right) is not Literal:
+            return node
+        arith = _ARITHMETIC.get(node.op_type)
+        if left.lit_type == "text":
+            a, b = left.value, right.value
+            if arith is not None:
+                size = (len(a.encode("utf-8", "surrogateescape"))
+                        + len(b.encode("utf-8", "surrogateescape")))
+                if size > MAX_FOLDED_TEXT:
+                    return node
+                self.report.folded_exprs += 1
+                return Literal(a + b, "text", node.line, node.col)
+            self.report.folded_exprs += 1
+            return self.boolean(_COMPARISON[node.op_type](a, b), node)
+        a, b = _literal_num(left), _literal_num(right)
+        if arith is None:
+            self.report.folded_exprs += 1
+            return self.boolean(_COMPARISON[node.op_type](a, b), node)
+        if node.op_type == TokenType.SLASH and b == 0:
+            return node     # reported when it runs
+        v = arith(a, b)
+        if not math.isfinite(v):
+            return node
+        self.report.folded_exprs += 1
+        return self.num(v, node)
+
+    @staticmethod
+    def num(v, at):
+        # 17 digits read back as the same float
+        return Literal("%.17g" % v, "num", at.line, at.col)
+
+    @staticmethod
+    def boolean(v, at):
+        return Literal("true" if v else "false", "bool", at.line, at.col)
+
+    # dead
+    def dead_block(self, stmts):
+        out = []
+        for s in stmts:
+            self.dead_statement(s, out)
+        stmts[:] = out
+
+    def dead_statement(self, node, out):
+        cls = type(node)
+        if cls is When:
+            for _, body in node.cases:
+                self.dead_block(body)
+            self.dead_block(node.else_block)
+            # Arms after one whose condition is true can never run
+            kept = []
+            settled = False
+            for cond, body in node.cases:
+                never = settled or _is_bool(cond, "false")
+                if never and not _defines_function(body):
+                    self.report.removed_arms += 1
+                    continue
+                kept.append((cond, body))
+                if _is_bool(cond, "true"):
+                    settled = True
+            if settled and node.else_block and not _defines_function(node.else_block):
+                node.else_block = []
+                self.report.removed_arms += 1
+            # A lone arm that always runs is a plain block
+            if len(kept) == 1 and not node.else_block and _is_bool(kept[0][0], "true"):
+                node.else_block = kept[0][1]
+                kept = []
+            node.cases = kept
+            if kept or any(type(s) is VarDecl for s in node.else_block):
+                # A case-less when still gives its block a scope; the code
+                # generator emits no test for it
+                out.append(node)
+            else:
+                out.extend(node.else_block)
+        elif cls is Loop:
+            self.dead_block(node.body)
+            a, b = node.start_expr, node.end_expr
+            if (type(a) is Literal and type(b) is Literal
+                    and not _literal_num(a) <= _literal_num(b)
+                    and not _defines_function(node.body)):
+                self.report.removed_loops += 1
+                return
+            out.append(node)
+        else:
+            if cls is FuncDef:
+                self.dead_block(node.body)
+            out.append(node)
+
+
+def _counted(n, one, many):
+    return f"{n} {one if n == 1 else many}"
+
+
+def print_opt_report(out, r):
+    """One line per pass that ran at the report's level, then the node
+    counts (--emit=passes)"""
+    if r.level >= 2:
+        out.write(f"inline: {_counted(r.inlined_calls, 'call', 'calls')} inlined\n")
+        out.write(
+            f"propagate: {_counted(r.propagated_uses, 'use', 'uses')} replaced, "
+            f"{_counted(r.removed_decls, 'declaration', 'declarations')} removed\n"
+        )
+    if r.level >= 1:
+        out.write(f"fold: {_counted(r.folded_exprs, 'expression', 'expressions')} folded\n")
+        out.write(
+            f"dead: {_counted(r.removed_arms, 'when arm', 'when arms')} and "
+            f"{_counted(r.removed_loops, 'loop', 'loops')} removed\n"
+        )
+    out.write(f"nodes: {r.nodes_before} -> {r.nodes_after}\n")
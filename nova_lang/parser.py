@@ -0,0 +1,377 @@
+"""
+Recursive descent parser for NovaLang (mirrors Parser::parse)
+"""
+
+from .ast_nodes import (
+    Program, VarDecl, Assign, Show, Take, When, Loop, Break, FuncDef,
+    FuncCall, BinOp, UnaryOp, Literal, Identifier
+)
+from .diagnostics import (
+    DEFAULT_MAX_ERRORS, CompileError, ErrorLimitReached, ErrorLog
+)
+from .token import Token, TokenType, token_type_name
+
+
+class ParserError(CompileError):
+    stage = "parser"
+
+    @classmethod
+    def at(cls, message, tok):
+        return cls(message, tok.line, tok.col, token_length(tok))
+
+
+def token_length(tok):
+    if tok.type is TokenType.STRING:
+        return len(tok.value) + 2
+    return len(tok.value) if tok.value else 1
+
+
+def describe(tok):
+    if tok.type is TokenType.EOF_T:
+        return "end of file"
+    return f"'{tok.value}'"
+
+
+_VAR_TYPES = (TokenType.NUM, TokenType.TEXT, TokenType.FLAG)
+_STATEMENT_END = (TokenType.END, TokenType.RBRACE, TokenType.EOF_T)
+_STATEMENT_START = frozenset((
+    TokenType.NUM, TokenType.TEXT, TokenType.FLAG, TokenType.SHOW,
+    TokenType.TAKE, TokenType.WHEN, TokenType.LOOP, TokenType.BREAK,
+    TokenType.FUNC
+))
+# Where panic mode resumes: 'back' ends a function body
+_SYNC_POINTS = _STATEMENT_START | {TokenType.BACK}
+
+# Binary operator precedence (all left-associative); tokens that are not
+# listed end an expression
+BINARY_PRECEDENCE = {
+    TokenType.EQEQ: 1, TokenType.NOTEQ: 1,
+    TokenType.GT: 2, TokenType.LT: 2, TokenType.GTEQ: 2, TokenType.LTEQ: 2,
+    TokenType.PLUS: 3, TokenType.MINUS: 3,
+    TokenType.STAR: 4, TokenType.SLASH: 4,
+}
+
+# Deepest nesting of parentheses, argument lists, blocks, unary minus and
+# binary operator chains (Parser::MAX_NESTING)
+MAX_NESTING = 128
+
+
+class Parser:
+    """
+    Builds a Program AST from a token list
+
+    Syntax errors are logged in self.log rather than raised; the Program
+    is only complete when the log is empty.
+    """
+
+    def __init__(self, tokens, max_errors=DEFAULT_MAX_ERRORS):
+        if not tokens:
+            raise ParserError("Empty token stream")
+        self.tokens = tokens
+        self.i = 0
+        self.depth = 0
+        self.log = ErrorLog(max_errors)
+        self._eof = Token(TokenType.EOF_T, "", 0, 0)
+
+    def current(self):
+        if self.i < len(self.tokens):
+            return self.tokens[self.i]
+        return self._eof
+
+    def advance(self):
+        if self.i < len(self.tokens):
+            tok = self.tokens[self.i]
+            self.i += 1
+            return tok
+        last = self.tokens[-1]
+        return Token(TokenType.EOF_T, "", last.line, last.col)
+
+    def match(self, *types):
+        cur = self.current()
+        if cur.type in types:
+            return self.advance()
+        expected = " or ".join(token_type_name(t) for t in types)
+        raise ParserError.at(f"Expected {expected}, found {describe(cur)}", cur)
+
+    def enter(self, tok):
+        if self.depth >= MAX_NESTING:
+            raise ParserError.at("Nesting too deep", tok)
+        self.depth += 1
+
+    def parse(self):
+        """Parse a whole 'start ... end' program, logging syntax errors"""
+        first = self.current()
+        stmts = []
+        try:
+            try:
+                self._program(stmts)
+            except RecursionError:
+                self.log.report(ParserError.at("Nesting too deep", self.current()))
+            except ParserError as e:
+                self.log.report(e)
+        except ErrorLimitReached:
+            pass
+        return Program(stmts, first.line, first.col)
+
+    def _program(self, stmts):
+        """'start' statements 'end'; errors after the last statement end it"""
+        try:
+            self.match(TokenType.START)
+        except ParserError as e:
+            self.log.report(e)
+            if self.current().type not in _STATEMENT_START:
+                self.synchronize(self.i)
+        # A '}' with no block to close is reported and skipped
+        while True:
+            self.statement_list(stmts)
+            if self.current().type is not TokenType.RBRACE:
+                break
+            try:
+                self.match(TokenType.END)
+            except ParserError as e:
+                self.log.report(e)
+            self.advance()
+        self.match(TokenType.END)
+        self.match(TokenType.EOF_T)
+
+    def statements(self):
+        stmts = []
+        self.statement_list(stmts)
+        return stmts
+
+    def statement_list(self, stmts):
+        while self.current().type not in _STATEMENT_END:
+            self.recovering_statement(stmts)
+
+    def recovering_statement(self, stmts):
+        """
+        Panic mode: a statement with a syntax error is logged and dropped,
+        and parsing resumes at the next statement. An error that leaves
+        nothing to skip (the statement list ended early) is passed on to
+        the enclosing one.
+        """
+        start = self.i
+        depth = self.depth
+        try:
+            stmts.append(self.statement())
+        except ParserError as e:
+            self.depth = depth
+            self.synchronize(start)
+            if self.i == start:
+                raise
+            self.log.report(e)
+
+    def synchronize(self, start):
+        """
+        Skip to the next statement keyword (or 'back'), to a '}' that
+        closes an enclosing block, or to 'end'. Blocks opened by the
+        broken statement starting at token index start are skipped whole.
+        """
+        tokens = self.tokens
+        open_braces = 0
+        for k in range(start, self.i):
+            t = tokens[k].type
+            if t is TokenType.LBRACE:
+                open_braces += 1
+            elif t is TokenType.RBRACE and open_braces:
+                open_braces -= 1
+        while True:
+            t = self.current().type
+            if t is TokenType.END or t is TokenType.EOF_T:
+                return
+            if t is TokenType.RBRACE:
+                if not open_braces:
+                    return
+                open_braces -= 1
+            elif t is TokenType.LBRACE:
+                open_braces += 1
+            elif not open_braces and self.i > start and t in _SYNC_POINTS:
+                return
+            self.advance()
+
+    def statement(self):
+        t = self.current().type
+        if t in _VAR_TYPES:
+            return self.var_decl()
+        elif t is TokenType.IDENT:
+            return self.assign_or_func_call()
+        elif t is TokenType.SHOW:
+            return self.show_stmt()
+        elif t is TokenType.TAKE:
+            return self.take_stmt()
+        elif t is TokenType.WHEN:
+            return self.when_stmt()
+        elif t is TokenType.LOOP:
+            return self.loop_stmt()
+        elif t is TokenType.BREAK:
+            b = self.match(TokenType.BREAK)
+            return Break(b.line, b.col)
+        elif t is TokenType.FUNC:
+            return self.func_def()
+        cur = self.current()
+        raise ParserError.at(f"Unexpected token {describe(cur)}", cur)
+
+    def var_decl(self):
+        vt = self.match(*_VAR_TYPES)
+        name = self.match(TokenType.IDENT)
+        self.match(TokenType.ASSIGN)
+        ex = self.expr()
+        return VarDecl(vt.value, name.value, ex, name.line, name.col)
+
+    def call_args(self):
+        self.enter(self.match(TokenType.LPAREN))
+        args = []
+        if self.current().type is not TokenType.RPAREN:
+            args.append(self.expr())
+            while self.current().type is TokenType.COMMA:
+                self.match(TokenType.COMMA)
+                args.append(self.expr())
+        self.match(TokenType.RPAREN)
+        self.depth -= 1
+        return args
+
+    def assign_or_func_call(self):
+        name = self.match(TokenType.IDENT)
+        t = self.current().type
+        if t is TokenType.ASSIGN:
+            self.match(TokenType.ASSIGN)
+            e = self.expr()
+            return Assign(name.value, e, name.line, name.col)
+        elif t is TokenType.LPAREN:
+            args = self.call_args()
+            return FuncCall(name.value, args, name.line, name.col)
+        raise ParserError.at(
+            f"Expected assign or func-call after '{name.value}'", self.current()
+        )
+
+    def show_stmt(self):
+        s = self.match(TokenType.SHOW)
+        e = self.expr()
+        return Show(e, s.line, s.col)
+
+    def take_stmt(self):
+        self.match(TokenType.TAKE)
+        ident = self.match(TokenType.IDENT)
+        return Take(ident.value, ident.line, ident.col)
+
+    def when_stmt(self):
+        cases = []
+        else_block = []
+        when_tok = self.match(TokenType.WHEN)
+        cond = self.expr()
+        cases.append((cond, self.block(when_tok)))
+        while self.current().type is TokenType.ELSEWHEN:
+            t = self.match(TokenType.ELSEWHEN)
+            cond2 = self.expr()
+            cases.append((cond2, self.block(t)))
+        if self.current().type is TokenType.ELSE:
+            t = self.match(TokenType.ELSE)
+            else_block = self.block(t)
+        return When(cases, else_block, when_tok.line, when_tok.col)
+
+    def loop_stmt(self):
+        loop_t = self.match(TokenType.LOOP)
+        var = self.match(TokenType.IDENT)
+        self.match(TokenType.ASSIGN)
+        s = self.expr()
+        self.match(TokenType.TO)
+        e = self.expr()
+        body = self.block(loop_t)
+        return Loop(var.value, s, e, body, var.line, var.col)
+
+    def func_def(self):
+        self.match(TokenType.FUNC)
+        name = self.match(TokenType.IDENT)
+        self.match(TokenType.LPAREN)
+        params = []
+        if self.current().type is not TokenType.RPAREN:
+            params.append(self.match(TokenType.IDENT).value)
+            while self.current().type is TokenType.COMMA:
+                self.match(TokenType.COMMA)
+                params.append(self.match(TokenType.IDENT).value)
+        self.match(TokenType.RPAREN)
+        self.enter(self.match(TokenType.LBRACE))
+        body = []
+        while self.current().type is not TokenType.BACK:
+            if self.current().type is TokenType.RBRACE:
+                raise ParserError.at(
+                    "Function must contain a 'back' statement", self.current()
+                )
+            self.recovering_statement(body)
+        self.match(TokenType.BACK)
+        back_expr = self.expr()
+        self.match(TokenType.RBRACE)
+        self.depth -= 1
+        return FuncDef(name.value, params, body, back_expr, name.line, name.col)
+
+    def block(self, context_token):
+        """Parse '{ statements }' and return the statement list"""
+        if self.current().type is not TokenType.LBRACE:
+            raise ParserError.at(
+                f"Expected LBRACE after '{context_token.value}'", context_token
+            )
+        self.enter(self.match(TokenType.LBRACE))
+        stmts = self.statements()
+        self.match(TokenType.RBRACE)
+        self.depth -= 1
+        return stmts
+
+    # Expressions: precedence climbing over BINARY_PRECEDENCE
+    def expr(self, min_prec=1):
+        node = self.prefix()
+        precedence = BINARY_PRECEDENCE
+        chain = 0
+        while True:
+            op = self.current()
+            prec = precedence.get(op.type, 0)
+            if prec < min_prec:
+                self.depth -= chain
+                return node
+            self.advance()
+            # The chain is built in a loop, but later stages walk the
+            # left-deep tree recursively, so each operator is a level
+            self.enter(op)
+            chain += 1
+            # Only tighter operators go right, so recursion here is
+            # bounded by the number of precedence levels
+            right = self.expr(prec + 1)
+            node = BinOp(node, op.type, op.value, right, op.line, op.col)
+
+    def prefix(self):
+        """A run of unary minus, applied innermost first without recursion"""
+        ops = []
+        while self.current().type is TokenType.MINUS:
+            op = self.advance()
+            self.enter(op)
+            ops.append(op)
+        node = self.primary()
+        for op in reversed(ops):
+            node = UnaryOp(op.type, op.value, node, op.line, op.col)
+        self.depth -= len(ops)
+        return node
+
+    def primary(self):
+        t = self.current()
+        tt = t.type
+        if tt is TokenType.NUMBER:
+            self.advance()
+            return Literal(t.value, "num", t.line, t.col)
+        elif tt is TokenType.STRING:
+            self.advance()
+            return Literal(t.value, "text", t.line, t.col)
+        elif tt is TokenType.BOOL:
+            self.advance()
+            return Literal(t.value, "bool", t.line, t.col)
+        elif tt is TokenType.IDENT:
+            self.advance()
+            if self.current().type is TokenType.LPAREN:
+                args = self.call_args()
+                return FuncCall(t.value, args, t.line, t.col)
+            return Identifier(t.value, t.line, t.col)
+        elif tt is TokenType.LPAREN:
+            self.enter(self.advance())
+            n = self.expr()
+            self.match(TokenType.RPAREN)
+            self.depth -= 1
+            return n
+        raise ParserError.at(f"Unexpected token in expression: {describe(t)}", t)
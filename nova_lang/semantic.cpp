@@ -1,169 +1,234 @@
 #include "semantic.hpp"
 #include <stdexcept>
-#include <typeinfo>
-
-SemanticAnalyzer::SemanticAnalyzer() {
-    scopes.emplace_back();
+#include <cstring>
+
+// Length of the source text a node is anchored at, for diagnostic spans
+static int anchor_length(const Node* n, const Names& names) {
+    switch (n->kind) {
+        case NodeKind::IDENTIFIER: return (int)names.spelling(static_cast<const Identifier*>(n)->name).size();
+        case NodeKind::LITERAL: {
+            auto l = static_cast<const Literal*>(n);
+            return (int)l->value.size + (l->lit == LitKind::TEXT ? 2 : 0);
+        }
+        case NodeKind::BIN_OP: return (int)std::strlen(op_text(static_cast<const BinOp*>(n)->op));
+        case NodeKind::UNARY_OP: return (int)std::strlen(op_text(static_cast<const UnaryOp*>(n)->op));
+        case NodeKind::VAR_DECL: return (int)names.spelling(static_cast<const VarDecl*>(n)->name).size();
+        case NodeKind::ASSIGN: return (int)names.spelling(static_cast<const Assign*>(n)->name).size();
+        case NodeKind::TAKE: return (int)names.spelling(static_cast<const Take*>(n)->name).size();
+        case NodeKind::LOOP: return (int)names.spelling(static_cast<const Loop*>(n)->var).size();
+        case NodeKind::FUNC_DEF: return (int)names.spelling(static_cast<const FuncDef*>(n)->name).size();
+        case NodeKind::FUNC_CALL: return (int)names.spelling(static_cast<const FuncCall*>(n)->name).size();
+        case NodeKind::BREAK: return 5;
+        case NodeKind::WHEN: return 4;
+        case NodeKind::SHOW: return 4;
+        case NodeKind::PROGRAM: return 1;
+    }
+    return 1;
 }
 
-void SemanticAnalyzer::enter_scope() { scopes.emplace_back(); }
-void SemanticAnalyzer::exit_scope() { if (!scopes.empty()) scopes.pop_back(); }
-
-void SemanticAnalyzer::declare_var(const std::string& name, const std::string& type) {
-    if (scopes.back().count(name)) throw SemanticError("Redeclaration of variable '" + name + "'");
-    scopes.back().emplace(name, Symbol(name, type));
+static Type value_type(VarType t) {
+    switch (t) {
+        case VarType::NUM: return Type::NUM;
+        case VarType::TEXT: return Type::TEXT;
+        case VarType::FLAG: return Type::BOOL;
+    }
+    return Type::NONE;
 }
 
-Symbol* SemanticAnalyzer::lookup_var(const std::string& name) {
-    for (auto it = scopes.rbegin(); it != scopes.rend(); ++it) {
-        if (it->count(name)) return &((*it)[name]);
+static Type literal_type(LitKind k) {
+    switch (k) {
+        case LitKind::NUM: return Type::NUM;
+        case LitKind::TEXT: return Type::TEXT;
+        case LitKind::BOOL: return Type::BOOL;
     }
-    throw SemanticError("Use of undeclared variable '" + name + "'");
-    return nullptr;
+    return Type::NONE;
+}
+
+void SemanticAnalyzer::error(const std::string& msg, const Node* at) {
+    log.report(SemanticError(msg, at->line, at->col, anchor_length(at, *names)));
 }
 
-void SemanticAnalyzer::analyze(ASTNode* node) {
-    visit(node);
+void SemanticAnalyzer::record(const char* kind, NameId id, const std::string& type, const Node* at) {
+    if (!record_symbols) return;
+    symbol_log.push_back(SymbolEntry{kind, name(id), type, (int)depth(), at ? at->line : 0, at ? at->col : 0});
 }
 
-std::string SemanticAnalyzer::visit(ASTNode* node) {
-    if (!node) return "";
-    if (auto p = dynamic_cast<Program*>(node)) return visit_Program(p);
-    if (auto v = dynamic_cast<VarDecl*>(node)) return visit_VarDecl(v);
-    if (auto a = dynamic_cast<Assign*>(node)) return visit_Assign(a);
-    if (auto s = dynamic_cast<Show*>(node)) return visit_Show(s);
-    if (auto t = dynamic_cast<Take*>(node)) return visit_Take(t);
-    if (auto w = dynamic_cast<When*>(node)) return visit_When(w);
-    if (auto lp = dynamic_cast<Loop*>(node)) return visit_Loop(lp);
-    if (dynamic_cast<Break*>(node)) return visit_Break(dynamic_cast<Break*>(node));
-    if (auto f = dynamic_cast<FuncDef*>(node)) return visit_FuncDef(f);
-    if (auto fc = dynamic_cast<FuncCall*>(node)) return visit_FuncCall(fc);
-    if (auto b = dynamic_cast<BinOp*>(node)) return visit_BinOp(b);
-    if (auto u = dynamic_cast<UnaryOp*>(node)) return visit_UnaryOp(u);
-    if (auto l = dynamic_cast<Literal*>(node)) return visit_Literal(l);
-    if (auto id = dynamic_cast<Identifier*>(node)) return visit_Identifier(id);
+void SemanticAnalyzer::enter_scope() { scope_marks.push_back((uint32_t)bindings.size()); }
 
-    throw SemanticError("Unhandled AST node in semantic analyzer");
+void SemanticAnalyzer::exit_scope() {
+    if (scope_marks.empty()) return;
+    uint32_t mark = scope_marks.back();
+    scope_marks.pop_back();
+    while (bindings.size() > mark) {
+        visible[bindings.back().name] = bindings.back().shadowed;
+        bindings.pop_back();
+    }
 }
 
-std::string SemanticAnalyzer::visit_Program(Program* node) {
-    for (auto &s : node->statements) visit(s.get());
-    return "";
+void SemanticAnalyzer::declare_var(NameId id, VarType type, const Node* at) {
+    int32_t top = visible[id];
+    if (top >= 0 && bindings[top].depth == depth()) {
+        // The first declaration stays in effect
+        error("Redeclaration of variable '" + name(id) + "'", at);
+        return;
+    }
+    visible[id] = (int32_t)bindings.size();
+    bindings.push_back(Binding{id, type, depth(), top});
 }
 
-std::string SemanticAnalyzer::visit_VarDecl(VarDecl* node) {
-    std::string expr_t = visit(node->expr.get());
-    std::string declared = node->vartype;
-    if (declared == "num" && expr_t != "num") throw SemanticError("Type mismatch: expected num");
-    if (declared == "text" && expr_t != "text") throw SemanticError("Type mismatch: expected text");
-    if (declared == "flag" && expr_t != "bool") throw SemanticError("Type mismatch: expected flag");
-    declare_var(node->name, declared);
-    return declared;
+const SemanticAnalyzer::Binding* SemanticAnalyzer::lookup_var(NameId id, const Node* at) {
+    int32_t top = visible[id];
+    if (top < 0) {
+        error("Use of undeclared variable '" + name(id) + "'", at);
+        return nullptr;
+    }
+    return &bindings[top];
 }
 
-std::string SemanticAnalyzer::visit_Assign(Assign* node) {
-    Symbol* s = lookup_var(node->name);
-    std::string expr_t = visit(node->expr.get());
-    if (s->type == "num" && expr_t != "num") throw SemanticError("Type mismatch in assignment to num");
-    if (s->type == "text" && expr_t != "text") throw SemanticError("Type mismatch in assignment to text");
-    if (s->type == "flag" && expr_t != "bool") throw SemanticError("Type mismatch in assignment to flag");
-    return s->type;
+void SemanticAnalyzer::analyze(const Ast& ast) {
+    names = &ast.names;
+    visible.assign(names->size(), -1);
+    arity.assign(names->size(), -1);
+    try {
+        visit_block(ast.root->statements);
+    } catch (const ErrorLimitReached&) {
+    }
 }
 
-std::string SemanticAnalyzer::visit_Show(Show* node) {
-    return visit(node->expr.get());
+void SemanticAnalyzer::visit_block(const NodeList& stmts) {
+    for (const Node* s : stmts) visit(s);
+}
+
+Type SemanticAnalyzer::visit(const Node* node) {
+    switch (node->kind) {
+        case NodeKind::PROGRAM: visit_block(static_cast<const Program*>(node)->statements); return Type::NONE;
+        case NodeKind::VAR_DECL: return visit_VarDecl(static_cast<const VarDecl*>(node));
+        case NodeKind::ASSIGN: return visit_Assign(static_cast<const Assign*>(node));
+        case NodeKind::SHOW: return visit(static_cast<const Show*>(node)->expr);
+        case NodeKind::TAKE: {
+            auto t = static_cast<const Take*>(node);
+            lookup_var(t->name, t);
+            return Type::NONE;
+        }
+        case NodeKind::WHEN: return visit_When(static_cast<const When*>(node));
+        case NodeKind::LOOP: return visit_Loop(static_cast<const Loop*>(node));
+        case NodeKind::BREAK:
+            if (in_loop == 0) error("break outside loop", node);
+            return Type::NONE;
+        case NodeKind::FUNC_DEF: return visit_FuncDef(static_cast<const FuncDef*>(node));
+        case NodeKind::FUNC_CALL: return visit_FuncCall(static_cast<const FuncCall*>(node));
+        case NodeKind::BIN_OP: return visit_BinOp(static_cast<const BinOp*>(node));
+        case NodeKind::UNARY_OP: return visit_UnaryOp(static_cast<const UnaryOp*>(node));
+        case NodeKind::LITERAL: return literal_type(static_cast<const Literal*>(node)->lit);
+        case NodeKind::IDENTIFIER: {
+            const Binding* b = lookup_var(static_cast<const Identifier*>(node)->name, node);
+            return b ? value_type(b->type) : Type::ERROR;
+        }
+    }
+    throw SemanticError("Unhandled AST node in semantic analyzer", node->line, node->col);
 }
 
-std::string SemanticAnalyzer::visit_Take(Take* node) {
-    Symbol* s = lookup_var(node->name);
-    return s->type;
+Type SemanticAnalyzer::visit_VarDecl(const VarDecl* node) {
+    Type expr_t = visit(node->expr);
+    if (expr_t != value_type(node->vartype) && expr_t != Type::ERROR)
+        error(std::string("Type mismatch: expected ") + var_type_name(node->vartype), node->expr);
+    declare_var(node->name, node->vartype, node);
+    record("var", node->name, var_type_name(node->vartype), node);
+    return value_type(node->vartype);
 }
 
-std::string SemanticAnalyzer::visit_When(When* node) {
-    for (auto &c : node->cases) {
-        std::string ct = visit(c.first.get());
-        if (ct != "bool") throw SemanticError("When condition must be boolean");
+Type SemanticAnalyzer::visit_Assign(const Assign* node) {
+    const Binding* b = lookup_var(node->name, node);
+    Type expr_t = visit(node->expr);
+    if (!b) return Type::ERROR;
+    if (expr_t != value_type(b->type) && expr_t != Type::ERROR)
+        error(std::string("Type mismatch in assignment to ") + var_type_name(b->type), node->expr);
+    return value_type(b->type);
+}
+
+Type SemanticAnalyzer::visit_When(const When* node) {
+    for (const WhenCase& c : *node) {
+        Type ct = visit(c.cond);
+        if (ct != Type::BOOL && ct != Type::ERROR) error("When condition must be boolean", c.cond);
         enter_scope();
-        for (auto &s : c.second) visit(s.get());
+        visit_block(c.body);
         exit_scope();
     }
     if (!node->else_block.empty()) {
         enter_scope();
-        for (auto &s : node->else_block) visit(s.get());
+        visit_block(node->else_block);
         exit_scope();
     }
-    return "";
+    return Type::NONE;
 }
 
-std::string SemanticAnalyzer::visit_Loop(Loop* node) {
-    std::string s1 = visit(node->start_expr.get());
-    std::string s2 = visit(node->end_expr.get());
-    if (s1 != "num" || s2 != "num") throw SemanticError("Loop bounds must be num");
+Type SemanticAnalyzer::visit_Loop(const Loop* node) {
+    Type s1 = visit(node->start_expr);
+    Type s2 = visit(node->end_expr);
+    if (s1 != Type::NUM && s1 != Type::ERROR) error("Loop bounds must be num", node->start_expr);
+    if (s2 != Type::NUM && s2 != Type::ERROR) error("Loop bounds must be num", node->end_expr);
     enter_scope();
-    declare_var(node->var, "num");
+    declare_var(node->var, VarType::NUM, node);
+    record("loopvar", node->var, "num", node);
     in_loop++;
-    for (auto &st : node->body) visit(st.get());
+    visit_block(node->body);
     in_loop--;
     exit_scope();
-    return "";
-}
-
-std::string SemanticAnalyzer::visit_Break(Break* /*node*/) {
-    if (in_loop == 0) throw SemanticError("break outside loop");
-    return "";
+    return Type::NONE;
 }
 
-std::string SemanticAnalyzer::visit_FuncDef(FuncDef* node) {
-    if (functions.count(node->name)) throw SemanticError("Redeclaration of function '" + node->name + "'");
-    functions.emplace(node->name, FunctionSymbol(node->name, node->params));
+Type SemanticAnalyzer::visit_FuncDef(const FuncDef* node) {
+    // A redeclared function keeps its first signature; its body is still checked
+    if (arity[node->name] >= 0) error("Redeclaration of function '" + name(node->name) + "'", node);
+    else arity[node->name] = (int32_t)node->param_count;
+    record("func", node->name, "arity " + std::to_string(node->param_count), node);
     enter_scope();
-    for (auto &p : node->params) declare_var(p, "num"); // simplistic; mark params as num
+    for (uint32_t k = 0; k < node->param_count; ++k) {
+        declare_var(node->params[k], VarType::NUM, node); // simplistic; mark params as num
+        record("param", node->params[k], "num", node);
+    }
+    // A loop around the definition does not make break valid in the body
+    int outer_loop = in_loop;
+    in_loop = 0;
     in_func++;
-    for (auto &s : node->body) visit(s.get());
-    std::string ret = visit(node->back_expr.get());
+    visit_block(node->body);
+    Type bt = visit(node->back_expr);
+    if (bt != Type::NUM && bt != Type::ERROR) error("Back value must be num", node->back_expr);
     in_func--;
+    in_loop = outer_loop;
     exit_scope();
-    return "";
-}
-
-std::string SemanticAnalyzer::visit_FuncCall(FuncCall* node) {
-    if (!functions.count(node->name)) throw SemanticError("Call to undeclared function '" + node->name + "'");
-    const auto &fs = functions.at(node->name);
-    if (fs.params.size() != node->args.size()) throw SemanticError("Function '" + node->name + "' called with incorrect number of arguments");
-    for (auto &a : node->args) visit(a.get());
-    return "num";
+    return Type::NONE;
 }
 
-std::string SemanticAnalyzer::visit_BinOp(BinOp* node) {
-    std::string lt = visit(node->left.get());
-    std::string rt = visit(node->right.get());
-    auto op = node->op_type;
-    if (op == TokenType::PLUS || op == TokenType::MINUS || op == TokenType::STAR || op == TokenType::SLASH) {
-        if (lt == "num" && rt == "num") return "num";
-        if (op == TokenType::PLUS && lt == "text" && rt == "text") return "text";
-        throw SemanticError("Invalid operands for arithmetic");
+Type SemanticAnalyzer::visit_FuncCall(const FuncCall* node) {
+    int32_t n = arity[node->name];
+    if (n < 0) error("Call to undeclared function '" + name(node->name) + "'", node);
+    else if ((uint32_t)n != node->args.size) error("Function '" + name(node->name) + "' called with incorrect number of arguments", node);
+    for (const Node* a : node->args) {
+        Type at = visit(a);
+        if (at != Type::NUM && at != Type::ERROR) error("Function arguments must be num", a);
     }
-    if (op == TokenType::GT || op == TokenType::LT || op == TokenType::GTEQ || op == TokenType::LTEQ || op == TokenType::EQEQ || op == TokenType::NOTEQ) {
-        if (lt == rt) return "bool";
-        throw SemanticError("Type mismatch in comparison");
+    return Type::NUM;
+}
+
+Type SemanticAnalyzer::visit_BinOp(const BinOp* node) {
+    Type lt = visit(node->left);
+    Type rt = visit(node->right);
+    if (lt == Type::ERROR || rt == Type::ERROR) return Type::ERROR;
+    if (is_arithmetic(node->op)) {
+        if (lt == Type::NUM && rt == Type::NUM) return Type::NUM;
+        if (node->op == OpKind::ADD && lt == Type::TEXT && rt == Type::TEXT) return Type::TEXT;
+        error("Invalid operands for arithmetic", node);
+        return Type::ERROR;
     }
-    throw SemanticError("Unknown binary op");
-}
-
-std::string SemanticAnalyzer::visit_UnaryOp(UnaryOp* node) {
-    std::string et = visit(node->expr.get());
-    if (node->op_type == TokenType::MINUS) {
-        if (et == "num") return "num";
-        throw SemanticError("Unary minus on non-num");
-    }
-    return et;
-}
-
-std::string SemanticAnalyzer::visit_Literal(Literal* node) {
-    return node->lit_type;
+    if (lt == rt) return Type::BOOL;
+    error("Type mismatch in comparison", node);
+    return Type::ERROR;
 }
 
-std::string SemanticAnalyzer::visit_Identifier(Identifier* node) {
-    Symbol* s = lookup_var(node->name);
-    return s->type;
+Type SemanticAnalyzer::visit_UnaryOp(const UnaryOp* node) {
+    Type et = visit(node->expr);
+    if (et == Type::NUM || et == Type::ERROR) return et;
+    error("Unary minus on non-num", node);
+    return Type::ERROR;
 }
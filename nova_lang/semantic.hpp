@@ -2,54 +2,81 @@
 #define NOVA_SEMANTIC_HPP
 
 #include "ast.hpp"
+#include "diagnostics.hpp"
+#include <cstdint>
 #include <string>
-#include <map>
+#include <vector>
 
-struct Symbol {
-    std::string name;
-    std::string type;
-    Symbol() : name(""), type("unknown") {}
-    Symbol(std::string n, std::string t) : name(std::move(n)), type(std::move(t)) {}
-};
+// The types an expression can have. A flag variable holds BOOL values;
+// the declared VarType is kept for messages and --emit=symbols. ERROR is
+// the type of an expression that already has an error reported; checks
+// on it pass silently so one mistake is reported once.
+enum class Type : uint8_t { NONE, NUM, TEXT, BOOL, ERROR };
 
-struct FunctionSymbol {
+// One declaration seen during analysis, recorded for --emit=symbols
+struct SymbolEntry {
+    std::string kind;   // "var", "param", "loopvar" or "func"
     std::string name;
-    std::vector<std::string> params;
-    FunctionSymbol() = default;
-    FunctionSymbol(std::string n, std::vector<std::string> p) : name(std::move(n)), params(std::move(p)) {}
+    std::string type;   // variable type, or "arity N" for functions
+    int depth;          // scope depth at the point of declaration
+    int line;
+    int col;
 };
 
-class SemanticError : public std::runtime_error { public: SemanticError(const std::string& s): std::runtime_error(s){} };
+class SemanticError : public CompileError {
+public:
+    SemanticError(const std::string& s, int l = 0, int c = 0, int len = 1) : CompileError("semantic", s, l, c, len) {}
+};
 
+// Scopes are flat tables indexed by NameId. Names are interned per Ast, so
+// an id indexes `visible` directly and the innermost binding is one load
+// away; shadowed bindings are chained and restored when a scope closes.
 class SemanticAnalyzer {
 private:
-    std::vector<std::map<std::string, Symbol>> scopes;
-    std::map<std::string, FunctionSymbol> functions;
+    struct Binding {
+        NameId name;
+        VarType type;
+        uint32_t depth;
+        int32_t shadowed;   // previous binding of the same name, or -1
+    };
+    const Names* names = nullptr;
+    std::vector<Binding> bindings;          // innermost scope last
+    std::vector<int32_t> visible;           // NameId -> innermost binding, or -1
+    std::vector<uint32_t> scope_marks;      // bindings.size() at each open scope
+    std::vector<int32_t> arity;             // NameId -> function parameter count, or -1
     int in_loop = 0;
     int in_func = 0;
+    bool record_symbols = false;
+    std::vector<SymbolEntry> symbol_log;
+    ErrorLog log;
+    std::string name(NameId id) const { return std::string(names->spelling(id)); }
+    uint32_t depth() const { return (uint32_t)scope_marks.size(); }
+    void error(const std::string& msg, const Node* at);
+    void record(const char* kind, NameId id, const std::string& type, const Node* at);
     void enter_scope();
     void exit_scope();
-    void declare_var(const std::string& name, const std::string& type);
-    Symbol* lookup_var(const std::string& name);
-    std::string visit(ASTNode* node);
+    void declare_var(NameId id, VarType type, const Node* at);
+    const Binding* lookup_var(NameId id, const Node* at);
+    void visit_block(const NodeList& stmts);
+    Type visit(const Node* node);
     // visitors
-    std::string visit_Program(Program* node);
-    std::string visit_VarDecl(VarDecl* node);
-    std::string visit_Assign(Assign* node);
-    std::string visit_Show(Show* node);
-    std::string visit_Take(Take* node);
-    std::string visit_When(When* node);
-    std::string visit_Loop(Loop* node);
-    std::string visit_Break(Break* node);
-    std::string visit_FuncDef(FuncDef* node);
-    std::string visit_FuncCall(FuncCall* node);
-    std::string visit_BinOp(BinOp* node);
-    std::string visit_UnaryOp(UnaryOp* node);
-    std::string visit_Literal(Literal* node);
-    std::string visit_Identifier(Identifier* node);
+    Type visit_VarDecl(const VarDecl* node);
+    Type visit_Assign(const Assign* node);
+    Type visit_When(const When* node);
+    Type visit_Loop(const Loop* node);
+    Type visit_FuncDef(const FuncDef* node);
+    Type visit_FuncCall(const FuncCall* node);
+    Type visit_BinOp(const BinOp* node);
+    Type visit_UnaryOp(const UnaryOp* node);
 public:
-    SemanticAnalyzer();
-    void analyze(ASTNode* node);
+    // Errors are logged and analysis goes on; it stops after this many
+    // (0: no limit)
+    void set_max_errors(size_t n) { log.limit = n; }
+    void analyze(const Ast& ast);
+    const ErrorLog& errors() const { return log; }
+    // Symbol recording is off by default so plain checks pay nothing for it
+    void set_record_symbols(bool on) { record_symbols = on; }
+    const std::vector<SymbolEntry>& symbols() const { return symbol_log; }
 };
 
 #endif // NOVA_SEMANTIC_HPP
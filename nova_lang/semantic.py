@@ -0,0 +1,318 @@
+"""
+Semantic analysis for NovaLang: symbol tables, types, validation
+(mirrors SemanticAnalyzer::analyze)
+"""
+
+from .ast_nodes import (
+    Program, VarDecl, Assign, Show, Take, When, Loop, Break, FuncDef,
+    FuncCall, BinOp, UnaryOp, Literal, Identifier
+)
+from .diagnostics import (
+    DEFAULT_MAX_ERRORS, CompileError, ErrorLimitReached, ErrorLog
+)
+from .token import TokenType
+
+
+def anchor_length(node):
+    """Length of the source text a node is anchored at, for diagnostic spans"""
+    cls = type(node)
+    if cls is Identifier:
+        return len(node.name)
+    if cls is Literal:
+        return len(node.value) + (2 if node.lit_type == "text" else 0)
+    if cls is BinOp or cls is UnaryOp:
+        return len(node.op_value)
+    if cls is VarDecl or cls is Assign or cls is Take or cls is FuncDef \
+            or cls is FuncCall:
+        return len(node.name)
+    if cls is Loop:
+        return len(node.var)
+    if cls is Break:
+        return 5
+    if cls is When or cls is Show:
+        return 4
+    return 1
+
+
+class SemanticError(CompileError):
+    stage = "semantic"
+
+    @classmethod
+    def at(cls, message, node):
+        if node is None:
+            return cls(message)
+        return cls(message, node.line, node.col, anchor_length(node))
+
+
+class Symbol:
+    __slots__ = ('name', 'type')
+
+    def __init__(self, name, type):
+        self.name = name
+        self.type = type
+
+
+class FunctionSymbol:
+    __slots__ = ('name', 'params')
+
+    def __init__(self, name, params):
+        self.name = name
+        self.params = params
+
+
+class SymbolEntry:
+    """One declaration seen during analysis, recorded for --emit=symbols"""
+
+    __slots__ = ('kind', 'name', 'type', 'depth', 'line', 'col')
+
+    def __init__(self, kind, name, type, depth, line, col):
+        self.kind = kind
+        self.name = name
+        self.type = type
+        self.depth = depth
+        self.line = line
+        self.col = col
+
+
+_ARITHMETIC = (TokenType.PLUS, TokenType.MINUS, TokenType.STAR, TokenType.SLASH)
+_COMPARISON = (
+    TokenType.GT, TokenType.LT, TokenType.GTEQ, TokenType.LTEQ,
+    TokenType.EQEQ, TokenType.NOTEQ
+)
+# Value type held by each declared type; flag variables hold bools
+_EXPECTED = {"num": "num", "text": "text", "flag": "bool"}
+# Type of an expression whose error is already reported; checks on it
+# pass silently so one mistake is reported once
+_ERROR = "error"
+
+
+class SemanticAnalyzer:
+    """
+    Type checks a Program and validates scopes, loops and calls
+
+    Errors are logged in self.log and analysis goes on, until more than
+    max_errors (0: no limit) are found.
+    """
+
+    def __init__(self, record_symbols=False, max_errors=DEFAULT_MAX_ERRORS):
+        self.scopes = [{}]
+        self.functions = {}
+        self.in_loop = 0
+        self.in_func = 0
+        self.record_symbols = record_symbols
+        self.symbols = []
+        self.log = ErrorLog(max_errors)
+        self._dispatch = {
+            Program: self.visit_Program,
+            VarDecl: self.visit_VarDecl,
+            Assign: self.visit_Assign,
+            Show: self.visit_Show,
+            Take: self.visit_Take,
+            When: self.visit_When,
+            Loop: self.visit_Loop,
+            Break: self.visit_Break,
+            FuncDef: self.visit_FuncDef,
+            FuncCall: self.visit_FuncCall,
+            BinOp: self.visit_BinOp,
+            UnaryOp: self.visit_UnaryOp,
+            Literal: self.visit_Literal,
+            Identifier: self.visit_Identifier,
+        }
+
+    def analyze(self, node):
+        """Analyze a Program, logging errors in self.log"""
+        try:
+            self.visit(node)
+        except ErrorLimitReached:
+            pass
+
+    def error(self, message, node):
+        self.log.report(SemanticError.at(message, node))
+
+    # Scopes
+    def enter_scope(self):
+        self.scopes.append({})
+
+    def exit_scope(self):
+        if self.scopes:
+            self.scopes.pop()
+
+    def record(self, kind, name, type, at):
+        if not self.record_symbols:
+            return
+        self.symbols.append(SymbolEntry(
+            kind, name, type, len(self.scopes) - 1,
+            at.line if at else 0, at.col if at else 0
+        ))
+
+    def declare_var(self, name, type, at):
+        scope = self.scopes[-1]
+        if name in scope:
+            # The first declaration stays in effect
+            self.error(f"Redeclaration of variable '{name}'", at)
+            return
+        scope[name] = Symbol(name, type)
+
+    def lookup_var(self, name, at):
+        """The variable's Symbol, or None once the error is logged"""
+        for scope in reversed(self.scopes):
+            sym = scope.get(name)
+            if sym is not None:
+                return sym
+        self.error(f"Use of undeclared variable '{name}'", at)
+        return None
+
+    # Visitors
+    def visit(self, node):
+        if node is None:
+            return ""
+        method = self._dispatch.get(type(node))
+        if method is None:
+            raise SemanticError.at("Unhandled AST node in semantic analyzer", node)
+        return method(node)
+
+    def visit_Program(self, node):
+        for s in node.statements:
+            self.visit(s)
+        return ""
+
+    def visit_VarDecl(self, node):
+        expr_t = self.visit(node.expr)
+        declared = node.vartype
+        expected = _EXPECTED.get(declared)
+        if expected is not None and expr_t != expected and expr_t != _ERROR:
+            self.error(f"Type mismatch: expected {declared}", node.expr)
+        self.declare_var(node.name, declared, node)
+        self.record("var", node.name, declared, node)
+        return expected
+
+    def visit_Assign(self, node):
+        s = self.lookup_var(node.name, node)
+        expr_t = self.visit(node.expr)
+        if s is None:
+            return _ERROR
+        expected = _EXPECTED.get(s.type)
+        if expected is not None and expr_t != expected and expr_t != _ERROR:
+            self.error(f"Type mismatch in assignment to {s.type}", node.expr)
+        return expected
+
+    def visit_Show(self, node):
+        return self.visit(node.expr)
+
+    def visit_Take(self, node):
+        self.lookup_var(node.name, node)
+        return ""
+
+    def _visit_block(self, stmts):
+        self.enter_scope()
+        for s in stmts:
+            self.visit(s)
+        self.exit_scope()
+
+    def visit_When(self, node):
+        for cond, stmts in node.cases:
+            ct = self.visit(cond)
+            if ct != "bool" and ct != _ERROR:
+                self.error("When condition must be boolean", cond)
+            self._visit_block(stmts)
+        if node.else_block:
+            self._visit_block(node.else_block)
+        return ""
+
+    def visit_Loop(self, node):
+        s1 = self.visit(node.start_expr)
+        s2 = self.visit(node.end_expr)
+        if s1 != "num" and s1 != _ERROR:
+            self.error("Loop bounds must be num", node.start_expr)
+        if s2 != "num" and s2 != _ERROR:
+            self.error("Loop bounds must be num", node.end_expr)
+        self.enter_scope()
+        self.declare_var(node.var, "num", node)
+        self.record("loopvar", node.var, "num", node)
+        self.in_loop += 1
+        for st in node.body:
+            self.visit(st)
+        self.in_loop -= 1
+        self.exit_scope()
+        return ""
+
+    def visit_Break(self, node):
+        if self.in_loop == 0:
+            self.error("break outside loop", node)
+        return ""
+
+    def visit_FuncDef(self, node):
+        # A redeclared function keeps its first signature; its body is
+        # still checked
+        if node.name in self.functions:
+            self.error(f"Redeclaration of function '{node.name}'", node)
+        else:
+            self.functions[node.name] = FunctionSymbol(node.name, node.params)
+        self.record("func", node.name, f"arity {len(node.params)}", node)
+        self.enter_scope()
+        for p in node.params:
+            self.declare_var(p, "num", node)  # simplistic; mark params as num
+            self.record("param", p, "num", node)
+        # A loop around the definition does not make break valid in the body
+        outer_loop, self.in_loop = self.in_loop, 0
+        self.in_func += 1
+        for s in node.body:
+            self.visit(s)
+        bt = self.visit(node.back_expr)
+        if bt != "num" and bt != _ERROR:
+            self.error("Back value must be num", node.back_expr)
+        self.in_func -= 1
+        self.in_loop = outer_loop
+        self.exit_scope()
+        return ""
+
+    def visit_FuncCall(self, node):
+        fs = self.functions.get(node.name)
+        if fs is None:
+            self.error(f"Call to undeclared function '{node.name}'", node)
+        elif len(fs.params) != len(node.args):
+            self.error(
+                f"Function '{node.name}' called with incorrect number of arguments",
+                node
+            )
+        for a in node.args:
+            at = self.visit(a)
+            if at != "num" and at != _ERROR:
+                self.error("Function arguments must be num", a)
+        return "num"
+
+    def visit_BinOp(self, node):
+        lt = self.visit(node.left)
+        rt = self.visit(node.right)
+        if lt == _ERROR or rt == _ERROR:
+            return _ERROR
+        op = node.op_type
+        if op in _ARITHMETIC:
+            if lt == "num" and rt == "num":
+                return "num"
+            if op is TokenType.PLUS and lt == "text" and rt == "text":
+                return "text"
+            self.error("Invalid operands for arithmetic", node)
+            return _ERROR
+        if op in _COMPARISON:
+            if lt == rt:
+                return "bool"
+            self.error("Type mismatch in comparison", node)
+            return _ERROR
+        raise SemanticError.at("Unknown binary op", node)
+
+    def visit_UnaryOp(self, node):
+        et = self.visit(node.expr)
+        if node.op_type is TokenType.MINUS:
+            if et == "num" or et == _ERROR:
+                return et
+            self.error("Unary minus on non-num", node)
+            return _ERROR
+        return et
+
+    def visit_Literal(self, node):
+        return node.lit_type
+
+    def visit_Identifier(self, node):
+        sym = self.lookup_var(node.name, node)
+        return _ERROR if sym is None else _EXPECTED[sym.type]
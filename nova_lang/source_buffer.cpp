@@ -0,0 +1,103 @@
+#include "source_buffer.hpp"
+#include <fstream>
+#include <iterator>
+#include <utility>
+
+#ifdef _WIN32
+#include <windows.h>
+#else
+#include <fcntl.h>
+#include <sys/mman.h>
+#include <sys/stat.h>
+#include <unistd.h>
+#endif
+
+SourceBuffer::~SourceBuffer() { unmap(); }
+
+#ifdef _WIN32
+
+bool SourceBuffer::map_file(const char* path) {
+    HANDLE file = CreateFileA(path, GENERIC_READ, FILE_SHARE_READ, nullptr,
+                              OPEN_EXISTING, FILE_ATTRIBUTE_NORMAL, nullptr);
+    if (file == INVALID_HANDLE_VALUE) return false;
+    LARGE_INTEGER size;
+    if (!GetFileSizeEx(file, &size) || GetFileType(file) != FILE_TYPE_DISK) {
+        CloseHandle(file);
+        return false;
+    }
+    if (size.QuadPart == 0) {
+        // Empty files cannot be mapped; an empty view is just as good
+        CloseHandle(file);
+        is_mapped = true;
+        return true;
+    }
+    HANDLE mapping = CreateFileMappingA(file, nullptr, PAGE_READONLY, 0, 0, nullptr);
+    if (!mapping) { CloseHandle(file); return false; }
+    void* view = MapViewOfFile(mapping, FILE_MAP_READ, 0, 0, 0);
+    if (!view) { CloseHandle(mapping); CloseHandle(file); return false; }
+    file_handle = file;
+    mapping_handle = mapping;
+    bytes = static_cast<const char*>(view);
+    length = (size_t)size.QuadPart;
+    is_mapped = true;
+    return true;
+}
+
+void SourceBuffer::unmap() {
+    if (is_mapped && length) UnmapViewOfFile(bytes);
+    if (mapping_handle) CloseHandle((HANDLE)mapping_handle);
+    if (file_handle) CloseHandle((HANDLE)file_handle);
+    mapping_handle = file_handle = nullptr;
+    is_mapped = false;
+}
+
+#else
+
+bool SourceBuffer::map_file(const char* path) {
+    int fd = ::open(path, O_RDONLY);
+    if (fd < 0) return false;
+    struct stat st;
+    if (fstat(fd, &st) != 0 || !S_ISREG(st.st_mode)) { ::close(fd); return false; }
+    if (st.st_size == 0) {
+        ::close(fd);
+        is_mapped = true;
+        return true;
+    }
+    void* view = mmap(nullptr, (size_t)st.st_size, PROT_READ, MAP_PRIVATE, fd, 0);
+    ::close(fd);  // the mapping keeps its own reference to the file
+    if (view == MAP_FAILED) return false;
+    madvise(view, (size_t)st.st_size, MADV_SEQUENTIAL);
+    bytes = static_cast<const char*>(view);
+    length = (size_t)st.st_size;
+    is_mapped = true;
+    return true;
+}
+
+void SourceBuffer::unmap() {
+    if (is_mapped && length) munmap(const_cast<char*>(bytes), length);
+    is_mapped = false;
+}
+
+#endif
+
+bool SourceBuffer::open(const char* path) {
+    unmap();
+    bytes = nullptr;
+    length = 0;
+    fallback.clear();
+    if (map_file(path)) return true;
+
+    std::ifstream in(path, std::ios::binary);
+    if (!in.is_open()) return false;
+    fallback.assign(std::istreambuf_iterator<char>(in), std::istreambuf_iterator<char>());
+    bytes = fallback.data();
+    length = fallback.size();
+    return true;
+}
+
+void SourceBuffer::assign(std::string text) {
+    unmap();
+    fallback = std::move(text);
+    bytes = fallback.data();
+    length = fallback.size();
+}
@@ -0,0 +1,37 @@
+#ifndef NOVA_SOURCE_BUFFER_HPP
+#define NOVA_SOURCE_BUFFER_HPP
+
+#include <cstddef>
+#include <string>
+
+// Read-only view of a source file. The file is memory-mapped when the OS
+// allows it; otherwise (pipes, special files) it is read into memory.
+// The bytes stay valid for the lifetime of the buffer.
+class SourceBuffer {
+private:
+    const char* bytes = nullptr;
+    size_t length = 0;
+    bool is_mapped = false;
+    std::string fallback;
+#ifdef _WIN32
+    void* file_handle = nullptr;
+    void* mapping_handle = nullptr;
+#endif
+    bool map_file(const char* path);
+    void unmap();
+public:
+    SourceBuffer() = default;
+    ~SourceBuffer();
+    SourceBuffer(const SourceBuffer&) = delete;
+    SourceBuffer& operator=(const SourceBuffer&) = delete;
+
+    // Returns false when the file cannot be opened
+    bool open(const char* path);
+    // Holds text read elsewhere, e.g. from stdin
+    void assign(std::string text);
+    const char* data() const { return bytes; }
+    size_t size() const { return length; }
+    bool mapped() const { return is_mapped; }
+};
+
+#endif // NOVA_SOURCE_BUFFER_HPP
@@ -1,7 +1,7 @@
 #include "token.hpp"
 #include <iostream>
 
-static std::string tokenTypeName(TokenType t) {
+std::string tokenTypeName(TokenType t) {
     switch (t) {
         case TokenType::EOF_T: return "EOF";
         case TokenType::IDENT: return "IDENT";
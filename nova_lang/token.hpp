@@ -27,6 +27,7 @@ struct Token {
     Token(TokenType t, std::string v, int l, int c) : type(t), value(std::move(v)), line(l), col(c) {}
 };
 
+std::string tokenTypeName(TokenType t);
 std::ostream& operator<<(std::ostream& os, const Token& t);
 
 #endif // NOVA_TOKEN_HPP
@@ -0,0 +1,72 @@
+"""
+Token definitions for NovaLang (mirrors token.hpp)
+"""
+
+from enum import Enum
+
+
+class TokenType(Enum):
+    # Special
+    EOF_T = 'EOF'
+    IDENT = 'IDENT'
+    NUMBER = 'NUMBER'
+    STRING = 'STRING'
+    BOOL = 'BOOL'
+
+    # Keywords
+    START = 'START'
+    END = 'END'
+    SHOW = 'SHOW'
+    TAKE = 'TAKE'
+    WHEN = 'WHEN'
+    ELSEWHEN = 'ELSEWHEN'
+    ELSE = 'ELSE'
+    LOOP = 'LOOP'
+    BREAK = 'BREAK'
+    FUNC = 'FUNC'
+    BACK = 'BACK'
+    NUM = 'NUM'
+    TEXT = 'TEXT'
+    FLAG = 'FLAG'
+    TRUE_T = 'TRUE'
+    FALSE_T = 'FALSE'
+
+    # Operators / punctuation
+    PLUS = 'PLUS'
+    MINUS = 'MINUS'
+    STAR = 'STAR'
+    SLASH = 'SLASH'
+    EQ = 'EQ'
+    EQEQ = 'EQEQ'
+    NOTEQ = 'NOTEQ'
+    GT = 'GT'
+    LT = 'LT'
+    GTEQ = 'GTEQ'
+    LTEQ = 'LTEQ'
+    ASSIGN = 'ASSIGN'
+    COMMA = 'COMMA'
+    LPAREN = 'LPAREN'
+    RPAREN = 'RPAREN'
+    LBRACE = 'LBRACE'
+    RBRACE = 'RBRACE'
+    TO = 'TO'
+
+
+def token_type_name(t):
+    """Name of a token type as printed by the backend (tokenTypeName)"""
+    return t.value
+
+
+class Token:
+    """A lexed token; the repr matches the backend's operator<<"""
+
+    __slots__ = ('type', 'value', 'line', 'col')
+
+    def __init__(self, type, value, line, col):
+        self.type = type
+        self.value = value
+        self.line = line
+        self.col = col
+
+    def __repr__(self):
+        return f"{self.type.value}('{self.value}') @{self.line}:{self.col}"
@@ -0,0 +1,348 @@
+#include "vm.hpp"
+#include <algorithm>
+#include <cctype>
+#include <cmath>
+#include <cstddef>
+#include <cstdio>
+#include <cstdlib>
+#include <new>
+
+// Immutable once built; freed when the last reference goes
+struct VM::Text {
+    uint32_t refs;
+    size_t size;
+    char data[1];
+};
+
+VM::Text* VM::alloc_text(size_t size) {
+    void* mem = std::malloc(offsetof(Text, data) + size + 1);
+    if (!mem) throw std::bad_alloc();
+    Text* t = static_cast<Text*>(mem);
+    t->refs = 1;
+    t->size = size;
+    t->data[size] = '\0';
+    return t;
+}
+
+VM::Text* VM::make_text(const char* data, size_t size) {
+    Text* t = alloc_text(size);
+    std::memcpy(t->data, data, size);
+    return t;
+}
+
+VM::Text* VM::concat(const Text* a, const Text* b) {
+    Text* t = alloc_text(a->size + b->size);
+    std::memcpy(t->data, a->data, a->size);
+    std::memcpy(t->data + a->size, b->data, b->size);
+    return t;
+}
+
+void VM::retain(Text* t) { t->refs++; }
+
+void VM::release(Text* t) {
+    if (--t->refs == 0) std::free(t);
+}
+
+int VM::compare(const Text* a, const Text* b) {
+    int c = std::memcmp(a->data, b->data, std::min(a->size, b->size));
+    if (c != 0) return c;
+    return a->size < b->size ? -1 : a->size > b->size ? 1 : 0;
+}
+
+VM::~VM() {
+    for (Text* t : constants) release(t);
+    if (empty) release(empty);
+}
+
+std::string format_num(double v) {
+    // printf may sign a NaN
+    if (std::isnan(v)) return "nan";
+    char buf[32];
+    std::snprintf(buf, sizeof buf, "%.15g", v);
+    return buf;
+}
+
+// Optional sign, digits with an optional fraction, optional exponent;
+// strtod would also take hex, "inf" and "nan"
+static bool parse_num(const std::string& line, double& out) {
+    size_t b = line.find_first_not_of(" \t");
+    size_t e = line.find_last_not_of(" \t");
+    if (b == std::string::npos) return false;
+    std::string s = line.substr(b, e - b + 1);
+    size_t i = 0, n = s.size();
+    if (s[i] == '+' || s[i] == '-') i++;
+    size_t digits = 0;
+    while (i < n && std::isdigit((unsigned char)s[i])) i++, digits++;
+    if (i < n && s[i] == '.') {
+        i++;
+        while (i < n && std::isdigit((unsigned char)s[i])) i++, digits++;
+    }
+    if (digits == 0) return false;
+    if (i < n && (s[i] == 'e' || s[i] == 'E')) {
+        i++;
+        if (i < n && (s[i] == '+' || s[i] == '-')) i++;
+        size_t exp_digits = 0;
+        while (i < n && std::isdigit((unsigned char)s[i])) i++, exp_digits++;
+        if (exp_digits == 0) return false;
+    }
+    if (i != n) return false;
+    out = std::strtod(s.c_str(), nullptr);
+    return true;
+}
+
+static bool parse_flag(const std::string& line, double& out) {
+    size_t b = line.find_first_not_of(" \t");
+    size_t e = line.find_last_not_of(" \t");
+    if (b == std::string::npos) return false;
+    std::string s = line.substr(b, e - b + 1);
+    for (auto& ch : s) ch = (char)std::tolower((unsigned char)ch);
+    if (s == "true") out = 1;
+    else if (s == "false") out = 0;
+    else return false;
+    return true;
+}
+
+void VM::open_frame(const Function& fn, size_t base) {
+    for (uint32_t s = fn.param_count; s < fn.slot_count; ++s) stack[base + s].num = 0;
+    for (uint32_t s : fn.text_slots) {
+        retain(empty);
+        stack[base + s].text = empty;
+    }
+}
+
+void VM::close_frame(const Function& fn, size_t base) {
+    for (uint32_t s : fn.text_slots) release(stack[base + s].text);
+}
+
+void VM::show(const char* data, size_t size) {
+    out.write(data, (std::streamsize)size);
+    out.put('\n');
+    auto now = std::chrono::steady_clock::now();
+    if (now - last_flush >= FLUSH_INTERVAL) {
+        out.flush();
+        last_flush = now;
+    }
+}
+
+bool VM::read_line(std::string& line) {
+    // A prompt shown just before take must reach the reader first
+    out.flush();
+    last_flush = std::chrono::steady_clock::now();
+    if (!std::getline(in, line)) return false;
+    if (!line.empty() && line.back() == '\r') line.pop_back();
+    return true;
+}
+
+void VM::fail(const Function& fn, const uint8_t* at, const std::string& msg) {
+    out.flush();
+    const CodeSpan* span = fn.span_at((uint32_t)(at - fn.code.data()));
+    if (!span) throw ExecutionError(msg);
+    throw ExecutionError(msg, span->line, span->col, span->length);
+}
+
+static inline uint32_t operand(const uint8_t* at) {
+    uint32_t v;
+    std::memcpy(&v, at, sizeof v);
+    return v;
+}
+
+void VM::run(const Module& m) {
+    for (const std::string& s : m.texts) constants.push_back(make_text(s.data(), s.size()));
+    empty = make_text("", 0);
+    last_flush = std::chrono::steady_clock::now();
+
+    const Function* f = &m.functions[0];
+    stack.resize(std::max<size_t>(4096, f->slot_count + f->max_stack));
+    open_frame(*f, 0);
+    const uint8_t* code = f->code.data();
+    const uint8_t* ip = code;
+    Value* globals = stack.data();
+    Value* base = globals;
+    Value* sp = base + f->slot_count;
+    const double* nums = m.nums.data();
+    std::string line;
+
+    try {
+        for (;;) {
+            switch ((Op)*ip++) {
+                case Op::NUM: (sp++)->num = nums[operand(ip)]; ip += 4; break;
+                case Op::TEXT: {
+                    Text* t = constants[operand(ip)];
+                    ip += 4;
+                    retain(t);
+                    (sp++)->text = t;
+                    break;
+                }
+                case Op::LOAD: *sp++ = base[operand(ip)]; ip += 4; break;
+                case Op::STORE: base[operand(ip)] = *--sp; ip += 4; break;
+                case Op::LOAD_TEXT: {
+                    Text* t = base[operand(ip)].text;
+                    ip += 4;
+                    retain(t);
+                    (sp++)->text = t;
+                    break;
+                }
+                case Op::STORE_TEXT: {
+                    Value& slot = base[operand(ip)];
+                    ip += 4;
+                    release(slot.text);
+                    slot = *--sp;
+                    break;
+                }
+                case Op::LOAD_GLOBAL: *sp++ = globals[operand(ip)]; ip += 4; break;
+                case Op::STORE_GLOBAL: globals[operand(ip)] = *--sp; ip += 4; break;
+                case Op::LOAD_GLOBAL_TEXT: {
+                    Text* t = globals[operand(ip)].text;
+                    ip += 4;
+                    retain(t);
+                    (sp++)->text = t;
+                    break;
+                }
+                case Op::STORE_GLOBAL_TEXT: {
+                    Value& slot = globals[operand(ip)];
+                    ip += 4;
+                    release(slot.text);
+                    slot = *--sp;
+                    break;
+                }
+                case Op::POP: --sp; break;
+                case Op::ADD: --sp; sp[-1].num += sp->num; break;
+                case Op::SUB: --sp; sp[-1].num -= sp->num; break;
+                case Op::MUL: --sp; sp[-1].num *= sp->num; break;
+                case Op::DIV:
+                    --sp;
+                    if (sp->num == 0) fail(*f, ip - 1, "Division by zero");
+                    sp[-1].num /= sp->num;
+                    break;
+                case Op::NEG: sp[-1].num = -sp[-1].num; break;
+                case Op::CONCAT: {
+                    --sp;
+                    Text* t = concat(sp[-1].text, sp->text);
+                    release(sp[-1].text);
+                    release(sp->text);
+                    sp[-1].text = t;
+                    break;
+                }
+                case Op::EQ: --sp; sp[-1].num = sp[-1].num == sp->num; break;
+                case Op::NE: --sp; sp[-1].num = sp[-1].num != sp->num; break;
+                case Op::GT: --sp; sp[-1].num = sp[-1].num > sp->num; break;
+                case Op::LT: --sp; sp[-1].num = sp[-1].num < sp->num; break;
+                case Op::GE: --sp; sp[-1].num = sp[-1].num >= sp->num; break;
+                case Op::LE: --sp; sp[-1].num = sp[-1].num <= sp->num; break;
+                case Op::COMPARE_TEXT: {
+                    OpKind op = (OpKind)operand(ip);
+                    ip += 4;
+                    --sp;
+                    int c = compare(sp[-1].text, sp->text);
+                    release(sp[-1].text);
+                    release(sp->text);
+                    bool r = false;
+                    switch (op) {
+                        case OpKind::EQ: r = c == 0; break;
+                        case OpKind::NE: r = c != 0; break;
+                        case OpKind::GT: r = c > 0; break;
+                        case OpKind::LT: r = c < 0; break;
+                        case OpKind::GE: r = c >= 0; break;
+                        case OpKind::LE: r = c <= 0; break;
+                        default: break;
+                    }
+                    sp[-1].num = r;
+                    break;
+                }
+                case Op::JUMP: ip = code + operand(ip); break;
+                case Op::JUMP_IF_FALSE:
+                    if ((--sp)->num == 0) ip = code + operand(ip);
+                    else ip += 4;
+                    break;
+                case Op::LOOP_TEST: {
+                    const Value* var = base + operand(ip);
+                    if (var[0].num <= var[1].num) ip += 8;
+                    else ip = code + operand(ip + 4);
+                    break;
+                }
+                case Op::LOOP_NEXT: {
+                    Value* var = base + operand(ip);
+                    var[0].num += 1;
+                    if (var[0].num <= var[1].num) ip = code + operand(ip + 4);
+                    else ip += 8;
+                    break;
+                }
+                case Op::CALL: {
+                    const Function& g = m.functions[operand(ip)];
+                    if (frames.size() >= MAX_CALL_DEPTH)
+                        fail(*f, ip - 1, "Too many nested calls (limit " + std::to_string(MAX_CALL_DEPTH) + ")");
+                    size_t callee = (size_t)(sp - stack.data()) - g.param_count;
+                    size_t caller = (size_t)(base - stack.data());
+                    size_t need = callee + g.slot_count + g.max_stack;
+                    if (need > stack.size()) {
+                        stack.resize(std::max(need, stack.size() * 2));
+                        globals = stack.data();
+                        base = globals + caller;
+                    }
+                    frames.push_back(Frame{f, ip + 4, caller});
+                    open_frame(g, callee);
+                    f = &g;
+                    code = ip = g.code.data();
+                    base = stack.data() + callee;
+                    sp = base + g.slot_count;
+                    break;
+                }
+                case Op::RETURN: {
+                    double result = sp[-1].num;
+                    close_frame(*f, (size_t)(base - stack.data()));
+                    sp = base;
+                    (sp++)->num = result;
+                    Frame caller = frames.back();
+                    frames.pop_back();
+                    f = caller.fn;
+                    code = f->code.data();
+                    ip = caller.ip;
+                    base = stack.data() + caller.base;
+                    break;
+                }
+                case Op::SHOW_NUM: {
+                    std::string s = format_num((--sp)->num);
+                    show(s.data(), s.size());
+                    break;
+                }
+                case Op::SHOW_FLAG:
+                    if ((--sp)->num != 0) show("true", 4);
+                    else show("false", 5);
+                    break;
+                case Op::SHOW_TEXT: {
+                    Text* t = (--sp)->text;
+                    show(t->data, t->size);
+                    release(t);
+                    break;
+                }
+                case Op::TAKE_NUM: {
+                    if (!read_line(line)) fail(*f, ip - 1, "No input left for take");
+                    if (!parse_num(line, sp->num)) fail(*f, ip - 1, "Invalid num input '" + line + "'");
+                    sp++;
+                    break;
+                }
+                case Op::TAKE_FLAG: {
+                    if (!read_line(line)) fail(*f, ip - 1, "No input left for take");
+                    if (!parse_flag(line, sp->num)) fail(*f, ip - 1, "Invalid flag input '" + line + "'");
+                    sp++;
+                    break;
+                }
+                case Op::TAKE_TEXT:
+                    if (!read_line(line)) fail(*f, ip - 1, "No input left for take");
+                    (sp++)->text = make_text(line.data(), line.size());
+                    break;
+                case Op::HALT:
+                    close_frame(*f, 0);
+                    out.flush();
+                    return;
+            }
+        }
+    } catch (...) {
+        // A runtime error leaves every open frame's texts behind
+        close_frame(*f, (size_t)(base - stack.data()));
+        for (size_t k = frames.size(); k-- > 0;)
+            close_frame(*frames[k].fn, frames[k].base);
+        frames.clear();
+        throw;
+    }
+}
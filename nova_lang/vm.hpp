@@ -0,0 +1,70 @@
+#ifndef NOVA_VM_HPP
+#define NOVA_VM_HPP
+
+#include <chrono>
+#include <cstdint>
+#include <istream>
+#include <ostream>
+#include <string>
+#include <vector>
+#include "bytecode.hpp"
+#include "diagnostics.hpp"
+
+// Calls nested deeper than this stop the program
+constexpr size_t MAX_CALL_DEPTH = 10000;
+
+class ExecutionError : public CompileError {
+public:
+    ExecutionError(const std::string& s, int l = 0, int c = 0, int len = 1) : CompileError("runtime", s, l, c, len) {}
+};
+
+// Runs a Module on one value stack: each call's frame is its slots (the
+// arguments are already in place) followed by its operands. Output is
+// flushed at least every FLUSH_INTERVAL and before input is read, so a
+// reader on a pipe sees it as the program runs.
+class VM {
+private:
+    struct Text;
+    union Value {
+        double num;
+        Text* text;
+    };
+    struct Frame {
+        const Function* fn;
+        const uint8_t* ip;
+        size_t base;
+    };
+    std::istream& in;
+    std::ostream& out;
+    std::vector<Value> stack;
+    std::vector<Frame> frames;
+    std::vector<Text*> constants;
+    Text* empty = nullptr;
+    std::chrono::steady_clock::time_point last_flush;
+
+    static Text* alloc_text(size_t size);
+    static Text* make_text(const char* data, size_t size);
+    static Text* concat(const Text* a, const Text* b);
+    static void retain(Text* t);
+    static void release(Text* t);
+    static int compare(const Text* a, const Text* b);
+    void open_frame(const Function& fn, size_t base);
+    void close_frame(const Function& fn, size_t base);
+    void show(const char* data, size_t size);
+    bool read_line(std::string& line);
+    [[noreturn]] void fail(const Function& fn, const uint8_t* at, const std::string& msg);
+public:
+    static constexpr std::chrono::milliseconds FLUSH_INTERVAL{50};
+
+    VM(std::istream& input, std::ostream& output) : in(input), out(output) {}
+    ~VM();
+    VM(const VM&) = delete;
+    VM& operator=(const VM&) = delete;
+    // Runs the program to its end; throws ExecutionError
+    void run(const Module& m);
+};
+
+// Text show writes for a num: 15 significant digits, "%.15g"
+std::string format_num(double v);
+
+#endif // NOVA_VM_HPP
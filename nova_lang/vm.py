@@ -0,0 +1,196 @@
+"""
+Stack VM for bytecode Modules (mirrors vm.hpp)
+
+One value stack holds every frame: a call's slots (the arguments are
+already in place) followed by its operands. Output and errors match the
+backend's; the backend is the one to use for speed.
+"""
+
+import re
+import sys
+
+from .bytecode import OPERANDS, Op
+from .diagnostics import CompileError
+
+# Calls nested deeper than this stop the program (MAX_CALL_DEPTH in vm.hpp)
+MAX_CALL_DEPTH = 10000
+
+# Optional sign, digits with an optional fraction, optional exponent
+_NUM_INPUT = re.compile(r"[+-]?([0-9]+\.?[0-9]*|\.[0-9]+)([eE][+-]?[0-9]+)?")
+
+
+class ExecutionError(CompileError):
+    stage = "runtime"
+
+
+def format_num(value):
+    """Text show writes for a num: 15 significant digits"""
+    if value != value:
+        return "nan"
+    return "%.15g" % value
+
+
+def _decode(fn):
+    """pc -> (op, operands...) for every instruction of a function"""
+    code = fn.code
+    decoded = {}
+    pc = 0
+    while pc < len(code):
+        op = code[pc]
+        n = OPERANDS[op]
+        decoded[pc] = (op,) + tuple(fn.operand(pc + 1 + 4 * i) for i in range(n))
+        pc += 1 + 4 * n
+    return decoded
+
+
+class VM:
+    """Runs a Module, reading take input from inp and writing show to out"""
+
+    def __init__(self, inp=None, out=None):
+        self.inp = sys.stdin if inp is None else inp
+        self.out = sys.stdout if out is None else out
+
+    def _fail(self, fn, pc, message):
+        self.out.flush()
+        span = fn.spans.get(pc)
+        if span is None:
+            raise ExecutionError(message)
+        raise ExecutionError(message, *span)
+
+    def _read_line(self, fn, pc):
+        # A prompt shown just before take must reach the reader first
+        self.out.flush()
+        line = self.inp.readline()
+        if not line:
+            self._fail(fn, pc, "No input left for take")
+        if line.endswith("\n"):
+            line = line[:-1]
+        if line.endswith("\r"):
+            line = line[:-1]
+        return line
+
+    @staticmethod
+    def _open_frame(stack, fn):
+        stack.extend([0.0] * (fn.slot_count - fn.param_count))
+        base = len(stack) - fn.slot_count
+        for s in fn.text_slots:
+            stack[base + s] = ""
+        return base
+
+    def run(self, module):
+        """Run the program to its end; raises ExecutionError"""
+        decoded = [_decode(fn) for fn in module.functions]
+        nums = module.nums
+        texts = module.texts
+        write = self.out.write
+        fn = module.functions[0]
+        code = decoded[0]
+        stack = []
+        base = self._open_frame(stack, fn)
+        frames = []
+        pc = 0
+        while True:
+            ins = code[pc]
+            op = ins[0]
+            at = pc
+            pc += 1 + 4 * (len(ins) - 1)
+            if op == Op.LOAD or op == Op.LOAD_TEXT:
+                stack.append(stack[base + ins[1]])
+            elif op == Op.STORE or op == Op.STORE_TEXT:
+                stack[base + ins[1]] = stack.pop()
+            elif op == Op.NUM:
+                stack.append(nums[ins[1]])
+            elif op == Op.TEXT:
+                stack.append(texts[ins[1]])
+            elif op == Op.LOAD_GLOBAL or op == Op.LOAD_GLOBAL_TEXT:
+                stack.append(stack[ins[1]])
+            elif op == Op.STORE_GLOBAL or op == Op.STORE_GLOBAL_TEXT:
+                stack[ins[1]] = stack.pop()
+            elif op == Op.LOOP_TEST:
+                if not stack[base + ins[1]] <= stack[base + ins[1] + 1]:
+                    pc = ins[2]
+            elif op == Op.LOOP_NEXT:
+                s = base + ins[1]
+                stack[s] += 1
+                if stack[s] <= stack[s + 1]:
+                    pc = ins[2]
+            elif op == Op.JUMP:
+                pc = ins[1]
+            elif op == Op.JUMP_IF_FALSE:
+                if stack.pop() == 0:
+                    pc = ins[1]
+            elif op == Op.ADD or op == Op.CONCAT:
+                b = stack.pop()
+                stack[-1] += b
+            elif op == Op.SUB:
+                b = stack.pop()
+                stack[-1] -= b
+            elif op == Op.MUL:
+                b = stack.pop()
+                stack[-1] *= b
+            elif op == Op.DIV:
+                b = stack.pop()
+                if b == 0:
+                    self._fail(fn, at, "Division by zero")
+                stack[-1] /= b
+            elif op == Op.NEG:
+                stack[-1] = -stack[-1]
+            elif op in _COMPARE:
+                b = stack.pop()
+                stack[-1] = 1.0 if _COMPARE[op](stack[-1], b) else 0.0
+            elif op == Op.COMPARE_TEXT:
+                b = stack.pop()
+                stack[-1] = 1.0 if _COMPARE_KIND[ins[1]](stack[-1], b) else 0.0
+            elif op == Op.POP:
+                stack.pop()
+            elif op == Op.CALL:
+                if len(frames) >= MAX_CALL_DEPTH:
+                    self._fail(fn, at, "Too many nested calls (limit "
+                               f"{MAX_CALL_DEPTH})")
+                frames.append((fn, code, pc, base))
+                fn = module.functions[ins[1]]
+                code = decoded[ins[1]]
+                base = self._open_frame(stack, fn)
+                pc = 0
+            elif op == Op.RETURN:
+                result = stack[-1]
+                del stack[base:]
+                stack.append(result)
+                fn, code, pc, base = frames.pop()
+            elif op == Op.SHOW_NUM:
+                write(format_num(stack.pop()) + "\n")
+            elif op == Op.SHOW_FLAG:
+                write("true\n" if stack.pop() != 0 else "false\n")
+            elif op == Op.SHOW_TEXT:
+                write(stack.pop() + "\n")
+            elif op == Op.TAKE_NUM:
+                line = self._read_line(fn, at)
+                text = line.strip(" \t")
+                if not _NUM_INPUT.fullmatch(text):
+                    self._fail(fn, at, f"Invalid num input '{line}'")
+                stack.append(float(text))
+            elif op == Op.TAKE_FLAG:
+                line = self._read_line(fn, at)
+                text = line.strip(" \t").lower()
+                if text not in ("true", "false"):
+                    self._fail(fn, at, f"Invalid flag input '{line}'")
+                stack.append(1.0 if text == "true" else 0.0)
+            elif op == Op.TAKE_TEXT:
+                stack.append(self._read_line(fn, at))
+            elif op == Op.HALT:
+                self.out.flush()
+                return
+            else:
+                raise ExecutionError(f"Unknown opcode {op}")
+
+
+_COMPARE = {
+    Op.EQ: lambda a, b: a == b, Op.NE: lambda a, b: a != b,
+    Op.GT: lambda a, b: a > b, Op.LT: lambda a, b: a < b,
+    Op.GE: lambda a, b: a >= b, Op.LE: lambda a, b: a <= b,
+}
+# COMPARE_TEXT operand: OpKind of the comparison (ast.hpp)
+_COMPARE_KIND = {
+    4: _COMPARE[Op.EQ], 5: _COMPARE[Op.NE], 6: _COMPARE[Op.GT],
+    7: _COMPARE[Op.LT], 8: _COMPARE[Op.GE], 9: _COMPARE[Op.LE],
+}
@@ -0,0 +1,27 @@
+"""
+Fixtures and import paths shared by the tests
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+# The nova_lang package, and the IDE's modules, which import each other
+# by bare name
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "ide"))
+
+# Qt aborts the process when it cannot reach a display; the tests never
+# need one
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture(scope="session")
+def app():
+    # One QApplication for the whole run: Qt allows a single application
+    # object per process, and widgets need the GUI one
+    QtWidgets = pytest.importorskip("PyQt6.QtWidgets")
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
@@ -0,0 +1,97 @@
+"""
+Headless batch checker (python -m nova_lang.batch)
+"""
+
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from nova_lang import batch
+from nova_lang.batch import check_in_process, main
+from test_parity import BACKEND
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run(args, capsys):
+    code = main(args)
+    lines = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return code, lines[:-1], lines[-1]["summary"]
+
+
+@pytest.fixture
+def programs(tmp_path):
+    good = tmp_path / "good"
+    bad = tmp_path / "nested" / "bad"
+    good.mkdir()
+    bad.mkdir(parents=True)
+    shutil.copy(ROOT / "tests" / "sample1.nova", good)
+    shutil.copy(ROOT / "tests" / "functions.nova", good)
+    shutil.copy(ROOT / "tests" / "err_type_mismatch.nova", bad)
+    (tmp_path / "notes.txt").write_text("not a program")
+    return tmp_path
+
+
+def test_reports_every_file_and_fails_on_errors(programs, capsys):
+    code, results, summary = run(["-j", "2", str(programs)], capsys)
+    assert code == 1
+    assert sorted(Path(r["file"]).name for r in results) == [
+        "err_type_mismatch.nova", "functions.nova", "sample1.nova"
+    ]
+    bad = next(r for r in results if not r["ok"])
+    assert bad["diagnostics"][0]["message"] == "Type mismatch: expected num"
+    assert (summary["files"], summary["passed"], summary["failed"]) == (3, 2, 1)
+    assert len(summary["slowest"]) == 3
+
+
+def test_passes_when_all_files_are_valid(programs, capsys):
+    code, results, summary = run([str(programs / "good")], capsys)
+    assert code == 0
+    assert all(r["ok"] for r in results)
+    assert summary["failed"] == 0
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+def test_backend_mode_matches_in_process(programs, capsys):
+    _, in_process, _ = run([str(programs)], capsys)
+    _, backend, _ = run(["--backend", BACKEND, "-j", "2", str(programs)], capsys)
+    key = lambda r: r["file"]  # noqa: E731
+    strip = lambda rs: [(r["file"], r["exit_code"], r["diagnostics"]) for r in sorted(rs, key=key)]  # noqa: E731
+    assert strip(in_process) == strip(backend)
+
+
+def test_no_files(tmp_path, capsys):
+    assert main([str(tmp_path)]) == 2
+
+
+def test_missing_path_fails(programs, capsys):
+    missing = programs / "doesnotexist"
+    code, results, summary = run([str(missing), str(programs / "good")], capsys)
+    assert code == 1
+    bad = next(r for r in results if r["file"] == str(missing))
+    assert not bad["ok"]
+    assert bad["diagnostics"][0]["stage"] == "driver"
+    assert (summary["files"], summary["failed"]) == (3, 1)
+
+
+def test_backend_that_cannot_run(programs, capsys):
+    backend = str(programs / "no-such-backend")
+    code, results, summary = run(["--backend", backend, str(programs / "good")], capsys)
+    assert code == 1 and summary["failed"] == 2
+    for result in results:
+        assert result["diagnostics"][0]["message"].startswith(
+            f"Cannot run backend {backend}"
+        )
+
+
+def test_front_end_failure_fails_only_that_file(programs, monkeypatch):
+    def broken(source):
+        raise RecursionError("maximum recursion depth exceeded")
+
+    monkeypatch.setattr(batch, "analyze", broken)
+    code, records, _ = check_in_process(str(programs / "good" / "sample1.nova"))
+    assert code == 1
+    assert records[0]["stage"] == "internal"
+    assert records[0]["message"].startswith("Analysis failed: RecursionError")
@@ -0,0 +1,64 @@
+"""
+On-disk compile result cache used by the IDE's Run command
+"""
+
+import os
+from pathlib import Path
+
+from compile_cache import CompileCache, CompileResult
+
+
+def make_backend(tmp_path):
+    backend = tmp_path / "Project2"
+    backend.write_bytes(b"backend v1")
+    return str(backend)
+
+
+def test_round_trip_and_counts(tmp_path):
+    backend = make_backend(tmp_path)
+    cache = CompileCache(str(tmp_path / "cache"))
+    key = CompileCache.make_key(b"start end", backend, ["--diagnostics=json"])
+
+    assert cache.get(key) is None
+    cache.put(key, CompileResult(1, "out", '{"severity":"error"}\n'))
+    result = cache.get(key)
+    assert (result.returncode, result.stdout, result.stderr) == (
+        1, "out", '{"severity":"error"}\n'
+    )
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_key_covers_source_backend_and_flags(tmp_path):
+    backend = make_backend(tmp_path)
+    key = CompileCache.make_key(b"start end", backend, ["--diagnostics=json"])
+    assert key != CompileCache.make_key(b"start  end", backend, ["--diagnostics=json"])
+    assert key != CompileCache.make_key(b"start end", backend, ["--diagnostics=text"])
+
+    # Rebuilding the backend changes its size or mtime
+    Path(backend).write_bytes(b"backend v2 (rebuilt)")
+    assert key != CompileCache.make_key(b"start end", backend, ["--diagnostics=json"])
+    assert CompileCache.make_key(b"start end", str(tmp_path / "missing"), []) is None
+
+
+def test_evicts_least_recently_used(tmp_path):
+    backend = make_backend(tmp_path)
+    cache = CompileCache(str(tmp_path / "cache"), max_bytes=350)
+    keys = [CompileCache.make_key(b"%d" % i, backend, []) for i in range(3)]
+    for age, key in enumerate(keys):
+        cache.put(key, CompileResult(0, "x" * 60, ""))
+        os.utime(cache._path(key), (1000 + age, 1000 + age))
+
+    # Reading the oldest entry makes it the most recently used
+    assert cache.get(keys[0]) is not None
+    cache.put(CompileCache.make_key(b"new", backend, []), CompileResult(0, "x" * 60, ""))
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+
+
+def test_key_covers_program_input(tmp_path):
+    backend = make_backend(tmp_path)
+    flags = ["--diagnostics=json", "--run"]
+    key = CompileCache.make_key(b"start end", backend, flags)
+    assert key == CompileCache.make_key(b"start end", backend, flags, b"")
+    assert key != CompileCache.make_key(b"start end", backend, flags, b"5\n")
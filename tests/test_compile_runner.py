@@ -0,0 +1,46 @@
+"""
+Runs of the backend in the background, superseded and cancelled
+"""
+
+import sys
+import time
+
+import pytest
+
+QtCore = pytest.importorskip("PyQt6.QtCore")
+
+from compile_runner import CompileRunner  # noqa: E402
+
+SLEEP = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+
+def wait_for(app, condition, timeout=10):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        app.processEvents()
+        time.sleep(0.01)
+    return condition()
+
+
+def test_superseded_run_is_dropped_and_freed(app):
+    runner = CompileRunner()
+    results = []
+    runner.finished.connect(
+        lambda rid, code, out, err: results.append((rid, out))
+    )
+    runner.start(SLEEP[0], SLEEP[1:])
+    runner.start(sys.executable, ["-c", "print('second')"])
+    assert wait_for(app, lambda: results)
+    assert results == [(2, "second\n")]
+    # The killed run is reaped from the event loop, not waited for
+    assert wait_for(app, lambda: not runner.findChildren(QtCore.QProcess))
+
+
+def test_cancel_frees_the_process(app):
+    runner = CompileRunner()
+    cancelled = []
+    runner.cancelled.connect(cancelled.append)
+    runner.start(SLEEP[0], SLEEP[1:])
+    runner.cancel()
+    assert cancelled == [1] and not runner.is_running()
+    assert wait_for(app, lambda: not runner.findChildren(QtCore.QProcess))
@@ -0,0 +1,90 @@
+"""
+Lazy documents behind the IDE's tabs, and highlighting shared between them
+"""
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+from document_tabs import DocumentTab  # noqa: E402
+from editor import CodeEditorWithLineNumbers  # noqa: E402
+from syntax_highlighter import NovaLangHighlighter, make_formats  # noqa: E402
+from themes import get_theme  # noqa: E402
+
+
+def test_text_until_shown_and_after_release(app):
+    tab = DocumentTab("/tmp/a.nova", "start\nshow 1\nend\n")
+    assert tab.document is None and tab.title() == "a.nova"
+
+    document = tab.materialize()
+    assert tab.materialize() is document and tab.text is None
+    document.setPlainText("start\nshow 2\nend\n")
+    assert tab.title() == "a.nova ●"
+
+    # Unsaved changes survive going back to text and being shown again
+    tab.release()
+    assert tab.document is None and tab.is_modified()
+    assert tab.get_text() == "start\nshow 2\nend\n"
+    assert tab.materialize().isModified()
+    assert DocumentTab().title() == "Untitled"
+
+
+def test_formats_are_shared_per_theme(app):
+    dark = get_theme("dark")['tokens']
+    assert make_formats(dark) is make_formats(dict(dark))
+    assert make_formats(dark) is not make_formats(get_theme("light")['tokens'])
+
+
+def test_documents_keep_their_highlighter(app):
+    editor = CodeEditorWithLineNumbers()
+    first = DocumentTab(text="start\nshow 1\nend\n").materialize()
+    second = DocumentTab(text="start\nnum x = 2\nend\n").materialize()
+    editor.show_document(first)
+    highlighter = editor.highlighter
+    assert first.findChild(NovaLangHighlighter) is highlighter
+
+    editor.show_document(second)
+    assert editor.highlighter is not highlighter
+    editor.apply_light_theme()
+    editor.show_document(first)
+    # Picked up again, with the theme chosen while it was hidden
+    assert editor.highlighter is highlighter
+    assert highlighter.formats is make_formats(get_theme("light")['tokens'])
+    editor.stop_live_analysis()
+
+
+def test_file_gone_before_its_tab_is_shown(app, tmp_path):
+    import novalang_ide
+
+    big = tmp_path / "big.nova"
+    lines = novalang_ide.LARGE_FILE_BYTES // 7
+    big.write_text("start\n" + "show 1\n" * lines + "end\n")
+    ide = novalang_ide.NovaLangIDE()
+    ide.editor.set_live_diagnostics(False)
+    ide.load_file(str(big), show=False)
+    index = ide.tab_index(ide.find_tab(str(big)))
+    big.unlink()
+
+    ide.tab_bar.setCurrentIndex(index)
+    assert ide.find_tab(str(big)) is None and ide.loader is None
+    assert ide.tab_bar.isEnabled()
+    assert "Could not open big.nova" in ide.status_label.text()
+    ide.close()
+
+
+def test_background_documents_are_bounded(app, monkeypatch):
+    import novalang_ide
+
+    monkeypatch.setattr(novalang_ide.NovaLangIDE, "LIVE_DOCUMENTS", 3)
+    monkeypatch.setattr(novalang_ide.NovaLangIDE, "LIVE_DOCUMENT_CHARS", 2500)
+    ide = novalang_ide.NovaLangIDE()
+    ide.editor.set_live_diagnostics(False)
+    text = "start\n" + "show 1\n" * 140 + "end\n"
+    for n in range(6):
+        ide.add_tab(novalang_ide.DocumentTab(f"/tmp/t{n}.nova", text))
+    background = [tab for tab in ide.tabs()
+                  if tab.document is not None and tab is not ide.current_tab]
+    # Three would fit the count; the character budget allows two
+    assert len(background) == 2
+    assert all(tab.last_shown >= ide.shown_count - 2 for tab in background)
+    ide.close()
@@ -0,0 +1,67 @@
+"""
+Background, atomic saving of IDE documents
+"""
+
+import os
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+
+from file_saver import FileSaver, write_atomic  # noqa: E402
+
+
+def test_write_replaces_file_and_keeps_mode(tmp_path):
+    path = tmp_path / "prog.nova"
+    path.write_text("old")
+    os.chmod(path, 0o640)
+    write_atomic(str(path), "start\nend\n")
+    assert path.read_text() == "start\nend\n"
+    assert os.stat(path).st_mode & 0o777 == 0o640
+    assert os.listdir(tmp_path) == ["prog.nova"]
+
+
+def test_write_through_symlink_and_new_file_mode(tmp_path):
+    target = tmp_path / "real" / "prog.nova"
+    target.parent.mkdir()
+    target.write_text("old")
+    link = tmp_path / "link.nova"
+    link.symlink_to(target)
+    write_atomic(str(link), "start\nend\n")
+    assert link.is_symlink() and target.read_text() == "start\nend\n"
+
+    new = tmp_path / "new.nova"
+    write_atomic(str(new), "start\nend\n")
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(new).st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_failed_write_leaves_file_alone(tmp_path):
+    path = tmp_path / "prog.nova"
+    path.write_text("old")
+    with pytest.raises(UnicodeEncodeError):
+        write_atomic(str(path), "\udc80")
+    assert path.read_text() == "old"
+    assert os.listdir(tmp_path) == ["prog.nova"]
+
+
+def test_saves_finish_in_order(tmp_path):
+    saver = FileSaver()
+    paths = [str(tmp_path / f"{n}.nova") for n in range(3)]
+    for n, path in enumerate(paths):
+        saver.save(path, f"v{n}")
+    saver.save(paths[0], "latest")
+    assert saver.wait(5)
+    assert [Path(p).read_text() for p in paths] == ["latest", "v1", "v2"]
+    saver.stop()
+
+
+def test_wait_reports_a_failed_save(tmp_path):
+    saver = FileSaver()
+    saver.save(str(tmp_path / "missing" / "prog.nova"), "start\nend\n")
+    assert not saver.wait(5)
+    # The failure is reported once
+    assert saver.wait(5)
+    saver.stop()
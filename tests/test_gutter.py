@@ -0,0 +1,38 @@
+"""
+Cached widths and number glyphs of the IDE's line-number gutter
+"""
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+from PyQt6.QtGui import QFont  # noqa: E402
+
+from gutter import GutterRenderer  # noqa: E402
+
+
+def test_width_grows_with_digit_count(app):
+    gutter = GutterRenderer(QFont("Courier New", 11))
+    one, two = gutter.width(1), gutter.width(10)
+    assert gutter.width(0) == gutter.width(9) == one
+    assert two - one == gutter.digit_width
+    assert gutter.width(999_999) < gutter.width(1_000_000)
+    assert gutter.width(1_000_000) == GutterRenderer.PADDING + 7 * gutter.digit_width
+
+
+def test_glyphs_are_cached_and_evicted(app, monkeypatch):
+    monkeypatch.setattr(GutterRenderer, "CACHED_GLYPHS", 3)
+    gutter = GutterRenderer(QFont("Courier New", 11))
+    first = gutter.glyph(7)
+    assert gutter.glyph(7) is first
+    assert first[0].text() == "7"
+    assert gutter.glyph(7, error=True)[0].text() == "✗ 7"
+    gutter.glyph(8)
+    gutter.glyph(7)
+    gutter.glyph(9)
+    # 7 was used last, so the error glyph went first
+    assert gutter.glyph(7) is first
+    assert len(gutter._glyphs) == 3
+
+    gutter.set_font(QFont("Courier New", 20))
+    assert gutter.glyph(7) is not first
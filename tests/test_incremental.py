@@ -0,0 +1,129 @@
+"""
+The incremental analyzer must report exactly what a whole-program
+analysis reports, before and after edits.
+"""
+
+import random
+from pathlib import Path
+
+import pytest
+
+from nova_lang import analyze
+from nova_lang import incremental
+from nova_lang.incremental import IncrementalAnalyzer, split_units
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROGRAMS = sorted((ROOT / "tests").glob("*.nova"))
+
+
+def records(diagnostics):
+    return [d.to_record() for d in diagnostics]
+
+
+@pytest.fixture
+def fine_units(monkeypatch):
+    # Split at every top-level statement so small programs get many units
+    monkeypatch.setattr(incremental, "GROUP_MASK", 0)
+
+
+def generate_program(funcs, statements):
+    lines = ["start"]
+    for f in range(funcs):
+        lines += [f"func f{f}(a, b) {{", "    num t = a * b + 1", "    back t", "}"]
+    for i in range(statements):
+        lines.append(f"num v{i} = f{i % funcs}({i}, 2) + 3")
+    lines.append("end")
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+def test_matches_full_analysis(program, fine_units):
+    source = program.read_text()
+    assert records(IncrementalAnalyzer().analyze(source)) == records(analyze(source))
+
+
+def test_random_edits_match_full_analysis(fine_units):
+    rnd = random.Random(7)
+    sources = [p.read_text() for p in PROGRAMS]
+    pieces = [line for s in sources for line in s.split("\n")]
+    inc = IncrementalAnalyzer()
+    for source in sources:
+        lines = source.split("\n")
+        for _ in range(150):
+            edited = list(lines)
+            k = rnd.randrange(len(edited))
+            op = rnd.randrange(4)
+            if op == 0:
+                del edited[k]
+            elif op == 1:
+                edited.insert(k, rnd.choice(pieces))
+            elif op == 2 and edited[k]:
+                c = rnd.randrange(len(edited[k]))
+                edited[k] = edited[k][:c] + edited[k][c + 1:]
+            else:
+                edited[k] += rnd.choice(' {}()"x+1=')
+            text = "\n".join(edited)
+            assert records(inc.analyze(text)) == records(analyze(text)), text
+            if rnd.random() < 0.5 and len(edited) > 1:
+                lines = edited
+
+
+def test_units_follow_top_level_structure(fine_units):
+    source = "start\nnum a = 1\nfunc f(x) {\n    show x\n    back x\n}\nwhen a > 0 {\n}\nelse {\n}\nend\n"
+    units = [source[s:e] for s, e, _ in split_units(source)]
+    assert units == [
+        "start\n", "num a = 1\n", "func f(x) {\n    show x\n    back x\n}\n",
+        "when a > 0 {\n}\nelse {\n}\n", "end\n"
+    ]
+
+
+def test_only_changed_units_are_reparsed():
+    source = generate_program(20, 2000)
+    inc = IncrementalAnalyzer()
+    assert inc.analyze(source) == []
+    units = inc.stats['units']
+    assert inc.stats['parsed'] == units
+
+    # The edited line's unit, and the one before it if the edit moved
+    # the boundary between them
+    edited = source.replace("num v1000 =", "num w1000 =")
+    assert inc.analyze(edited) == []
+    assert 1 <= inc.stats['parsed'] <= 2
+    assert inc.stats['checked'] == inc.stats['parsed']
+
+
+def test_signature_change_rechecks_callers():
+    source = generate_program(20, 2000)
+    inc = IncrementalAnalyzer(max_errors=0)
+    inc.analyze(source)
+
+    body = "num t = a * b + 1\n    back t\n}\nfunc f4("
+    edited = source.replace(body, "num t = a * b + 2\n    back t\n}\nfunc f4(")
+    assert inc.analyze(edited) == []
+    assert inc.stats['checked'] == 1
+
+    edited = source.replace("func f3(a, b)", "func f3(a, b, c)")
+    diagnostics = inc.analyze(edited)
+    assert records(diagnostics) == records(analyze(edited, max_errors=0))
+    assert len(diagnostics) == 2000 // 20
+    assert "incorrect number of arguments" in diagnostics[0].message
+    assert inc.stats['parsed'] == 1
+    # The edited function and the units that call it
+    callers = [s for s, e, _ in split_units(edited) if "f3(" in edited[s:e]]
+    assert inc.stats['checked'] == len(callers)
+
+
+def test_error_limit_matches_full_analysis(fine_units):
+    source = generate_program(3, 60).replace("+ 3\n", "+ q\n")
+    for limit in (0, 1, 5, 20):
+        diagnostics = IncrementalAnalyzer(max_errors=limit).analyze(source)
+        assert records(diagnostics) == records(analyze(source, limit))
+    assert len(diagnostics) == 21 and diagnostics[-1].severity == "note"
+
+
+def test_error_lines_are_absolute():
+    source = generate_program(5, 500).replace("num v400 = ", "num v400 = q + ")
+    diagnostics = IncrementalAnalyzer().analyze(source)
+    assert records(diagnostics) == records(analyze(source))
+    assert diagnostics[0].line == 1 + 5 * 4 + 400 + 1
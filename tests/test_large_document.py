@@ -0,0 +1,46 @@
+"""
+Line addressing of memory-mapped files in the IDE's large-document view
+"""
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+from large_document import MappedDocument  # noqa: E402
+
+
+def open_mapped(tmp_path, data, monkeypatch, chunk=8):
+    # Tiny chunks put line breaks on and across every chunk boundary
+    monkeypatch.setattr(MappedDocument, "CHUNK", chunk)
+    path = tmp_path / "big.nova"
+    path.write_bytes(data)
+    return MappedDocument(str(path))
+
+
+def test_every_line_across_chunks(tmp_path, monkeypatch):
+    lines = [f"show {'x' * (n % 13)}{n}" for n in range(500)]
+    doc = open_mapped(tmp_path, "\n".join(lines).encode(), monkeypatch)
+    assert doc.line_count == 500
+    assert [doc.line(n) for n in range(500)] == lines
+    # In any order, past the cached chunks
+    assert [doc.line(n) for n in range(499, -1, -7)] == lines[::-7]
+    doc.close()
+
+
+def test_line_breaks_and_bad_bytes(tmp_path, monkeypatch):
+    doc = open_mapped(tmp_path, b"start\r\n\n\xffend\n", monkeypatch)
+    assert [doc.line(n) for n in range(doc.line_count)] == [
+        "start", "", "�end", ""
+    ]
+    assert doc.source_bytes() == b"start\r\n\n\xffend\n"
+    doc.close()
+
+
+def test_empty_file_and_long_lines(tmp_path, monkeypatch):
+    doc = open_mapped(tmp_path, b"", monkeypatch)
+    assert (doc.line_count, doc.line(0)) == (1, "")
+    doc.close()
+    monkeypatch.setattr(MappedDocument, "MAX_LINE_BYTES", 16)
+    doc = open_mapped(tmp_path, b"a" * 100 + b"\nb", monkeypatch)
+    assert doc.line(0) == "a" * 16 and doc.line(1) == "b"
+    doc.close()
@@ -0,0 +1,41 @@
+"""
+Background as-you-type analysis in the IDE
+"""
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+
+from live_analysis import LiveAnalyzer  # noqa: E402
+
+
+def results(app, analyzer, revision, text):
+    got = []
+    analyzer.finished.connect(lambda rev, diags: got.append((rev, diags)))
+    analyzer.submit(revision, text)
+    for _ in range(1000):
+        app.processEvents()
+        if got:
+            break
+        analyzer._thread.join(0.01)
+    return got
+
+
+def test_failed_run_is_reported_and_the_worker_survives(app, monkeypatch):
+    analyzer = LiveAnalyzer()
+    analyze = analyzer._analyze
+
+    def fragile(revision, text):
+        if "boom" in text:
+            raise RecursionError("maximum recursion depth exceeded")
+        return analyze(revision, text)
+
+    monkeypatch.setattr(analyzer, "_analyze", fragile)
+    [(_, diagnostics)] = results(app, analyzer, 1, "start\nnum boom = 1\nend\n")
+    assert [(d.stage, d.message) for d in diagnostics] == [
+        ("internal", "Analysis failed: RecursionError("
+         "'maximum recursion depth exceeded')"),
+    ]
+    [(revision, diagnostics)] = results(app, analyzer, 2, "start\nshow y\nend\n")
+    assert revision == 2 and diagnostics[0].stage == "semantic"
+    analyzer.stop()
@@ -0,0 +1,132 @@
+"""
+Native builds: the emitted C, and executables that behave like --run and
+are reused from the cache while the program and flags stay the same
+"""
+
+import subprocess
+
+import pytest
+
+from nova_lang import CGenerator, Lexer, Parser, analyze
+from nova_lang.cgen import c_number, c_string
+from nova_lang.native import NativeCache, find_c_compiler
+from test_parity import BACKEND
+from test_vm import PROGRAMS, STDIN, run_python
+
+needs_cc = pytest.mark.skipif(find_c_compiler() is None,
+                              reason="no C compiler")
+
+RUNTIME_ERRORS = [
+    ("num z = 0\nshow 1 / z", ""),
+    ("num n = 0\ntake n", ""),
+    ("num n = 0\ntake n", "0x10\n"),
+    ("flag f = true\ntake f", "yes\n"),
+    ("func f(n) {\n    back f(n + 1)\n}\nshow f(0)", ""),
+]
+
+
+def generate(source):
+    assert analyze(source) == []
+    return CGenerator().generate(Parser(Lexer(source).tokenize()).parse())
+
+
+def run_native(cache, source, stdin, opt_level=0):
+    build = cache.build(source, opt_level)
+    assert build.diagnostics == []
+    result = subprocess.run([build.path, "--diagnostics=json"],
+                            capture_output=True, text=True, input=stdin)
+    return result.returncode, result.stdout, result.stderr
+
+
+def test_literals_read_back_exactly():
+    assert c_number(0.1) == "0.10000000000000001"
+    assert c_number(3) == "3.0"
+    assert c_number(-2) == "(-2.0)"
+    assert c_string(b'a"\\\n?') == '"a\\"\\\\\\012\\?"'
+
+
+def test_operands_keep_their_order():
+    # C may evaluate either operand first; the call must run before the
+    # division can fail
+    code = generate("start\nfunc f() {\n    show 1\n    back 2\n}\n"
+                    "num z = 0\nshow f() + 1 / z\nend")
+    assert "double t1 = f1_f(&nv_sites[0]);" in code
+    assert "(t1 + nv_div(1.0, g0_z, &nv_sites[1]))" in code
+
+
+@needs_cc
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+@pytest.mark.parametrize("level", [0, 2])
+def test_same_output_as_vm(program, level, tmp_path, capsys, monkeypatch):
+    cache = NativeCache(str(tmp_path))
+    expected = run_python(["--diagnostics=json", f"-O{level}", "--run",
+                           str(program)], STDIN, capsys, monkeypatch)
+    assert run_native(cache, program.read_text(), STDIN, level) == expected
+
+
+@needs_cc
+@pytest.mark.parametrize("body, stdin", RUNTIME_ERRORS)
+def test_runtime_errors_match_vm(body, stdin, tmp_path, capsys, monkeypatch):
+    program = tmp_path / "fail.nova"
+    program.write_text("start\nshow 1\n" + body + "\nend\n")
+    expected = run_python(["--diagnostics=json", "--run", str(program)],
+                          stdin, capsys, monkeypatch)
+    assert expected[0] == 1
+    cache = NativeCache(str(tmp_path / "cache"))
+    assert run_native(cache, program.read_text(), stdin) == expected
+
+
+@needs_cc
+def test_unchanged_program_is_not_rebuilt(tmp_path, monkeypatch):
+    source = "start\nshow 6 * 7\nend\n"
+    first = NativeCache(str(tmp_path)).build(source)
+    assert not first.cached and "cc_ms" in first.timing
+    # A hit never reaches the front end or the compiler
+    monkeypatch.setattr("nova_lang.native.Lexer", None)
+    monkeypatch.setattr(NativeCache, "_compile", None)
+    hit = NativeCache(str(tmp_path)).build(source)
+    assert hit.cached and hit.path == first.path
+    assert set(hit.timing) == {"lookup_ms"}
+    assert subprocess.run([hit.path], capture_output=True,
+                          text=True).stdout == "42\n"
+
+
+def test_key_covers_source_level_and_flags(tmp_path):
+    cache = NativeCache(str(tmp_path), compiler=["cc"], cflags=["-O2"])
+    key = cache.make_key(b"start\nend\n", 0)
+    assert key == cache.make_key(b"start\nend\n", 0)
+    assert key != cache.make_key(b"start\nend \n", 0)
+    assert key != cache.make_key(b"start\nend\n", 2)
+    other = NativeCache(str(tmp_path), compiler=["cc"], cflags=["-O1"])
+    assert key != other.make_key(b"start\nend\n", 0)
+
+
+def test_key_covers_the_code_generator(tmp_path, monkeypatch):
+    cgen = tmp_path / "cgen.py"
+    cgen.write_text("# version 1\n")
+    monkeypatch.setattr("nova_lang.native.GENERATOR_SOURCES", [str(cgen)])
+    cache = NativeCache(str(tmp_path), compiler=["cc"], cflags=["-O2"])
+    key = cache.make_key(b"start\nend\n", 0)
+    cgen.write_text("# version 2\n")
+    assert key != cache.make_key(b"start\nend\n", 0)
+
+
+def test_errors_are_reported_without_compiling(tmp_path):
+    cache = NativeCache(str(tmp_path), compiler=["false"])
+    build = cache.build("start\nshow x\nend\n")
+    assert build.path is None
+    assert [(d.stage, d.message) for d in build.diagnostics] == [
+        ("semantic", "Use of undeclared variable 'x'")
+    ]
+    build = cache.build("start\nshow 1\nend\n")
+    assert build.path is None and build.diagnostics[0].stage == "native"
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+@pytest.mark.parametrize("level", ["-O0", "-O2"])
+def test_matches_backend(program, level, capsys, monkeypatch):
+    args = [level, "--emit=c", str(program)]
+    result = subprocess.run([BACKEND] + args, capture_output=True, text=True)
+    code, out, err = run_python(args, "", capsys, monkeypatch)
+    assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
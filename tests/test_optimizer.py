@@ -0,0 +1,116 @@
+"""
+Optimizer passes: what each -O level rewrites, and that optimized programs
+show the same output and fail at the same place as unoptimized ones
+"""
+
+import io
+import subprocess
+
+import pytest
+
+from nova_lang import (
+    Compiler, ExecutionError, Lexer, Optimizer, Parser, VM, analyze
+)
+from nova_lang.optimizer import count_nodes
+from test_parity import BACKEND
+from test_vm import PROGRAMS, STDIN, run_python
+
+SQUARE = """start
+func sq(n) {
+    back n * n
+}
+num side = 3
+show sq(side) + 1
+show 1 / 0
+end"""
+
+
+def optimize(source, level):
+    assert analyze(source) == []
+    program = Parser(Lexer(source).tokenize()).parse()
+    report = Optimizer(level).run(program)
+    return program, report
+
+
+def execute(source, level, stdin=""):
+    program, _ = optimize(source, level)
+    out = io.StringIO()
+    try:
+        VM(io.StringIO(stdin), out).run(Compiler().compile(program))
+    except ExecutionError as e:
+        return out.getvalue(), (e.message, e.line, e.col)
+    return out.getvalue(), None
+
+
+def test_report_counts_each_pass():
+    program, report = optimize(SQUARE, 2)
+    assert (report.inlined_calls, report.propagated_uses,
+            report.removed_decls, report.folded_exprs) == (1, 2, 1, 2)
+    assert (report.nodes_before, report.nodes_after) == (15, 10)
+    assert count_nodes(program.statements) == 10
+
+
+def test_level_one_skips_inline_and_propagate():
+    _, report = optimize(SQUARE, 1)
+    assert (report.inlined_calls, report.propagated_uses) == (0, 0)
+    assert report.nodes_before == report.nodes_after
+
+
+def test_division_by_zero_is_left_for_the_vm():
+    assert execute(SQUARE, 2) == ("10\n", ("Division by zero", 7, 8))
+    assert execute(SQUARE, 2) == execute(SQUARE, 0)
+
+
+def test_dead_code_that_defines_a_function_is_kept():
+    source = """start
+when 1 > 2 {
+    func seven() {
+        back 7
+    }
+}
+loop i = 2 to 1 {
+    show i
+}
+show seven()
+end"""
+    _, report = optimize(source, 2)
+    assert (report.removed_arms, report.removed_loops) == (0, 1)
+    assert execute(source, 2) == ("7\n", None)
+
+
+def test_no_propagation_into_function_that_outlives_declaration():
+    # At -O0 the declaration in the else block never runs, so f sees 0
+    source = """start
+when 1 < 2 {
+} else {
+    num d = 5
+    func f() {
+        back 1 / d
+    }
+}
+show f()
+end"""
+    assert execute(source, 2) == ("", ("Division by zero", 6, 16))
+    assert execute(source, 2) == execute(source, 0)
+
+
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+@pytest.mark.parametrize("level", [1, 2])
+def test_same_output_as_unoptimized(program, level):
+    source = program.read_text()
+    assert execute(source, level, STDIN) == execute(source, 0, STDIN)
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+@pytest.mark.parametrize("args", [
+    ["-O2", "--emit=passes,bytecode"], ["-O1", "--emit=passes"],
+    ["-O2", "--diagnostics=json", "--run"],
+], ids=["O2", "O1", "run"])
+def test_matches_backend(program, args, capsys, monkeypatch):
+    args = args + [str(program)]
+    result = subprocess.run(
+        [BACKEND] + args, capture_output=True, text=True, input=STDIN
+    )
+    code, out, err = run_python(args, STDIN, capsys, monkeypatch)
+    assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
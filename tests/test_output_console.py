@@ -0,0 +1,71 @@
+"""
+Escaping, bounds and the log file of the IDE's streaming output console
+"""
+
+import pytest
+
+pytest.importorskip("PyQt6.QtWidgets")
+
+from PyQt6.QtGui import QFont  # noqa: E402
+
+from output_console import OutputConsole  # noqa: E402
+
+
+def test_output_is_plain_text(app):
+    console = OutputConsole()
+    console.begin()
+    console.write("<b>bold</b> & <pre>")
+    console.write("</pre>\n")
+    console.write_message("✓ Program Finished", "#4ec9b0")
+    assert console.toPlainText() == (
+        "<b>bold</b> & <pre></pre>\n✓ Program Finished\n"
+    )
+
+
+def test_only_the_last_lines_are_kept(app, monkeypatch):
+    monkeypatch.setattr(OutputConsole, "PENDING_CHARS", 100)
+    console = OutputConsole(max_lines=50)
+    console.begin()
+    for n in range(1000):
+        console.write(f"{n}\n")
+        if n % 97 == 0:
+            console.flush()
+        assert console.pending_chars <= 100 + 50 * OutputConsole.MAX_LINE_CHARS
+    console.write_message("done", "#ffffff")
+    lines = console.toPlainText().split("\n")
+    assert console.blockCount() == 50
+    assert lines[-3:] == ["999", "done", ""]
+    assert lines[0] == "952"
+
+
+def test_trimming_keeps_message_formats(app):
+    console = OutputConsole(max_lines=5)
+    console.begin()
+    console.write("a\nb\n")
+    console.write_message("error", "#ff6b6b")
+    console.write("c\nd\n")
+    console.flush()
+    assert console.toPlainText() == "b\nerror\nc\nd\n"
+    block = console.document().findBlockByNumber(1)
+    fmt = block.begin().fragment().charFormat()
+    assert fmt.foreground().color().name() == "#ff6b6b"
+    assert fmt.fontWeight() == QFont.Weight.Bold
+
+
+def test_long_lines_wrap_and_the_log_keeps_everything(app, tmp_path, monkeypatch):
+    monkeypatch.setattr(OutputConsole, "MAX_LINE_CHARS", 8)
+    log = tmp_path / "out.log"
+    console = OutputConsole()
+    console.set_log_path(str(log))
+    console.begin()
+    console.write("abcde")
+    console.flush()
+    console.write("fghijklmnopqrst\nuv")
+    console.write_message("✗ Program Stopped", "#ff6b6b")
+    console.end()
+    assert console.toPlainText() == (
+        "abcdefgh\nijklmnop\nqrst\nuv\n✗ Program Stopped\n"
+    )
+    assert log.read_text(encoding="utf-8") == (
+        "abcdefghijklmnopqrst\nuv\n✗ Program Stopped\n"
+    )
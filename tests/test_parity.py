@@ -0,0 +1,253 @@
+"""
+Parity tests: the in-process Python front end must report exactly what
+the C++ backend reports for every program in tests/.
+
+The backend is looked up in $NOVA_BACKEND, then next to the IDE and in
+nova_lang/; the backend comparisons are skipped when none is built.
+"""
+
+import io
+import json
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from nova_lang import (
+    DEFAULT_MAX_ERRORS, Diagnostic, Lexer, LexerError, Parser, SemanticAnalyzer,
+    analyze
+)
+from nova_lang.incremental import IncrementalAnalyzer
+from nova_lang.main import main
+from nova_lang.token import TokenType
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROGRAMS = sorted((ROOT / "tests").glob("*.nova"))
+ARGS = ["--diagnostics=json", "--emit=tokens,ast,symbols"]
+
+
+def find_backend():
+    candidates = [os.environ.get("NOVA_BACKEND")]
+    for folder in ("ide", "nova_lang"):
+        for name in ("Project2.exe", "Project2"):
+            candidates.append(str(ROOT / folder / name))
+    for path in candidates:
+        if path and os.path.isfile(path) and os.access(path, os.X_OK):
+            return path
+    return None
+
+
+BACKEND = find_backend()
+
+
+def run_python(args, capsys):
+    code = main(["nova_lang"] + args)
+    captured = capsys.readouterr()
+    return code, captured.out, captured.err
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+def test_matches_backend(program, capsys):
+    result = subprocess.run(
+        [BACKEND] + ARGS + [str(program)], capture_output=True, text=True
+    )
+    code, out, err = run_python(ARGS + [str(program)], capsys)
+    assert out == result.stdout
+    assert err == result.stderr
+    assert code == result.returncode
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+def test_compact_lexer_matches_backend(program, capsys):
+    result = subprocess.run(
+        [BACKEND, "--lexer=compact"] + ARGS + [str(program)],
+        capture_output=True, text=True
+    )
+    code, out, err = run_python(ARGS + [str(program)], capsys)
+    assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+def test_stop_after_matches_backend(capsys):
+    program = str(ROOT / "tests" / "err_type_mismatch.nova")
+    for stage in ("lex", "parse"):
+        args = ["-v", "--emit=ast", f"--stop-after={stage}", program]
+        result = subprocess.run([BACKEND] + args, capture_output=True, text=True)
+        code, out, err = run_python(args, capsys)
+        assert code == 0
+        assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+def test_max_errors_matches_backend(capsys):
+    for name in ("syntax_errors.nova", "type_errors.nova"):
+        program = str(ROOT / "tests" / name)
+        for limit in ("0", "1", "3"):
+            args = [f"--max-errors={limit}", program]
+            result = subprocess.run([BACKEND] + args, capture_output=True, text=True)
+            code, out, err = run_python(args, capsys)
+            assert code == 1
+            assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+def test_verbose_and_text_match_backend(capsys):
+    program = str(ROOT / "tests" / "err_type_mismatch.nova")
+    result = subprocess.run(
+        [BACKEND, "-v", program], capture_output=True, text=True
+    )
+    code, out, err = run_python(["-v", program], capsys)
+    assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+def test_backend_records_decode_like_live_diagnostics():
+    # The IDE shows both, so the same error must get the same span
+    for name in ("syntax_errors.nova", "type_errors.nova", "err_missing_back.nova"):
+        program = ROOT / "tests" / name
+        result = subprocess.run(
+            [BACKEND, "--diagnostics=json", str(program)],
+            capture_output=True, text=True
+        )
+        decoded = [Diagnostic.from_record(json.loads(line))
+                   for line in result.stderr.splitlines()]
+        assert [d.to_record() for d in decoded] == [
+            d.to_record() for d in analyze(program.read_text())
+        ]
+
+
+def test_valid_programs_have_no_diagnostics():
+    for name in ("sample1.nova", "functions.nova", "flags.nova"):
+        source = (ROOT / "tests" / name).read_text()
+        assert analyze(source) == []
+
+
+def test_error_programs_report_one_error():
+    for program in PROGRAMS:
+        if program.name.startswith("err_"):
+            diags = analyze(program.read_text())
+            assert len(diags) == 1 and diags[0].is_error(), program.name
+
+
+def test_keywords_are_case_insensitive():
+    tokens = Lexer("START Show \"x\" End").tokenize()
+    assert [t.type for t in tokens] == [
+        TokenType.START, TokenType.SHOW, TokenType.STRING, TokenType.END,
+        TokenType.EOF_T
+    ]
+    assert tokens[0].value == "start"
+
+
+def syntax_errors(source, max_errors=DEFAULT_MAX_ERRORS):
+    parser = Parser(Lexer(source).tokenize(), max_errors)
+    parser.parse()
+    return [d.message for d in parser.log.diagnostics()]
+
+
+def test_stage_errors():
+    with pytest.raises(LexerError):
+        Lexer("start ~ end").tokenize()
+    parser = Parser(Lexer("start show end").tokenize())
+    program = parser.parse()
+    assert [d.stage for d in parser.log.errors] == ["parser"]
+    sem = SemanticAnalyzer()
+    sem.analyze(Parser(Lexer("start show 1 + \"a\" end").tokenize()).parse())
+    assert [d.stage for d in sem.log.errors] == ["semantic"]
+    assert program.statements == []
+
+
+def test_deep_nesting_is_a_parser_error():
+    source = "start show " + "(" * 5000 + "1" + ")" * 5000 + " end"
+    assert syntax_errors(source) == ["Nesting too deep"]
+    # Flat chains are parsed in a loop but checked recursively
+    source = "start\nnum x = " + "+".join(["1"] * 1000) + "\nend"
+    assert [d.message for d in analyze(source)] == ["Nesting too deep"]
+    assert [d.message for d in IncrementalAnalyzer().analyze(source)] == [
+        "Nesting too deep"
+    ]
+
+
+def test_recovery_resumes_at_next_statement():
+    source = (
+        "start\n"
+        "num a = \n"              # missing expression, resumes at 'show'
+        "show a\n"
+        "when a { show ) }\n"     # inside a block, resumes at '}'
+        "func f() { x y back 1 }\n"
+        "}\n"                     # stray brace
+        "end"
+    )
+    assert syntax_errors(source) == [
+        "Unexpected token in expression: 'show'",
+        "Unexpected token in expression: ')'",
+        "Expected assign or func-call after 'x'",
+        "Expected END, found '}'",
+    ]
+
+
+def test_semantic_errors_are_not_repeated():
+    source = "start\nnum a = q + 1\nshow -a\nshow a == \"s\"\nshow f(a)\nend"
+    assert [d.message for d in analyze(source)] == [
+        "Use of undeclared variable 'q'",
+        "Type mismatch in comparison",
+        "Call to undeclared function 'f'",
+    ]
+
+
+def test_error_limit():
+    source = "start\n" + "show x\n" * 30 + "end"
+    diags = analyze(source)
+    assert len(diags) == DEFAULT_MAX_ERRORS + 1
+    assert diags[-1].severity == "note"
+    assert diags[-1].message == f"Too many errors, stopping after {DEFAULT_MAX_ERRORS}"
+    assert len(analyze(source, max_errors=0)) == 30
+    assert syntax_errors("start\n" + "show )\n" * 5 + "end", 2) == [
+        "Unexpected token in expression: ')'",
+        "Unexpected token in expression: ')'",
+        "Too many errors, stopping after 2",
+    ]
+
+
+def test_nesting_limit():
+    from nova_lang.parser import MAX_NESTING
+
+    def parens(n):
+        return "start show " + "(" * n + "1" + ")" * n + " end"
+
+    def blocks(n):
+        return "start\n" + "when 1 > 0 {\n" * n + "show 1\n" + "}\n" * n + "end"
+
+    def chain(n):
+        return "start show " + " + ".join(["1"] * (n + 1)) + " end"
+
+    for build in (parens, blocks, chain):
+        assert syntax_errors(build(MAX_NESTING)) == []
+        assert syntax_errors(build(MAX_NESTING + 1)) == ["Nesting too deep"]
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+def test_deep_nesting_matches_backend(tmp_path, capsys):
+    sources = {
+        "parens": "start show " + "(" * 100000 + "1" + ")" * 100000 + " end",
+        "minus": "start show " + "-" * 100000 + "1 end",
+        "chain": "start show " + "+".join(["1"] * 100000) + " end",
+        "blocks": "start\n" + "loop i = 1 to 2 {\n" * 5000 + "}\n" * 5000 + "end",
+    }
+    for name, source in sources.items():
+        program = tmp_path / f"{name}.nova"
+        program.write_text(source)
+        args = ["--diagnostics=json", str(program)]
+        result = subprocess.run([BACKEND] + args, capture_output=True, text=True)
+        code, out, err = run_python(args, capsys)
+        assert code == 1 and "Nesting too deep" in err
+        assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+
+
+def test_missing_file(capsys):
+    code, out, err = run_python(["missing.nova"], capsys)
+    assert code == 1
+    assert err == "Error: Cannot open file missing.nova\n"
@@ -0,0 +1,198 @@
+"""
+Bytecode compiler and VM: program output, runtime errors, and parity of
+--run and --emit=bytecode with the C++ backend
+"""
+
+import io
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from nova_lang import (
+    CodegenError, Compiler, ExecutionError, Lexer, Parser, VM, analyze
+)
+from nova_lang.main import main, read_stdin_source
+from nova_lang.vm import MAX_CALL_DEPTH
+from test_parity import BACKEND
+
+ROOT = Path(__file__).resolve().parent.parent
+
+PROGRAMS = [ROOT / "tests" / name
+            for name in ("sample1.nova", "functions.nova", "flags.nova")]
+STDIN = "Ada\n"
+
+
+def execute(source, stdin=""):
+    assert analyze(source) == []
+    module = Compiler().compile(Parser(Lexer(source).tokenize()).parse())
+    out = io.StringIO()
+    VM(io.StringIO(stdin), out).run(module)
+    return out.getvalue()
+
+
+def run_python(args, stdin, capsys, monkeypatch):
+    monkeypatch.setattr(sys, "stdin", io.StringIO(stdin))
+    code = main(["nova_lang"] + args)
+    captured = capsys.readouterr()
+    return code, captured.out, captured.err
+
+
+def test_sample_output():
+    source = (ROOT / "tests" / "sample1.nova").read_text()
+    assert execute(source, STDIN).splitlines() == [
+        "Hello, NovaLang!", "Count is greater than 5",
+        "1", "2", "3", "4", "5", "12", "Hello, Ada",
+    ]
+
+
+def test_loops_calls_and_globals():
+    source = """start
+num total = 0
+func add(n) {
+    total = total + n
+    back total
+}
+loop i = 1 to 4 {
+    when i == 3 { break }
+    num ignored = add(i * 10)
+}
+loop i = 5 to 1 { show i }
+func fact(n) {
+    num r = 1
+    when n > 1 { r = n * fact(n - 1) }
+    back r
+}
+show total
+show fact(20)
+show 1 / 3
+show 2 > 1
+show "b" > "a" + "z"
+end"""
+    assert execute(source).splitlines() == [
+        "30", "2.43290200817664e+18", "0.333333333333333", "true", "true"
+    ]
+
+
+def test_take_parses_num_and_flag():
+    source = """start
+num n = 0
+flag f = false
+text t = ""
+take n
+take f
+take t
+show n * 2
+show f
+show t
+end"""
+    assert execute(source, " -1.5e1 \nTRUE\r\n  x \n") == "-30\ntrue\n  x \n"
+
+
+@pytest.mark.parametrize("body, stdin, message, column", [
+    ("num z = 0\nshow 1 / z", "", "Division by zero", 8),
+    ("num n = 0\ntake n", "", "No input left for take", 6),
+    ("num n = 0\ntake n", "0x10\n", "Invalid num input '0x10'", 6),
+    ("flag f = true\ntake f", "yes\n", "Invalid flag input 'yes'", 6),
+])
+def test_runtime_errors(body, stdin, message, column):
+    with pytest.raises(ExecutionError) as info:
+        execute("start\n" + body + "\nend", stdin)
+    assert info.value.stage == "runtime"
+    assert info.value.message == message
+    assert (info.value.line, info.value.col) == (3, column)
+
+
+def test_call_depth_limit():
+    source = "start\nfunc f(n) {\n    back f(n + 1)\n}\nshow f(0)\nend"
+    with pytest.raises(ExecutionError) as info:
+        execute(source)
+    assert info.value.message == f"Too many nested calls (limit {MAX_CALL_DEPTH})"
+    assert info.value.line == 3
+
+
+def test_nested_function_cannot_capture():
+    source = """start
+func f(x) {
+    func g() {
+        back x
+    }
+    back g()
+}
+show f(1)
+end"""
+    with pytest.raises(CodegenError) as info:
+        execute(source)
+    assert info.value.message == "Function 'g' cannot use 'x' of the enclosing function"
+
+
+def test_checks_execution_relies_on():
+    source = """start
+text s = "a"
+func f(n) {
+    back s
+}
+num a = f(s)
+loop i = 1 to 2 {
+    func g() {
+        break
+        back 1
+    }
+}
+end"""
+    assert [d.message for d in analyze(source)] == [
+        "Back value must be num",
+        "Function arguments must be num",
+        "break outside loop",
+    ]
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+@pytest.mark.parametrize("args", [
+    ["--diagnostics=json", "--run"], ["--emit=bytecode"]
+], ids=["run", "bytecode"])
+def test_matches_backend(program, args, capsys, monkeypatch):
+    args = args + [str(program)]
+    result = subprocess.run(
+        [BACKEND] + args, capture_output=True, text=True, input=STDIN
+    )
+    code, out, err = run_python(args, STDIN, capsys, monkeypatch)
+    assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+def test_runtime_error_matches_backend(tmp_path, capsys, monkeypatch):
+    program = tmp_path / "div.nova"
+    program.write_text("start\nshow 1\nnum z = 0\nshow 2 / z\nend\n")
+    args = ["--diagnostics=json", "--run", str(program)]
+    result = subprocess.run([BACKEND] + args, capture_output=True, text=True)
+    code, out, err = run_python(args, "", capsys, monkeypatch)
+    assert code == 1 and out == "1\n"
+    assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+
+
+def test_source_from_stdin_leaves_the_rest_for_take():
+    stdin = io.TextIOWrapper(io.BufferedReader(
+        io.BytesIO(b"start\nshow 1\nend\n\0Ada\n5\n"), buffer_size=4
+    ))
+    source, inp = read_stdin_source(stdin)
+    assert source == "start\nshow 1\nend\n"
+    assert inp.readline() == "Ada\n" and inp.readline() == "5\n"
+
+
+@pytest.mark.skipif(BACKEND is None, reason="C++ backend not built")
+@pytest.mark.parametrize("program", PROGRAMS, ids=lambda p: p.name)
+@pytest.mark.parametrize("lexer", ["classic", "compact"])
+def test_stdin_source_matches_file(program, lexer, capsys, monkeypatch):
+    args = ["--diagnostics=json", f"--lexer={lexer}", "--run"]
+    expected = subprocess.run([BACKEND] + args + [str(program)],
+                              capture_output=True, text=True, input=STDIN)
+    stdin = program.read_text() + "\0" + STDIN
+    result = subprocess.run([BACKEND] + args + ["-"],
+                            capture_output=True, text=True, input=stdin)
+    code, out, err = run_python(args + ["-"], stdin, capsys, monkeypatch)
+    assert (code, out, err) == (result.returncode, result.stdout, result.stderr)
+    assert (code, out, err) == (expected.returncode, expected.stdout,
+                                expected.stderr)
@@ -0,0 +1,136 @@
+"""
+Workspace symbol index: scopes, incremental updates and persistence
+"""
+
+import os
+import time
+
+import pytest
+
+pytest.importorskip("PyQt6.QtCore")
+
+import workspace_index  # noqa: E402
+from workspace_index import (  # noqa: E402
+    FileSymbols, WorkspaceIndex, WorkspaceIndexer
+)
+
+SHAPES = """start
+num x = 1
+func add(x, y) {
+    back x + y
+}
+loop i = 1 to 3 {
+    num x = i
+    show x
+}
+show add(x, 2)
+show "unterminated
+show x
+"""
+
+
+def positions(found):
+    return [(os.path.basename(loc.path or ""), loc.line, loc.col) for loc in found]
+
+
+def test_names_resolve_by_scope(tmp_path):
+    symbols = FileSymbols.from_text(SHAPES)
+    assert [s[:2] for s in symbols.symbols] == [
+        ["x", "var"], ["add", "func"], ["x", "param"], ["y", "param"],
+        ["i", "loopvar"], ["x", "var"],
+    ]
+    path = tmp_path / "shapes.nova"
+    path.write_text(SHAPES)
+    index = WorkspaceIndex(tmp_path)
+    index.scan()
+    # The parameter, the loop's own x and the global one are kept apart;
+    # the line the lexer rejects ends the file
+    assert positions(index.definition_at(path, 4, 10)) == [("shapes.nova", 3, 10)]
+    assert positions(index.references_at(path, 8, 10)) == [
+        ("shapes.nova", 7, 9), ("shapes.nova", 8, 10),
+    ]
+    assert positions(index.references_at(path, 2, 5)) == [
+        ("shapes.nova", 2, 5), ("shapes.nova", 10, 10),
+    ]
+    # Just past the name still counts, as after a double click
+    assert positions(index.definition_at(path, 10, 9)) == [("shapes.nova", 3, 6)]
+    assert index.definition_at(path, 1, 1) == []
+
+
+def test_string_closing_on_a_rejected_line():
+    # Cut before line 3, the string opened on line 2 no longer closes
+    symbols = FileSymbols.from_text('start\nnum a = 1\ntext s = "a\nb" @\nend\n')
+    assert [s[:2] for s in symbols.symbols] == [["a", "var"]]
+
+
+def test_updates_only_what_changed(tmp_path):
+    root = tmp_path / "ws"
+    (root / "lib").mkdir(parents=True)
+    (root / "lib" / "square.nova").write_text(
+        "start\nfunc square(n) {\n    back n * n\n}\nend\n"
+    )
+    main = root / "main.nova"
+    main.write_text("start\nshow square(4)\nend\n")
+    cache = tmp_path / "index.jsonl"
+    index = WorkspaceIndex(root, cache)
+    assert index.scan() == 2 and index.save()
+
+    # A call the file does not declare is found in the workspace
+    assert positions(index.definition_at(main, 2, 6)) == [("square.nova", 2, 6)]
+    assert index.files_using("square") == [str(main)]
+
+    warm = WorkspaceIndex(root, cache)
+    assert warm.load() and warm.scan() == 0
+    # Touched without a change: hashed, not parsed
+    os.utime(main, ns=(time.time_ns(), time.time_ns() + 10**9))
+    assert warm.scan() == 0
+    main.write_text("start\nnum total = square(4)\nshow total\nend\n")
+    os.utime(main, ns=(time.time_ns(), time.time_ns() + 2 * 10**9))
+    assert warm.scan() == 1
+    assert positions(warm.references("total")) == [("main.nova", 3, 6)]
+    (root / "lib" / "square.nova").unlink()
+    warm.scan()
+    assert warm.definitions("square") == [] and len(warm) == 1
+
+
+def test_watcher_picks_up_new_files(app, tmp_path):
+    root = tmp_path / "ws"
+    root.mkdir()
+    (root / "a.nova").write_text("start\nnum a = 1\nend\n")
+    indexer = WorkspaceIndexer(str(tmp_path / "cache"))
+    indexer.open(str(root))
+    assert indexer.wait(10)
+    # Folders found by the scan are watched from the event loop
+    app.processEvents()
+    assert indexer.index.definitions("b") == []
+
+    (root / "b.nova").write_text("start\nnum b = 2\nend\n")
+    deadline = time.monotonic() + 10
+    while not indexer.index.definitions("b") and time.monotonic() < deadline:
+        app.processEvents()
+        indexer.wait(0.05)
+    assert positions(indexer.index.definitions("b")) == [("b.nova", 2, 5)]
+    indexer.stop()
+    assert os.listdir(tmp_path / "cache")
+
+
+def test_worker_survives_a_failing_file(app, tmp_path, monkeypatch):
+    from_text = FileSymbols.from_text
+
+    def fragile(text):
+        if "boom" in text:
+            raise RecursionError("maximum recursion depth exceeded")
+        return from_text(text)
+
+    monkeypatch.setattr(workspace_index.FileSymbols, "from_text", fragile)
+    root = tmp_path / "ws"
+    root.mkdir()
+    (root / "a.nova").write_text("start\nnum boom = 1\nend\n")
+    indexer = WorkspaceIndexer(str(tmp_path / "cache"))
+    indexer.open(str(root))
+    assert indexer.wait(10)
+    (root / "b.nova").write_text("start\nnum b = 2\nend\n")
+    indexer.refresh_file(str(root / "b.nova"))
+    assert indexer.wait(10)
+    assert positions(indexer.index.definitions("b")) == [("b.nova", 2, 5)]
+    indexer.stop()